@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bulk Ingestion Benchmark
+
+Rows/sec for AgentMemory.store (one transaction per row) versus
+AgentMemory.store_many (one transaction per batch).
+
+Usage:
+    python3 benchmarks/bench_bulk_insert.py [--sizes 1000 10000 100000] [--loop-max 10000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.agent_integration import AgentMemory
+
+
+def make_items(count: int) -> list:
+    return [
+        {
+            "domain": "Project Knowledge",
+            "title": f"Imported memory {i}",
+            "content": f"Imported content {i}: sqlite caching and deployment notes",
+            "tags": [f"batch-{i % 20}", "import"],
+        }
+        for i in range(count)
+    ]
+
+
+def rows_per_sec(fn, count: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = AgentMemory(str(Path(tmp) / "bench.db"))
+        items = make_items(count)
+        start = time.perf_counter()
+        fn(memory, items)
+        elapsed = time.perf_counter() - start
+        memory.close()
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def loop_store(memory: AgentMemory, items: list) -> None:
+    for item in items:
+        memory.store(**item)
+
+
+def bulk_store(memory: AgentMemory, items: list) -> None:
+    memory.store_many(items)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000], help="Batch sizes")
+    parser.add_argument("--loop-max", type=int, default=10_000,
+                        help="Skip the per-row baseline above this size (default: 10000)")
+    args = parser.parse_args()
+
+    print("=== Bulk ingestion benchmark ===")
+    print(f"{'batch':>8}{'store() rows/s':>18}{'store_many rows/s':>20}{'speedup':>10}")
+    for size in args.sizes:
+        bulk = rows_per_sec(bulk_store, size)
+        if size <= args.loop_max:
+            loop = rows_per_sec(loop_store, size)
+            print(f"{size:>8}{loop:>18.0f}{bulk:>20.0f}{bulk / loop:>9.1f}x")
+        else:
+            print(f"{size:>8}{'-':>18}{bulk:>20.0f}{'-':>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
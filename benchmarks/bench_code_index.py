@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Code Index Benchmark
+
+Query latency of ripgrep_search with the trigram index against plain rg
+and the plain Python fallback, on a synthetic committed git repository
+(default 100k small files). Also reports the first build, a no-op
+rebuild (stat only), and the index size. Queries range from a literal
+in a handful of files to one the index cannot narrow.
+
+Usage:
+    python3 benchmarks/bench_code_index.py [--files 100000] [--repeat 3] [--path DIR]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.code_index import CodeIndex
+from mcp.engineer_tools import ripgrep_search
+
+WORDS = "alpha beta gamma delta config build cache worker index query token value".split()
+QUERIES = [
+    ("rare literal", "needle_4200"),
+    ("regex, rare", r"needle_4[0-9]00\b"),
+    ("alternation", "needle_100|needle_9900"),
+    ("common words", "config_cache"),
+    ("not narrowed", r"\w+_x"),
+]
+
+
+def make_repo(root: Path, files: int, seed: int = 7) -> None:
+    """Python-like files in nested packages, committed; 1 in 100 has a needle_N line"""
+    rng = random.Random(seed)
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    (root / ".gitignore").write_text("*.pyc\nbuild/\n")
+    for i in range(files):
+        directory = root / f"pkg{i % 50:02d}" / f"mod{i % 1000:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"def {rng.choice(WORDS)}_{rng.choice(WORDS)}_{j}(x):\n    return x + {j}\n"
+                 for j in range(rng.randint(5, 30))]
+        if i % 100 == 0:
+            lines.insert(len(lines) // 2, f"NEEDLE = 'needle_{i}'\n")
+        (directory / f"file{i:06d}.py").write_text("".join(lines))
+    env = dict(os.environ, GIT_AUTHOR_NAME="b", GIT_AUTHOR_EMAIL="b@b", GIT_COMMITTER_NAME="b",
+               GIT_COMMITTER_EMAIL="b@b")
+    subprocess.run(["git", "-C", str(root), "add", "-A"], check=True, env=env)
+    subprocess.run(["git", "-C", str(root), "commit", "-qm", "bench"], check=True, env=env)
+
+
+def best_of(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def search(query: str, root: str, index, rg: bool) -> dict:
+    kwargs = dict(context_lines=0, max_results=10**6, max_bytes=10**9, timeout_sec=3600, index=index)
+    if rg:
+        return ripgrep_search(query, root, **kwargs)
+    with mock.patch("mcp.engineer_tools.shutil.which", return_value=None):
+        return ripgrep_search(query, root, **kwargs)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100_000, help="Files in the synthetic repo (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is kept (default: 3)")
+    parser.add_argument("--path", help="Index and search this checkout instead of a synthetic repo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        root = args.path
+        if root is None:
+            root = tmp
+            start = time.perf_counter()
+            make_repo(Path(tmp), args.files)
+            print(f"Generated and committed {args.files} files in {time.perf_counter() - start:.1f}s")
+        index = CodeIndex(root, data)
+        build = index.build()
+        print(f"First build: {build['files']} files in {build['elapsed_ms'] / 1000:.1f}s")
+        rebuild = index.build()
+        status = index.status()
+        print(f"No-op rebuild: {rebuild['elapsed_ms']:.0f} ms; index {status['size_bytes'] / 2**20:.1f} MiB, "
+              f"{status['postings']} postings")
+
+        engines = [("rg", True)] if shutil.which("rg") else []
+        if not engines:
+            print("rg not installed: comparing against the Python fallback only")
+        engines.append(("fallback", False))
+        # Warm the page cache, the worker pool and the mapped segments
+        for _, rg in engines:
+            search("warm_up_query", root, None, rg)
+            search("warm_up_query", root, index, rg)
+
+        print("\n=== Code index benchmark ===")
+        print(f"{'query':<16}{'engine':<10}{'matches':>9}{'candidates':>12}{'plain ms':>10}{'indexed ms':>12}{'speedup':>9}")
+        for label, query in QUERIES:
+            for name, rg in engines:
+                plain_ms, plain = best_of(lambda query=query, rg=rg: search(query, root, None, rg), args.repeat)
+                indexed_ms, indexed = best_of(lambda query=query, rg=rg: search(query, root, index, rg), args.repeat)
+                assert indexed["match_count"] == plain["match_count"], (query, name)
+                candidates = indexed.get("index", {}).get("candidates", "-")
+                print(f"{label:<16}{name:<10}{plain['match_count']:>9}{candidates:>12}{plain_ms:>10.1f}"
+                      f"{indexed_ms:>12.1f}{plain_ms / indexed_ms:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Daemon Attach Benchmark
+
+Measures time from process start to the initialize response for a
+cold mcp/server.py spawn versus the stdio shim attaching to an already
+running daemon (MCP_TRANSPORT=daemon).
+
+Usage:
+    python3 benchmarks/bench_daemon_attach.py [--runs 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+SHIM_PATH = REPO_ROOT / "mcp" / "shim.py"
+
+INITIALIZE = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}) + "\n"
+
+
+def time_initialize(script: Path, env: dict) -> float:
+    """Seconds from spawn to the initialize response"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(script)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=env,
+        cwd=str(REPO_ROOT),
+    )
+    proc.stdin.write(INITIALIZE)
+    proc.stdin.flush()
+    line = proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.stdin.close()
+    proc.wait(timeout=30)
+    proc.stdout.close()
+    if '"result"' not in line:
+        raise RuntimeError(f"{script.name} did not answer initialize: {line!r}")
+    return elapsed
+
+
+def wait_for_socket(path: Path, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not path.exists():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Daemon socket {path} did not appear")
+        time.sleep(0.02)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Attaches per mode (default: 20)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = Path(tmp) / "mcp.sock"
+        env = {
+            **os.environ,
+            "MCP_HOME": tmp,
+            "MCP_SOCKET_PATH": str(socket_path),
+            "MCP_DAEMON_IDLE_SEC": "0",
+            "PYTHONPATH": str(REPO_ROOT),
+        }
+
+        cold = [time_initialize(SERVER_PATH, env) for _ in range(args.runs)]
+
+        daemon = subprocess.Popen(
+            [sys.executable, str(SERVER_PATH)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env={**env, "MCP_TRANSPORT": "daemon"},
+            cwd=str(REPO_ROOT),
+        )
+        try:
+            wait_for_socket(socket_path)
+            attach = [time_initialize(SHIM_PATH, env) for _ in range(args.runs)]
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=30)
+
+    print(f"=== Time to initialize response ({args.runs} runs) ===")
+    print(f"{'mode':<14}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for label, samples in (("cold spawn", cold), ("shim attach", attach)):
+        ms = [s * 1000 for s in samples]
+        print(f"{label:<14}{statistics.median(ms):>12.1f}{min(ms):>10.1f}{max(ms):>10.1f}")
+    print(f"Speedup: {statistics.median(cold) / statistics.median(attach):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
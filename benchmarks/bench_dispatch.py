@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tool Dispatch Benchmark
+
+Per-call overhead of MCPServer.handle_call_tool (registry lookup, write
+authorization, sandbox binding, middleware) on top of calling the tool
+handler directly. A linear name scan stands in for the old if/elif chain.
+
+Usage:
+    python3 benchmarks/bench_dispatch.py [--iterations 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def us_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000, help="Calls per measurement (default: 100000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MCP_HOME"] = tmp
+        from mcp.server import MCPServer
+        from mcp.tool_registry import ToolCall
+
+        server = MCPServer()
+        registry = server.tool_registry
+        names = [spec.name for spec in registry]
+
+        print(f"=== Tool dispatch benchmark ({len(names)} tools, {args.iterations} calls) ===")
+        print(f"{'tool':<20}{'linear scan us':>16}{'dict lookup us':>16}{'handler us':>12}{'dispatch us':>13}{'overhead us':>13}")
+        # Cheap read-only handlers, early and late in registration order
+        for name in ("get_stats", "ext_get_context", "verdent_recent"):
+            spec = registry.get(name)
+            params = {"name": name, "arguments": {}}
+
+            def linear(name=name):
+                for candidate in registry:
+                    if candidate.name == name:
+                        return candidate
+
+            scan = us_per_call(linear, args.iterations)
+            lookup = us_per_call(lambda name=name: registry.get(name), args.iterations)
+            handler = us_per_call(lambda spec=spec, name=name: spec.handler(ToolCall(name, {})), args.iterations)
+            dispatch = us_per_call(lambda params=params: server.handle_call_tool(params), args.iterations)
+            print(f"{name:<20}{scan:>16.3f}{lookup:>16.3f}{handler:>12.2f}{dispatch:>13.2f}{dispatch - handler:>13.2f}")
+        server.memory.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
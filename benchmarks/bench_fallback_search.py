@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Fallback Search Benchmark
+
+Full-tree search time of ripgrep_search's Python fallback (serial and on
+the process pool) against rg and against the old fallback (rglob, read
+each file as text, lowercase every line) on a synthetic tree of many
+small files. The query is rare so the numbers measure scanning, not
+result handling; the page cache is warmed before measuring.
+
+Usage:
+    python3 benchmarks/bench_fallback_search.py [--files 50000] [--workers 4] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp import fallback_search
+
+QUERY = "needle_[0-9]+"
+WORDS = "alpha beta gamma delta config build cache worker index query token value".split()
+
+
+def make_tree(root: Path, files: int, seed: int = 5) -> int:
+    """Python-like files in nested packages; about 1 in 100 contains the query; returns matches"""
+    rng = random.Random(seed)
+    (root / ".gitignore").write_text("*.pyc\nbuild/\n")
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    matches = 0
+    for i in range(files):
+        directory = root / f"pkg{i % 40:02d}" / f"mod{i % 400:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"def {rng.choice(WORDS)}_{j}(x):\n    return x + {j}  # {rng.choice(WORDS)}\n"
+                 for j in range(rng.randint(5, 40))]
+        if i % 100 == 0:
+            lines.insert(len(lines) // 2, f"NEEDLE = 'needle_{i}'\n")
+            matches += 1
+        (directory / f"file{i:05d}.py").write_text("".join(lines))
+    return matches
+
+
+def old_fallback(root: str, query: str) -> int:
+    """The pre-engine fallback: case-insensitive substring over rglob"""
+    count = 0
+    for file_path in Path(root).rglob("*"):
+        if file_path.is_file():
+            try:
+                lines = file_path.read_text(encoding="utf-8", errors="ignore").split("\n")
+            except Exception:
+                continue
+            count += sum(1 for line in lines if query.lower() in line.lower())
+    return count
+
+
+def engine(root: str, workers: int) -> int:
+    regex = fallback_search.compile_query(QUERY)
+    return sum(len(matches) for _, matches in fallback_search.search(regex, root, "*", 0, 10**9, workers))
+
+
+def rg(root: str) -> int:
+    completed = subprocess.run(["rg", "-c", QUERY], cwd=root, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True)
+    return sum(int(line.rsplit(":", 1)[1]) for line in completed.stdout.splitlines())
+
+
+def best_of(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000, help="Files in the synthetic tree (default: 50000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Pool size for the parallel run (default: CPU count)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is kept (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        expected = make_tree(Path(tmp), args.files)
+        print(f"Generated {args.files} files in {time.perf_counter() - start:.1f}s ({expected} matches)")
+        # Warm the page cache and start the pool outside the measurements
+        engine(tmp, 1)
+        engine(tmp, max(2, args.workers))
+
+        runs = [
+            ("old fallback (substring)", lambda: old_fallback(tmp, "needle_")),
+            ("engine, 1 process", lambda: engine(tmp, 1)),
+            (f"engine, {max(2, args.workers)} workers", lambda: engine(tmp, max(2, args.workers))),
+        ]
+        if shutil.which("rg"):
+            runs.append(("rg", lambda: rg(tmp)))
+        else:
+            print("rg not installed: skipping the rg baseline")
+
+        print("\n=== Fallback search benchmark ===")
+        print(f"{'search':<28}{'matches':>9}{'ms':>10}")
+        for label, fn in runs:
+            ms, matches = best_of(fn, args.repeat)
+            print(f"{label:<28}{matches:>9}{ms:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
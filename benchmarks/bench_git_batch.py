@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Git Batch Benchmark
+
+Reads N blobs (default 1,000) from a synthetic committed git repository:
+one `git cat-file blob` subprocess per read, against the persistent
+`git cat-file --batch` pool (including its first process start), and
+the git_read_file_at_ref tool on top of the pool (resolves the commit,
+then reads "<commit>:<path>"). Also lists the whole tree with
+git_ls_tree against `git ls-tree -r`.
+
+Usage:
+    python3 benchmarks/bench_git_batch.py [--blobs 1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.engineer_tools import git_ls_tree, git_read_file_at_ref
+from mcp.git_batch import GitBatchPool
+
+
+def make_repo(root: Path, blobs: int) -> list:
+    """Commit `blobs` small files; returns their paths"""
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    paths = []
+    for i in range(blobs):
+        rel = f"pkg{i % 20:02d}/file{i:05d}.py"
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(f"def f_{i}(x):\n    return x * {i}\n" * 20)
+        paths.append(rel)
+    env = dict(os.environ, GIT_AUTHOR_NAME="b", GIT_AUTHOR_EMAIL="b@b", GIT_COMMITTER_NAME="b",
+               GIT_COMMITTER_EMAIL="b@b")
+    subprocess.run(["git", "-C", str(root), "add", "-A"], check=True, env=env)
+    subprocess.run(["git", "-C", str(root), "commit", "-qm", "bench"], check=True, env=env)
+    return paths
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blobs", type=int, default=1000, help="Blobs to read (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is kept (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        top = os.path.realpath(tmp)
+        paths = make_repo(Path(top), args.blobs)
+        names = [f"HEAD:{rel}" for rel in paths]
+        expected = sum((Path(top) / rel).stat().st_size for rel in paths)
+
+        def per_subprocess():
+            total = 0
+            for name in names:
+                total += len(subprocess.run(["git", "cat-file", "blob", name], cwd=top,
+                                            capture_output=True, check=True).stdout)
+            assert total == expected
+
+        def pooled():
+            # A fresh pool each run, so the process start is included
+            pool = GitBatchPool(workers=1, idle_sec=0)
+            try:
+                assert sum(len(pool.read(top, name).data) for name in names) == expected
+            finally:
+                pool.close()
+
+        pool = GitBatchPool(workers=1, idle_sec=0)
+
+        def tool():
+            for rel in paths:
+                assert "content" in git_read_file_at_ref(top, rel, pool=pool)
+
+        print(f"\n=== Git batch benchmark ({args.blobs} blobs) ===")
+        print(f"{'method':<34}{'total ms':>10}{'per read us':>13}{'speedup':>9}")
+        baseline = best_of(per_subprocess, args.repeat)
+        rows = [
+            ("git cat-file per read", baseline),
+            ("cat-file --batch pool", best_of(pooled, args.repeat)),
+            ("git_read_file_at_ref (pool)", best_of(tool, args.repeat)),
+        ]
+        for label, total_ms in rows:
+            print(f"{label:<34}{total_ms:>10.1f}{total_ms * 1000 / args.blobs:>13.1f}{baseline / total_ms:>8.1f}x")
+
+        ls_tree_ms = best_of(lambda: subprocess.run(["git", "ls-tree", "-r", "HEAD"], cwd=top,
+                                                    capture_output=True, check=True), args.repeat)
+        listing_ms = best_of(lambda: git_ls_tree(top, recursive=True, pool=pool), args.repeat)
+        print(f"\ngit ls-tree -r: {ls_tree_ms:.1f} ms; git_ls_tree recursive (pool): {listing_ms:.1f} ms")
+        pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Git Cache Benchmark
+
+Latency of git_status, git_diff and git_show without the result cache,
+on a cache hit, and right after a one-file edit (key computed, entry
+invalidated, git re-run), on a synthetic committed git repository with
+50 modified files.
+
+Usage:
+    python3 benchmarks/bench_git_cache.py [--files 2000] [--repeat 5] [--path DIR]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.engineer_tools import git_diff, git_show, git_status
+from mcp.git_cache import GitCache
+
+
+def make_repo(root: Path, files: int) -> Path:
+    """Committed files in nested packages, a small commit on top, then edits; returns a file to touch"""
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    for i in range(files):
+        directory = root / f"pkg{i % 50:02d}" / f"mod{i % 500:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i:06d}.py").write_text(f"def f_{i}(x):\n    return x + {i}\n" * 10)
+    env = dict(os.environ, GIT_AUTHOR_NAME="b", GIT_AUTHOR_EMAIL="b@b", GIT_COMMITTER_NAME="b",
+               GIT_COMMITTER_EMAIL="b@b")
+    subprocess.run(["git", "-C", str(root), "add", "-A"], check=True, env=env)
+    subprocess.run(["git", "-C", str(root), "commit", "-qm", "bench"], check=True, env=env)
+    (root / "CHANGES").write_text("small commit\n")
+    subprocess.run(["git", "-C", str(root), "add", "CHANGES"], check=True, env=env)
+    subprocess.run(["git", "-C", str(root), "commit", "-qm", "changes"], check=True, env=env)
+    for i in range(0, min(files, 1000), 20):
+        path = root / f"pkg{i % 50:02d}" / f"mod{i % 500:03d}" / f"file{i:06d}.py"
+        path.write_text(path.read_text().replace("return x", "return -x"))
+    return root / "pkg00" / "mod000" / "file000000.py"
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2_000, help="Files in the synthetic repo (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, best is kept (default: 5)")
+    parser.add_argument("--path", help="Benchmark this checkout instead of a synthetic repo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.path:
+            cwd = args.path
+            touched = None
+        else:
+            start = time.perf_counter()
+            touched = make_repo(Path(tmp), args.files)
+            cwd = tmp
+            print(f"Generated and committed {args.files} files in {time.perf_counter() - start:.1f}s")
+
+        calls = [
+            ("git_status", lambda cache: git_status(cwd, cache=cache)),
+            ("git_diff", lambda cache: git_diff(cwd, cache=cache)),
+            ("git_show", lambda cache: git_show(cwd, "HEAD", cache=cache)),
+        ]
+        cache = GitCache()
+
+        print("\n=== Git cache benchmark ===")
+        print(f"{'tool':<12}{'uncached ms':>13}{'hit ms':>10}{'after edit ms':>15}{'speedup':>10}")
+        for name, fn in calls:
+            fn(None)
+            uncached_ms = best_of(lambda fn=fn: fn(None), args.repeat)
+            fn(cache)
+            if not fn(cache).get("cached"):
+                # Too many tracked files to fingerprint, a rev expression, truncated output...
+                print(f"{name:<12}{uncached_ms:>13.2f}{'not cached':>25}")
+                continue
+            hit_ms = best_of(lambda fn=fn: fn(cache), args.repeat)
+
+            edit_ms = float("nan")
+            if touched is not None:
+                def edit_then_call(fn=fn, name=name):
+                    touched.write_text(touched.read_text() + "#\n")
+                    result = fn(cache)
+                    assert name == "git_show" or not result.get("cached")
+                edit_ms = best_of(edit_then_call, args.repeat)
+            print(f"{name:<12}{uncached_ms:>13.2f}{hit_ms:>10.2f}{edit_ms:>15.2f}{uncached_ms / hit_ms:>9.1f}x")
+
+        stats = cache.stats()
+        print(f"\nCache: {stats['entries']} entries, {stats['bytes'] / 1024:.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+MemoryStore Benchmark
+
+Compares ops/sec of the public MemoryStore methods using pooled,
+long-lived connections against the previous connect-per-call behaviour.
+
+Usage:
+    python3 benchmarks/bench_memory_store.py [--rows 1000] [--iterations 500]
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore
+from mcp.models import MemoryQuery
+
+
+class ConnectPerCallStore(MemoryStore):
+    """MemoryStore that opens and closes a connection for every call (baseline)"""
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.commit()
+            conn.close()
+
+    @contextmanager
+    def _read_connection(self):
+        with self._get_connection() as conn:
+            yield conn
+
+
+def _seed(store: MemoryStore, rows: int) -> list:
+    ids = []
+    for i in range(rows):
+        ids.append(store.set_memory(
+            domain=f"domain-{i % 8}",
+            title=f"Memory {i}",
+            content=f"Benchmark content {i} about caching, sqlite and performance",
+            workspace=f"ws-{i % 4}",
+            tags=[f"tag-{i % 16}", "bench"],
+        ))
+    return ids
+
+
+def _ops_per_sec(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float("inf")
+
+
+def run(store_cls, rows: int, iterations: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = store_cls(str(Path(tmp) / "bench.db"))
+        ids = _seed(store, rows)
+
+        results = {
+            "set_memory": _ops_per_sec(
+                lambda i: store.set_memory("bench", f"t{i}", f"content {i}", tags=["x"]),
+                iterations,
+            ),
+            "get_memory": _ops_per_sec(lambda i: store.get_memory(ids[i % len(ids)]), iterations),
+            "list_memories": _ops_per_sec(
+                lambda i: store.list_memories(MemoryQuery(workspace=f"ws-{i % 4}", limit=20)),
+                iterations,
+            ),
+            "search": _ops_per_sec(lambda i: store.search("caching", limit=10), iterations),
+            "get_stats": _ops_per_sec(lambda i: store.get_stats(), iterations),
+        }
+        if hasattr(store, "close"):
+            store.close()
+        return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows to seed (default: 1000)")
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per method (default: 500)")
+    args = parser.parse_args()
+
+    print(f"=== MemoryStore benchmark (rows={args.rows}, iterations={args.iterations}) ===")
+    before = run(ConnectPerCallStore, args.rows, args.iterations)
+    after = run(MemoryStore, args.rows, args.iterations)
+
+    print(f"{'method':<16}{'before ops/s':>16}{'after ops/s':>16}{'speedup':>10}")
+    for name in before:
+        speedup = after[name] / before[name] if before[name] else 0.0
+        print(f"{name:<16}{before[name]:>16.1f}{after[name]:>16.1f}{speedup:>9.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tool Metrics Overhead Benchmark
+
+Per-call cost of the metrics middleware on a no-op tool (on top of the
+security middleware MCPServer always installs), of record_io in the
+transports, and of the SQLite trace callback that counts statements.
+
+Usage:
+    python3 benchmarks/bench_metrics.py [--iterations 50000] [--repeat 5]
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.metrics import ToolMetrics, count_db_statement
+from mcp.tool_registry import ToolCall, ToolRegistry, ToolSpec
+
+
+def noop(call: ToolCall) -> dict:
+    return {"content": []}
+
+
+def guard(spec, call, call_next):
+    return call_next()
+
+
+def best_of(fn, iterations: int, repeat: int) -> float:
+    """Best per-iteration time in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(iterations)
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e6
+
+
+def invoke_loop(with_metrics: bool):
+    registry = ToolRegistry()
+    registry.register(ToolSpec("noop", "Noop", {"type": "object", "properties": {}}, noop))
+    if with_metrics:
+        registry.add_middleware(ToolMetrics().middleware)
+    registry.add_middleware(guard)
+    spec, call = registry.get("noop"), ToolCall("noop", {})
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            registry.invoke(spec, call)
+    return run
+
+
+def record_io_loop():
+    metrics = ToolMetrics()
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "noop", "arguments": {}}}
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            metrics.record_io(request, 120, 480)
+    return run
+
+
+def sqlite_loop(traced: bool):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.execute("INSERT INTO t (v) VALUES ('x')")
+    if traced:
+        conn.set_trace_callback(count_db_statement)
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            conn.execute("SELECT v FROM t WHERE id = 1").fetchone()
+    return run
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000, help="Calls per measurement (default: 50000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements, best is kept (default: 5)")
+    args = parser.parse_args()
+
+    plain = best_of(invoke_loop(False), args.iterations, args.repeat)
+    metered = best_of(invoke_loop(True), args.iterations, args.repeat)
+    record_io = best_of(record_io_loop(), args.iterations, args.repeat)
+    untraced = best_of(sqlite_loop(False), args.iterations, args.repeat)
+    traced = best_of(sqlite_loop(True), args.iterations, args.repeat)
+
+    print("=== Tool metrics overhead benchmark ===")
+    print(f"{'measurement':<34}{'us/call':>10}")
+    print(f"{'tools/call without metrics':<34}{plain:>10.2f}")
+    print(f"{'tools/call with metrics':<34}{metered:>10.2f}")
+    print(f"{'  middleware overhead':<34}{metered - plain:>10.2f}")
+    print(f"{'record_io':<34}{record_io:>10.2f}")
+    print(f"{'SQLite statement untraced':<34}{untraced:>10.2f}")
+    print(f"{'SQLite statement traced':<34}{traced:>10.2f}")
+    print(f"{'  trace callback overhead':<34}{traced - untraced:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Page Query-Count Regression Benchmark
+
+Counts SQL statements and latency per list_memories/search page. The
+statement count must stay constant as the page size grows; the script
+exits non-zero if it does not (previously tags cost one query per row).
+
+Usage:
+    python3 benchmarks/bench_page_queries.py [--rows 2000] [--iterations 50]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore
+from mcp.models import MemoryQuery
+from mcp.sqlite_pool import SQLiteSettings
+
+PAGE_SIZES = (1, 10, 100, 500)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Rows to seed (default: 2000)")
+    parser.add_argument("--iterations", type=int, default=50, help="Calls per page size (default: 50)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(str(Path(tmp) / "bench.db"), settings=SQLiteSettings(read_pool_size=1))
+        for i in range(args.rows):
+            store.set_memory("bench", f"item {i}", "page benchmark content", tags=[f"t{i % 50}", "bench"])
+
+        statements = []
+
+        def _trace(sql):
+            if not sql.startswith("--"):
+                statements.append(sql)
+
+        with store._read_connection() as conn:
+            conn.set_trace_callback(_trace)
+        store.search("benchmark", limit=1)
+
+        operations = {
+            "list_memories": lambda size: store.list_memories(MemoryQuery(limit=size)),
+            "search": lambda size: store.search("benchmark", limit=size),
+        }
+
+        print(f"=== Page query benchmark (rows={args.rows}) ===")
+        print(f"{'operation':<16}{'page':>6}{'queries':>10}{'ms/page':>10}")
+        failed = False
+        for name, op in operations.items():
+            counts = set()
+            for size in PAGE_SIZES:
+                statements.clear()
+                op(size)
+                counts.add(len(statements))
+                queries = len(statements)
+
+                start = time.perf_counter()
+                for _ in range(args.iterations):
+                    op(size)
+                ms = (time.perf_counter() - start) / args.iterations * 1000
+                print(f"{name:<16}{size:>6}{queries:>10}{ms:>10.2f}")
+            if len(counts) != 1:
+                print(f"❌ {name}: query count varies with page size {sorted(counts)}")
+                failed = True
+        store.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
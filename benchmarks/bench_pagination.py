@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Pagination Benchmark
+
+Compares OFFSET pagination (with a COUNT per page, the old behaviour)
+against keyset cursors without the count, at increasing page depth.
+
+Usage:
+    python3 benchmarks/bench_pagination.py [--rows 100000] [--page-size 50]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore, decode_cursor
+from mcp.models import MemoryQuery
+
+
+def seed(store: MemoryStore, rows: int) -> None:
+    base = datetime(2026, 1, 1)
+    batch = []
+    for i in range(rows):
+        ts = (base + timedelta(seconds=i)).isoformat()
+        batch.append((str(uuid.uuid4()), "bench", f"item {i}", "pagination", ts, ts, "ws", "{}"))
+    with store._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO memories (id, domain, title, content, created_at, updated_at, workspace, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows to seed (default: 100000)")
+    parser.add_argument("--page-size", type=int, default=50, help="Rows per page (default: 50)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(str(Path(tmp) / "bench.db"))
+        seed(store, args.rows)
+
+        # Walk every page once with cursors, remembering where each depth starts
+        cursors = {0: None}
+        after, page_no = None, 0
+        walk_start = time.perf_counter()
+        while True:
+            page = store.list_memories_page(
+                MemoryQuery(workspace="ws", limit=args.page_size, after=after, include_total=False)
+            )
+            page_no += 1
+            if page.next_cursor is None:
+                break
+            after = decode_cursor(page.next_cursor)
+            cursors[page_no] = after
+        walk = time.perf_counter() - walk_start
+
+        print(f"=== Pagination benchmark (rows={args.rows}, page size={args.page_size}) ===")
+        print(f"Full keyset walk: {page_no} pages in {walk:.2f}s")
+        print(f"{'page':>8}{'offset+count ms':>18}{'keyset ms':>12}{'speedup':>10}")
+        depths = [d for d in (1, 10, 100, 1000, page_no - 1) if d in cursors]
+        for depth in sorted(set(depths)):
+            offset_query = MemoryQuery(workspace="ws", limit=args.page_size, offset=depth * args.page_size)
+            keyset_query = MemoryQuery(
+                workspace="ws", limit=args.page_size, after=cursors[depth], include_total=False
+            )
+            timings = []
+            for query in (offset_query, keyset_query):
+                start = time.perf_counter()
+                for _ in range(20):
+                    store.list_memories_page(query)
+                timings.append((time.perf_counter() - start) / 20 * 1000)
+            print(f"{depth:>8}{timings[0]:>18.2f}{timings[1]:>12.2f}{timings[0] / timings[1]:>9.1f}x")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
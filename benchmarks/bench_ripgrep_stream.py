@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Streaming ripgrep_search Benchmark
+
+Compares the old buffered search (run rg to completion, keep all of its
+output) with the streaming search (parse rg --json as it arrives, stop
+at max_results) on a broad query. Reports time to first result, total
+time and peak RSS of the searching process and of rg. Each mode runs in
+a fresh child process so peak RSS is not shared between modes.
+
+Without --path a synthetic tree is generated; point --path at a large
+monorepo checkout for realistic numbers. Without rg only the Python
+fallback is measured.
+
+Usage:
+    python3 benchmarks/bench_ripgrep_stream.py [--path DIR] [--query needle] [--files 2000] [--lines 2000]
+"""
+
+import argparse
+import json
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+MODES = ["buffered", "streaming", "streaming-unbounded"]
+
+
+def make_tree(root: Path, files: int, lines: int) -> None:
+    for i in range(files):
+        directory = root / f"pkg{i % 50:02d}"
+        directory.mkdir(exist_ok=True)
+        body = "".join(
+            f"    value_{j} = compute(needle_{j % 7}, other)\n" if j % 5 == 0 else f"    value_{j} = {j}\n"
+            for j in range(lines)
+        )
+        (directory / f"module{i:05d}.py").write_text(body)
+
+
+def run_child(mode: str, path: str, query: str, glob: str, max_results: int) -> dict:
+    """One measurement in this process; returns the JSON line the parent reads"""
+    from mcp.engineer_tools import ripgrep_search
+
+    start = time.perf_counter()
+    first = None
+    if mode == "buffered":
+        # What ripgrep_search did before: wait for rg, keep all of stdout
+        completed = subprocess.run(
+            ["rg", query, "-g", glob, "-C", "2", "--no-heading", "--line-number"],
+            cwd=path, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+        )
+        # Match lines are "file:N:text", context lines "file-N-text"
+        matches = len(re.findall(r"^[^\n:]*:\d+:", completed.stdout, re.MULTILINE))
+        first = time.perf_counter()
+    else:
+        def progress(done, total=None, message=None, partial=None):
+            nonlocal first
+            if partial and first is None:
+                first = time.perf_counter()
+
+        limit = max_results if mode == "streaming" else 10**9
+        result = ripgrep_search(query, path, glob, 2, progress=progress, max_results=limit,
+                                max_bytes=10**12, timeout_sec=3600, partial_results=True)
+        matches = result["match_count"]
+        if first is None:
+            first = time.perf_counter()
+    total = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "first_ms": (first - start) * 1000,
+        "total_ms": total * 1000,
+        "matches": matches,
+        # ru_maxrss is in KiB on Linux
+        "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "rg_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def measure(mode: str, args: argparse.Namespace, path: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--path", path, "--query", args.query,
+         "--glob", args.glob, "--max-results", str(args.max_results)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", help="Directory to search (default: generated tree)")
+    parser.add_argument("--query", default="needle", help="Search pattern (default: needle)")
+    parser.add_argument("--glob", default="*", help="File pattern (default: *)")
+    parser.add_argument("--files", type=int, default=2000, help="Generated files (default: 2000)")
+    parser.add_argument("--lines", type=int, default=2000, help="Lines per generated file (default: 2000)")
+    parser.add_argument("--max-results", type=int, default=200, help="max_results for streaming (default: 200)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.path, args.query, args.glob, args.max_results)))
+        return 0
+
+    modes = MODES if shutil.which("rg") else MODES[1:]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = tmp
+            make_tree(Path(tmp), args.files, args.lines)
+            print(f"Generated {args.files} files x {args.lines} lines in {tmp}")
+        if "buffered" not in modes:
+            print("rg not installed: measuring the Python fallback only")
+        results = [measure(mode, args, path) for mode in modes]
+
+    print("\n=== Streaming ripgrep_search benchmark ===")
+    print(f"{'mode':<22}{'matches':>10}{'first ms':>11}{'total ms':>11}{'RSS MiB':>10}{'rg MiB':>9}")
+    for r in results:
+        print(f"{r['mode']:<22}{r['matches']:>10}{r['first_ms']:>11.1f}{r['total_ms']:>11.1f}"
+              f"{r['rss_kb'] / 1024:>10.1f}{r['rg_rss_kb'] / 1024:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+MemoryStore Search Benchmark
+
+Compares FTS5/BM25 search against the LIKE full-table-scan fallback on a
+large synthetic memories table.
+
+Usage:
+    python3 benchmarks/bench_search.py [--rows 100000] [--iterations 50]
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore
+
+# Zipf-distributed synthetic vocabulary: word rank r appears with weight 1/r
+VOCAB_SIZE = 20_000
+WORDS = [f"w{rank}x" for rank in range(1, VOCAB_SIZE + 1)]
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / rank for rank in range(1, VOCAB_SIZE + 1)))
+
+# Common, mid-frequency and rare terms, a phrase and a prefix query
+QUERIES = ["w3x", "w200x", "w9000x", '"w1x w2x"', "w1234*", "w50x w700x"]
+
+
+def seed(store: MemoryStore, rows: int) -> None:
+    rng = random.Random(42)
+    now = datetime.utcnow().isoformat()
+    batch = []
+    with store._get_connection() as conn:
+        for i in range(rows):
+            title = " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=4))
+            content = " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=60))
+            batch.append((f"m{i}", "bench", title, content, now, now, "{}"))
+            if len(batch) >= 5000:
+                conn.executemany(
+                    "INSERT INTO memories (id, domain, title, content, created_at, updated_at, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                batch.clear()
+        if batch:
+            conn.executemany(
+                "INSERT INTO memories (id, domain, title, content, created_at, updated_at, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+
+
+def time_queries(store: MemoryStore, iterations: int) -> dict:
+    results = {}
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            store.search(query, limit=10)
+        results[query] = (time.perf_counter() - start) / iterations * 1000
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows to seed (default: 100000)")
+    parser.add_argument("--iterations", type=int, default=50, help="Runs per query (default: 50)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(str(Path(tmp) / "bench.db"))
+        if not store.fts_enabled:
+            print("SQLite build lacks FTS5; nothing to compare")
+            return 1
+
+        start = time.perf_counter()
+        seed(store, args.rows)
+        print(f"=== Search benchmark (rows={args.rows}, seeded in {time.perf_counter() - start:.1f}s) ===")
+
+        fts = time_queries(store, args.iterations)
+        store.fts_enabled = False
+        like = time_queries(store, args.iterations)
+        store.close()
+
+    print(f"{'query':<24}{'LIKE ms':>12}{'FTS5 ms':>12}{'speedup':>10}")
+    for query in QUERIES:
+        speedup = like[query] / fts[query] if fts[query] else 0.0
+        print(f"{query:<24}{like[query]:>12.2f}{fts[query]:>12.2f}{speedup:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
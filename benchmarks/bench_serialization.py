@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Response Serialization Benchmark
+
+Bytes written to stdout and encode time per response for a ~1 MB git
+diff and a 500-result memory search, comparing the previous path
+(indent=2 text re-encoded by json.dumps) with the compact and
+structured response modes on each available backend.
+
+Usage:
+    python3 benchmarks/bench_serialization.py [--iterations 20] [--diff-kb 1024] [--results 500]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.serialization import get_serializer, orjson, tool_result
+
+
+def make_diff(size_kb: int) -> dict:
+    rng = random.Random(7)
+    lines, size = [], 0
+    while size < size_kb * 1024:
+        line = (
+            f"{rng.choice('+- ')}    result = compute(\"value_{rng.randint(0, 9999)}\", "
+            f"{{'key': {rng.randint(0, 99)}}})\t# note"
+        )
+        lines.append(line)
+        size += len(line) + 1
+    return {"diff": "\n".join(lines), "returncode": 0}
+
+
+def make_search(count: int) -> list:
+    return [
+        {
+            "id": f"{i:08x}-0000-4000-8000-000000000000",
+            "domain": "Project Knowledge",
+            "title": f"Memory {i}",
+            "content": f"Deployment note {i}: restart the \"worker\" pool after migrations.\nSee runbook.",
+            "tags": ["deploy", f"batch-{i % 10}"],
+            "score": -round(10 / (i + 1), 4),
+            "snippet": f"restart the [worker] pool after migrations ({i})",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_response(label: str, obj) -> bytes:
+    """The pre-serializer path: pretty text nested in a default json.dumps"""
+    text = json.dumps(obj, indent=2)
+    response = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": f"{label}:\n{text}"}]}}
+    return (json.dumps(response) + "\n").encode("utf-8")
+
+
+def mode_response(label: str, obj, mode: str, serializer) -> bytes:
+    result = tool_result(label, obj, mode, serializer)
+    return serializer.dumps_bytes({"jsonrpc": "2.0", "id": 1, "result": result}) + b"\n"
+
+
+def measure(fn, iterations: int):
+    data = fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return len(data), (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="Encodes per measurement (default: 20)")
+    parser.add_argument("--diff-kb", type=int, default=1024, help="Diff size in KiB (default: 1024)")
+    parser.add_argument("--results", type=int, default=500, help="Search results (default: 500)")
+    args = parser.parse_args()
+
+    payloads = [
+        ("Git diff", f"git_diff {args.diff_kb} KiB", make_diff(args.diff_kb)),
+        ("Search results", f"search_memory x{args.results}", make_search(args.results)),
+    ]
+    backends = [get_serializer("stdlib")] + ([get_serializer("orjson")] if orjson is not None else [])
+
+    print("=== Response serialization benchmark ===")
+    if orjson is None:
+        print("(orjson not installed; stdlib only)")
+    print(f"{'payload':<22}{'path':<22}{'bytes out':>12}{'ms/call':>10}{'vs legacy':>11}")
+    for label, name, obj in payloads:
+        legacy_bytes, legacy_ms = measure(partial(legacy_response, label, obj), args.iterations)
+        print(f"{name:<22}{'legacy pretty':<22}{legacy_bytes:>12,}{legacy_ms:>10.2f}{'1.0x':>11}")
+        for serializer in backends:
+            for mode in ("compact", "structured"):
+                size, ms = measure(partial(mode_response, label, obj, mode, serializer), args.iterations)
+                path = f"{mode} {serializer.name}"
+                print(f"{'':<22}{path:<22}{size:>12,}{ms:>10.2f}{legacy_ms / ms:>10.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Statistics Benchmark
+
+Compares get_stats() backed by the trigger-maintained memory_stats table
+against the previous five aggregate queries over the whole table.
+
+Usage:
+    python3 benchmarks/bench_stats.py [--sizes 1000 10000 100000] [--iterations 100]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore
+
+
+def aggregate_stats(store: MemoryStore) -> None:
+    """The full-scan queries get_stats() used to run"""
+    with store._read_connection() as conn:
+        conn.execute("SELECT COUNT(*) FROM memories").fetchone()
+        conn.execute("SELECT domain, COUNT(*) FROM memories GROUP BY domain").fetchall()
+        conn.execute(
+            "SELECT workspace, COUNT(*) FROM memories WHERE workspace IS NOT NULL GROUP BY workspace"
+        ).fetchall()
+        conn.execute("SELECT SUM(LENGTH(content)) FROM memories").fetchone()
+        conn.execute("SELECT MAX(updated_at) FROM memories").fetchone()
+
+
+def ms_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000], help="Table sizes")
+    parser.add_argument("--iterations", type=int, default=100, help="Calls per measurement (default: 100)")
+    args = parser.parse_args()
+
+    print("=== get_stats benchmark ===")
+    print(f"{'rows':>8}{'aggregate ms':>15}{'get_stats ms':>15}{'count ms':>11}{'speedup':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MemoryStore(str(Path(tmp) / "bench.db"))
+            store.set_memories_bulk([
+                {
+                    "domain": f"domain-{i % 8}",
+                    "title": f"item {i}",
+                    "content": "statistics benchmark content " * 8,
+                    "workspace": f"ws-{i % 16}",
+                }
+                for i in range(size)
+            ])
+            before = ms_per_call(lambda store=store: aggregate_stats(store), args.iterations)
+            after = ms_per_call(store.get_stats, args.iterations)
+            count = ms_per_call(store.count_memories, args.iterations)
+            store.close()
+        print(f"{size:>8}{before:>15.3f}{after:>15.3f}{count:>11.3f}{before / after:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Stdout Writer Benchmark
+
+1. In-process: messages/sec written to a pipe by the previous text-layer
+   write+flush per message versus StdoutWriter, for bursts of
+   notifications produced in the same event-loop tick.
+2. End to end: requests/sec for a pipelined local client against the
+   server in async and sync stdio modes.
+
+Usage:
+    python3 benchmarks/bench_stdout_writer.py [--messages 20000] [--burst 50] [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp.serialization import get_serializer
+from mcp.transport import StdoutWriter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+
+
+def _drain(fd: int, counter: list) -> None:
+    while True:
+        data = os.read(fd, 1 << 16)
+        if not data:
+            return
+        counter[0] += len(data)
+
+
+def _message(i: int) -> dict:
+    return {"jsonrpc": "2.0", "method": "notifications/progress",
+            "params": {"progressToken": "bench", "progress": i, "message": f"step {i}"}}
+
+
+def legacy_writer(fd: int, messages: int, burst: int) -> None:
+    stream = io.TextIOWrapper(io.BufferedWriter(io.FileIO(fd, "w", closefd=False)), encoding="utf-8")
+
+    async def run():
+        for start in range(0, messages, burst):
+            for i in range(start, min(start + burst, messages)):
+                stream.write(json.dumps(_message(i)) + "\n")
+                stream.flush()
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+
+def buffered_writer(fd: int, messages: int, burst: int) -> None:
+    async def run():
+        writer = StdoutWriter(fd=fd, serializer=get_serializer())
+        for start in range(0, messages, burst):
+            for i in range(start, min(start + burst, messages)):
+                writer.write(_message(i))
+            await asyncio.sleep(0)
+        await writer.aclose()
+
+    asyncio.run(run())
+
+
+def messages_per_sec(fn, messages: int, burst: int) -> tuple:
+    read_fd, write_fd = os.pipe()
+    counter = [0]
+    reader = threading.Thread(target=_drain, args=(read_fd, counter))
+    reader.start()
+    start = time.perf_counter()
+    fn(write_fd, messages, burst)
+    elapsed = time.perf_counter() - start
+    os.close(write_fd)
+    reader.join()
+    os.close(read_fd)
+    return messages / elapsed, counter[0]
+
+
+def requests_per_sec(mode: str, requests: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "MCP_HOME": tmp, "MCP_STDIO_MODE": mode, "PYTHONPATH": str(REPO_ROOT)}
+        proc = subprocess.Popen(
+            [sys.executable, str(SERVER_PATH)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env=env, cwd=str(REPO_ROOT),
+        )
+        # Wait for start-up before timing
+        proc.stdin.write(b'{"jsonrpc":"2.0","id":0,"method":"initialize","params":{}}\n')
+        proc.stdin.flush()
+        proc.stdout.readline()
+
+        payload = b"".join(
+            json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                        "params": {"name": "ext_get_context", "arguments": {}}}).encode() + b"\n"
+            for i in range(1, requests + 1)
+        )
+        answered = [0]
+
+        def read_responses():
+            for _ in proc.stdout:
+                answered[0] += 1
+
+        reader = threading.Thread(target=read_responses)
+        start = time.perf_counter()
+        reader.start()
+        proc.stdin.write(payload)
+        proc.stdin.close()
+        reader.join()
+        elapsed = time.perf_counter() - start
+        proc.wait(timeout=60)
+    return answered[0] / elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000, help="Messages for the writer test (default: 20000)")
+    parser.add_argument("--burst", type=int, default=50, help="Messages per loop tick (default: 50)")
+    parser.add_argument("--requests", type=int, default=5000, help="Pipelined requests end to end (default: 5000)")
+    args = parser.parse_args()
+
+    print(f"=== Writer throughput ({args.messages} messages, {args.burst} per tick) ===")
+    legacy, legacy_bytes = messages_per_sec(legacy_writer, args.messages, args.burst)
+    buffered, buffered_bytes = messages_per_sec(buffered_writer, args.messages, args.burst)
+    print(f"{'text write+flush':<22}{legacy:>12,.0f} msg/s{legacy_bytes:>14,} bytes")
+    print(f"{'StdoutWriter':<22}{buffered:>12,.0f} msg/s{buffered_bytes:>14,} bytes  ({buffered / legacy:.1f}x)")
+
+    print(f"\n=== End to end ({args.requests} pipelined ext_get_context calls) ===")
+    for mode in ("sync", "async"):
+        print(f"{mode:<22}{requests_per_sec(mode, args.requests):>12,.0f} req/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
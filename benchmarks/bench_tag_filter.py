@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tag Filter Benchmark
+
+Measures tag-filtered list_memories against a store with 10k distinct
+tags, with and without the (tag, memory_id) index.
+
+Usage:
+    python3 benchmarks/bench_tag_filter.py [--rows 50000] [--tags 10000] [--iterations 200]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.memory_store import MemoryStore
+from mcp.models import MemoryQuery
+
+
+def seed(store: MemoryStore, rows: int, tag_count: int) -> None:
+    rng = random.Random(7)
+    now = datetime.utcnow().isoformat()
+    memories, tags = [], []
+    for i in range(rows):
+        memory_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        memories.append((memory_id, "bench", f"item {i}", "tag benchmark", now, now, "{}"))
+        for tag in rng.sample(range(tag_count), 3):
+            tags.append((memory_id, f"tag-{tag}"))
+    with store._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO memories (id, domain, title, content, created_at, updated_at, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            memories,
+        )
+        conn.executemany("INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)", tags)
+
+
+def time_filters(store: MemoryStore, tag_count: int, iterations: int) -> dict:
+    rng = random.Random(11)
+    results = {}
+    for mode, width in (("any", 1), ("any", 5), ("all", 2)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            tags = [f"tag-{t}" for t in rng.sample(range(tag_count), width)]
+            store.list_memories(MemoryQuery(tags=tags, tag_mode=mode, limit=20))
+        results[f"{mode} x{width}"] = (time.perf_counter() - start) / iterations * 1000
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000, help="Memories to seed (default: 50000)")
+    parser.add_argument("--tags", type=int, default=10_000, help="Distinct tags (default: 10000)")
+    parser.add_argument("--iterations", type=int, default=200, help="Queries per mode (default: 200)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(str(Path(tmp) / "bench.db"))
+        seed(store, args.rows, args.tags)
+        print(f"=== Tag filter benchmark (rows={args.rows}, tags={args.tags}) ===")
+
+        indexed = time_filters(store, args.tags, args.iterations)
+        with store._get_connection() as conn:
+            conn.execute("DROP INDEX idx_memory_tags_tag")
+        unindexed = time_filters(store, args.tags, args.iterations)
+        store.close()
+
+    print(f"{'filter':<12}{'no index ms':>14}{'indexed ms':>14}{'speedup':>10}")
+    for name in indexed:
+        speedup = unindexed[name] / indexed[name] if indexed[name] else 0.0
+        print(f"{name:<12}{unindexed[name]:>14.3f}{indexed[name]:>14.3f}{speedup:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
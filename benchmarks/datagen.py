@@ -0,0 +1,92 @@
+"""
+Synthetic Data Generators for the Benchmarks
+
+Deterministic (seeded) inputs shaped like real usage: memories with
+tags and workspaces, classifier notes, a large MEMORY.md, sandbox
+paths (valid and hostile) and JSON-RPC tool calls.
+"""
+
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+DOMAINS = [
+    "Project Knowledge", "Communication Style", "Progress Tracking",
+    "Domain-Specific Knowledge", "Code Patterns", "Tools & Configuration",
+]
+
+WORDS = (
+    "cache sqlite index query deploy worker pool migration schema latency "
+    "python docker kubernetes auth token refactor pattern review pipeline "
+    "config build release rollback queue retry timeout metric trace profile "
+    "security oauth redis postgresql fastapi react typescript benchmark"
+).split()
+
+# Terms guaranteed to appear in generated text, for search benchmarks
+SEARCH_TERMS = ["sqlite", "deploy", "worker pool", "cache*", "oauth token", "migration schema"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def memory_records(count: int, seed: int = 1) -> Iterator[Dict[str, Any]]:
+    """Records for MemoryStore.set_memories_bulk"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "domain": DOMAINS[i % len(DOMAINS)],
+            "title": f"Memory {i}: {_sentence(rng, 4)}",
+            "content": f"{_sentence(rng, 30)}. Note {i}.",
+            "workspace": f"ws-{i % 4}",
+            "repository": f"repo-{i % 16}",
+            "tags": [f"tag-{i % 32}", rng.choice(WORDS)],
+        }
+
+
+def classifier_texts(count: int, seed: int = 2) -> List[Dict[str, str]]:
+    """Title/content pairs for MemoryClassifier.classify"""
+    rng = random.Random(seed)
+    return [{"title": _sentence(rng, 5), "content": _sentence(rng, rng.randint(20, 200))} for _ in range(count)]
+
+
+def repo_memory_file(path: Path, size_kb: int, seed: int = 3) -> int:
+    """Write a MEMORY.md of about size_kb KiB in RepoMemory's entry format; returns entries"""
+    rng = random.Random(seed)
+    parts = ["# Project Memory\n\nThis file stores important project context and decisions.\n\n"]
+    size = len(parts[0])
+    entries = 0
+    while size < size_kb * 1024:
+        entry = (
+            f"\n---\n\n## 2024-01-{entries % 28 + 1:02d}T12:00:00\n"
+            f"**Tags:** {rng.choice(WORDS)} {rng.choice(WORDS)}\n\n{_sentence(rng, 60)}\n"
+        )
+        parts.append(entry)
+        size += len(entry)
+        entries += 1
+    path.write_text("".join(parts), encoding="utf-8")
+    return entries
+
+
+def sandbox_paths(root: Path, count: int, seed: int = 4) -> List[str]:
+    """Mix of nested, relative, traversal and outside paths under root"""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        depth = rng.randint(1, 6)
+        nested = "/".join(rng.choice(WORDS) for _ in range(depth))
+        kind = i % 4
+        if kind == 0:
+            paths.append(str(root / nested / "file.py"))
+        elif kind == 1:
+            paths.append(str(root / nested / ".." / "other.py"))
+        elif kind == 2:
+            paths.append(str(root / nested / ("../" * (depth + 2)) / "etc" / "passwd"))
+        else:
+            paths.append(f"/tmp/{nested}")
+    return paths
+
+
+def tool_call(request_id: int, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": name, "arguments": arguments}}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test
+
+Starts the MCP server with MCP_TRANSPORT=http on a local port, opens
+one session per simulated client, and has every client issue tool calls
+back to back over a keep-alive connection. Reports throughput and
+p50/p99 latency. Needs httpx (a declared dependency); no external
+services are contacted.
+
+Usage:
+    python3 benchmarks/load_http.py [--clients 100] [--requests 50] [--tool get_stats]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{url}/healthz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError("HTTP server did not start")
+            await asyncio.sleep(0.05)
+
+
+async def run_client(url: str, requests: int, tool: str, latencies: list, errors: list) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        init = await client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+        headers = {"Mcp-Session-Id": init.headers["Mcp-Session-Id"]}
+        for i in range(1, requests + 1):
+            request = {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                       "params": {"name": tool, "arguments": {}}}
+            start = time.perf_counter()
+            response = await client.post("/mcp", json=request, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200 or "result" not in response.json():
+                errors.append(response.status_code)
+
+
+async def run_load(url: str, clients: int, requests: int, tool: str) -> dict:
+    await wait_ready(url)
+    latencies: list = []
+    errors: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(url, requests, tool, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Concurrent clients (default: 100)")
+    parser.add_argument("--requests", type=int, default=50, help="Calls per client (default: 50)")
+    parser.add_argument("--tool", default="get_stats", help="Tool to call (default: get_stats)")
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "MCP_HOME": tmp,
+            "MCP_TRANSPORT": "http",
+            "MCP_HTTP_PORT": str(port),
+            "MCP_WORKSPACE_ROOT": str(REPO_ROOT),
+            "PYTHONPATH": str(REPO_ROOT),
+        }
+        proc = subprocess.Popen(
+            [sys.executable, str(SERVER_PATH)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            cwd=str(REPO_ROOT),
+        )
+        try:
+            r = asyncio.run(run_load(f"http://127.0.0.1:{port}", args.clients, args.requests, args.tool))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print(f"=== HTTP load test ({args.clients} clients x {args.requests} {args.tool} calls) ===")
+    print(f"{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print(f"{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
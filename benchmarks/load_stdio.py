@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Stdio Load Test
+
+Spawns the MCP server and fires interleaved fast (get_stats) and slow
+(run_cmd sleeping) tool calls over one stdio pipe, then reports tail
+latency of the fast calls. Runs the legacy sync loop and the async
+transport back to back for comparison.
+
+Usage:
+    python3 benchmarks/load_stdio.py [--fast 200] [--slow-every 20] [--slow-sec 0.5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(mode: str, fast: int, slow_every: int, slow_sec: float, interval: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "MCP_HOME": tmp,
+            "MCP_STDIO_MODE": mode,
+            "MCP_WORKSPACE_ROOT": str(REPO_ROOT),
+            "PYTHONPATH": str(REPO_ROOT),
+        }
+        proc = subprocess.Popen(
+            [sys.executable, str(SERVER_PATH)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env,
+            cwd=str(REPO_ROOT),
+        )
+
+        sent = {}
+        received = {}
+
+        def reader():
+            for line in proc.stdout:
+                try:
+                    response = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                received[response.get("id")] = time.perf_counter()
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+
+        # Exclude server start-up from the measurements
+        proc.stdin.write(json.dumps({"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}}) + "\n")
+        proc.stdin.flush()
+        while 0 not in received:
+            time.sleep(0.01)
+
+        fast_ids = []
+        request_id = 0
+        for i in range(fast):
+            if slow_every and i % slow_every == 0:
+                request_id += 1
+                request = {
+                    "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                    "params": {"name": "run_cmd", "arguments": {
+                        "cmd": ["python3", "-c", f"import time; time.sleep({slow_sec})"]
+                    }},
+                }
+                sent[request_id] = time.perf_counter()
+                proc.stdin.write(json.dumps(request) + "\n")
+
+            request_id += 1
+            fast_ids.append(request_id)
+            request = {
+                "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                "params": {"name": "get_stats", "arguments": {}},
+            }
+            sent[request_id] = time.perf_counter()
+            proc.stdin.write(json.dumps(request) + "\n")
+            proc.stdin.flush()
+            time.sleep(interval)
+
+        proc.stdin.close()
+        proc.wait(timeout=600)
+        thread.join(timeout=5)
+
+        latencies = [(received[i] - sent[i]) * 1000 for i in fast_ids if i in received]
+        return {
+            "answered": len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fast", type=int, default=200, help="Fast get_stats calls (default: 200)")
+    parser.add_argument("--slow-every", type=int, default=20, help="Insert a slow call every N fast calls")
+    parser.add_argument("--slow-sec", type=float, default=0.5, help="Duration of each slow call (default: 0.5)")
+    parser.add_argument("--interval", type=float, default=0.01, help="Delay between fast calls (default: 0.01)")
+    args = parser.parse_args()
+
+    print(f"=== Stdio load test (fast={args.fast}, slow every {args.slow_every}, slow={args.slow_sec}s) ===")
+    print(f"{'mode':<8}{'answered':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode in ("sync", "async"):
+        r = run_load(mode, args.fast, args.slow_every, args.slow_sec, args.interval)
+        print(f"{mode:<8}{r['answered']:>10}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
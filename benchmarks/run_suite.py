@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark Suite
+
+Runs every benchmark group on synthetic data (benchmarks/datagen.py)
+and writes one JSON results file that can be diffed or compared
+between commits:
+
+    memory_store   MemoryStore bulk insert, CRUD, listing and search
+                   at each --rows size
+    classifier     MemoryClassifier.classify throughput
+    repo_memory    RepoMemory.search_memory on MEMORY.md files of
+                   each --repo-kb size
+    path_sandbox   PathSandbox.validate_path on valid and hostile paths
+    rpc            JSON-RPC round trips through one persistent server
+                   process over stdio
+
+Latencies are per call in microseconds (mean, p50, p95, p99).
+
+Usage:
+    python3 benchmarks/run_suite.py [--rows 1000,10000] [--only memory_store,rpc]
+                                    [--output results.json] [--compare baseline.json]
+
+    # 1M rows takes several minutes to seed
+    python3 benchmarks/run_suite.py --only memory_store --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import datagen
+
+from mcp.classifier import MemoryClassifier
+from mcp.memory_store import MemoryStore
+from mcp.models import MemoryQuery
+from mcp.path_sandbox import PathSandbox
+from mcp.repo_memory import RepoMemory
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+GROUPS = ["memory_store", "classifier", "repo_memory", "path_sandbox", "rpc"]
+SEED_BATCH = 10000
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Suite:
+    """Collects timings under stable benchmark names"""
+
+    def __init__(self, scale: float) -> None:
+        self.scale = scale
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(self, name: str, fn: Callable[[int], Any], iterations: int, **params: Any) -> None:
+        """Time fn(i) for i in range(iterations), one sample per call"""
+        iterations = max(1, int(iterations * self.scale))
+        fn(0)  # warm caches and lazy initialization
+        samples = []
+        clock = time.perf_counter
+        for i in range(iterations):
+            start = clock()
+            fn(i)
+            samples.append(clock() - start)
+        self.record(name, samples, **params)
+
+    def note(self, name: str, **values: Any) -> None:
+        """Store a single measurement that is not a per-call latency"""
+        self.results[name] = values
+        print(f"{name:<44}" + "  ".join(f"{k}={v:,}" for k, v in values.items()))
+
+    def record(self, name: str, samples: List[float], **params: Any) -> None:
+        ordered = sorted(samples)
+        mean = statistics.fmean(ordered)
+        self.results[name] = {
+            "iterations": len(ordered),
+            "mean_us": round(mean * 1e6, 2),
+            "p50_us": round(percentile(ordered, 50) * 1e6, 2),
+            "p95_us": round(percentile(ordered, 95) * 1e6, 2),
+            "p99_us": round(percentile(ordered, 99) * 1e6, 2),
+            "ops_per_sec": round(1 / mean, 1) if mean > 0 else None,
+            **params,
+        }
+        print(f"{name:<44}{self.results[name]['p50_us']:>12.1f}{self.results[name]['p95_us']:>12.1f}"
+              f"{self.results[name]['ops_per_sec'] or 0:>14,.0f}")
+
+
+def seed_store(store: MemoryStore, rows: int) -> float:
+    """Bulk insert rows synthetic memories; returns rows/sec"""
+    records = datagen.memory_records(rows)
+    start = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == SEED_BATCH:
+            store.set_memories_bulk(batch)
+            batch = []
+    if batch:
+        store.set_memories_bulk(batch)
+    return rows / (time.perf_counter() - start)
+
+
+def bench_memory_store(suite: Suite, args: argparse.Namespace) -> None:
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MemoryStore(str(Path(tmp) / "bench.db"))
+            rate = seed_store(store, rows)
+            suite.note(f"memory_store.bulk_insert[rows={rows}]", rows=rows, rows_per_sec=round(rate, 1))
+
+            ids = [m.id for m in store.list_memories_page(MemoryQuery(limit=500, include_total=False)).memories]
+            terms = datagen.SEARCH_TERMS
+            suite.measure(f"memory_store.set_memory[rows={rows}]",
+                          lambda i, store=store: store.set_memory("Project Knowledge", f"t{i}", f"bench content {i}", tags=["bench"]),
+                          500, rows=rows)
+            suite.measure(f"memory_store.get_memory[rows={rows}]",
+                          lambda i, store=store, ids=ids: store.get_memory(ids[i % len(ids)]), 2000, rows=rows)
+            suite.measure(f"memory_store.list_page[rows={rows}]",
+                          lambda i, store=store: store.list_memories_page(MemoryQuery(workspace=f"ws-{i % 4}", limit=20,
+                                                                                      include_total=False)),
+                          500, rows=rows)
+            suite.measure(f"memory_store.list_by_tag[rows={rows}]",
+                          lambda i, store=store: store.list_memories_page(MemoryQuery(tags=[f"tag-{i % 32}"], limit=20,
+                                                                                      include_total=False)),
+                          500, rows=rows)
+            suite.measure(f"memory_store.search[rows={rows}]",
+                          lambda i, store=store, terms=terms: store.search_hits(terms[i % len(terms)], limit=10), 300, rows=rows)
+            suite.measure(f"memory_store.delete_memory[rows={rows}]",
+                          lambda i, store=store, ids=ids: store.delete_memory(ids[i % len(ids)]), min(300, len(ids) - 1), rows=rows)
+            suite.measure(f"memory_store.get_stats[rows={rows}]", lambda i, store=store: store.get_stats(), 300, rows=rows)
+            store.close()
+
+
+def bench_classifier(suite: Suite, args: argparse.Namespace) -> None:
+    classifier = MemoryClassifier()
+    texts = datagen.classifier_texts(1000)
+    suite.measure("classifier.classify",
+                  lambda i: classifier.classify(texts[i % len(texts)]["content"], texts[i % len(texts)]["title"]),
+                  5000)
+
+
+def bench_repo_memory(suite: Suite, args: argparse.Namespace) -> None:
+    for size_kb in args.repo_kb:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_file = Path(tmp) / "MEMORY.md"
+            entries = datagen.repo_memory_file(memory_file, size_kb)
+            repo = RepoMemory(str(memory_file), str(Path(tmp) / "DECISIONS.md"))
+            terms = ["sqlite", "rollback queue", "no-such-term"]
+            suite.measure(f"repo_memory.search_memory[kb={size_kb}]",
+                          lambda i, repo=repo, terms=terms: repo.search_memory(terms[i % len(terms)]), 50,
+                          size_kb=size_kb, entries=entries)
+
+
+def bench_path_sandbox(suite: Suite, args: argparse.Namespace) -> None:
+    sandbox = PathSandbox(str(REPO_ROOT))
+    paths = datagen.sandbox_paths(REPO_ROOT, 1000)
+    suite.measure("path_sandbox.validate_path", lambda i: sandbox.validate_path(paths[i % len(paths)]), 20000)
+
+
+class ServerProcess:
+    """One MCP server over stdio, used for sequential round trips"""
+
+    def __init__(self, home: str) -> None:
+        env = {
+            **os.environ,
+            "MCP_HOME": home,
+            "MCP_WORKSPACE_ROOT": str(REPO_ROOT),
+            "PYTHONPATH": str(REPO_ROOT),
+        }
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "mcp.server"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env=env, cwd=str(REPO_ROOT),
+        )
+        self.request_id = 0
+
+    def call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.request_id += 1
+        request = {"jsonrpc": "2.0", "id": self.request_id, "method": method, "params": params}
+        self.proc.stdin.write(json.dumps(request).encode("utf-8") + b"\n")
+        self.proc.stdin.flush()
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError("Server exited")
+            response = json.loads(line)
+            if response.get("id") == self.request_id:
+                return response
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait(timeout=10)
+
+
+def bench_rpc(suite: Suite, args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "data" / "mcp" / "memories.db"
+        db_path.parent.mkdir(parents=True)
+        store = MemoryStore(str(db_path))
+        seed_store(store, args.rpc_rows)
+        store.close()
+
+        start = time.perf_counter()
+        server = ServerProcess(tmp)
+        server.call("initialize", {})
+        suite.note("rpc.first_response", ms=round((time.perf_counter() - start) * 1000, 2))
+        try:
+            terms = datagen.SEARCH_TERMS
+            suite.measure("rpc.tools_list", lambda i: server.call("tools/list", {}), 500)
+            suite.measure("rpc.ext_get_context",
+                          lambda i: server.call("tools/call", {"name": "ext_get_context", "arguments": {}}), 500)
+            suite.measure("rpc.get_stats",
+                          lambda i: server.call("tools/call", {"name": "get_stats", "arguments": {}}), 300,
+                          rows=args.rpc_rows)
+            suite.measure("rpc.search_memory",
+                          lambda i: server.call("tools/call", {"name": "search_memory",
+                                                               "arguments": {"query": terms[i % len(terms)]}}),
+                          300, rows=args.rpc_rows)
+            suite.measure("rpc.get_context",
+                          lambda i: server.call("tools/call", {"name": "get_context",
+                                                               "arguments": {"tags": [f"tag-{i % 32}"], "limit": 20}}),
+                          300, rows=args.rpc_rows)
+        finally:
+            server.close()
+
+
+BENCHMARKS = {
+    "memory_store": bench_memory_store,
+    "classifier": bench_classifier,
+    "repo_memory": bench_repo_memory,
+    "path_sandbox": bench_path_sandbox,
+    "rpc": bench_rpc,
+}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT),
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: Path, threshold: float) -> int:
+    """Print p50 changes against a previous results file; returns the number of regressions"""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = 0
+    print(f"\n=== Compared with {baseline_path} ({threshold:g}% threshold) ===")
+    print(f"{'benchmark':<44}{'base p50':>12}{'p50':>12}{'change':>10}")
+    for name, result in results.items():
+        old = baseline.get(name, {}).get("p50_us")
+        new = result.get("p50_us")
+        if old is None or new is None or old <= 0:
+            continue
+        change = (new - old) / old * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<44}{old:>12.1f}{new:>12.1f}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"Groups to run (default: {','.join(GROUPS)})")
+    parser.add_argument("--rows", default="1000,10000", help="MemoryStore sizes (default: 1000,10000)")
+    parser.add_argument("--repo-kb", default="64,1024", help="MEMORY.md sizes in KiB (default: 64,1024)")
+    parser.add_argument("--rpc-rows", type=int, default=1000, help="Memories in the server DB (default: 1000)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply iteration counts (default: 1.0)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file (default: benchmark_results.json)")
+    parser.add_argument("--compare", help="Previous results file to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent (default: 10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any benchmark regressed")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(unknown)}")
+    args.rows = [int(r) for r in args.rows.split(",") if r]
+    args.repo_kb = [int(k) for k in args.repo_kb.split(",") if k]
+
+    suite = Suite(args.scale)
+    print("=== MCP benchmark suite ===")
+    print(f"{'benchmark':<44}{'p50 us':>12}{'p95 us':>12}{'ops/sec':>14}")
+    for group in groups:
+        BENCHMARKS[group](suite, args)
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": suite.results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2, sort_keys=True) + "\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(suite.results, Path(args.compare), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,16 @@
 """Cursor MCP - Multi-Context Protocol for Persistent Cross-Chat Memory"""
 
-from mcp.memory_store import MemoryStore
-from mcp.classifier import MemoryClassifier
-from mcp.agent_integration import AgentMemory, get_memory
+import importlib
+from typing import Any
+
+# Exports are imported on first access so that loading a submodule
+# (e.g. mcp.server at start-up) does not pull in SQLite and the store.
+_EXPORTS = {
+    'MemoryStore': 'mcp.memory_store',
+    'MemoryClassifier': 'mcp.classifier',
+    'AgentMemory': 'mcp.agent_integration',
+    'get_memory': 'mcp.agent_integration',
+}
 
 __all__ = [
     'MemoryStore',
@@ -12,3 +20,12 @@ __all__ = [
 ]
 
 __version__ = '1.0.0'
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -2,26 +2,40 @@
 MCP Agent Integration - Simple API for agent access to memory system
 """
 
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+import multiprocessing
 import os
 
-from .memory_store import MemoryStore
+from .memory_store import MemoryStore, decode_cursor
 from .classifier import MemoryClassifier
 from .models import MemoryQuery
+from .sqlite_pool import SQLiteSettings
+
+
+def _classify_item(item: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+    """Process-pool entry point for bulk auto-classification"""
+    content, title = item
+    return MemoryClassifier().classify(content, title)
 
 
 class AgentMemory:
     """Simple agent interface to memory system"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        sqlite_settings: Optional[SQLiteSettings] = None
+    ):
         if db_path is None:
             mcp_home = Path(
                 os.environ.get("MCP_HOME", str(Path(__file__).resolve().parent.parent))
             ).expanduser().resolve()
             db_path = str(mcp_home / "data" / "mcp" / "memories.db")
         
-        self.store_instance = MemoryStore(db_path)
+        # Connection PRAGMAs/pool size default to MCP_SQLITE_* env settings
+        self.store_instance = MemoryStore(db_path, settings=sqlite_settings)
         self.classifier = MemoryClassifier()
     
     def store(
@@ -38,12 +52,9 @@ class AgentMemory:
         
         if auto_classify:
             classification = self.classifier.classify(content, title)
-            domain = classification["domain"]
-            tags = (tags or []) + classification["tags"]
-            if priority == "medium":
-                priority = classification["priority"]
-            if not title:
-                title = classification["suggested_title"]
+            domain, title, tags, priority = self._apply_classification(
+                classification, domain, title, tags, priority
+            )
         
         if not title:
             title = content[:50]
@@ -57,20 +68,119 @@ class AgentMemory:
             **kwargs
         )
     
+    @staticmethod
+    def _apply_classification(
+        classification: Dict[str, Any],
+        domain: str,
+        title: Optional[str],
+        tags: Optional[List[str]],
+        priority: str
+    ) -> Tuple[str, Optional[str], List[str], str]:
+        domain = classification["domain"]
+        tags = (tags or []) + classification["tags"]
+        if priority == "medium":
+            priority = classification["priority"]
+        if not title:
+            title = classification["suggested_title"]
+        return domain, title, tags, priority
+    
+    def store_many(
+        self,
+        items: List[Dict[str, Any]],
+        auto_classify: bool = False,
+        workers: int = 1
+    ) -> List[str]:
+        """
+        Store many memories in one transaction.
+
+        Args:
+            items: Dicts accepted by store() (domain, content, title, tags, priority, ...)
+            auto_classify: Classify every item before storing
+            workers: Processes used for classification (1 = in-process)
+
+        Returns:
+            Memory IDs in input order
+        """
+        classifications: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        if auto_classify:
+            pairs = [(item.get("content", ""), item.get("title")) for item in items]
+            if workers > 1 and len(items) > 1:
+                chunksize = max(1, len(pairs) // (workers * 4))
+                # forkserver: forking a threaded server directly is unsafe
+                context = multiprocessing.get_context("forkserver")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    classifications = list(pool.map(_classify_item, pairs, chunksize=chunksize))
+            else:
+                classifications = [self.classifier.classify(c, t) for c, t in pairs]
+        
+        records = []
+        for item, classification in zip(items, classifications):
+            domain = item.get("domain", "Project Knowledge")
+            content = item.get("content", "")
+            title = item.get("title")
+            tags = item.get("tags")
+            priority = item.get("priority", "medium")
+            if classification is not None:
+                domain, title, tags, priority = self._apply_classification(
+                    classification, domain, title, tags, priority
+                )
+            records.append({
+                **item,
+                "domain": domain,
+                "content": content,
+                "title": title or content[:50],
+                "tags": tags or [],
+                "priority": priority,
+            })
+        
+        return self.store_instance.set_memories_bulk(records)
+    
     def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search for memories"""
-        results = self.store_instance.search(query, limit)
-        return [m.to_dict() for m in results]
+        """Search for memories (BM25-ranked, with snippets when FTS5 is available)"""
+        hits = self.store_instance.search_hits(query, limit)
+        return [h.to_dict() for h in hits]
     
     def get_context(
         self,
         workspace: Optional[str] = None,
-        max_memories: int = 20
+        max_memories: int = 20,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "any"
     ) -> List[Dict[str, Any]]:
-        """Get contextual memories"""
-        query = MemoryQuery(workspace=workspace, limit=max_memories)
-        memories, _ = self.store_instance.list_memories(query)
-        return [m.to_dict() for m in memories]
+        """Get contextual memories, optionally filtered by any/all of tags"""
+        page = self.get_context_page(
+            workspace=workspace,
+            max_memories=max_memories,
+            tags=tags,
+            tag_mode=tag_mode,
+            include_total=False,
+        )
+        return page["memories"]
+    
+    def get_context_page(
+        self,
+        workspace: Optional[str] = None,
+        max_memories: int = 20,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "any",
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> Dict[str, Any]:
+        """Get one page of contextual memories plus a next_cursor for the following page"""
+        query = MemoryQuery(
+            workspace=workspace,
+            tags=tags,
+            tag_mode=tag_mode,
+            limit=max_memories,
+            after=decode_cursor(cursor) if cursor else None,
+            include_total=include_total,
+        )
+        page = self.store_instance.list_memories_page(query)
+        return {
+            "memories": [m.to_dict() for m in page.memories],
+            "total": page.total,
+            "next_cursor": page.next_cursor,
+        }
     
     def retrieve(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a specific memory"""
@@ -104,9 +214,22 @@ class AgentMemory:
             "last_updated": s.last_updated.isoformat() if s.last_updated else None,
         }
     
+    def count(self) -> int:
+        """Total number of stored memories"""
+        return self.store_instance.count_memories()
+    
+    def rebuild_stats(self) -> Dict[str, Any]:
+        """Recompute statistics counters from scratch and return them"""
+        self.store_instance.rebuild_stats()
+        return self.stats()
+    
     def classify(self, content: str, title: Optional[str] = None) -> Dict[str, Any]:
         """Classify content"""
         return self.classifier.classify(content, title)
+    
+    def close(self) -> None:
+        """Release pooled database connections"""
+        self.store_instance.close()
 
 
 # Global singleton
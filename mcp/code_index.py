@@ -0,0 +1,699 @@
+"""
+Code Index - Persistent trigram index that narrows ripgrep_search
+
+An optional per-workspace index that maps every three-byte sequence
+(ASCII lowercased) to the files containing it. A query's regular
+expression is reduced to the literal strings any match must contain
+(as UTF-8, like rg; case-insensitive non-ASCII text is not required);
+only files holding all of their trigrams are handed to rg (or to
+fallback_search), which still does the real matching, so results are
+the same as a full search. Queries that yield no literal of three or
+more characters, or too many candidate files, search the whole tree as
+before.
+
+Layout under data/mcp/index/<hash of the workspace root>/:
+
+- manifest.json: indexed files (rel path -> [id, mtime_ns, size, trigram
+  count]), the git HEAD at build time and the list of segments
+- seg-NNNNNN.tri: immutable segments, each a sorted trigram table with
+  posting lists of file ids (native uint32), memory-mapped for queries
+- build.lock: flock held while building, so server processes sharing
+  the workspace take turns; each build re-reads the manifest under it
+
+The first build indexes every file; later builds only stat files and
+index new or changed ones into a new segment, marking replaced ids dead.
+Segments are merged once there are too many of them or too many dead
+postings. Between builds, files changed since the index was built (git
+status plus commits since the indexed HEAD, or a stat walk outside git)
+are always searched, so a stale index never hides a match.
+"""
+
+import bisect
+import fcntl
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import re
+import stat
+import struct
+import subprocess
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from . import fallback_search
+
+try:
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+INDEX_VERSION = 1
+SEGMENT_MAGIC = b"MCPTRI01"
+# magic, reserved, key count, offset of the key/offset tables
+_HEADER = struct.Struct("=8sIIQ")
+# Larger files are not indexed and are always searched
+MAX_INDEX_FILE_BYTES = 1024 * 1024
+# Files per new segment while building
+BUILD_CHUNK_FILES = 10_000
+# Merge segments beyond this many, or when this share of postings is dead
+MAX_SEGMENTS = 8
+MAX_DEAD_RATIO = 0.3
+# Above this many candidates narrowing is not worth it (and rg's argv gets long)
+MAX_CANDIDATES = 5000
+# Alternatives kept when reducing a regex (a|b|c...) to literals
+MAX_ALTERNATIVES = 16
+# How long the list of files changed since the build may be reused
+# (MCP_INDEX_DELTA_TTL_SEC); 0 checks git status on every query
+DEFAULT_DELTA_TTL_SEC = 0.0
+GIT_TIMEOUT_SEC = 30
+
+# rel path -> [id, mtime_ns, size, trigrams (-1 when not indexed)]
+FileRecord = List[int]
+ProgressCallback = Callable[..., None]
+
+_OPS = {name: getattr(sre_constants, name, None) for name in (
+    "LITERAL", "SUBPATTERN", "BRANCH", "MAX_REPEAT", "MIN_REPEAT",
+    "POSSESSIVE_REPEAT", "ATOMIC_GROUP", "AT",
+)}
+# Escapes the bytes parse reads as one byte where rg means a code point
+# (\xe9 is U+00E9, two bytes in the file); group 1 is set for those
+_ESCAPE = re.compile(r"\\(?:(x[89a-fA-F]|[0-7])|.)", re.DOTALL)
+# ASCII letters that also match a non-ASCII character under (?i) in rg
+# (K: KELVIN SIGN, S: LATIN SMALL LETTER LONG S)
+_FOLDS_BEYOND_ASCII = frozenset(b"kKsS")
+
+
+def _trigram_keys(data: bytes) -> Set[int]:
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def extract_batch(paths: List[str]) -> List[Tuple[int, int, Optional[bytes]]]:
+    """
+    Pool task: (mtime_ns, size, sorted trigram keys as uint32 bytes) per
+    file; keys are None for files too large to index or unreadable, and
+    empty for binary files (rg skips those, so they never match).
+    """
+    results: List[Tuple[int, int, Optional[bytes]]] = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_size > MAX_INDEX_FILE_BYTES:
+                    results.append((st.st_mtime_ns, st.st_size, None))
+                    continue
+                data = f.read()
+        except OSError:
+            results.append((0, -1, None))
+            continue
+        if data.find(b"\0", 0, fallback_search.BINARY_SNIFF_BYTES) != -1:
+            keys = array("I")
+        else:
+            keys = array("I", sorted(_trigram_keys(data)))
+        results.append((st.st_mtime_ns, st.st_size, keys.tobytes()))
+    return results
+
+
+class _Literals:
+    """Reduces a parsed regex to alternatives of literals that must all occur"""
+
+    def __init__(self, ignorecase: bool = False) -> None:
+        # (literals found so far, literal being extended)
+        self.alts: List[Tuple[List[bytes], bytes]] = [([], b"")]
+        self.ignorecase = ignorecase
+
+    def char(self, value: int) -> None:
+        # Case-insensitive non-ASCII text matches other bytes (é and É)
+        if value > 0xFF or self.ignorecase and (value >= 0x80 or value in _FOLDS_BEYOND_ASCII):
+            self.flush()
+            return
+        byte = bytes((value,))
+        self.alts = [(done, run + byte) for done, run in self.alts]
+
+    def flush(self) -> None:
+        self.alts = [(done + [run] if len(run) >= 3 else done, b"") for done, run in self.alts]
+
+    def require(self, options: List[List[bytes]]) -> None:
+        """One of options (each a list of literals) must match here"""
+        self.flush()
+        if len(self.alts) * len(options) > MAX_ALTERNATIVES:
+            # Dropping a requirement only widens the candidate set
+            return
+        self.alts = [(done + option, b"") for done, _ in self.alts for option in options]
+
+    def result(self) -> List[List[bytes]]:
+        self.flush()
+        return [done for done, _ in self.alts]
+
+
+def _required(items: Iterable[Tuple[Any, Any]], ignorecase: bool = False) -> List[List[bytes]]:
+    lits = _Literals(ignorecase)
+    for op, av in items:
+        if op == _OPS["LITERAL"]:
+            lits.char(av)
+        elif op == _OPS["AT"]:
+            # Anchors are zero-width and do not break a literal
+            continue
+        elif op == _OPS["SUBPATTERN"]:
+            # (group, flags added, flags removed, items): scoped (?i:...) and (?-i:...)
+            scoped = (ignorecase or bool(av[1] & re.IGNORECASE)) and not av[2] & re.IGNORECASE
+            lits.require(_required(av[-1], scoped))
+        elif op == _OPS["ATOMIC_GROUP"]:
+            lits.require(_required(av, ignorecase))
+        elif op == _OPS["BRANCH"]:
+            options = [option for branch in av[1] for option in _required(branch, ignorecase)]
+            if len(options) <= MAX_ALTERNATIVES and all(options):
+                lits.require(options)
+            else:
+                lits.flush()
+        elif op in (_OPS["MAX_REPEAT"], _OPS["MIN_REPEAT"], _OPS["POSSESSIVE_REPEAT"]) and av[0] >= 1:
+            lits.require(_required(av[2], ignorecase))
+            # Repeats break adjacency with what follows
+            lits.flush()
+        else:
+            lits.flush()
+    return lits.result()
+
+
+def query_trigrams(query: str) -> Optional[List[Set[int]]]:
+    """
+    Trigram sets, one per alternative, at least one of which a matching
+    file contains in full; None when the query cannot be narrowed.
+    """
+    if any(m.group(1) for m in _ESCAPE.finditer(query)):
+        return None
+    try:
+        parsed = sre_parse.parse(query.encode("utf-8"), re.MULTILINE)
+    except (re.error, RecursionError, OverflowError):
+        return None
+    alternatives = _required(parsed, bool(parsed.state.flags & re.IGNORECASE))
+    if not alternatives or len(alternatives) > MAX_ALTERNATIVES:
+        return None
+    result = []
+    for literals in alternatives:
+        keys: Set[int] = set()
+        for literal in literals:
+            keys |= _trigram_keys(literal)
+        if not keys:
+            return None
+        result.append(keys)
+    return result
+
+
+class Segment:
+    """One immutable segment file, memory-mapped"""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, count, table = _HEADER.unpack_from(self._map)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Not an index segment: {path}")
+        view = memoryview(self._map)
+        self.postings = view[_HEADER.size:table].cast("I")
+        self.keys = view[table:table + 4 * count].cast("I")
+        self.offsets = view[table + 4 * count:table + 8 * count + 4].cast("I")
+
+    def find(self, key: int) -> Tuple[int, int]:
+        """Posting range of key, empty if absent"""
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.offsets[i], self.offsets[i + 1]
+        return 0, 0
+
+    def items(self) -> Iterator[Tuple[int, int, "Segment"]]:
+        for i, key in enumerate(self.keys):
+            yield key, i, self
+
+
+def write_segment(path: Path, items: Iterable[Tuple[int, Iterable[int]]]) -> int:
+    """Write (key, file ids) pairs in key order; returns the posting count"""
+    keys = array("I")
+    offsets = array("I", [0])
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        total = 0
+        for key, ids in items:
+            postings = ids if isinstance(ids, array) else array("I", ids)
+            if not postings:
+                continue
+            postings.tofile(f)
+            total += len(postings)
+            keys.append(key)
+            offsets.append(total)
+        table = _HEADER.size + 4 * total
+        keys.tofile(f)
+        offsets.tofile(f)
+        f.seek(0)
+        f.write(_HEADER.pack(SEGMENT_MAGIC, 0, len(keys), table))
+    os.replace(tmp, path)
+    return total
+
+
+def _git(root: str, *args: str) -> Optional[bytes]:
+    try:
+        completed = subprocess.run(
+            ["git", "-C", root, *args], stdin=subprocess.DEVNULL, capture_output=True,
+            timeout=GIT_TIMEOUT_SEC,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return completed.stdout if completed.returncode == 0 else None
+
+
+def _acquire_lock(path: Path) -> Optional[IO[str]]:
+    """Exclusive lock on path, held until the returned file is closed; None if taken"""
+    lock_file = open(path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _visible(rel: str) -> bool:
+    # Hidden files and directories are skipped, as by rg
+    return not any(part.startswith(".") for part in rel.split("/"))
+
+
+class CodeIndex:
+    """The trigram index of one workspace root"""
+
+    def __init__(self, root: str, data_dir: Union[str, Path]) -> None:
+        self.root = os.path.realpath(root)
+        digest = hashlib.sha1(self.root.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+        self.index_dir = Path(data_dir) / digest
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._loaded = False
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._segments: List[Segment] = []
+        self._paths: Dict[int, str] = {}
+        self._unindexed: List[str] = []
+        self._delta: Optional[Tuple[float, Optional[Set[str]]]] = None
+        self.delta_ttl = float(os.environ.get("MCP_INDEX_DELTA_TTL_SEC", DEFAULT_DELTA_TTL_SEC))
+
+    # -- manifest -----------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.index_dir / "manifest.json"
+
+    def _load(self, reload: bool = False) -> None:
+        """Read the manifest and map segments once, on first use (or again on reload)"""
+        with self._lock:
+            if self._loaded and not reload:
+                return
+            self._loaded = True
+            try:
+                manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+                if manifest["version"] != INDEX_VERSION or manifest.get("root") != self.root:
+                    return
+                segments = [Segment(self.index_dir / name) for name in manifest["segments"]]
+            except (OSError, ValueError, KeyError):
+                return
+            self._publish(manifest, segments)
+
+    def _publish(self, manifest: Dict[str, Any], segments: List[Segment]) -> None:
+        self._manifest = manifest
+        self._segments = segments
+        self._paths = {record[0]: rel for rel, record in manifest["files"].items()}
+        self._unindexed = [rel for rel, record in manifest["files"].items() if record[3] < 0]
+        self._delta = None
+
+    def _save(self, manifest: Dict[str, Any]) -> None:
+        manifest["updated"] = time.time()
+        tmp = self.manifest_path.with_name("manifest.json.tmp")
+        tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def built(self) -> bool:
+        self._load()
+        return self._manifest is not None
+
+    # -- building -----------------------------------------------------
+
+    def _list_files(self) -> Tuple[List[str], Optional[str], Optional[str]]:
+        """
+        (rel paths, HEAD, path of root inside the repository) of the files
+        rg would search; the last two are None outside git.
+        """
+        listed = _git(self.root, "ls-files", "-z", "-c", "-o", "--exclude-standard")
+        if listed is None:
+            return [rel for _, rel in fallback_search.walk_files(self.root)], None, None
+        head = _git(self.root, "rev-parse", "-q", "--verify", "HEAD")
+        prefix = _git(self.root, "rev-parse", "--show-prefix") or b""
+        rels = sorted({rel for rel in os.fsdecode(listed).split("\0") if rel and _visible(rel)})
+        return rels, head.decode().strip() if head else None, os.fsdecode(prefix).strip()
+
+    def build(
+        self,
+        rebuild: bool = False,
+        cancel_token: Any = None,
+        progress: Optional[ProgressCallback] = None,
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Build or update the index; only new and changed files are read.
+
+        Progress is saved after every chunk of files, so a cancelled build
+        resumes where it stopped.
+        """
+        from .engineer_tools import ToolCancelled
+
+        if not self._build_lock.acquire(blocking=False):
+            return {"error": "An index build is already running for this workspace"}
+        lock_file = None
+        try:
+            start = time.monotonic()
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            # Other server processes on this workspace share the directory
+            lock_file = _acquire_lock(self.index_dir / "build.lock")
+            if lock_file is None:
+                return {"error": "An index build is already running for this workspace in another process"}
+            # Segment names and the segments to keep come from the manifest on disk
+            self._load(reload=True)
+            rels, head, prefix = self._list_files()
+            previous = None if rebuild else self._manifest
+            if previous is None:
+                manifest: Dict[str, Any] = {
+                    "version": INDEX_VERSION, "root": self.root, "created": time.time(),
+                    "next_id": 0, "segments": [], "postings": 0, "dead_postings": 0, "files": {},
+                    # Never reuse the name of a segment a query may still have mapped
+                    "next_segment": self._manifest["next_segment"] if self._manifest else 0,
+                }
+            else:
+                manifest = dict(previous, files=dict(previous["files"]), segments=list(previous["segments"]))
+            # Until the last chunk is saved, files may be missing from the index
+            manifest.update(git_head=head, git_prefix=prefix, complete=False)
+            old_files: Dict[str, FileRecord] = manifest["files"]
+
+            # Keep unchanged files; everything else is (re)indexed under a new id
+            files: Dict[str, FileRecord] = {}
+            pending: List[str] = []
+            for rel in rels:
+                try:
+                    st = os.lstat(os.path.join(self.root, rel))
+                except OSError:
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                record = old_files.get(rel)
+                if record is not None and record[1] == st.st_mtime_ns and record[2] == st.st_size:
+                    files[rel] = record
+                else:
+                    pending.append(rel)
+            removed = [record for rel, record in old_files.items() if files.get(rel) is not record]
+            manifest["dead_postings"] += sum(max(record[3], 0) for record in removed)
+            manifest["files"] = files
+            segments = list(self._segments) if previous is not None else []
+
+            done = 0
+            for chunk_start in range(0, len(pending), BUILD_CHUNK_FILES):
+                chunk = pending[chunk_start:chunk_start + BUILD_CHUNK_FILES]
+                name = f"seg-{manifest['next_segment']:06d}.tri"
+                postings: Dict[int, array] = {}
+                first_id = manifest["next_id"]
+                for offset, (mtime_ns, size, keys) in enumerate(self._extract(chunk, workers)):
+                    if cancel_token is not None and cancel_token.cancelled:
+                        raise ToolCancelled("index_build")
+                    if size < 0:
+                        continue
+                    file_id = first_id + offset
+                    if keys is None:
+                        files[chunk[offset]] = [file_id, mtime_ns, size, -1]
+                        continue
+                    ids = array("I")
+                    ids.frombytes(keys)
+                    for key in ids:
+                        posting = postings.get(key)
+                        if posting is None:
+                            postings[key] = array("I", (file_id,))
+                        else:
+                            posting.append(file_id)
+                    files[chunk[offset]] = [file_id, mtime_ns, size, len(ids)]
+                    done += 1
+                    if progress is not None and done % 1000 == 0:
+                        progress(done, len(pending), f"Indexed {done} of {len(pending)} files")
+                manifest["next_id"] = first_id + len(chunk)
+                manifest["next_segment"] += 1
+                manifest["postings"] += write_segment(self.index_dir / name, sorted(postings.items()))
+                manifest["segments"].append(name)
+                segments.append(Segment(self.index_dir / name))
+                self._commit(manifest, segments)
+
+            compacted = False
+            dead_ratio = manifest["dead_postings"] / manifest["postings"] if manifest["postings"] else 0.0
+            if len(segments) > MAX_SEGMENTS or dead_ratio > MAX_DEAD_RATIO or (previous is None and len(segments) > 1):
+                segments = self._compact(manifest, segments)
+                compacted = True
+            manifest["complete"] = True
+            self._commit(manifest, segments)
+            return {
+                "root": self.root,
+                "files": len(files),
+                "indexed": len(pending),
+                "removed": len(removed),
+                "segments": len(segments),
+                "postings": manifest["postings"],
+                "compacted": compacted,
+                "elapsed_ms": round((time.monotonic() - start) * 1000, 1),
+            }
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+            self._build_lock.release()
+
+    def _extract(self, rels: List[str], workers: Optional[int]) -> Iterator[Tuple[int, int, Optional[bytes]]]:
+        paths = [os.path.join(self.root, rel) for rel in rels]
+        batches = [paths[i:i + fallback_search.BATCH_FILES] for i in range(0, len(paths), fallback_search.BATCH_FILES)]
+        workers = workers or fallback_search.workers_from_env()
+        if workers <= 1 or len(batches) <= 1:
+            for batch in batches:
+                yield from extract_batch(batch)
+            return
+        pool = fallback_search.worker_pool(workers)
+        for results in pool.map(extract_batch, batches):
+            yield from results
+
+    def _commit(self, manifest: Dict[str, Any], segments: List[Segment]) -> None:
+        """Save the manifest, make it visible to queries and drop unreferenced segments"""
+        self._save(manifest)
+        with self._lock:
+            self._publish(manifest, segments)
+        live = set(manifest["segments"])
+        for path in self.index_dir.glob("seg-*.tri*"):
+            if path.name not in live:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _compact(self, manifest: Dict[str, Any], segments: List[Segment]) -> List[Segment]:
+        """Merge all segments into one without dead postings"""
+        live = array("b", bytes(manifest["next_id"]))
+        for record in manifest["files"].values():
+            live[record[0]] = 1
+        # Segments hold increasing id ranges, so concatenating keeps ids sorted
+        merged = heapq.merge(*(segment.items() for segment in segments), key=lambda item: item[0])
+
+        def postings() -> Iterator[Tuple[int, array]]:
+            current_key = -1
+            ids = array("I")
+            for key, i, segment in merged:
+                if key != current_key:
+                    if ids:
+                        yield current_key, ids
+                    current_key, ids = key, array("I")
+                lo, hi = segment.offsets[i], segment.offsets[i + 1]
+                ids.extend(file_id for file_id in segment.postings[lo:hi] if live[file_id])
+            if ids:
+                yield current_key, ids
+
+        name = f"seg-{manifest['next_segment']:06d}.tri"
+        manifest["next_segment"] += 1
+        manifest["postings"] = write_segment(self.index_dir / name, postings())
+        manifest["dead_postings"] = 0
+        manifest["segments"] = [name]
+        return [Segment(self.index_dir / name)]
+
+    # -- querying -----------------------------------------------------
+
+    def _git_suspects(self, manifest: Dict[str, Any]) -> Optional[Set[str]]:
+        """Paths git reports as modified, untracked or committed since the build"""
+        status = _git(self.root, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+        if status is None:
+            return None
+        # Porcelain paths are relative to the repository root
+        prefix = manifest["git_prefix"]
+        suspects = set()
+        skip = False
+        for entry in os.fsdecode(status).split("\0"):
+            if skip or len(entry) < 4:
+                skip = False
+                continue
+            # Renames and copies are followed by their source path
+            skip = entry[0] in "RC"
+            if entry[3:].startswith(prefix):
+                suspects.add(entry[3 + len(prefix):])
+        if manifest["git_head"]:
+            committed = _git(self.root, "diff", "--name-only", "--relative", "-z", manifest["git_head"], "HEAD")
+            if committed is None:
+                return None
+            suspects.update(os.fsdecode(committed).split("\0"))
+        return suspects
+
+    def _changed_files(self, manifest: Dict[str, Any]) -> Optional[Set[str]]:
+        """Files added or modified since the build; None if that cannot be told"""
+        now = time.monotonic()
+        cached = self._delta
+        if cached is not None and now - cached[0] < self.delta_ttl:
+            return cached[1]
+        suspects: Optional[Iterable[str]]
+        if manifest["git_prefix"] is not None:
+            suspects = self._git_suspects(manifest)
+        else:
+            # Outside git every file is stat'ed, which still reads no contents
+            suspects = (rel for _, rel in fallback_search.walk_files(self.root))
+        if suspects is None:
+            self._delta = (now, None)
+            return None
+        files = manifest["files"]
+        changed = set()
+        for rel in suspects:
+            if not rel or not _visible(rel):
+                continue
+            try:
+                st = os.lstat(os.path.join(self.root, rel))
+            except OSError:
+                continue
+            record = files.get(rel)
+            if stat.S_ISREG(st.st_mode) and (
+                    record is None or record[1] != st.st_mtime_ns or record[2] != st.st_size):
+                changed.add(rel)
+        self._delta = (now, changed)
+        return changed
+
+    def _lookup(self, segments: List[Segment], keys: Set[int]) -> Set[int]:
+        """Ids of files containing every key"""
+        ranges = []
+        for key in keys:
+            found = [(segment, *segment.find(key)) for segment in segments]
+            found = [(segment, lo, hi) for segment, lo, hi in found if hi > lo]
+            size = sum(hi - lo for _, lo, hi in found)
+            if size == 0:
+                return set()
+            ranges.append((size, found))
+        ranges.sort(key=lambda item: item[0])
+        size, found = ranges[0]
+        ids = {file_id for segment, lo, hi in found for file_id in segment.postings[lo:hi]}
+        for size, found in ranges[1:]:
+            if len(ids) * 16 < size:
+                # Few candidates left: probe each in the (sorted) posting lists
+                ids = {file_id for file_id in ids if any(
+                    _contains(segment.postings, lo, hi, file_id) for segment, lo, hi in found)}
+            else:
+                ids &= {file_id for segment, lo, hi in found for file_id in segment.postings[lo:hi]}
+            if not ids:
+                break
+        return ids
+
+    def candidates(self, query: str, path: str, glob: str = "*") -> Optional[Dict[str, Any]]:
+        """
+        Files under path that may match query, as fallback_search entries
+        (absolute path, path relative to path) sorted by path, plus stats;
+        None when the index cannot narrow this search.
+        """
+        if not self.built:
+            return None
+        start = time.monotonic()
+        scope = os.path.relpath(os.path.realpath(path), self.root)
+        if scope == ".":
+            scope = ""
+        elif scope.startswith(".."):
+            return None
+        alternatives = query_trigrams(query)
+        if alternatives is None:
+            return None
+        with self._lock:
+            manifest, segments = self._manifest, self._segments
+            paths, unindexed = self._paths, self._unindexed
+        if manifest is None or not manifest["complete"]:
+            return None
+
+        ids: Set[int] = set()
+        for keys in alternatives:
+            ids |= self._lookup(segments, keys)
+        rels = {paths[file_id] for file_id in ids if file_id in paths}
+        rels.update(unindexed)
+        # Checked before asking git for changes, the slower step on large trees
+        if len(rels) > MAX_CANDIDATES:
+            return None
+        changed = self._changed_files(manifest)
+        if changed is None:
+            return None
+        rels.update(changed)
+        if len(rels) > MAX_CANDIDATES:
+            return None
+
+        entries = []
+        for rel in sorted(rels):
+            if scope and not rel.startswith(scope + "/"):
+                continue
+            local = rel[len(scope) + 1:] if scope else rel
+            if not fallback_search.glob_matches(glob, local, local.rsplit("/", 1)[-1]):
+                continue
+            full = os.path.join(self.root, rel)
+            if os.path.isfile(full):
+                entries.append((full, local))
+        return {
+            "files": entries,
+            "candidates": len(entries),
+            "indexed_files": len(manifest["files"]),
+            "changed_files": len(changed),
+            "lookup_ms": round((time.monotonic() - start) * 1000, 1),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        if not self.built:
+            return {"root": self.root, "built": False}
+        with self._lock:
+            manifest, segments = self._manifest, self._segments
+        files = manifest["files"]
+        changed = self._changed_files(manifest)
+        size = 0
+        for path in self.index_dir.iterdir():
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return {
+            "root": self.root,
+            "built": True,
+            "complete": manifest["complete"],
+            "files": len(files),
+            "unindexed_files": sum(1 for record in files.values() if record[3] < 0),
+            "changed_files": len(changed) if changed is not None else None,
+            "segments": len(segments),
+            "postings": manifest["postings"],
+            "dead_postings": manifest["dead_postings"],
+            "size_bytes": size,
+            "git_head": manifest.get("git_head"),
+            "created": manifest.get("created"),
+            "updated": manifest.get("updated"),
+        }
+
+
+def _contains(postings: Any, lo: int, hi: int, file_id: int) -> bool:
+    i = bisect.bisect_left(postings, file_id, lo, hi)
+    return i < hi and postings[i] == file_id
@@ -0,0 +1,171 @@
+"""
+Daemon - One shared MCP server on a Unix domain socket
+
+Start with MCP_TRANSPORT=daemon (or let mcp/shim.py start it on demand).
+Every IDE window connects through the stdio shim and shares this
+process's memory store, caches and SQLite connection pools instead of
+paying for its own imports and schema setup.
+
+Each connection is a ClientSession with its own extension context,
+request ordering and cancellation; the worker pool and per-tool limits
+are shared. The daemon exits after MCP_DAEMON_IDLE_SEC seconds without
+clients.
+
+The socket is created with mode 0600. The daemon runs with the
+environment (MCP_WRITE_TOKEN, MCP_DRY_RUN, ...) of whoever started it.
+"""
+
+import asyncio
+import fcntl
+import itertools
+import logging
+import os
+import signal
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Union
+
+from mcp.transport import RequestDispatcher, StreamMessageWriter, serve_lines
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT_SEC = 600.0
+
+# Bulk tool calls can be large; asyncio's default line limit is 64 KiB
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+
+def default_socket_path(server_home: Union[str, Path]) -> Path:
+    """MCP_SOCKET_PATH, or data/mcp/mcp.sock under the server home"""
+    env_path = os.environ.get("MCP_SOCKET_PATH")
+    if env_path:
+        return Path(env_path).expanduser()
+    return Path(server_home) / "data" / "mcp" / "mcp.sock"
+
+
+def idle_timeout_from_env() -> Optional[float]:
+    """MCP_DAEMON_IDLE_SEC; 0 disables idle shutdown"""
+    value = float(os.environ.get("MCP_DAEMON_IDLE_SEC", DEFAULT_IDLE_TIMEOUT_SEC))
+    return value if value > 0 else None
+
+
+class ClientSession:
+    """Per-connection state kept apart from other IDE windows"""
+
+    def __init__(self, session_id: Union[int, str], extension_context: Any) -> None:
+        # A counter for socket clients, the Mcp-Session-Id for HTTP clients
+        self.session_id = session_id
+        self.extension_context = extension_context
+
+
+def _acquire_lock(socket_path: Path):
+    """Hold an exclusive lock beside the socket so only one daemon serves it"""
+    lock_file = open(f"{socket_path}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+async def serve_unix(
+    server: Any,
+    socket_path: Union[str, Path],
+    idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT_SEC,
+) -> None:
+    """
+    Serve MCP clients on a Unix domain socket until idle or signalled.
+
+    Args:
+        server: MCPServer instance shared by every client
+        socket_path: Path of the Unix socket
+        idle_timeout: Seconds without clients before exiting (None = never)
+    """
+    path = Path(socket_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock = _acquire_lock(path)
+    if lock is None:
+        logger.info(f"Another daemon is already serving {path}")
+        return
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    sessions: Dict[int, ClientSession] = {}
+    streams: Set[asyncio.StreamWriter] = set()
+    session_ids = itertools.count(1)
+    idle_handle: Optional[asyncio.TimerHandle] = None
+    # Parent dispatcher: owns the shared worker pool and tool limits
+    pool = RequestDispatcher(server)
+
+    def request_stop(reason: str) -> None:
+        if not stop.done():
+            logger.info(f"Daemon stopping: {reason}")
+            stop.set_result(None)
+
+    def arm_idle_timer() -> None:
+        nonlocal idle_handle
+        if idle_timeout is not None:
+            idle_handle = loop.call_later(idle_timeout, request_stop, f"idle for {idle_timeout:g}s")
+
+    def disarm_idle_timer() -> None:
+        nonlocal idle_handle
+        if idle_handle is not None:
+            idle_handle.cancel()
+            idle_handle = None
+
+    async def on_client(reader: asyncio.StreamReader, stream: asyncio.StreamWriter) -> None:
+        session = ClientSession(next(session_ids), server.new_extension_context())
+        sessions[session.session_id] = session
+        disarm_idle_timer()
+        logger.info(f"Client session {session.session_id} connected ({len(sessions)} active)")
+
+        streams.add(stream)
+        writer = StreamMessageWriter(stream)
+        dispatcher = pool.for_client(notify=writer.write, session=session)
+
+        async def next_lines():
+            line = await reader.readline()
+            return [line] if line else None
+
+        try:
+            await serve_lines(dispatcher, next_lines, writer)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning(f"Client session {session.session_id} dropped: {e}")
+        finally:
+            await writer.aclose()
+            streams.discard(stream)
+            del sessions[session.session_id]
+            logger.info(f"Client session {session.session_id} closed ({len(sessions)} active)")
+            if not sessions:
+                arm_idle_timer()
+
+    # A stale socket from a crashed daemon is safe to remove while we hold the lock
+    if path.exists() or path.is_symlink():
+        path.unlink()
+    # Create the socket owner-only from the start
+    old_umask = os.umask(0o177)
+    try:
+        unix_server = await asyncio.start_unix_server(on_client, path=str(path), limit=MAX_LINE_BYTES)
+    finally:
+        os.umask(old_umask)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, request_stop, signal.Signals(sig).name)
+    logger.info(f"Daemon listening on {path}")
+    arm_idle_timer()
+
+    try:
+        await stop
+    finally:
+        disarm_idle_timer()
+        unix_server.close()
+        for stream in list(streams):
+            stream.close()
+        await unix_server.wait_closed()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        pool.shutdown()
+        lock.close()
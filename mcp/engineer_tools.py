@@ -4,13 +4,43 @@ Engineer Tools - Git, ripgrep, and safe command execution
 Provides read-only engineer tools for the MCP server.
 """
 
+import base64
+import json
+import os
+import re
 import subprocess
 import shutil
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple
 
+from . import fallback_search, git_batch
+from .git_cache import GitCache, Repository
+from .output_spill import OutputCapture, OutputStore, capped_output, inline_bytes_from_env
 from .path_sandbox import PathSandbox
 
+if TYPE_CHECKING:
+    from .code_index import CodeIndex
+
+# progress(progress, total, message, partial=None); total is None when unknown,
+# partial carries new ripgrep_search matches when partial results were requested
+ProgressCallback = Callable[..., None]
+
+# How often long-running tools check for cancellation and report progress
+PROGRESS_INTERVAL_SEC = 0.5
+
+# ripgrep_search limits
+DEFAULT_MAX_RESULTS = 200
+MAX_LINE_CHARS = 1000
+# First matches are sent at once, later ones batched at most this often
+PARTIAL_RESULTS_INTERVAL_SEC = 0.2
+# Candidate paths passed to rg at most (bytes), well under ARG_MAX (256 KiB
+# on macOS, shared with the environment); beyond it rg searches everything
+MAX_RG_ARGV_BYTES = 96 * 1024
+
+# git_ls_tree entries returned at most
+MAX_TREE_ENTRIES = 10_000
+
 
 # Strict allowlist of allowed commands
 ALLOWED_COMMANDS = {
@@ -28,16 +58,134 @@ ALLOWED_COMMANDS = {
 }
 
 
-def git_status(cwd: str) -> Dict[str, Any]:
+class ToolCancelled(Exception):
+    """Raised when a tool call is cancelled by the client"""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag that also kills the attached subprocess"""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._event.set()
+            process = self._process
+        if process is not None:
+            _kill(process)
+
+    def attach(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._process = process
+            cancelled = self._event.is_set()
+        if cancelled:
+            _kill(process)
+
+    def detach(self) -> None:
+        with self._lock:
+            self._process = None
+
+
+def _kill(process: subprocess.Popen) -> None:
+    try:
+        process.kill()
+    except OSError:
+        # Already exited
+        pass
+
+
+def _run_process(
+    cmd: List[str],
+    cwd: str,
+    timeout_sec: float,
+    cancel_token: Optional[CancelToken] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[int, OutputCapture, OutputCapture]:
+    """
+    Run a subprocess that can be cancelled and reports elapsed time.
+
+    stdout and stderr are drained by reader threads into OutputCaptures,
+    so memory stays bounded however much the command prints.
+
+    Returns:
+        (returncode, stdout, stderr); the caller owns the captures
+
+    Raises:
+        subprocess.TimeoutExpired: If timeout_sec elapses
+        ToolCancelled: If cancel_token is cancelled before the process exits
+    """
+    if cancel_token is not None and cancel_token.cancelled:
+        raise ToolCancelled(cmd[0])
+
+    # Security: Never use shell=True
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        shell=False
+    )
+    stdout, stderr = OutputCapture(), OutputCapture()
+    readers = [
+        threading.Thread(target=capture.feed, args=(pipe,), daemon=True)
+        for capture, pipe in ((stdout, process.stdout), (stderr, process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    if cancel_token is not None:
+        cancel_token.attach(process)
+    start = time.monotonic()
+    try:
+        try:
+            while True:
+                try:
+                    process.wait(timeout=PROGRESS_INTERVAL_SEC)
+                    break
+                except subprocess.TimeoutExpired:
+                    elapsed = time.monotonic() - start
+                    if elapsed >= timeout_sec:
+                        _kill(process)
+                        process.wait()
+                        raise subprocess.TimeoutExpired(cmd, timeout_sec) from None
+                    if progress is not None:
+                        progress(round(elapsed, 1), timeout_sec, f"{cmd[0]} running for {elapsed:.0f}s")
+        finally:
+            if cancel_token is not None:
+                cancel_token.detach()
+            for reader in readers:
+                reader.join()
+            process.stdout.close()
+            process.stderr.close()
+
+        if cancel_token is not None and cancel_token.cancelled:
+            raise ToolCancelled(cmd[0])
+    except BaseException:
+        stdout.close()
+        stderr.close()
+        raise
+    return process.returncode, stdout, stderr
+
+
+def git_status(cwd: str, cache: Optional[GitCache] = None) -> Dict[str, Any]:
     """
     Get git repository status.
 
     Args:
         cwd: Working directory (must be within sandbox)
+        cache: Optional result cache; unchanged repositories are not re-scanned
 
     Returns:
-        Dict with status output and return code
+        Dict with status output and return code (cached: true on a cache hit)
     """
+    if cache is not None:
+        return cache.call("git_status", cwd, None, lambda: git_status(cwd))
     try:
         result = subprocess.run(
             ["git", "status", "--porcelain"],
@@ -62,34 +210,49 @@ def git_status(cwd: str) -> Dict[str, Any]:
         }
 
 
-def git_diff(cwd: str, ref: str = "HEAD") -> Dict[str, Any]:
+def git_diff(
+    cwd: str,
+    ref: str = "HEAD",
+    cancel_token: Optional[CancelToken] = None,
+    progress: Optional[ProgressCallback] = None,
+    output_store: Optional[OutputStore] = None,
+    cache: Optional[GitCache] = None
+) -> Dict[str, Any]:
     """
     Get git diff between commits or working tree.
 
     Args:
         cwd: Working directory (must be within sandbox)
         ref: Git reference to diff against (default: HEAD)
+        cancel_token: Optional token; cancelling kills git
+        progress: Optional callback for periodic progress updates
+        output_store: Where output beyond the inline cap is kept for continue_output
+        cache: Optional result cache keyed on the resolved ref and repository state
 
     Returns:
-        Dict with diff output and return code
+        Dict with diff output and return code (plus truncated/next_cursor
+        when the diff exceeds the cap; cached: true on a cache hit)
     """
+    if cache is not None:
+        return cache.call("git_diff", cwd, ref, lambda: git_diff(cwd, ref, cancel_token, progress, output_store))
     try:
-        result = subprocess.run(
-            ["git", "diff", ref],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        returncode, stdout, stderr = _run_process(["git", "diff", ref], cwd, 30, cancel_token, progress)
+        stderr.close()
         return {
-            "diff": result.stdout,
-            "returncode": result.returncode
+            **capped_output(stdout, "diff", output_store),
+            "returncode": returncode
         }
     except subprocess.TimeoutExpired:
         return {
             "error": "git diff timed out",
             "returncode": -1
         }
+    except ToolCancelled:
+        return {
+            "error": "git diff cancelled",
+            "returncode": -1,
+            "cancelled": True
+        }
     except Exception as e:
         return {
             "error": str(e),
@@ -97,142 +260,639 @@ def git_diff(cwd: str, ref: str = "HEAD") -> Dict[str, Any]:
         }
 
 
-def git_show(cwd: str, ref: str = "HEAD") -> Dict[str, Any]:
+def git_show(
+    cwd: str,
+    ref: str = "HEAD",
+    cancel_token: Optional[CancelToken] = None,
+    progress: Optional[ProgressCallback] = None,
+    output_store: Optional[OutputStore] = None,
+    cache: Optional[GitCache] = None
+) -> Dict[str, Any]:
     """
     Show commit details.
 
     Args:
         cwd: Working directory (must be within sandbox)
         ref: Git reference to show (default: HEAD)
+        cancel_token: Optional token; cancelling kills git
+        progress: Optional callback for periodic progress updates
+        output_store: Where output beyond the inline cap is kept for continue_output
+        cache: Optional result cache keyed on the resolved ref and repository state
 
     Returns:
-        Dict with show output and return code
+        Dict with show output and return code (plus truncated/next_cursor
+        when the output exceeds the cap; cached: true on a cache hit)
     """
+    if cache is not None:
+        return cache.call("git_show", cwd, ref, lambda: git_show(cwd, ref, cancel_token, progress, output_store))
     try:
-        result = subprocess.run(
-            ["git", "show", "--stat", ref],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        returncode, stdout, stderr = _run_process(["git", "show", "--stat", ref], cwd, 30, cancel_token, progress)
+        stderr.close()
         return {
-            "show": result.stdout,
-            "returncode": result.returncode
+            **capped_output(stdout, "show", output_store),
+            "returncode": returncode
         }
     except subprocess.TimeoutExpired:
         return {
             "error": "git show timed out",
             "returncode": -1
         }
+    except ToolCancelled:
+        return {
+            "error": "git show cancelled",
+            "returncode": -1,
+            "cancelled": True
+        }
     except Exception as e:
         return {
             "error": str(e),
             "returncode": -1
         }
 
+def _tree_path(top: str, cwd: str, path: str) -> Optional[str]:
+    """Repository-relative '/'-separated form of path (relative to cwd); None if outside"""
+    base = os.path.realpath(cwd)
+    full = os.path.normpath(os.path.join(base, path))
+    rel = os.path.relpath(full, top)
+    if rel == os.curdir:
+        return ""
+    if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+        return None
+    return rel.replace(os.sep, "/")
+
+
+def _object_error(ref: str, path: Optional[str]) -> Optional[str]:
+    if not ref or ":" in ref or any(c.isspace() for c in ref):
+        return f"Invalid ref: {ref!r}"
+    if path is None:
+        return "Path is outside the repository"
+    return None
+
+
+def git_read_file_at_ref(
+    cwd: str,
+    path: str,
+    ref: str = "HEAD",
+    output_store: Optional[OutputStore] = None,
+    pool: Optional[git_batch.GitBatchPool] = None
+) -> Dict[str, Any]:
+    """
+    Read a file as of a commit without checking it out.
+
+    Args:
+        cwd: Working directory (must be within sandbox); path is relative to it
+        path: File path
+        ref: Commit, branch, tag or other revision (default: HEAD)
+        output_store: Where content beyond the inline cap is kept for continue_output
+        pool: cat-file process pool (default: the shared pool)
+
+    Returns:
+        Dict with path (repository-relative), commit, oid, size and content
+        (plus truncated/next_cursor for large files); binary files have
+        binary: true and no content
+    """
+    repository = Repository.find(cwd)
+    if repository is None:
+        return {"error": "Not a git repository"}
+    rel = _tree_path(repository.top, cwd, path)
+    error = _object_error(ref, rel) or (None if rel else "Path is the repository root; use git_ls_tree")
+    if error:
+        return {"error": error}
+    pool = pool or git_batch.shared_pool()
+    capture = OutputCapture()
+    try:
+        commit = pool.read(repository.top, f"{ref}^{{commit}}", check=True).oid
+        info = pool.read(repository.top, f"{commit}:{rel}", sink=capture.write)
+    except git_batch.ObjectNotFound:
+        capture.close()
+        return {"error": f"{rel} not found at {ref}"}
+    except git_batch.BatchProcessError as e:
+        capture.close()
+        return {"error": str(e)}
+    result: Dict[str, Any] = {"path": rel, "ref": ref, "commit": commit, "oid": info.oid, "size": info.size}
+    if info.type != "blob":
+        capture.close()
+        hint = "; use git_ls_tree" if info.type == "tree" else ""
+        return {**result, "error": f"{rel} is a {info.type} at {ref}{hint}"}
+    # git's own test: a NUL in the first 8000 bytes
+    if b"\0" in capture.head_bytes()[:8000]:
+        capture.close()
+        return {**result, "binary": True}
+    return {**result, **capped_output(capture, "content", output_store)}
+
+
+def git_ls_tree(
+    cwd: str,
+    ref: str = "HEAD",
+    path: str = "",
+    recursive: bool = False,
+    long: bool = False,
+    max_entries: int = MAX_TREE_ENTRIES,
+    cancel_token: Optional[CancelToken] = None,
+    pool: Optional[git_batch.GitBatchPool] = None
+) -> Dict[str, Any]:
+    """
+    List a directory as of a commit, like git ls-tree.
+
+    Args:
+        cwd: Working directory (must be within sandbox); path is relative to it
+        ref: Commit, branch, tag or other revision (default: HEAD)
+        path: Directory to list (default: cwd)
+        recursive: List files in all subdirectories instead (ls-tree -r)
+        long: Include blob sizes (ls-tree -l)
+        max_entries: Stop after this many entries
+        cancel_token: Optional token; checked between subtrees
+        pool: cat-file process pool (default: the shared pool)
+
+    Returns:
+        Dict with commit, entries ({mode, type, oid, path} with
+        repository-relative paths, plus size when long), count and
+        truncated
+    """
+    repository = Repository.find(cwd)
+    if repository is None:
+        return {"error": "Not a git repository"}
+    rel = _tree_path(repository.top, cwd, path or ".")
+    error = _object_error(ref, rel)
+    if error:
+        return {"error": error}
+    pool = pool or git_batch.shared_pool()
+    top = repository.top
+    max_entries = max(1, max_entries)
+    entries: List[Dict[str, Any]] = []
+    try:
+        commit = pool.read(top, f"{ref}^{{commit}}", check=True).oid
+        tree = f"{commit}:{rel}" if rel else f"{commit}^{{tree}}"
+        listing = pool.ls_tree(
+            top, tree, prefix=f"{rel}/" if rel else "", recursive=recursive, limit=max_entries + 1,
+            should_stop=(lambda: cancel_token.cancelled) if cancel_token is not None else None
+        )
+        for entry in listing:
+            record: Dict[str, Any] = entry._asdict()
+            if long:
+                record["size"] = pool.read(top, entry.oid, check=True).size if entry.type == "blob" else None
+            entries.append(record)
+    except git_batch.ObjectNotFound:
+        return {"error": f"{rel or '.'} is not a directory at {ref}"}
+    except git_batch.BatchProcessError as e:
+        return {"error": str(e)}
+    if cancel_token is not None and cancel_token.cancelled:
+        return {"error": "git ls-tree cancelled", "cancelled": True}
+    truncated = len(entries) > max_entries
+    del entries[max_entries:]
+    return {
+        "ref": ref,
+        "commit": commit,
+        "path": rel,
+        "entries": entries,
+        "count": len(entries),
+        "truncated": truncated
+    }
+
+
+class SearchCollector:
+    """
+    Builds capped, structured search results from ripgrep events or the
+    Python fallback.
+
+    Each record is {"file", "line", "text", "submatches": [[start, end], ...],
+    "before": [...], "after": [...]} with character offsets and context
+    lines as {"line", "text"}. Collection stops once max_results records
+    or max_bytes of line text have been gathered.
+    """
+
+    def __init__(self, context_lines: int, max_results: int, max_bytes: int) -> None:
+        self.context_lines = max(0, context_lines)
+        self.max_results = max(1, max_results)
+        self.max_bytes = max(1, max_bytes)
+        self.results: List[Dict[str, Any]] = []
+        self.files: set = set()
+        self.bytes = 0
+        self.stop_reason: Optional[str] = None
+        self._sent = 0
+        self._last_partial: Optional[float] = None
+        # Context lines that may precede the next match in the same file
+        self._before: List[Tuple[str, int, str]] = []
+
+    @property
+    def full(self) -> bool:
+        return self.stop_reason is not None
+
+    def _account(self, text: str) -> None:
+        self.bytes += len(text) if text.isascii() else len(text.encode("utf-8"))
+        if self.stop_reason is None:
+            if len(self.results) >= self.max_results:
+                self.stop_reason = "max_results"
+            elif self.bytes >= self.max_bytes:
+                self.stop_reason = "max_bytes"
+
+    def add_match(self, file: str, line: int, text: str, submatches: List[List[int]],
+                  before: Optional[List[Dict[str, Any]]] = None,
+                  after: Optional[List[Dict[str, Any]]] = None) -> None:
+        if self.full:
+            return
+        text, submatches = _clip_line(text, submatches)
+        if before is None:
+            first = line - self.context_lines
+            before = [{"line": n, "text": t} for f, n, t in self._before if f == file and n >= first]
+        self._before = []
+        record: Dict[str, Any] = {"file": file, "line": line, "text": text, "submatches": submatches}
+        if self.context_lines:
+            record["before"] = before
+            record["after"] = after or []
+        self.results.append(record)
+        self.files.add(file)
+        self._account(text + "".join(c["text"] for c in before + (after or [])))
+
+    def add_raw_match(self, file: str, line: int, raw: bytes, spans: List[Tuple[int, int]],
+                      before: List[Tuple[int, bytes]], after: List[Tuple[int, bytes]]) -> None:
+        """Add a fallback_search match (line bytes and byte offsets)"""
+        raw_line = None if raw.isascii() else raw
+        self.add_match(
+            file, line, _decode_line(raw),
+            [[_char_offset(raw_line, start), _char_offset(raw_line, end)] for start, end in spans],
+            before=[{"line": n, "text": _clip_line(_decode_line(t), [])[0]} for n, t in before],
+            after=[{"line": n, "text": _clip_line(_decode_line(t), [])[0]} for n, t in after],
+        )
+
+    def add_context(self, file: str, line: int, text: str) -> None:
+        text, _ = _clip_line(text, [])
+        last = self.results[-1] if self.results else None
+        if last is not None and last["file"] == file and 0 < line - last["line"] <= self.context_lines:
+            last["after"].append({"line": line, "text": text})
+            self.bytes += len(text)
+        self._before.append((file, line, text))
+        del self._before[:-self.context_lines or len(self._before)]
+
+    def feed_json(self, raw: bytes) -> None:
+        """Consume one `rg --json` line"""
+        if raw.startswith((b'{"type":"begin"', b'{"type":"end"')):
+            return
+        event = json.loads(raw)
+        if event.get("type") not in ("match", "context"):
+            return
+        data = event["data"]
+        file = _rg_text(data["path"])
+        line = data.get("line_number") or 0
+        text = _rg_text(data["lines"]).rstrip("\r\n")
+        if event["type"] == "match":
+            # rg reports byte offsets into the original line
+            lines = data["lines"]
+            if "bytes" in lines:
+                raw_line: Optional[bytes] = base64.b64decode(lines["bytes"])
+            else:
+                raw_line = None if text.isascii() else text.encode("utf-8")
+            submatches = [
+                [_char_offset(raw_line, m["start"]), _char_offset(raw_line, m["end"])]
+                for m in data.get("submatches", [])
+            ]
+            self.add_match(file, line, text, submatches)
+        else:
+            self.add_context(file, line, text)
+
+    @property
+    def has_new(self) -> bool:
+        return len(self.results) > self._sent
+
+    def take_new(self) -> List[Dict[str, Any]]:
+        """Records not yet reported as partial results"""
+        new = self.results[self._sent:]
+        self._sent = len(self.results)
+        return new
+
+    def take_partial(self, now: float) -> Optional[List[Dict[str, Any]]]:
+        """New records to report now: the first at once, later ones batched"""
+        if not self.has_new:
+            return None
+        if self._last_partial is not None and now - self._last_partial < PARTIAL_RESULTS_INTERVAL_SEC:
+            return None
+        self._last_partial = now
+        return self.take_new()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "results": self.results,
+            "match_count": len(self.results),
+            "file_count": len(self.files),
+            "truncated": self.full,
+            "stop_reason": self.stop_reason,
+        }
+
+
+def _rg_text(value: Dict[str, Any]) -> str:
+    """rg --json encodes non-UTF-8 data as base64 "bytes" instead of "text" """
+    if "text" in value:
+        return value["text"]
+    return base64.b64decode(value.get("bytes", "")).decode("utf-8", errors="replace")
+
+
+def _decode_line(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def _char_offset(raw_line: Optional[bytes], byte_offset: int) -> int:
+    if raw_line is None:
+        return byte_offset
+    return len(raw_line[:byte_offset].decode("utf-8", errors="replace"))
+
+
+def _clip_line(text: str, submatches: List[List[int]]) -> Tuple[str, List[List[int]]]:
+    """Keep very long (e.g. minified) lines to a window around the first match"""
+    if len(text) <= MAX_LINE_CHARS:
+        return text, submatches
+    start = max(0, submatches[0][0] - MAX_LINE_CHARS // 4) if submatches else 0
+    end = start + MAX_LINE_CHARS
+    clipped = [[max(s, start) - start, min(e, end) - start] for s, e in submatches if s < end]
+    prefix = "…" if start else ""
+    shift = len(prefix)
+    return prefix + text[start:end] + "…", [[s + shift, e + shift] for s, e in clipped]
+
+
+def _stream_ripgrep(
+    cmd: List[str],
+    cwd: str,
+    collector: SearchCollector,
+    timeout_sec: float,
+    cancel_token: Optional[CancelToken],
+    progress: Optional[ProgressCallback],
+    partial_results: bool
+) -> Tuple[int, bool, str]:
+    """
+    Run rg --json and parse its output as it arrives.
+
+    rg is killed as soon as the collector is full. New matches are sent
+    as progress notifications (partial=...) when partial_results is set.
+
+    Returns:
+        (returncode, timed_out, stderr)
+    """
+    if cancel_token is not None and cancel_token.cancelled:
+        raise ToolCancelled(cmd[0])
+
+    # Security: Never use shell=True. rg searches stdin instead of cwd when
+    # stdin is a pipe (as it is under the stdio transport), so close it.
+    process = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=False)
+    stderr = OutputCapture(inline_bytes=4096, max_bytes=4096)
+    stderr_reader = threading.Thread(target=stderr.feed, args=(process.stderr,), daemon=True)
+    stderr_reader.start()
+    if cancel_token is not None:
+        cancel_token.attach(process)
+
+    start = time.monotonic()
+    finished = threading.Event()
+    timed_out = threading.Event()
+
+    def watchdog() -> None:
+        # Enforces the timeout and reports progress while rg is quiet
+        while not finished.wait(PROGRESS_INTERVAL_SEC):
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout_sec:
+                timed_out.set()
+                _kill(process)
+                return
+            if progress is not None:
+                progress(len(collector.results), None,
+                         f"{len(collector.results)} matches after {elapsed:.0f}s")
+
+    watcher = threading.Thread(target=watchdog, daemon=True)
+    watcher.start()
+    try:
+        for raw in process.stdout:
+            collector.feed_json(raw)
+            if collector.full:
+                # Enough results: stop rg instead of reading the rest
+                _kill(process)
+                break
+            if partial_results and progress is not None:
+                _report_partial(collector, progress)
+        process.stdout.close()
+        process.wait()
+    finally:
+        finished.set()
+        watcher.join()
+        stderr_reader.join()
+        process.stderr.close()
+        if cancel_token is not None:
+            cancel_token.detach()
+
+    if cancel_token is not None and cancel_token.cancelled:
+        raise ToolCancelled(cmd[0])
+    error_text = stderr.text()
+    stderr.close()
+    return process.returncode, timed_out.is_set(), error_text
+
+
+def _report_partial(collector: SearchCollector, progress: ProgressCallback) -> None:
+    new = collector.take_partial(time.monotonic())
+    if new:
+        progress(len(collector.results), collector.max_results, f"{len(collector.results)} matches", partial=new)
+
+
+def _python_search(
+    regex: "re.Pattern[str]",
+    search_path: str,
+    glob: str,
+    collector: SearchCollector,
+    timeout_sec: float,
+    cancel_token: Optional[CancelToken],
+    progress: Optional[ProgressCallback],
+    partial_results: bool,
+    files: Optional[List[fallback_search.FileEntry]] = None
+) -> bool:
+    """Search with fallback_search when rg is missing; returns True on timeout"""
+    start = last_report = time.monotonic()
+    scan = fallback_search.search(
+        regex, search_path, glob, collector.context_lines, collector.max_results, files=files
+    )
+    try:
+        for files_scanned, matches in scan:
+            for match in matches:
+                collector.add_raw_match(*match)
+                if collector.full:
+                    return False
+            if cancel_token is not None and cancel_token.cancelled:
+                raise ToolCancelled("ripgrep_search")
+            if partial_results and progress is not None:
+                _report_partial(collector, progress)
+            now = time.monotonic()
+            if now - start >= timeout_sec:
+                return True
+            if progress is not None and now - last_report >= PROGRESS_INTERVAL_SEC:
+                last_report = now
+                progress(files_scanned, None, f"{files_scanned} files scanned, {len(collector.results)} matches")
+    finally:
+        # Cancels batches still queued on the worker pool
+        scan.close()
+    return False
+
+
+def _rg_command(query: str, context_lines: int, glob: str,
+                files: Optional[List[fallback_search.FileEntry]]) -> List[str]:
+    cmd = ["rg", query, "-C", str(context_lines), "--json"]
+    # rg -g overrides ignore rules, so "*" would search .git and ignored
+    # build output; only pass real filters
+    if files is not None:
+        # Candidates are already filtered by glob and ignore rules
+        cmd += ["--"] + [rel for _, rel in files]
+    elif glob != "*":
+        cmd += ["-g", glob]
+    return cmd
+
 
 def ripgrep_search(
     query: str,
     path: str = ".",
     glob: str = "*",
-    context_lines: int = 2
+    context_lines: int = 2,
+    cancel_token: Optional[CancelToken] = None,
+    progress: Optional[ProgressCallback] = None,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    max_bytes: Optional[int] = None,
+    timeout_sec: float = 30,
+    partial_results: bool = False,
+    index: Optional["CodeIndex"] = None
 ) -> Dict[str, Any]:
     """
     Search using ripgrep (rg) with Python fallback.
 
+    rg --json output is parsed as it streams in, and rg is stopped as
+    soon as max_results matches or max_bytes of matched text have been
+    collected, so the cost of a broad query is bounded by the limits
+    rather than the size of the repository. Without rg, fallback_search
+    gives the same results (Unicode regex, ignore files, binary
+    detection) for the syntax Python's re shares with rg.
+    With a built code index, only the files it reports as candidates
+    are searched (by rg when their paths fit in MAX_RG_ARGV_BYTES).
+
     Args:
         query: Search pattern
         path: Directory to search (default: current)
         glob: File pattern (default: *)
         context_lines: Number of context lines (default: 2)
+        cancel_token: Optional token; cancelling kills the search
+        progress: Optional callback for periodic progress updates
+        max_results: Stop after this many matches (default: 200)
+        max_bytes: Stop after this much matched text (default: MCP_OUTPUT_INLINE_BYTES)
+        timeout_sec: Return what was found so far after this long (default: 30)
+        partial_results: Also send new matches with progress updates
+        index: Optional CodeIndex of the workspace to narrow the search
 
     Returns:
-        Dict with search results and return code
+        Dict with structured results (see SearchCollector), match and
+        file counts, truncated/stop_reason and return code (plus index
+        stats when the index narrowed the search)
     """
+    collector = SearchCollector(
+        context_lines, max_results, max_bytes if max_bytes is not None else inline_bytes_from_env()
+    )
+    start = time.monotonic()
+
+    files = None
+    index_stats = None
+    if index is not None:
+        narrowed = index.candidates(query, path, glob)
+        if narrowed is not None:
+            files = narrowed.pop("files")
+            index_stats = narrowed
+            if not files:
+                result = collector.summary()
+                result.update(returncode=0, elapsed_ms=round((time.monotonic() - start) * 1000, 1),
+                              index=index_stats)
+                return result
+
     # Check if ripgrep is available
     rg_available = shutil.which("rg") is not None
 
     if rg_available:
+        if files is not None and sum(len(os.fsencode(rel)) + 1 for _, rel in files) > MAX_RG_ARGV_BYTES:
+            files = index_stats = None
         try:
-            cmd = [
-                "rg",
-                query,
-                "-g", glob,
-                "-C", str(context_lines),
-                "--json"
-            ]
-            result = subprocess.run(
-                cmd,
-                cwd=path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return {
-                "results": result.stdout,
-                "returncode": result.returncode
-            }
-        except subprocess.TimeoutExpired:
+            try:
+                returncode, timed_out, error_text = _stream_ripgrep(
+                    _rg_command(query, context_lines, glob, files),
+                    path, collector, timeout_sec, cancel_token, progress, partial_results
+                )
+            except OSError:
+                # e.g. E2BIG: the candidate list did not fit; search everything instead
+                if files is None or collector.results:
+                    raise
+                files = index_stats = None
+                returncode, timed_out, error_text = _stream_ripgrep(
+                    _rg_command(query, context_lines, glob, None),
+                    path, collector, timeout_sec, cancel_token, progress, partial_results
+                )
+        except ToolCancelled:
             return {
-                "error": "ripgrep search timed out",
-                "returncode": -1
+                "error": "ripgrep search cancelled",
+                "returncode": -1,
+                "cancelled": True
             }
         except Exception as e:
             return {
                 "error": str(e),
                 "returncode": -1
             }
+        # Every file filtered out (e.g. all ignored) is an empty result, not an error
+        nothing_searched = returncode == 2 and "No files were searched" in error_text
+        if returncode == 2 and not collector.results and not timed_out and not nothing_searched:
+            return {
+                "error": error_text.strip() or "ripgrep failed",
+                "returncode": 2
+            }
+        result = collector.summary()
+        if timed_out and not collector.full:
+            result.update(truncated=True, stop_reason="timeout")
+        # 1 = no matches; stopping rg early is not a failure
+        ok = returncode in (0, 1) or nothing_searched or collector.full or timed_out
+        result["returncode"] = 0 if ok else returncode
+        result["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+        if index_stats is not None:
+            result["index"] = index_stats
+        return result
     else:
-        # Python fallback using pathlib and basic string search
+        # Python fallback: rg's Unicode matching, ignore rules and result format
         try:
-            search_path = Path(path)
-            results = []
-
-            # Recursively find matching files
-            for file_path in search_path.rglob(glob):
-                if file_path.is_file():
-                    try:
-                        content = file_path.read_text(encoding="utf-8", errors="ignore")
-                        lines = content.split("\n")
-
-                        # Find matching lines
-                        for i, line in enumerate(lines):
-                            if query.lower() in line.lower():
-                                # Get context lines
-                                start = max(0, i - context_lines)
-                                end = min(len(lines), i + context_lines + 1)
-
-                                context = "\n".join(
-                                    f"{j + 1}:{lines[j]}" for j in range(start, end)
-                                )
-
-                                results.append({
-                                    "file": str(file_path),
-                                    "line": i + 1,
-                                    "context": context
-                                })
-                    except Exception:
-                        # Skip files that can't be read
-                        continue
-
+            regex = fallback_search.compile_query(query)
+        except re.error as e:
+            return {
+                "error": f"regex parse error: {e}",
+                "returncode": 2
+            }
+        try:
+            timed_out = _python_search(
+                regex, path, glob, collector, timeout_sec, cancel_token, progress, partial_results, files
+            )
+        except ToolCancelled:
             return {
-                "results": str(results),
-                "returncode": 0,
-                "fallback": "python"
+                "error": "ripgrep search cancelled",
+                "returncode": -1,
+                "cancelled": True
             }
         except Exception as e:
             return {
                 "error": str(e),
                 "returncode": -1
             }
+        result = collector.summary()
+        if timed_out and not collector.full:
+            result.update(truncated=True, stop_reason="timeout")
+        result["returncode"] = 0
+        result["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+        result["fallback"] = "python"
+        if index_stats is not None:
+            result["index"] = index_stats
+        return result
 
 
 def run_cmd(
     cmd: List[str],
     cwd: str,
     sandbox: PathSandbox,
-    timeout_sec: int = 60
+    timeout_sec: int = 60,
+    cancel_token: Optional[CancelToken] = None,
+    progress: Optional[ProgressCallback] = None,
+    output_store: Optional[OutputStore] = None
 ) -> Dict[str, Any]:
     """
     Run an allowed command with sandboxing and timeout.
@@ -242,9 +902,13 @@ def run_cmd(
         cwd: Working directory (must be within sandbox)
         sandbox: PathSandbox instance for validation
         timeout_sec: Timeout in seconds (default: 60)
+        cancel_token: Optional token; cancelling kills the process
+        progress: Optional callback for periodic progress updates
+        output_store: Where stdout beyond the inline cap is kept for continue_output
 
     Returns:
-        Dict with stdout, stderr, and return code
+        Dict with stdout, stderr, and return code (stderr is cut at the
+        inline cap without continuation)
     """
     # Security: Check command is allowed
     if not cmd:
@@ -272,25 +936,25 @@ def run_cmd(
 
     # Execute command safely (no shell=True)
     try:
-        result = subprocess.run(
-            cmd,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_sec,
-            # Security: Never use shell=True
-            shell=False
-        )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode
-        }
+        returncode, stdout, stderr = _run_process(cmd, cwd, timeout_sec, cancel_token, progress)
+        result = capped_output(stdout, "stdout", output_store)
+        result["stderr"] = stderr.text()
+        if stderr.truncated:
+            result["stderr_truncated"] = True
+        stderr.close()
+        result["returncode"] = returncode
+        return result
     except subprocess.TimeoutExpired:
         return {
             "error": f"Command timed out after {timeout_sec} seconds",
             "returncode": -1
         }
+    except ToolCancelled:
+        return {
+            "error": "Command cancelled",
+            "returncode": -1,
+            "cancelled": True
+        }
     except Exception as e:
         return {
             "error": str(e),
@@ -0,0 +1,434 @@
+"""
+Fallback Search - Python search engine for ripgrep_search without rg
+
+Mirrors rg's defaults closely enough that results do not depend on
+whether rg is installed: the query is a (case-sensitive) regular
+expression, hidden files and anything matched by .gitignore (inside a
+git repository) or .ignore files are skipped, files with a NUL byte in
+their first 64 KiB are treated as binary and skipped, and symlinks are
+not followed.
+
+Files are decoded as UTF-8 (invalid bytes are kept as surrogates) and
+matched with a str regex, so word and space classes, ".", (?i) and hex
+escapes follow Unicode rules as in rg. Offsets are mapped back to
+bytes, and a file is only split into lines where it matches. Syntax
+only rg's regex engine has (Unicode property classes, for instance) is
+reported as a parse error. Larger trees are scanned in batches on a
+process pool (MCP_SEARCH_WORKERS, default: CPU count) that is started
+once and reused; batches are consumed in order so results are
+deterministic, and pending batches are cancelled as soon as the caller
+stops iterating.
+"""
+
+import atexit
+import fnmatch
+import os
+import re
+import threading
+from collections import deque
+from itertools import chain
+from typing import Any, Iterator, List, Optional, Pattern, Tuple
+
+# rg looks for NUL in the first block it reads
+BINARY_SNIFF_BYTES = 64 * 1024
+IGNORE_FILES = (".gitignore", ".ignore")
+# Files per pool task
+BATCH_FILES = 64
+# How long to wait on a batch before yielding control back to the caller
+WAIT_SLICE_SEC = 0.25
+
+# (line, raw line bytes)
+ContextLine = Tuple[int, bytes]
+# (file, line, raw line bytes, [(start, end) byte offsets], before, after)
+RawMatch = Tuple[str, int, bytes, List[Tuple[int, int]], List[ContextLine], List[ContextLine]]
+# (path, path relative to the search root)
+FileEntry = Tuple[str, str]
+
+_pool: Any = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def workers_from_env() -> int:
+    return max(1, int(os.environ.get("MCP_SEARCH_WORKERS", 0)) or os.cpu_count() or 1)
+
+
+def compile_query(query: str) -> Pattern[str]:
+    """Compile a search pattern; raises re.error like rg's regex parse error"""
+    return re.compile(query, re.MULTILINE)
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _byte_offset(text: str, index: int) -> int:
+    return index if text.isascii() else len(_encode(text[:index]))
+
+
+def _translate(pattern: str) -> str:
+    """gitignore glob -> regex over '/'-separated relative paths"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern[i] == "*":
+            parts.append(".*" if pattern.startswith("**", i) else "[^/]*")
+            i += 2 if pattern.startswith("**", i) else 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """Patterns from one directory's ignore files"""
+
+    def __init__(self, base: str, prefix: str = "") -> None:
+        # Path of the directory relative to the search root ("" for the root
+        # and its parents)
+        self.base = base
+        # Path from a parent directory down to the search root
+        self.prefix = prefix
+        # (regex, negated, directories only, matched against the name only)
+        self.rules: List[Tuple[Pattern[str], bool, bool, bool]] = []
+
+    def add_line(self, line: str) -> None:
+        line = line.rstrip("\n")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            return
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return
+        # A slash anywhere but the end anchors the pattern to this directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        self.rules.append((re.compile(_translate(line) + r"\Z"), negated, dir_only, not anchored))
+
+    @classmethod
+    def load(cls, directory: str, base: str, names: Tuple[str, ...],
+             prefix: str = "") -> Optional["IgnoreRules"]:
+        rules = cls(base, prefix)
+        for name in names:
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        rules.add_line(line)
+            except OSError:
+                continue
+        return rules if rules.rules else None
+
+    def match(self, rel: str, name: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included, None if no rule applies"""
+        local = self.prefix + (rel[len(self.base) + 1:] if self.base else rel)
+        result = None
+        for regex, negated, dir_only, name_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(name if name_only else local):
+                result = not negated
+        return result
+
+
+def _ignored(stack: List[IgnoreRules], rel: str, name: str, is_dir: bool) -> bool:
+    # The deepest ignore file with a matching rule decides
+    for rules in reversed(stack):
+        verdict = rules.match(rel, name, is_dir)
+        if verdict is not None:
+            return verdict
+    return False
+
+
+def _root_rules(root: str) -> Tuple[Tuple[str, ...], List[IgnoreRules]]:
+    """
+    Ignore files that apply to the search root.
+
+    Like rg, .gitignore is only honoured inside a git repository, and the
+    ignore files of parent directories up to the repository root (plus
+    .git/info/exclude) apply as well.
+    """
+    root = os.path.abspath(root)
+    chain_dirs = [root]
+    while not os.path.exists(os.path.join(chain_dirs[-1], ".git")):
+        parent = os.path.dirname(chain_dirs[-1])
+        if parent == chain_dirs[-1]:
+            # Not in a repository: only .ignore files count
+            rules = IgnoreRules.load(root, "", (".ignore",))
+            return (".ignore",), [rules] if rules else []
+        chain_dirs.append(parent)
+    stack = []
+    repo = chain_dirs[-1]
+    exclude = IgnoreRules(base="", prefix=os.path.relpath(root, repo) + "/" if root != repo else "")
+    try:
+        with open(os.path.join(repo, ".git", "info", "exclude"), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                exclude.add_line(line)
+    except OSError:
+        pass
+    if exclude.rules:
+        stack.append(exclude)
+    for directory in reversed(chain_dirs):
+        prefix = os.path.relpath(root, directory) + "/" if directory != root else ""
+        rules = IgnoreRules.load(directory, "", IGNORE_FILES, prefix)
+        if rules:
+            stack.append(rules)
+    return IGNORE_FILES, stack
+
+
+def glob_matches(glob: str, rel: str, name: str) -> bool:
+    # Like rg -g: globs without a slash match the file name
+    return fnmatch.fnmatchcase(rel if "/" in glob else name, glob)
+
+
+def walk_files(root: str, glob: str = "*") -> Iterator[FileEntry]:
+    """
+    Files under root that rg would search, in directory order.
+
+    As with rg -g, a glob other than "*" is an override: entries it
+    matches are searched even if hidden or ignored.
+    """
+    override = glob != "*"
+    names, root_stack = _root_rules(root)
+    pending: List[Tuple[str, str, List[IgnoreRules]]] = [(root, "", root_stack)]
+    while pending:
+        directory, rel_dir, stack = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            matched = glob_matches(glob, rel, name)
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not (override and matched) and (name.startswith(".") or _ignored(stack, rel, name, is_dir)):
+                    continue
+                if is_dir:
+                    subdirs.append((entry.path, rel))
+                    continue
+                if not matched or not entry.is_file(follow_symlinks=False):
+                    continue
+                yield entry.path, rel
+            except OSError:
+                continue
+        for path, rel in reversed(subdirs):
+            rules = IgnoreRules.load(path, rel, names)
+            pending.append((path, rel, stack + [rules] if rules else stack))
+
+
+def _context(text: str, line_start: int, line_end: int, line: int,
+             count: int) -> Tuple[List[ContextLine], List[ContextLine]]:
+    before: List[ContextLine] = []
+    start = line_start
+    while len(before) < count and start > 0:
+        prev = text.rfind("\n", 0, start - 1) + 1
+        before.append((line - len(before) - 1, _encode(text[prev:start - 1])))
+        start = prev
+    before.reverse()
+    after: List[ContextLine] = []
+    end = line_end
+    size = len(text)
+    while len(after) < count and end < size:
+        nxt = text.find("\n", end + 1)
+        nxt = size if nxt == -1 else nxt
+        if nxt == end + 1 and nxt == size:
+            break
+        after.append((line + len(after) + 1, _encode(text[end + 1:nxt])))
+        end = nxt
+    return before, after
+
+
+def _trim_context(results: List[RawMatch]) -> List[RawMatch]:
+    """Drop context lines that are matches themselves, as rg reports them"""
+    trimmed = []
+    previous = 0
+    for i, (rel, line, text, spans, before, after) in enumerate(results):
+        following = results[i + 1][1] if i + 1 < len(results) else None
+        before = [c for c in before if c[0] > previous]
+        if following is not None:
+            after = [c for c in after if c[0] < following]
+        trimmed.append((rel, line, text, spans, before, after))
+        previous = line
+    return trimmed
+
+
+def scan_file(path: str, rel: str, regex: Pattern[str], context_lines: int, limit: int) -> List[RawMatch]:
+    """Matching lines of one file (at most limit), empty for binary files"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if not data or data.find(b"\0", 0, BINARY_SNIFF_BYTES) != -1:
+        return []
+    text = data.decode("utf-8", "surrogateescape")
+    results: List[RawMatch] = []
+    line = 1
+    counted = 0
+    current_start = -1
+    current = ""
+    spans: List[Tuple[int, int]] = []
+    size = len(text)
+    for m in regex.finditer(text):
+        start = m.start()
+        if start == size and text.endswith("\n"):
+            # An empty match after the final newline is not a line
+            break
+        line_start = text.rfind("\n", 0, start) + 1
+        if line_start == current_start:
+            spans.append((_byte_offset(current, start - line_start), _byte_offset(current, m.end() - line_start)))
+            continue
+        if len(results) >= limit:
+            break
+        line += text.count("\n", counted, line_start)
+        counted = line_start
+        line_end = text.find("\n", start)
+        line_end = size if line_end == -1 else line_end
+        current_start = line_start
+        current = text[line_start:line_end]
+        spans = [(_byte_offset(current, start - line_start), _byte_offset(current, min(m.end(), line_end) - line_start))]
+        before, after = _context(text, line_start, line_end, line, context_lines) if context_lines else ([], [])
+        results.append((rel, line, _encode(current[:-1] if current.endswith("\r") else current), spans, before, after))
+    return _trim_context(results)
+
+
+def scan_batch(files: List[FileEntry], regex: Pattern[str], context_lines: int,
+               limit: int) -> List[RawMatch]:
+    """Pool task: scan files in order until limit matches are found"""
+    results: List[RawMatch] = []
+    for path, rel in files:
+        results.extend(scan_file(path, rel, regex, context_lines, limit - len(results)))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def worker_pool(workers: int) -> Any:
+    """Shared process pool, (re)started when the worker count changes"""
+    global _pool, _pool_workers
+    # Deferred: multiprocessing is only needed when the fallback runs in parallel
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # forkserver: forking a threaded server directly is unsafe
+            context = multiprocessing.get_context("forkserver")
+            if _pool is None:
+                atexit.register(shutdown_pool)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes (registered with atexit on first use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _batches(files: Iterator[FileEntry]) -> Iterator[List[FileEntry]]:
+    batch: List[FileEntry] = []
+    for entry in files:
+        batch.append(entry)
+        if len(batch) >= BATCH_FILES:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def search(
+    regex: Pattern[str],
+    root: str,
+    glob: str,
+    context_lines: int,
+    limit: int,
+    workers: Optional[int] = None,
+    files: Optional[List[FileEntry]] = None
+) -> Iterator[Tuple[int, List[RawMatch]]]:
+    """
+    Search a tree (or just the given files), yielding (files scanned so
+    far, new matches).
+
+    Yields at least every WAIT_SLICE_SEC (possibly with no matches) so
+    the caller can check cancellation, deadlines and report progress;
+    closing the iterator cancels outstanding work.
+    """
+    workers = workers or workers_from_env()
+    batches = _batches(iter(files) if files is not None else walk_files(root, glob))
+    first = next(batches, None)
+    if first is None:
+        return
+    second = next(batches, None)
+    all_batches = chain([first], [second] if second else [], batches)
+    scanned = 0
+    if workers <= 1 or second is None:
+        # Small tree or one CPU: a pool would only add overhead
+        for batch in all_batches:
+            for path, rel in batch:
+                scanned += 1
+                yield scanned, scan_file(path, rel, regex, context_lines, limit)
+        return
+
+    from concurrent.futures import wait
+
+    pool = worker_pool(workers)
+    in_flight: deque[Tuple[int, Any]] = deque()
+    window = workers * 2
+    try:
+        while True:
+            while len(in_flight) < window:
+                batch = next(all_batches, None)
+                if batch is None:
+                    break
+                in_flight.append((len(batch), pool.submit(scan_batch, batch, regex, context_lines, limit)))
+            if not in_flight:
+                return
+            count, future = in_flight[0]
+            done, _ = wait([future], timeout=WAIT_SLICE_SEC)
+            if not done:
+                yield scanned, []
+                continue
+            in_flight.popleft()
+            scanned += count
+            yield scanned, future.result()
+    finally:
+        for _, future in in_flight:
+            future.cancel()
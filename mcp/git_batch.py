@@ -0,0 +1,408 @@
+"""
+Git Batch - Persistent git cat-file processes for object reads
+
+Starting git costs milliseconds per call (tens on large repositories), so
+object reads go through long-lived `git cat-file --batch` (contents) and
+`git cat-file --batch-check` (type and size) processes instead: a read
+is one line written to the process and one response read back.
+
+Processes are pooled per repository, up to MCP_GIT_BATCH_WORKERS of each
+kind, and are handed to one request at a time. A process that fails
+(exits, breaks the pipe, garbles a response or times out) is killed and
+replaced, and the read is retried once if nothing was returned yet. A
+reaper thread stops processes idle for MCP_GIT_BATCH_IDLE_SEC, which also
+releases any pack files they still have mapped after a repack.
+
+cat-file resolves refs on every read, so new commits are seen at once.
+"""
+
+import atexit
+import os
+import select
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_WORKERS = 2
+DEFAULT_IDLE_SEC = 300.0
+# Longest wait for one response before the process is considered hung
+READ_TIMEOUT_SEC = 30.0
+READ_CHUNK_BYTES = 64 * 1024
+# Reaper wakes at least this often
+REAP_INTERVAL_SEC = 30.0
+
+BATCH = "--batch"
+BATCH_CHECK = "--batch-check"
+
+_pool: Optional["GitBatchPool"] = None
+_pool_lock = threading.Lock()
+
+
+def workers_from_env() -> int:
+    return max(1, int(os.environ.get("MCP_GIT_BATCH_WORKERS", DEFAULT_WORKERS)))
+
+
+def idle_sec_from_env() -> float:
+    return float(os.environ.get("MCP_GIT_BATCH_IDLE_SEC", DEFAULT_IDLE_SEC))
+
+
+class ObjectNotFound(LookupError):
+    """The object name did not resolve (missing or ambiguous)"""
+
+
+class BatchProcessError(RuntimeError):
+    """The cat-file process failed; it has been discarded"""
+
+
+class ObjectInfo(NamedTuple):
+    oid: str
+    type: str
+    size: int
+    # Object contents (--batch without a sink), otherwise None
+    data: Optional[bytes]
+
+
+class TreeEntry(NamedTuple):
+    mode: str
+    type: str
+    oid: str
+    path: str
+
+
+class CatFileProcess:
+    """One `git cat-file --batch[-check]` process; not thread-safe (the pool hands it out)"""
+
+    def __init__(self, top: str, mode: str) -> None:
+        self.top = top
+        self.mode = mode
+        # Security: Never use shell=True
+        self.process = subprocess.Popen(
+            ["git", "cat-file", mode],
+            cwd=top,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            shell=False,
+            bufsize=0,
+        )
+        self._fd = self.process.stdout.fileno()
+        self._buffer = bytearray()
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _fill(self, deadline: float) -> None:
+        remaining = deadline - time.monotonic()
+        try:
+            ready = remaining > 0 and select.select([self._fd], [], [], remaining)[0]
+            data = os.read(self._fd, READ_CHUNK_BYTES) if ready else None
+        except (OSError, ValueError) as e:
+            raise BatchProcessError(f"git cat-file {self.mode} pipe failed: {e}") from e
+        if data is None:
+            raise BatchProcessError(f"git cat-file {self.mode} did not answer within {READ_TIMEOUT_SEC:g}s")
+        if not data:
+            raise BatchProcessError(f"git cat-file {self.mode} exited")
+        self._buffer += data
+
+    def _readline(self, deadline: float) -> bytes:
+        while True:
+            end = self._buffer.find(b"\n")
+            if end != -1:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                return line
+            self._fill(deadline)
+
+    def _read_body(self, size: int, sink: Callable[[bytes], None], deadline: float) -> None:
+        remaining = size
+        while remaining:
+            if not self._buffer:
+                self._fill(deadline)
+            chunk = bytes(self._buffer[:remaining])
+            del self._buffer[:len(chunk)]
+            remaining -= len(chunk)
+            sink(chunk)
+        # Contents are followed by a LF
+        if not self._buffer:
+            self._fill(deadline)
+        if self._buffer[0] != 0x0A:
+            raise BatchProcessError("response longer than announced")
+        del self._buffer[:1]
+
+    def request(self, name: str, sink: Optional[Callable[[bytes], None]] = None,
+                delivered: Optional[List[int]] = None) -> ObjectInfo:
+        """
+        Look up one object. With --batch, contents go to sink in chunks
+        (or are returned in ObjectInfo.data without one); delivered[0]
+        counts the bytes handed to the sink.
+
+        Raises:
+            ObjectNotFound: If the name does not resolve to one object
+            BatchProcessError: If the process fails or times out
+        """
+        deadline = time.monotonic() + READ_TIMEOUT_SEC
+        try:
+            self.process.stdin.write(name.encode("utf-8") + b"\n")
+        except OSError as e:
+            raise BatchProcessError(f"git cat-file {self.mode} exited: {e}") from e
+        header = self._readline(deadline)
+        parts = header.split(b" ")
+        if len(parts) == 2 and parts[1] in (b"missing", b"ambiguous"):
+            self.last_used = time.monotonic()
+            raise ObjectNotFound(f"{name}: {parts[1].decode()}")
+        if len(parts) != 3 or not parts[2].isdigit():
+            raise BatchProcessError(f"unexpected response from git cat-file: {header[:200]!r}")
+        oid, kind, size = parts[0].decode(), parts[1].decode(), int(parts[2])
+        data = None
+        if self.mode == BATCH:
+            collected: List[bytes] = []
+
+            def deliver(chunk: bytes) -> None:
+                if sink is None:
+                    collected.append(chunk)
+                    return
+                if delivered is not None:
+                    delivered[0] += len(chunk)
+                sink(chunk)
+
+            self._read_body(size, deliver, deadline)
+            if sink is None:
+                data = b"".join(collected)
+        self.last_used = time.monotonic()
+        return ObjectInfo(oid, kind, size, data)
+
+    def close(self) -> None:
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class GitBatchPool:
+    """cat-file processes per repository, restarted on failure and reaped when idle"""
+
+    def __init__(self, workers: Optional[int] = None, idle_sec: Optional[float] = None) -> None:
+        self.workers = workers if workers is not None else workers_from_env()
+        self.idle_sec = idle_sec if idle_sec is not None else idle_sec_from_env()
+        self._idle: Dict[Tuple[str, str], List[CatFileProcess]] = defaultdict(list)
+        self._busy: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._cond = threading.Condition()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._closed = False
+        self.started = 0
+        self.restarts = 0
+        self.reaped = 0
+        self.requests = 0
+
+    def _acquire(self, key: Tuple[str, str]) -> CatFileProcess:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise BatchProcessError("pool is closed")
+                idle = self._idle[key]
+                while idle:
+                    process = idle.pop()
+                    if process.alive:
+                        self._busy[key] += 1
+                        return process
+                    process.close()
+                if self._busy[key] < self.workers:
+                    self._busy[key] += 1
+                    break
+                self._cond.wait()
+        try:
+            process = CatFileProcess(key[0], key[1])
+        except BaseException:
+            with self._cond:
+                self._busy[key] -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.started += 1
+            self._start_reaper()
+        return process
+
+    def _release(self, key: Tuple[str, str], process: CatFileProcess, healthy: bool) -> None:
+        with self._cond:
+            self._busy[key] -= 1
+            if healthy and not self._closed:
+                self._idle[key].append(process)
+                process = None
+            self._cond.notify()
+        if process is not None:
+            process.close()
+
+    def read(self, top: str, name: str, sink: Optional[Callable[[bytes], None]] = None,
+             check: bool = False) -> ObjectInfo:
+        """
+        Read one object through a pooled process of the repository at top.
+
+        Args:
+            top: Working tree root of the repository
+            name: Object name as cat-file takes it (oid, ref, "<rev>:<path>")
+            sink: Receives the contents in chunks instead of ObjectInfo.data
+            check: Type and size only (--batch-check)
+
+        Raises:
+            ObjectNotFound: If the name does not resolve
+            BatchProcessError: If git failed twice or the pipe broke mid-object
+        """
+        if "\n" in name or "\0" in name:
+            raise ObjectNotFound(f"{name!r}: invalid object name")
+        key = (top, BATCH_CHECK if check else BATCH)
+        with self._cond:
+            self.requests += 1
+        retried = False
+        while True:
+            process = self._acquire(key)
+            delivered = [0]
+            try:
+                info = process.request(name, sink, delivered)
+            except ObjectNotFound:
+                self._release(key, process, healthy=True)
+                raise
+            except BatchProcessError:
+                self._release(key, process, healthy=False)
+                # Retry on a fresh process unless the caller already has part of the object
+                if retried or delivered[0]:
+                    raise
+                retried = True
+                with self._cond:
+                    self.restarts += 1
+                continue
+            except BaseException:
+                self._release(key, process, healthy=False)
+                raise
+            self._release(key, process, healthy=True)
+            return info
+
+    def ls_tree(self, top: str, tree: str, prefix: str = "", recursive: bool = False,
+                limit: Optional[int] = None,
+                should_stop: Optional[Callable[[], bool]] = None) -> Iterator[TreeEntry]:
+        """
+        Entries of a tree in git ls-tree order, with paths under prefix.
+        Recursive listings descend into subtrees and, like ls-tree -r,
+        yield only their files.
+
+        Raises:
+            ObjectNotFound: If tree does not name a tree
+        """
+        root = self.read(top, tree)
+        if root.type != "tree":
+            raise ObjectNotFound(f"{tree}: is a {root.type}, not a tree")
+        oid_bytes = len(root.oid) // 2
+        # Depth-first: one entry iterator per tree being listed
+        pending = [_parse_tree(root.data, oid_bytes, prefix)]
+        yielded = 0
+        while pending:
+            entry = next(pending[-1], None)
+            if entry is None:
+                pending.pop()
+                continue
+            if recursive and entry.type == "tree":
+                if should_stop is not None and should_stop():
+                    return
+                subtree = self.read(top, entry.oid)
+                pending.append(_parse_tree(subtree.data, oid_bytes, entry.path + "/"))
+                continue
+            yield entry
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+    def _start_reaper(self) -> None:
+        # Caller holds self._cond
+        if self._reaper is None and self.idle_sec > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, name="git-batch-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = min(REAP_INTERVAL_SEC, max(self.idle_sec / 2, 0.05))
+        while not self._stop.wait(interval):
+            self.reap()
+            with self._cond:
+                if not self._idle and not any(self._busy.values()):
+                    # Nothing to watch: the next process started restarts the reaper
+                    self._reaper = None
+                    return
+
+    def reap(self, idle_sec: Optional[float] = None) -> int:
+        """Stop processes unused for idle_sec (default: the pool's); returns how many"""
+        limit = time.monotonic() - (self.idle_sec if idle_sec is None else idle_sec)
+        stale: List[CatFileProcess] = []
+        with self._cond:
+            for key, idle in list(self._idle.items()):
+                keep = [p for p in idle if p.last_used > limit and p.alive]
+                stale.extend(p for p in idle if p not in keep)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+            self.reaped += len(stale)
+        for process in stale:
+            process.close()
+        return len(stale)
+
+    def close(self) -> None:
+        """Stop every process; reads fail afterwards"""
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            processes = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for process in processes:
+            process.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "processes": sum(len(idle) for idle in self._idle.values()) + sum(self._busy.values()),
+                "started": self.started,
+                "restarts": self.restarts,
+                "reaped": self.reaped,
+                "requests": self.requests,
+            }
+
+
+def _parse_tree(data: bytes, oid_bytes: int, prefix: str) -> Iterator[TreeEntry]:
+    """Entries of a raw tree object: "<mode> <name>\\0<binary oid>" each"""
+    pos = 0
+    size = len(data)
+    while pos < size:
+        space = data.index(b" ", pos)
+        nul = data.index(b"\0", space)
+        mode = data[pos:space].decode("ascii")
+        path = prefix + os.fsdecode(data[space + 1:nul])
+        oid = data[nul + 1:nul + 1 + oid_bytes].hex()
+        pos = nul + 1 + oid_bytes
+        if mode == "40000":
+            yield TreeEntry("040000", "tree", oid, path)
+        elif mode == "160000":
+            yield TreeEntry(mode, "commit", oid, path)
+        else:
+            yield TreeEntry(mode, "blob", oid, path)
+
+
+def shared_pool() -> GitBatchPool:
+    """Process-wide pool used by the git tools (closed at exit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GitBatchPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,397 @@
+"""
+Git Cache - Result cache for git_status, git_diff and git_show
+
+Agents call the git tools repeatedly while the repository does not
+change, so results are cached in memory (LRU, bounded by entry count and
+bytes) under a key describing the repository state they depend on:
+
+- git_show of a ref: the object id the ref resolves to. Commits never
+  change, so these entries stay valid until evicted.
+- git_diff of a ref: the resolved ref, HEAD, the .git/index stat and a
+  fingerprint of the working tree (lstat of every tracked file).
+- git_status: HEAD, the index stat and the working-tree fingerprint
+  plus the directories holding tracked files, .git/info/exclude and the
+  untracked entries of the cached result, so added files invalidate it.
+
+Refs are resolved by reading HEAD, loose refs and packed-refs directly,
+so computing a key forks no process; the tracked-file list comes from
+`git ls-files` once per index change. A git_show hit costs a few small
+file reads; a git_status/git_diff hit still stats every tracked file
+(the pass git itself makes), but skips the process, the diff and the
+untracked-file scan; above MAX_FINGERPRINT_FILES that is no cheaper
+than git, so those calls are not cached. Anything that cannot be resolved
+this way (rev expressions like HEAD~2, abbreviated ids, reftable,
+submodules) is not cached either. Truncated outputs and failures are never
+cached.
+"""
+
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Beyond this many tracked files, stat'ing them all costs about as much as
+# running git, so git_status/git_diff are not cached
+MAX_FINGERPRINT_FILES = 5_000
+# Symbolic refs followed before giving up (ref: ref: ...)
+MAX_REF_DEPTH = 5
+
+_OID = re.compile(r"\A(?:[0-9a-f]{40}|[0-9a-f]{64})\Z")
+# Plain ref names only: no rev expressions (~ ^ : @{ ..) or globs
+_REF_NAME = re.compile(r"\A(?!.*\.\.)(?!/)[A-Za-z0-9._/-]+(?<![./])\Z")
+# Only pseudo refs (HEAD, FETCH_HEAD, ...) are read from the top of $GIT_DIR
+_PSEUDO_REF = re.compile(r"\A[A-Z_]+\Z")
+GITLINK_MODE = b"160000"
+
+# (mtime_ns, ctime_ns, size, inode); None when the path is missing
+StatSignature = Optional[Tuple[int, int, int, int]]
+
+
+def _signature(path: Union[str, bytes]) -> StatSignature:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino
+
+
+def max_bytes_from_env() -> int:
+    return int(os.environ.get("MCP_GIT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+def max_entries_from_env() -> int:
+    return int(os.environ.get("MCP_GIT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+
+class Repository:
+    """Read-only view of one repository's refs, index and working tree"""
+
+    def __init__(self, top: str, git_dir: str, common_dir: str) -> None:
+        self.top = top
+        self.git_dir = git_dir
+        # Shared refs of linked worktrees live in the main repository
+        self.common_dir = common_dir
+        self._lock = threading.Lock()
+        self._packed: Tuple[StatSignature, Dict[str, str]] = (None, {})
+        # (index signature, tracked files, their directories)
+        self._tracked: Tuple[StatSignature, Optional[List[bytes]], List[bytes]] = (None, None, [])
+
+    @classmethod
+    def find(cls, cwd: str) -> Optional["Repository"]:
+        directory = os.path.realpath(cwd)
+        while True:
+            dot_git = os.path.join(directory, ".git")
+            if os.path.isdir(dot_git):
+                return cls(directory, dot_git, dot_git)
+            if os.path.isfile(dot_git):
+                # Linked worktree or submodule: "gitdir: <path>"
+                try:
+                    with open(dot_git, encoding="utf-8") as f:
+                        line = f.readline().strip()
+                except OSError:
+                    return None
+                if not line.startswith("gitdir: "):
+                    return None
+                git_dir = os.path.join(directory, line[len("gitdir: "):])
+                common_dir = git_dir
+                try:
+                    with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+                        common_dir = os.path.join(git_dir, f.read().strip())
+                except OSError:
+                    pass
+                return cls(directory, os.path.normpath(git_dir), os.path.normpath(common_dir))
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    def _packed_refs(self) -> Dict[str, str]:
+        path = os.path.join(self.common_dir, "packed-refs")
+        signature = _signature(path)
+        with self._lock:
+            cached_signature, refs = self._packed
+            if cached_signature == signature:
+                return refs
+        refs = {}
+        if signature is not None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.startswith(("#", "^")):
+                            continue
+                        oid, _, name = line.rstrip("\n").partition(" ")
+                        refs[name] = oid
+            except OSError:
+                refs = {}
+        with self._lock:
+            self._packed = (signature, refs)
+        return refs
+
+    def _read_ref(self, name: str, depth: int = 0) -> Optional[str]:
+        if depth > MAX_REF_DEPTH:
+            return None
+        base = self.git_dir if "/" not in name else self.common_dir
+        try:
+            with open(os.path.join(base, name), encoding="utf-8") as f:
+                content = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            return self._packed_refs().get(name)
+        if content.startswith("ref: "):
+            return self._read_ref(content[len("ref: "):], depth + 1)
+        return content if _OID.match(content) else None
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Object id of a full object id or ref name, as git rev-parse would pick it"""
+        if _OID.match(ref):
+            return ref
+        if not _REF_NAME.match(ref):
+            return None
+        names = [f"refs/{ref}", f"refs/tags/{ref}", f"refs/heads/{ref}",
+                 f"refs/remotes/{ref}", f"refs/remotes/{ref}/HEAD"]
+        if _PSEUDO_REF.match(ref):
+            names.insert(0, ref)
+        elif ref.startswith("refs/"):
+            names.insert(0, ref)
+        for name in names:
+            oid = self._read_ref(name)
+            if oid is not None:
+                return oid
+        return None
+
+    def index_signature(self) -> StatSignature:
+        return _signature(os.path.join(self.git_dir, "index"))
+
+    def tracked_files(self) -> Optional[List[bytes]]:
+        """
+        Absolute paths of the files in the index, or None if it holds a
+        submodule (its working tree is not fingerprinted).
+        """
+        signature = self.index_signature()
+        with self._lock:
+            cached_signature, files, _ = self._tracked
+            if cached_signature is not None and cached_signature == signature:
+                return files
+        try:
+            completed = subprocess.run(
+                ["git", "-C", self.top, "ls-files", "-z", "--stage"],
+                stdin=subprocess.DEVNULL, capture_output=True, timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if completed.returncode != 0:
+            return None
+        top = os.fsencode(self.top) + b"/"
+        files: Optional[List[bytes]] = []
+        directories = {b""}
+        for entry in completed.stdout.split(b"\0"):
+            if not entry:
+                continue
+            meta, _, path = entry.partition(b"\t")
+            if meta.startswith(GITLINK_MODE):
+                files = None
+                break
+            files.append(top + path)
+            # Every ancestor, so a new file anywhere above a tracked one changes a mtime
+            directory = os.path.dirname(path)
+            while directory not in directories:
+                directories.add(directory)
+                directory = os.path.dirname(directory)
+        with self._lock:
+            self._tracked = (signature, files, sorted(top + d for d in directories))
+        return files
+
+    def worktree_fingerprint(self, directories: bool = False) -> Optional[int]:
+        """
+        Hash of the lstat signatures of all tracked files (and, for
+        status, of the directories containing them); None if the
+        working tree cannot be fingerprinted.
+        """
+        files = self.tracked_files()
+        if files is None or len(files) > MAX_FINGERPRINT_FILES:
+            return None
+        with self._lock:
+            dirs = self._tracked[2]
+        # One lstat per file, the same pass git makes to find modified files
+        signatures: List[Any] = [_signature(path) for path in files]
+        # Settings like diff.renames or status.showUntrackedFiles change the output
+        signatures.append(_signature(os.path.join(self.common_dir, "config")))
+        if directories:
+            signatures.extend(_signature(path) for path in dirs)
+            signatures.append(_signature(os.path.join(self.common_dir, "info", "exclude")))
+        return hash(tuple(signatures))
+
+
+class _Entry:
+    __slots__ = ("result", "size", "checks")
+
+    def __init__(self, result: Dict[str, Any], size: int, checks: List[Tuple[str, StatSignature]]) -> None:
+        self.result = result
+        self.size = size
+        # Extra paths that must still have the same lstat signature
+        self.checks = checks
+
+
+def _result_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(k) + _result_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_result_size(v) for v in value)
+    return 8
+
+
+def untracked_paths(status: str) -> Optional[List[str]]:
+    """Untracked entries (repository-relative) in `git status --porcelain` output; None if quoted"""
+    paths = []
+    for line in status.splitlines():
+        if line.startswith("?? "):
+            path = line[3:]
+            if path.startswith('"'):
+                return None
+            paths.append(path.rstrip("/"))
+    return paths
+
+
+class GitCache:
+    """LRU cache of git tool results keyed on repository state"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.max_entries = max_entries_from_env() if max_entries is None else max_entries
+        self.max_bytes = max_bytes_from_env() if max_bytes is None else max_bytes
+        self._entries: OrderedDict[Tuple[Any, ...], _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._repositories: Dict[str, Optional[Repository]] = {}
+        # tool -> [hits, misses, bypassed]
+        self._counts: Dict[str, List[int]] = {}
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_entries > 0
+
+    def repository(self, cwd: str) -> Optional[Repository]:
+        with self._lock:
+            if cwd in self._repositories:
+                return self._repositories[cwd]
+        repository = Repository.find(cwd)
+        with self._lock:
+            return self._repositories.setdefault(cwd, repository)
+
+    def key(self, tool: str, cwd: str, ref: Optional[str] = None) -> Optional[Tuple[Any, ...]]:
+        """Cache key for a call in the current repository state; None if uncacheable"""
+        repository = self.repository(cwd)
+        if repository is None:
+            return None
+        if tool == "git_show":
+            oid = repository.resolve(ref or "HEAD")
+            return None if oid is None else (tool, repository.top, cwd, oid)
+        head = repository.resolve("HEAD")
+        if head is None:
+            return None
+        target = None
+        if tool == "git_diff":
+            target = repository.resolve(ref or "HEAD")
+            if target is None:
+                return None
+        fingerprint = repository.worktree_fingerprint(directories=tool == "git_status")
+        if fingerprint is None:
+            return None
+        return (tool, repository.top, cwd, target, head, repository.index_signature(), fingerprint)
+
+    def _count(self, tool: str, column: int) -> None:
+        with self._lock:
+            counts = self._counts.get(tool)
+            if counts is None:
+                counts = self._counts[tool] = [0, 0, 0]
+            counts[column] += 1
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        if any(_signature(path) != signature for path, signature in entry.checks):
+            return None
+        return entry.result
+
+    def put(self, key: Tuple[Any, ...], result: Dict[str, Any],
+            checks: Optional[List[Tuple[str, StatSignature]]] = None) -> None:
+        size = _result_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(result, size, checks or [])
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def call(
+        self,
+        tool: str,
+        cwd: str,
+        ref: Optional[str],
+        run: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Return a cached result for this repository state, or run and
+        cache it. Hits are marked "cached": true.
+        """
+        key = self.key(tool, cwd, ref) if self.enabled else None
+        if key is None:
+            self._count(tool, 2)
+            return run()
+        cached = self.get(key)
+        if cached is not None:
+            self._count(tool, 0)
+            return dict(cached, cached=True)
+        self._count(tool, 1)
+        result = run()
+        if result.get("returncode") != 0 or "error" in result or result.get("truncated"):
+            return result
+        checks: List[Tuple[str, StatSignature]] = []
+        if tool == "git_status":
+            untracked = untracked_paths(result.get("status", ""))
+            if untracked is None:
+                return result
+            top = key[1]
+            checks = [(os.path.join(top, path), _signature(os.path.join(top, path))) for path in untracked]
+        if tool == "git_status":
+            # git status refreshes the index as it runs: store under the refreshed
+            # index (files were fingerprinted before the run, so later edits miss)
+            repository = self.repository(cwd)
+            if repository is None or repository.resolve("HEAD") != key[4]:
+                return result
+            key = key[:5] + (repository.index_signature(),) + key[6:]
+        self.put(key, result, checks)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._repositories.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics snapshot"""
+        with self._lock:
+            tools = {tool: {"hits": c[0], "misses": c[1], "bypassed": c[2]} for tool, c in sorted(self._counts.items())}
+            entries, size = len(self._entries), self._bytes
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "tools": tools,
+        }
@@ -0,0 +1,324 @@
+"""
+HTTP Transport - Streamable HTTP (JSON POST + Server-Sent Events) for the MCP server
+
+Start with MCP_TRANSPORT=http. Requires the FastAPI/uvicorn dependencies
+already declared in pyproject.toml.
+
+    POST   /mcp   one JSON-RPC message or batch. Answered with
+                  application/json, or as an SSE stream (progress
+                  notifications, then the response) when the client
+                  accepts text/event-stream and sent a progressToken.
+                  Notification-only bodies get 202 Accepted.
+    GET    /mcp   SSE stream of session notifications with keep-alive pings
+    DELETE /mcp   end the session
+    GET    /healthz
+
+initialize returns an Mcp-Session-Id header; requests carrying it get a
+ClientSession with its own extension context, ordering and cancellation,
+as in daemon mode. Requests without it share the server's default
+context. The worker pool and per-tool limits are shared by everyone.
+
+Large JSON responses are gzip-compressed. The server binds to 127.0.0.1
+by default and rejects browser Origins other than localhost.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+try:
+    import uvicorn
+    from fastapi import FastAPI, Request, Response
+    from fastapi.responses import StreamingResponse
+    from starlette.middleware.gzip import GZipMiddleware
+except ImportError:  # pragma: no cover - optional at runtime
+    FastAPI = None
+
+from mcp.daemon import ClientSession
+from mcp.serialization import get_serializer
+from mcp.transport import RequestDispatcher, invalid_request
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "Mcp-Session-Id"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_GZIP_MIN_BYTES = 1024
+DEFAULT_KEEPALIVE_SEC = 30
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_SESSION_TTL_SEC = 3600.0
+SSE_PING_SEC = 15.0
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class HttpSession(ClientSession):
+    """ClientSession plus the dispatcher and notification routing for one HTTP client"""
+
+    def __init__(self, session_id: str, extension_context: Any, pool: RequestDispatcher) -> None:
+        super().__init__(session_id, extension_context)
+        self.dispatcher = pool.for_client(notify=self.route, session=self)
+        self.last_seen = time.monotonic()
+        # progressToken -> queue of the POST stream waiting for it
+        self.streams: Dict[Any, asyncio.Queue] = {}
+        # Listeners on GET /mcp receive everything else
+        self.listeners: Set[asyncio.Queue] = set()
+
+    def route(self, message: Dict[str, Any]) -> None:
+        """Deliver a notification to the stream that asked for it (loop thread)"""
+        token = (message.get("params") or {}).get("progressToken")
+        queue = self.streams.get(token)
+        if queue is not None:
+            queue.put_nowait(message)
+            return
+        for listener in self.listeners:
+            listener.put_nowait(message)
+
+
+def _progress_tokens(body: Any) -> List[Any]:
+    messages = body if isinstance(body, list) else [body]
+    tokens = []
+    for message in messages:
+        if isinstance(message, dict):
+            token = ((message.get("params") or {}).get("_meta") or {}).get("progressToken")
+            if token is not None:
+                tokens.append(token)
+    return tokens
+
+
+def _is_initialize(body: Any) -> bool:
+    messages = body if isinstance(body, list) else [body]
+    return any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages)
+
+
+def _request_ids(body: Any) -> List[Any]:
+    messages = body if isinstance(body, list) else [body]
+    return [m.get("id") for m in messages if isinstance(m, dict) and m.get("id") is not None]
+
+
+def origin_allowed(origin: Optional[str], allowed: Set[str]) -> bool:
+    """Non-browser clients send no Origin; browsers must come from localhost or the allow-list"""
+    if not origin:
+        return True
+    if origin in allowed:
+        return True
+    return urlparse(origin).hostname in LOCAL_HOSTS
+
+
+class OriginCheckMiddleware:
+    """ASGI middleware answering 403 to requests from a disallowed browser Origin"""
+
+    def __init__(self, app: Any, allowed: Set[str]) -> None:
+        self.app = app
+        self.allowed = allowed
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            origin = dict(scope["headers"]).get(b"origin")
+            if origin is not None and not origin_allowed(origin.decode("latin-1"), self.allowed):
+                response = Response(
+                    get_serializer().dumps_bytes(
+                        {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Origin not allowed"}}
+                    ),
+                    status_code=403,
+                    media_type="application/json",
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def create_app(server: Any, dispatcher: Optional[RequestDispatcher] = None) -> "FastAPI":
+    """
+    Build the FastAPI application for an MCPServer.
+
+    Args:
+        server: MCPServer instance shared by every client
+        dispatcher: Optional preconfigured RequestDispatcher owning the worker pool
+    """
+    if FastAPI is None:
+        raise RuntimeError("HTTP transport requires fastapi and uvicorn (pip install fastapi 'uvicorn[standard]')")
+
+    serializer = get_serializer()
+    metrics = server.metrics
+    pool = dispatcher or RequestDispatcher(server)
+    sessions: Dict[str, HttpSession] = {}
+    session_ttl = float(os.environ.get("MCP_HTTP_SESSION_TTL_SEC", DEFAULT_SESSION_TTL_SEC))
+    allowed_origins = {
+        o.strip() for o in os.environ.get("MCP_HTTP_ALLOWED_ORIGINS", "").split(",") if o.strip()
+    }
+
+    @asynccontextmanager
+    async def lifespan(app: "FastAPI") -> AsyncIterator[None]:
+        yield
+        pool.shutdown()
+
+    app = FastAPI(title="cursor-mcp", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=int(os.environ.get("MCP_HTTP_GZIP_MIN_BYTES", DEFAULT_GZIP_MIN_BYTES)),
+    )
+    app.add_middleware(OriginCheckMiddleware, allowed=allowed_origins)
+    app.state.sessions = sessions
+
+    def json_response(obj: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> "Response":
+        return Response(serializer.dumps_bytes(obj), status_code=status_code,
+                        media_type="application/json", headers=headers)
+
+    def error_response(status_code: int, code: int, message: str) -> "Response":
+        return json_response(
+            {"jsonrpc": "2.0", "id": None, "error": {"code": code, "message": message}},
+            status_code=status_code,
+        )
+
+    def expire_sessions() -> None:
+        cutoff = time.monotonic() - session_ttl
+        for session_id in [sid for sid, s in sessions.items() if s.last_seen < cutoff and not s.listeners]:
+            logger.info(f"HTTP session {session_id[:8]} expired")
+            del sessions[session_id]
+
+    def new_session() -> HttpSession:
+        expire_sessions()
+        session = HttpSession(secrets.token_urlsafe(16), server.new_extension_context(), pool)
+        sessions[session.session_id] = session
+        logger.info(f"HTTP session {session.session_id[:8]} started ({len(sessions)} active)")
+        return session
+
+    @app.get("/healthz")
+    async def healthz() -> "Response":
+        return json_response({"status": "ok", "sessions": len(sessions)})
+
+    @app.post("/mcp")
+    async def post_message(request: "Request") -> "Response":
+        raw = await request.body()
+        try:
+            body = serializer.loads(raw)
+        except ValueError:
+            return error_response(400, -32700, "Parse error")
+        if isinstance(body, list) and not body:
+            return json_response(invalid_request(), status_code=400)
+        if not isinstance(body, (dict, list)):
+            return json_response(invalid_request(), status_code=400)
+
+        session_id = request.headers.get(SESSION_HEADER)
+        session: Optional[HttpSession] = None
+        if session_id:
+            session = sessions.get(session_id)
+            if session is None:
+                return error_response(404, -32001, "Session not found")
+        elif _is_initialize(body):
+            session = new_session()
+
+        headers = {SESSION_HEADER: session.session_id} if session is not None else None
+        dispatcher = session.dispatcher if session is not None else pool
+        if session is not None:
+            session.last_seen = time.monotonic()
+
+        async def handle() -> Optional[Any]:
+            if isinstance(body, list):
+                return await dispatcher.dispatch_batch(body)
+            return await dispatcher.respond(body)
+
+        tokens = _progress_tokens(body)
+        if session is None or not tokens or "text/event-stream" not in request.headers.get("accept", ""):
+            response = await handle()
+            if response is None:
+                return Response(status_code=202, headers=headers)
+            reply = json_response(response, headers=headers)
+            metrics.record_io(body, len(raw), len(reply.body))
+            return reply
+
+        # Stream progress for this request, then its response
+        queue: asyncio.Queue = asyncio.Queue()
+        for token in tokens:
+            session.streams[token] = queue
+        task = asyncio.create_task(handle())
+        task.add_done_callback(lambda t: queue.put_nowait(t))
+
+        async def events() -> AsyncIterator[bytes]:
+            try:
+                while True:
+                    item = await queue.get()
+                    if isinstance(item, asyncio.Task):
+                        response = item.result()
+                        if response is not None:
+                            data = serializer.dumps_bytes(response)
+                            metrics.record_io(body, len(raw), len(data))
+                            yield b"event: message\ndata: " + data + b"\n\n"
+                        return
+                    yield b"event: message\ndata: " + serializer.dumps_bytes(item) + b"\n\n"
+            finally:
+                for token in tokens:
+                    if session.streams.get(token) is queue:
+                        del session.streams[token]
+                if not task.done():
+                    # Client hung up: stop the work it was waiting for
+                    for request_id in _request_ids(body):
+                        dispatcher.cancel(request_id)
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={**headers, "Cache-Control": "no-cache"})
+
+    @app.get("/mcp")
+    async def listen(request: "Request") -> "Response":
+        session = sessions.get(request.headers.get(SESSION_HEADER, ""))
+        if session is None:
+            return error_response(404, -32001, "Session not found")
+        queue: asyncio.Queue = asyncio.Queue()
+        session.listeners.add(queue)
+
+        async def events() -> AsyncIterator[bytes]:
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(queue.get(), timeout=SSE_PING_SEC)
+                    except asyncio.TimeoutError:
+                        # Comment line keeps proxies from closing an idle stream
+                        yield b": ping\n\n"
+                        continue
+                    yield b"event: message\ndata: " + serializer.dumps_bytes(message) + b"\n\n"
+            finally:
+                session.listeners.discard(queue)
+                session.last_seen = time.monotonic()
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
+
+    @app.delete("/mcp")
+    async def end_session(request: "Request") -> "Response":
+        session = sessions.pop(request.headers.get(SESSION_HEADER, ""), None)
+        if session is None:
+            return error_response(404, -32001, "Session not found")
+        session.dispatcher.cancel_all()
+        logger.info(f"HTTP session {session.session_id[:8]} ended ({len(sessions)} active)")
+        return Response(status_code=204)
+
+    return app
+
+
+def serve_http(server: Any, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """
+    Run the HTTP transport with uvicorn until interrupted.
+
+    Args:
+        server: MCPServer instance
+        host: Bind address (default MCP_HTTP_HOST or 127.0.0.1)
+        port: Port (default MCP_HTTP_PORT or 8765)
+    """
+    app = create_app(server)
+    config = uvicorn.Config(
+        app,
+        host=host or os.environ.get("MCP_HTTP_HOST", DEFAULT_HOST),
+        port=port or int(os.environ.get("MCP_HTTP_PORT", DEFAULT_PORT)),
+        timeout_keep_alive=int(os.environ.get("MCP_HTTP_KEEPALIVE_SEC", DEFAULT_KEEPALIVE_SEC)),
+        # Beyond this many open connections uvicorn answers 503
+        limit_concurrency=int(os.environ.get("MCP_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        log_level="warning",
+        access_log=False,
+    )
+    uvicorn.Server(config).run()
@@ -0,0 +1,49 @@
+"""
+Line I/O - Blocking newline-delimited reads and writes on file descriptors
+
+Standard library only and free of asyncio, so server.py can answer a
+client's first requests before the async transport is imported.
+"""
+
+import os
+import select
+from typing import List, Optional
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """Write every byte to fd, retrying partial writes and waiting on full pipes"""
+    view = memoryview(data)
+    while view:
+        try:
+            written = os.write(fd, view)
+        except BlockingIOError:
+            # Non-blocking fd with a full pipe: wait until the reader catches up
+            select.select([], [fd], [])
+            continue
+        except InterruptedError:
+            continue
+        view = view[written:]
+
+
+class LineReader:
+    """Reads newline-delimited messages from a file descriptor in large chunks"""
+
+    def __init__(self, fd: int, chunk_size: int = 1 << 16) -> None:
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self._partial = b""
+
+    def read_lines(self) -> Optional[List[bytes]]:
+        """Block for the next chunk; returns complete lines, or None at EOF"""
+        while True:
+            try:
+                data = os.read(self.fd, self.chunk_size)
+            except InterruptedError:
+                continue
+            if not data:
+                tail, self._partial = self._partial, b""
+                return [tail] if tail.strip() else None
+            lines = (self._partial + data).split(b"\n")
+            self._partial = lines.pop()
+            if lines:
+                return lines
@@ -2,34 +2,197 @@
 MCP Memory Store - SQLite-based persistent memory system
 """
 
+import base64
 import sqlite3
 import json
+import re
 import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
 from contextlib import contextmanager
 
-from .models import Memory, MemoryQuery, MemoryStats
+from .models import Memory, MemoryPage, MemoryQuery, MemoryStats, SearchHit
+from .sqlite_pool import SQLiteConnectionPool, SQLiteSettings
+
+
+# Quoted phrase or bare term in a user search query
+_FTS_TOKEN_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+# Memory ids per tag-loading query (stays under SQLITE_MAX_VARIABLE_NUMBER)
+_TAG_BATCH_SIZE = 500
+
+# Column weights for bm25(): title, content, tags
+_FTS_WEIGHTS = (10.0, 1.0, 5.0)
+
+_FTS_TAGS_SQL = "(SELECT group_concat(tag, ' ') FROM memory_tags WHERE memory_id = {ref})"
+
+_FTS_TRIGGERS = [
+    # INSERT OR REPLACE skips delete triggers (recursive_triggers is off), so
+    # drop the replaced row's index entry before the conflict is resolved
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_bi BEFORE INSERT ON memories BEGIN
+        DELETE FROM memories_fts WHERE rowid = (SELECT rowid FROM memories WHERE id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts(rowid, title, content, tags)
+        VALUES (new.rowid, new.title, new.content, {_FTS_TAGS_SQL.format(ref='new.id')});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+        DELETE FROM memories_fts WHERE rowid = old.rowid;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF title, content ON memories BEGIN
+        DELETE FROM memories_fts WHERE rowid = old.rowid;
+        INSERT INTO memories_fts(rowid, title, content, tags)
+        VALUES (new.rowid, new.title, new.content, {_FTS_TAGS_SQL.format(ref='new.id')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_fts_ai AFTER INSERT ON memory_tags BEGIN
+        UPDATE memories_fts SET tags = {_FTS_TAGS_SQL.format(ref='new.memory_id')}
+        WHERE rowid = (SELECT rowid FROM memories WHERE id = new.memory_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_fts_ad AFTER DELETE ON memory_tags BEGIN
+        UPDATE memories_fts SET tags = {_FTS_TAGS_SQL.format(ref='old.memory_id')}
+        WHERE rowid = (SELECT rowid FROM memories WHERE id = old.memory_id);
+    END
+    """,
+]
+
+
+# Counters kept current by triggers so get_stats() never scans memories.
+# kind is 'total' (key ''), 'domain' or 'workspace'; chars is only kept for 'total'.
+_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_stats (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    chars INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, key)
+)
+"""
+
+_STATS_ADD_SQL = """
+    INSERT INTO memory_stats (kind, key, count, chars) VALUES ('total', '', 1, length({row}.content))
+        ON CONFLICT(kind, key) DO UPDATE SET count = count + 1, chars = chars + excluded.chars;
+    INSERT INTO memory_stats (kind, key, count) VALUES ('domain', {row}.domain, 1)
+        ON CONFLICT(kind, key) DO UPDATE SET count = count + 1;
+    INSERT INTO memory_stats (kind, key, count) SELECT 'workspace', {row}.workspace, 1
+        WHERE {row}.workspace IS NOT NULL
+        ON CONFLICT(kind, key) DO UPDATE SET count = count + 1;
+"""
+
+_STATS_REMOVE_SQL = """
+    UPDATE memory_stats SET count = count - 1, chars = chars - length({row}.content)
+        WHERE kind = 'total' AND key = '';
+    UPDATE memory_stats SET count = count - 1 WHERE kind = 'domain' AND key = {row}.domain;
+    UPDATE memory_stats SET count = count - 1 WHERE kind = 'workspace' AND key = {row}.workspace;
+"""
+
+_STATS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_stats_ai AFTER INSERT ON memories BEGIN
+        {_STATS_ADD_SQL.format(row='new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_stats_ad AFTER DELETE ON memories BEGIN
+        {_STATS_REMOVE_SQL.format(row='old')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_stats_au AFTER UPDATE OF domain, workspace, content ON memories BEGIN
+        {_STATS_REMOVE_SQL.format(row='old')}
+        {_STATS_ADD_SQL.format(row='new')}
+    END
+    """,
+    # Same INSERT OR REPLACE caveat as the FTS triggers: un-count the replaced row
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_stats_bi BEFORE INSERT ON memories
+    WHEN EXISTS (SELECT 1 FROM memories WHERE id = new.id) BEGIN
+        UPDATE memory_stats
+            SET count = count - 1,
+                chars = chars - (SELECT length(content) FROM memories WHERE id = new.id)
+            WHERE kind = 'total' AND key = '';
+        UPDATE memory_stats SET count = count - 1
+            WHERE kind = 'domain' AND key = (SELECT domain FROM memories WHERE id = new.id);
+        UPDATE memory_stats SET count = count - 1
+            WHERE kind = 'workspace' AND key = (SELECT workspace FROM memories WHERE id = new.id);
+    END
+    """,
+]
+
+
+def build_fts_query(query: str) -> Optional[str]:
+    """
+    Translate a user query into a safe FTS5 MATCH expression.
+
+    Bare terms are ANDed, "quoted text" is a phrase and a trailing * makes
+    a prefix query. Punctuation is dropped so input can never be a syntax error.
+
+    Returns:
+        MATCH expression, or None if the query has no searchable terms
+    """
+    terms = []
+    for phrase, word in _FTS_TOKEN_RE.findall(query):
+        words = re.findall(r"\w+", phrase or word)
+        if not words:
+            continue
+        term = '"' + " ".join(words) + '"'
+        if word and word.endswith("*"):
+            term += "*"
+        terms.append(term)
+    return " ".join(terms) or None
+
+
+def encode_cursor(updated_at: str, memory_id: str) -> str:
+    """Encode a (updated_at, id) keyset position as an opaque cursor"""
+    raw = json.dumps([updated_at, memory_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode an opaque cursor back into (updated_at, id)"""
+    try:
+        updated_at, memory_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    return str(updated_at), str(memory_id)
 
 
 class MemoryStore:
     """SQLite-based persistent memory store"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, settings: Optional[SQLiteSettings] = None):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = SQLiteConnectionPool(str(self.db_path), settings)
+        self.fts_enabled = False
         self._init_schema()
     
     @contextmanager
     def _get_connection(self):
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        try:
+        """Borrow the long-lived writer connection"""
+        with self.pool.writer() as conn:
             yield conn
-        finally:
-            conn.commit()
-            conn.close()
+    
+    @contextmanager
+    def _read_connection(self):
+        """Borrow a pooled read-only connection"""
+        with self.pool.reader() as conn:
+            yield conn
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close()
     
     def _init_schema(self):
         """Initialize database schema"""
@@ -81,50 +244,213 @@ class MemoryStore:
             # Indexes
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_domain ON memories(domain)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_workspace ON memories(workspace)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_updated ON memories(updated_at, id)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workspace_updated ON memories(workspace, updated_at, id)"
+            )
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_priority ON memories(priority)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags(tag, memory_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_log_synced ON sync_log(synced)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_log_machine ON sync_log(machine_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_log_memory ON sync_log(memory_id)")
             
+            self.fts_enabled = self._init_fts(conn)
+            self._init_stats(conn)
+            
             conn.commit()
     
+    def _init_stats(self, conn: sqlite3.Connection) -> None:
+        """Create the materialized stats table and triggers; seed on first run"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_stats'"
+        )
+        existed = cursor.fetchone() is not None
+        
+        cursor.execute(_STATS_SCHEMA)
+        for trigger in _STATS_TRIGGERS:
+            cursor.execute(trigger)
+        
+        if not existed:
+            self._rebuild_stats(cursor)
+    
+    def _rebuild_stats(self, cursor: sqlite3.Cursor) -> None:
+        cursor.execute("DELETE FROM memory_stats")
+        cursor.execute("""
+        INSERT INTO memory_stats (kind, key, count, chars)
+        SELECT 'total', '', COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM memories
+        """)
+        cursor.execute("""
+        INSERT INTO memory_stats (kind, key, count)
+        SELECT 'domain', domain, COUNT(*) FROM memories GROUP BY domain
+        """)
+        cursor.execute("""
+        INSERT INTO memory_stats (kind, key, count)
+        SELECT 'workspace', workspace, COUNT(*) FROM memories
+        WHERE workspace IS NOT NULL GROUP BY workspace
+        """)
+    
+    def rebuild_stats(self) -> None:
+        """Recompute the stats counters from the memories table (repair path)"""
+        with self._get_connection() as conn:
+            self._rebuild_stats(conn.cursor())
+    
+    def _init_fts(self, conn: sqlite3.Connection) -> bool:
+        """Create the FTS5 index and triggers; backfill on first run"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+        )
+        existed = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+            USING fts5(title, content, tags, tokenize = 'unicode61')
+            """)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search() falls back to LIKE
+            return False
+        
+        for trigger in _FTS_TRIGGERS:
+            cursor.execute(trigger)
+        
+        if not existed:
+            self._backfill_fts(cursor)
+        return True
+    
+    def _backfill_fts(self, cursor: sqlite3.Cursor) -> None:
+        cursor.execute("DELETE FROM memories_fts")
+        cursor.execute(f"""
+        INSERT INTO memories_fts(rowid, title, content, tags)
+        SELECT rowid, title, content, {_FTS_TAGS_SQL.format(ref='memories.id')}
+        FROM memories
+        """)
+    
+    def rebuild_search_index(self) -> bool:
+        """Rebuild the full-text index from the memories table"""
+        if not self.fts_enabled:
+            return False
+        with self._get_connection() as conn:
+            self._backfill_fts(conn.cursor())
+        return True
+    
+    _INSERT_MEMORY_SQL = """
+    INSERT OR REPLACE INTO memories 
+    (id, domain, title, content, created_at, updated_at, workspace, 
+     repository, status, priority, metadata, machine_id, sync_version, deleted)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    _INSERT_TAG_SQL = "INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)"
+    
+    @staticmethod
+    def _memory_params(memory_id: str, domain: str, title: str, content: str, kwargs: Dict[str, Any]) -> tuple:
+        """Build the memories row for set_memory/set_memories_bulk"""
+        now = datetime.utcnow().isoformat()
+        return (
+            memory_id, domain, title, content, now, now,
+            kwargs.get('workspace'), kwargs.get('repository'),
+            kwargs.get('status', 'active'),
+            kwargs.get('priority', 'medium'),
+            json.dumps(kwargs.get('metadata', {})),
+            kwargs.get('machine_id', 'unknown'),
+            kwargs.get('sync_version', 0),
+            0
+        )
+    
     def set_memory(self, domain: str, title: str, content: str, **kwargs) -> str:
         """Store a memory"""
         memory_id = kwargs.get('memory_id') or str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        machine_id = kwargs.get('machine_id', 'unknown')
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-            INSERT OR REPLACE INTO memories 
-            (id, domain, title, content, created_at, updated_at, workspace, 
-             repository, status, priority, metadata, machine_id, sync_version, deleted)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                memory_id, domain, title, content, now, now,
-                kwargs.get('workspace'), kwargs.get('repository'),
-                kwargs.get('status', 'active'),
-                kwargs.get('priority', 'medium'),
-                json.dumps(kwargs.get('metadata', {})),
-                machine_id,
-                kwargs.get('sync_version', 0),
-                0
-            ))
+            cursor.execute(
+                self._INSERT_MEMORY_SQL,
+                self._memory_params(memory_id, domain, title, content, kwargs)
+            )
             
             # Handle tags
             for tag in kwargs.get('tags', []):
-                cursor.execute("""
-                INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)
-                """, (memory_id, tag.lower()))
+                cursor.execute(self._INSERT_TAG_SQL, (memory_id, tag.lower()))
             
             conn.commit()
         
         return memory_id
     
+    def set_memories_bulk(self, records: List[Dict[str, Any]]) -> List[str]:
+        """
+        Store many memories in a single transaction.
+
+        Args:
+            records: Dicts with domain, title, content and any set_memory kwargs
+
+        Returns:
+            Memory IDs in input order
+        """
+        memory_ids = []
+        memory_rows = []
+        tag_rows = []
+        for record in records:
+            extra = {k: v for k, v in record.items() if k not in ('domain', 'title', 'content')}
+            memory_id = record.get('memory_id') or str(uuid.uuid4())
+            memory_ids.append(memory_id)
+            memory_rows.append(self._memory_params(
+                memory_id, record['domain'], record['title'], record['content'], extra
+            ))
+            tag_rows.extend((memory_id, tag.lower()) for tag in record.get('tags') or [])
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            # Tags first: the FTS insert trigger then picks them up with the
+            # memory row instead of re-indexing once per tag
+            cursor.executemany(self._INSERT_TAG_SQL, tag_rows)
+            cursor.executemany(self._INSERT_MEMORY_SQL, memory_rows)
+        
+        return memory_ids
+    
+    @staticmethod
+    def _row_to_memory(row: sqlite3.Row, tags: List[str]) -> Memory:
+        """Hydrate a memories row into a Memory"""
+        return Memory(
+            id=row['id'],
+            domain=row['domain'],
+            title=row['title'],
+            content=row['content'],
+            created_at=datetime.fromisoformat(row['created_at']),
+            updated_at=datetime.fromisoformat(row['updated_at']),
+            workspace=row['workspace'],
+            repository=row['repository'],
+            tags=tags,
+            metadata=json.loads(row['metadata'] or '{}'),
+            status=row['status'],
+            priority=row['priority'],
+        )
+    
+    @staticmethod
+    def _load_tags(cursor: sqlite3.Cursor, memory_ids: List[str]) -> Dict[str, List[str]]:
+        """Load tags for a whole page of memories in one query per chunk"""
+        tags: Dict[str, List[str]] = {memory_id: [] for memory_id in memory_ids}
+        for start in range(0, len(memory_ids), _TAG_BATCH_SIZE):
+            chunk = memory_ids[start:start + _TAG_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+            SELECT memory_id, tag FROM memory_tags
+            WHERE memory_id IN ({placeholders})
+            ORDER BY memory_id, tag
+            """, chunk)
+            for memory_id, tag in cursor.fetchall():
+                tags[memory_id].append(tag)
+        return tags
+    
+    def _hydrate(self, cursor: sqlite3.Cursor, rows: List[sqlite3.Row]) -> List[Memory]:
+        """Convert a page of rows to Memory objects with batched tag loading"""
+        tags = self._load_tags(cursor, [row['id'] for row in rows])
+        return [self._row_to_memory(row, tags[row['id']]) for row in rows]
+    
     def get_memory(self, memory_id: str) -> Optional[Memory]:
         """Retrieve a memory by ID"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM memories WHERE id = ?", (memory_id,))
             row = cursor.fetchone()
@@ -132,27 +458,21 @@ class MemoryStore:
             if not row:
                 return None
             
-            cursor.execute("SELECT tag FROM memory_tags WHERE memory_id = ?", (memory_id,))
-            tags = [t[0] for t in cursor.fetchall()]
-            
-            return Memory(
-                id=row['id'],
-                domain=row['domain'],
-                title=row['title'],
-                content=row['content'],
-                created_at=datetime.fromisoformat(row['created_at']),
-                updated_at=datetime.fromisoformat(row['updated_at']),
-                workspace=row['workspace'],
-                repository=row['repository'],
-                tags=tags,
-                metadata=json.loads(row['metadata'] or '{}'),
-                status=row['status'],
-                priority=row['priority'],
-            )
+            return self._hydrate(cursor, [row])[0]
     
-    def list_memories(self, query: MemoryQuery) -> Tuple[List[Memory], int]:
-        """List memories with optional filters"""
-        with self._get_connection() as conn:
+    def list_memories(self, query: MemoryQuery) -> Tuple[List[Memory], Optional[int]]:
+        """List memories with optional filters (total is None if include_total is off)"""
+        page = self.list_memories_page(query)
+        return page.memories, page.total
+    
+    def list_memories_page(self, query: MemoryQuery) -> MemoryPage:
+        """
+        List one page of memories, newest first.
+
+        Pass query.after (or a decoded next_cursor) for keyset pagination,
+        which stays fast on deep pages unlike OFFSET.
+        """
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             
             where_clauses = []
@@ -170,50 +490,98 @@ class MemoryStore:
                 where_clauses.append("repository = ?")
                 params.append(query.repository)
             
+            if query.tags:
+                tags = sorted({tag.lower() for tag in query.tags})
+                placeholders = ",".join("?" * len(tags))
+                if query.tag_mode == "all":
+                    # (memory_id, tag) is unique, so a full match has one row per tag
+                    where_clauses.append(f"""id IN (
+                        SELECT memory_id FROM memory_tags WHERE tag IN ({placeholders})
+                        GROUP BY memory_id HAVING COUNT(*) = ?
+                    )""")
+                    params.extend(tags + [len(tags)])
+                elif query.tag_mode == "any":
+                    where_clauses.append(
+                        f"id IN (SELECT memory_id FROM memory_tags WHERE tag IN ({placeholders}))"
+                    )
+                    params.extend(tags)
+                else:
+                    raise ValueError(f"Invalid tag_mode: {query.tag_mode} (expected 'any' or 'all')")
+            
             where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
             
             # Get total count
-            cursor.execute(f"SELECT COUNT(*) FROM memories WHERE {where_clause}", params)
-            total = cursor.fetchone()[0]
+            total = None
+            if query.include_total:
+                cursor.execute(f"SELECT COUNT(*) FROM memories WHERE {where_clause}", params)
+                total = cursor.fetchone()[0]
+            
+            if query.after:
+                where_clause += " AND (updated_at, id) < (?, ?)"
+                params = params + list(query.after)
             
             # Get results
             cursor.execute(f"""
             SELECT * FROM memories 
             WHERE {where_clause}
-            ORDER BY updated_at DESC
+            ORDER BY updated_at DESC, id DESC
             LIMIT ? OFFSET ?
             """, params + [query.limit, query.offset])
             
             rows = cursor.fetchall()
-            memories = []
-            
-            for row in rows:
-                cursor.execute(
-                    "SELECT tag FROM memory_tags WHERE memory_id = ?",
-                    (row['id'],)
-                )
-                tags = [t[0] for t in cursor.fetchall()]
-                
-                memories.append(Memory(
-                    id=row['id'],
-                    domain=row['domain'],
-                    title=row['title'],
-                    content=row['content'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.fromisoformat(row['updated_at']),
-                    workspace=row['workspace'],
-                    repository=row['repository'],
-                    tags=tags,
-                    metadata=json.loads(row['metadata'] or '{}'),
-                    status=row['status'],
-                    priority=row['priority'],
-                ))
+            next_cursor = None
+            if rows and len(rows) == query.limit:
+                next_cursor = encode_cursor(rows[-1]['updated_at'], rows[-1]['id'])
             
-            return memories, total
+            return MemoryPage(
+                memories=self._hydrate(cursor, rows),
+                total=total,
+                next_cursor=next_cursor,
+            )
     
     def search(self, query: str, limit: int = 10) -> List[Memory]:
-        """Search memories by title/content"""
-        with self._get_connection() as conn:
+        """Search memories by title/content/tags, best match first"""
+        return [hit.memory for hit in self.search_hits(query, limit)]
+    
+    def search_hits(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """
+        Search memories with BM25 ranking and content snippets.
+
+        Supports phrase ("exact words") and prefix (term*) queries when
+        FTS5 is available, otherwise falls back to substring matching.
+        """
+        if not self.fts_enabled:
+            return self._search_like(query, limit)
+        
+        match = build_fts_query(query)
+        if match is None:
+            return []
+        
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+            SELECT m.*,
+                   bm25(memories_fts, ?, ?, ?) AS rank,
+                   snippet(memories_fts, 1, '[', ']', '...', 16) AS snippet
+            FROM memories_fts
+            JOIN memories m ON m.rowid = memories_fts.rowid
+            WHERE memories_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """, (*_FTS_WEIGHTS, match, limit))
+            
+            rows = cursor.fetchall()
+            memories = self._hydrate(cursor, rows)
+            
+            # bm25() is lower-is-better; flip so higher means more relevant
+            return [
+                SearchHit(memory=memory, score=-row['rank'], snippet=row['snippet'])
+                for memory, row in zip(memories, rows)
+            ]
+    
+    def _search_like(self, query: str, limit: int) -> List[SearchHit]:
+        """Substring search used when FTS5 is unavailable"""
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             
             search_term = f"%{query}%"
@@ -224,32 +592,7 @@ class MemoryStore:
             LIMIT ?
             """, (search_term, search_term, limit))
             
-            rows = cursor.fetchall()
-            memories = []
-            
-            for row in rows:
-                cursor.execute(
-                    "SELECT tag FROM memory_tags WHERE memory_id = ?",
-                    (row['id'],)
-                )
-                tags = [t[0] for t in cursor.fetchall()]
-                
-                memories.append(Memory(
-                    id=row['id'],
-                    domain=row['domain'],
-                    title=row['title'],
-                    content=row['content'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.fromisoformat(row['updated_at']),
-                    workspace=row['workspace'],
-                    repository=row['repository'],
-                    tags=tags,
-                    metadata=json.loads(row['metadata'] or '{}'),
-                    status=row['status'],
-                    priority=row['priority'],
-                ))
-            
-            return memories
+            return [SearchHit(memory=m) for m in self._hydrate(cursor, cursor.fetchall())]
     
     def delete_memory(self, memory_id: str) -> bool:
         """Delete a memory"""
@@ -258,28 +601,33 @@ class MemoryStore:
             cursor.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
             return cursor.rowcount > 0
     
+    def count_memories(self) -> int:
+        """Total number of memories (O(1), from the stats table)"""
+        with self._read_connection() as conn:
+            row = conn.execute(
+                "SELECT count FROM memory_stats WHERE kind = 'total' AND key = ''"
+            ).fetchone()
+            return row[0] if row else 0
+    
     def get_stats(self) -> MemoryStats:
         """Get memory statistics"""
-        with self._get_connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("SELECT COUNT(*) FROM memories")
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("""
-            SELECT domain, COUNT(*) FROM memories GROUP BY domain
-            """)
-            by_domain = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            cursor.execute("""
-            SELECT workspace, COUNT(*) FROM memories 
-            WHERE workspace IS NOT NULL GROUP BY workspace
-            """)
-            by_workspace = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            cursor.execute("SELECT SUM(LENGTH(content)) FROM memories")
-            total_chars = cursor.fetchone()[0] or 0
+            cursor.execute("SELECT kind, key, count, chars FROM memory_stats WHERE count > 0")
+            total = 0
+            total_chars = 0
+            by_domain = {}
+            by_workspace = {}
+            for kind, key, count, chars in cursor.fetchall():
+                if kind == 'total':
+                    total, total_chars = count, chars
+                elif kind == 'domain':
+                    by_domain[key] = count
+                elif kind == 'workspace':
+                    by_workspace[key] = count
             
+            # Served by the (updated_at, id) index
             cursor.execute("SELECT MAX(updated_at) FROM memories")
             last_updated_str = cursor.fetchone()[0]
             last_updated = datetime.fromisoformat(last_updated_str) if last_updated_str else None
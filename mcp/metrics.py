@@ -0,0 +1,307 @@
+"""
+Metrics - Per-tool call counts, latency, errors, payload sizes and DB statements
+
+ToolMetrics.middleware wraps every tool call (ToolRegistry.add_middleware).
+Latencies go into fixed log-spaced histogram buckets, so recording is a
+bisect and a few integer updates under one lock; p50/p95/p99 are
+estimated from the buckets when a snapshot is taken.
+
+Payload sizes come from the transports, which already hold the raw
+request line and the encoded response (record_io), so measuring them
+costs no extra encoding. SQLite statements are counted per thread by a
+trace callback on pooled connections (count_db_statement). Result caches
+registered with add_cache report hits, misses and hit rates per tool.
+
+The snapshot is served as the mcp://cursor-mcp/metrics resource.
+MCP_METRICS_PROM_FILE additionally dumps Prometheus text format to a
+file every MCP_METRICS_PROM_INTERVAL_SEC seconds (e.g. for the
+node_exporter textfile collector).
+"""
+
+import atexit
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds: 50 us to ~100 s, factor sqrt(2)
+LATENCY_BOUNDS = [50e-6 * 2 ** (i / 2) for i in range(43)]
+DEFAULT_PROM_INTERVAL_SEC = 15.0
+
+
+class _ThreadCounters(threading.local):
+    db_statements = 0
+
+
+_counters = _ThreadCounters()
+
+
+def count_db_statement(_sql: Optional[str] = None) -> None:
+    """sqlite3 trace callback: counts statements executed by the current thread"""
+    _counters.db_statements += 1
+
+
+def db_statements() -> int:
+    """Statements executed so far by the current thread"""
+    return _counters.db_statements
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds)"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        # Last bucket collects everything above the largest bound
+        self.counts = [0] * (len(LATENCY_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if bucket and seen + bucket >= rank:
+                lower = LATENCY_BOUNDS[index - 1] if index > 0 else 0.0
+                upper = LATENCY_BOUNDS[index] if index < len(LATENCY_BOUNDS) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket
+                return min(estimate, self.max)
+            seen += bucket
+        return self.max
+
+
+class ToolStats:
+    """Counters for one tool"""
+
+    __slots__ = ("calls", "errors", "cancelled", "latency", "input_bytes", "output_bytes", "db_statements")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.latency = LatencyHistogram()
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.db_statements = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "latency_ms": {
+                "p50": round(latency.quantile(0.50) * 1000, 3),
+                "p95": round(latency.quantile(0.95) * 1000, 3),
+                "p99": round(latency.quantile(0.99) * 1000, 3),
+                "max": round(latency.max * 1000, 3),
+                "mean": round(latency.total / latency.count * 1000, 3) if latency.count else 0.0,
+            },
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "db_statements": self.db_statements,
+        }
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ToolMetrics:
+    """Per-tool metrics shared by every transport and worker thread"""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._tools: Dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+        self._dump_thread: Optional[threading.Thread] = None
+        # name -> callable returning the cache's stats (hits/misses per tool)
+        self._caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def add_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Report a result cache's hit rates in the snapshot and Prometheus dump"""
+        with self._lock:
+            self._caches[name] = stats
+
+    def _cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            caches = sorted(self._caches.items())
+        snapshot = {}
+        for name, stats_fn in caches:
+            stats = stats_fn()
+            tools = stats.get("tools", {})
+            hits = sum(t["hits"] for t in tools.values())
+            misses = sum(t["misses"] for t in tools.values())
+            stats.update({
+                "hits": hits,
+                "misses": misses,
+                "bypassed": sum(t["bypassed"] for t in tools.values()),
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            })
+            snapshot[name] = stats
+        return snapshot
+
+    def _stats(self, name: str) -> ToolStats:
+        # Caller holds self._lock
+        stats = self._tools.get(name)
+        if stats is None:
+            stats = self._tools[name] = ToolStats()
+        return stats
+
+    def middleware(self, spec: Any, call: Any, call_next: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """ToolRegistry middleware recording latency, errors and DB statements"""
+        statements = _counters.db_statements
+        start = time.perf_counter()
+        error = True
+        try:
+            result = call_next()
+            error = bool(result.get("isError"))
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            statements = _counters.db_statements - statements
+            token = call.cancel_token
+            with self._lock:
+                stats = self._stats(spec.name)
+                stats.calls += 1
+                stats.latency.observe(elapsed)
+                stats.db_statements += statements
+                if error:
+                    stats.errors += 1
+                if token is not None and token.cancelled:
+                    stats.cancelled += 1
+
+    def record_io(self, request: Any, input_bytes: int, output_bytes: int) -> None:
+        """Add request/response sizes for a single tools/call (transports call this)"""
+        if not isinstance(request, dict) or request.get("method") != "tools/call":
+            return
+        name = (request.get("params") or {}).get("name")
+        if not isinstance(name, str):
+            return
+        with self._lock:
+            stats = self._stats(name)
+            stats.input_bytes += input_bytes
+            stats.output_bytes += output_bytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics as a JSON-serializable dict"""
+        with self._lock:
+            tools = {name: stats.to_dict() for name, stats in sorted(self._tools.items())}
+        return {
+            "uptime_sec": round(time.time() - self.started_at, 1),
+            "totals": {
+                "calls": sum(t["calls"] for t in tools.values()),
+                "errors": sum(t["errors"] for t in tools.values()),
+                "cancelled": sum(t["cancelled"] for t in tools.values()),
+                "input_bytes": sum(t["input_bytes"] for t in tools.values()),
+                "output_bytes": sum(t["output_bytes"] for t in tools.values()),
+                "db_statements": sum(t["db_statements"] for t in tools.values()),
+            },
+            "tools": tools,
+            "caches": self._cache_stats(),
+        }
+
+    def prometheus(self) -> str:
+        """Metrics in Prometheus text exposition format"""
+        with self._lock:
+            rows = [
+                (name, stats.calls, stats.errors, stats.cancelled, stats.input_bytes,
+                 stats.output_bytes, stats.db_statements, list(stats.latency.counts),
+                 stats.latency.total, stats.latency.count)
+                for name, stats in sorted(self._tools.items())
+            ]
+
+        lines: List[str] = []
+        counters = [
+            ("mcp_tool_calls_total", "Tool calls", 1),
+            ("mcp_tool_errors_total", "Tool calls that failed or returned isError", 2),
+            ("mcp_tool_cancelled_total", "Tool calls cancelled by the client", 3),
+            ("mcp_tool_input_bytes_total", "Request bytes received for the tool", 4),
+            ("mcp_tool_output_bytes_total", "Response bytes sent for the tool", 5),
+            ("mcp_tool_db_statements_total", "SQLite statements executed by the tool", 6),
+        ]
+        for metric, help_text, column in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for row in rows:
+                lines.append(f'{metric}{{tool="{_escape_label(row[0])}"}} {row[column]}')
+
+        lines.append("# HELP mcp_tool_latency_seconds Tool call latency")
+        lines.append("# TYPE mcp_tool_latency_seconds histogram")
+        for name, *_, counts, total, count in rows:
+            label = _escape_label(name)
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BOUNDS, counts):
+                cumulative += bucket
+                lines.append(f'mcp_tool_latency_seconds_bucket{{tool="{label}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'mcp_tool_latency_seconds_bucket{{tool="{label}",le="+Inf"}} {count}')
+            lines.append(f'mcp_tool_latency_seconds_sum{{tool="{label}"}} {total:.6f}')
+            lines.append(f'mcp_tool_latency_seconds_count{{tool="{label}"}} {count}')
+
+        caches = self._cache_stats()
+        cache_counters = [
+            ("mcp_cache_hits_total", "Tool results served from a cache", "hits"),
+            ("mcp_cache_misses_total", "Cacheable tool calls that ran", "misses"),
+            ("mcp_cache_bypassed_total", "Tool calls whose result could not be cached", "bypassed"),
+        ]
+        for metric, help_text, field in cache_counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for cache, stats in caches.items():
+                for tool, counts in sorted(stats["tools"].items()):
+                    lines.append(f'{metric}{{cache="{_escape_label(cache)}",tool="{_escape_label(tool)}"}} '
+                                 f'{counts[field]}')
+        cache_values = [
+            ("mcp_cache_evictions_total", "Cache entries evicted to stay within bounds", "counter", "evictions"),
+            ("mcp_cache_entries", "Entries held by the cache", "gauge", "entries"),
+            ("mcp_cache_bytes", "Approximate size of the cached results", "gauge", "bytes"),
+        ]
+        for metric, help_text, kind, field in cache_values:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for cache, stats in caches.items():
+                lines.append(f'{metric}{{cache="{_escape_label(cache)}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically replace path with the current Prometheus dump"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+    def start_prometheus_dump(self, path: str, interval: float = DEFAULT_PROM_INTERVAL_SEC) -> None:
+        """Dump to path every interval seconds and once more at exit"""
+        if self._dump_thread is not None:
+            return
+
+        def dump() -> None:
+            try:
+                self.write_prometheus(path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {path}: {e}")
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval)
+                dump()
+
+        self._dump_thread = threading.Thread(target=loop, name="mcp-metrics", daemon=True)
+        self._dump_thread.start()
+        atexit.register(dump)
+        logger.info(f"Writing Prometheus metrics to {path} every {interval:g}s")
@@ -4,7 +4,7 @@ MCP Core - Models and data structures for the memory system.
 
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 
 
@@ -42,6 +42,20 @@ class Memory:
         return data
 
 
+@dataclass
+class SearchHit:
+    """Ranked search result"""
+    memory: Memory
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.memory.to_dict()
+        data['score'] = self.score
+        data['snippet'] = self.snippet
+        return data
+
+
 @dataclass
 class MemoryQuery:
     """Query parameters for memory retrieval"""
@@ -49,8 +63,19 @@ class MemoryQuery:
     workspace: Optional[str] = None
     repository: Optional[str] = None
     tags: Optional[List[str]] = None
+    tag_mode: str = "any"  # "any" = at least one tag, "all" = every tag
     limit: int = 100
     offset: int = 0
+    after: Optional[Tuple[str, str]] = None  # keyset cursor: (updated_at, id)
+    include_total: bool = True
+
+
+@dataclass
+class MemoryPage:
+    """One page of list results with a cursor for the next page"""
+    memories: List[Memory] = field(default_factory=list)
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 @dataclass
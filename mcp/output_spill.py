@@ -0,0 +1,224 @@
+"""
+Output Spill - Size caps and continuation for large tool outputs
+
+Subprocess output is read through an OutputCapture: the first
+MCP_OUTPUT_INLINE_BYTES stay in memory and are returned with the tool
+result, anything beyond goes to an anonymous temporary file, and
+capture stops at MCP_OUTPUT_MAX_BYTES. Server memory per call is
+therefore bounded by the inline size, whatever the command prints.
+
+When output was cut, the capture is handed to the OutputStore and the
+result carries "truncated": true and a "next_cursor". The
+continue_output tool reads further chunks with that cursor; an output
+is released once its last chunk has been read. Stored outputs expire
+after MCP_OUTPUT_TTL_SEC, and the oldest are dropped once their files
+exceed MCP_OUTPUT_SPILL_BUDGET_BYTES in total.
+"""
+
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional
+
+DEFAULT_INLINE_BYTES = 256 * 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SPILL_BUDGET_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SEC = 600.0
+MAX_STORED_OUTPUTS = 64
+READ_CHUNK_BYTES = 64 * 1024
+# Largest chunk continue_output returns at once
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def inline_bytes_from_env() -> int:
+    return int(os.environ.get("MCP_OUTPUT_INLINE_BYTES", DEFAULT_INLINE_BYTES))
+
+
+def max_bytes_from_env() -> int:
+    return int(os.environ.get("MCP_OUTPUT_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+def utf8_boundary(data: bytes, end: int) -> int:
+    """Largest cut <= end that does not split a UTF-8 sequence"""
+    if end >= len(data):
+        return len(data)
+    cut = end
+    # Continuation bytes look like 0b10xxxxxx; at most 3 precede a start byte
+    while cut > 0 and end - cut < 3 and (data[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return cut if (data[cut] & 0xC0) != 0x80 else end
+
+
+class OutputCapture:
+    """Bounded capture of one output stream: head in memory, the rest in a temp file"""
+
+    def __init__(self, inline_bytes: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.inline_bytes = inline_bytes if inline_bytes is not None else inline_bytes_from_env()
+        self.max_bytes = max(self.inline_bytes, max_bytes if max_bytes is not None else max_bytes_from_env())
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        # A few bytes past the inline size let head_bytes() end on a whole character
+        self._head_cap = self.inline_bytes + 4
+        self._head = bytearray()
+        self._file: Optional[BinaryIO] = None
+
+    def write(self, data: bytes) -> None:
+        room = self.max_bytes - self.total_bytes
+        if len(data) > room:
+            self.dropped_bytes += len(data) - room
+            data = data[:room]
+        if not data:
+            return
+        if self._file is None and len(self._head) + len(data) <= self._head_cap:
+            self._head += data
+        else:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="mcp-output-")
+                self._file.write(self._head)
+            self._file.write(data)
+            if len(self._head) < self._head_cap:
+                self._head += data[:self._head_cap - len(self._head)]
+        self.total_bytes += len(data)
+
+    def feed(self, stream: BinaryIO) -> None:
+        """Copy a pipe until EOF (run in a reader thread)"""
+        while True:
+            data = stream.read1(READ_CHUNK_BYTES)
+            if not data:
+                break
+            self.write(data)
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self.head_bytes()) or self.dropped_bytes > 0
+
+    def head_bytes(self) -> bytes:
+        return bytes(self._head[:utf8_boundary(self._head, self.inline_bytes)])
+
+    def text(self) -> str:
+        """The inline part, decoded"""
+        return self.head_bytes().decode("utf-8", errors="replace")
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if self._file is None:
+            return bytes(self._head[offset:offset + size])
+        self._file.flush()
+        return os.pread(self._file.fileno(), size, offset)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _StoredOutput:
+    __slots__ = ("capture", "expires_at")
+
+    def __init__(self, capture: OutputCapture, expires_at: float) -> None:
+        self.capture = capture
+        self.expires_at = expires_at
+
+
+class OutputStore:
+    """Spilled outputs awaiting continue_output, bounded by count, bytes and age"""
+
+    def __init__(self, budget_bytes: Optional[int] = None, ttl_sec: Optional[float] = None,
+                 max_outputs: int = MAX_STORED_OUTPUTS) -> None:
+        self.budget_bytes = budget_bytes if budget_bytes is not None else int(
+            os.environ.get("MCP_OUTPUT_SPILL_BUDGET_BYTES", DEFAULT_SPILL_BUDGET_BYTES))
+        self.ttl_sec = ttl_sec if ttl_sec is not None else float(
+            os.environ.get("MCP_OUTPUT_TTL_SEC", DEFAULT_TTL_SEC))
+        self.max_outputs = max_outputs
+        self._outputs: OrderedDict[str, _StoredOutput] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _evict(self, key: str) -> None:
+        # Caller holds self._lock
+        stored = self._outputs.pop(key)
+        self._bytes -= stored.capture.total_bytes
+        stored.capture.close()
+
+    def _expire(self, now: float) -> None:
+        for key in [k for k, s in self._outputs.items() if s.expires_at <= now]:
+            self._evict(key)
+
+    def put(self, capture: OutputCapture) -> str:
+        """Keep a truncated capture and return the cursor for its first unread byte"""
+        key = secrets.token_urlsafe(12)
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._outputs[key] = _StoredOutput(capture, now + self.ttl_sec)
+            self._bytes += capture.total_bytes
+            while len(self._outputs) > 1 and (
+                self._bytes > self.budget_bytes or len(self._outputs) > self.max_outputs
+            ):
+                self._evict(next(iter(self._outputs)))
+        return f"{key}.{len(capture.head_bytes())}"
+
+    def read(self, cursor: str, max_bytes: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read the chunk a cursor points at.
+
+        Returns:
+            Dict with output, offset, total_bytes and next_cursor (None at
+            the end), or None if the cursor is unknown or expired
+        """
+        key, _, offset_text = cursor.rpartition(".")
+        try:
+            offset = int(offset_text)
+        except ValueError:
+            return None
+        size = min(max(1, max_bytes or inline_bytes_from_env()), MAX_CHUNK_BYTES)
+        with self._lock:
+            self._expire(time.monotonic())
+            stored = self._outputs.get(key)
+            if stored is None or offset < 0 or offset > stored.capture.total_bytes:
+                return None
+            capture = stored.capture
+            data = capture.read_at(offset, size + 4)
+            if len(data) > size:
+                data = data[:utf8_boundary(data, size)]
+            end = offset + len(data)
+            done = end >= capture.total_bytes
+            if done:
+                self._evict(key)
+            else:
+                stored.expires_at = time.monotonic() + self.ttl_sec
+        result = {
+            "output": data.decode("utf-8", errors="replace"),
+            "offset": offset,
+            "returned_bytes": len(data),
+            "total_bytes": capture.total_bytes,
+            "next_cursor": None if done else f"{key}.{end}",
+        }
+        if done and capture.dropped_bytes:
+            result["dropped_bytes"] = capture.dropped_bytes
+        return result
+
+
+def capped_output(capture: OutputCapture, field: str, store: Optional[OutputStore]) -> Dict[str, Any]:
+    """
+    Result fields for a captured stream.
+
+    Small outputs come back unchanged as {field: text}. Truncated ones add
+    truncated/total_bytes and, when a store is given, a next_cursor for
+    continue_output; without a store the rest is discarded.
+    """
+    result: Dict[str, Any] = {field: capture.text()}
+    if not capture.truncated:
+        capture.close()
+        return result
+    result["truncated"] = True
+    result["total_bytes"] = capture.total_bytes
+    if capture.total_bytes > len(capture.head_bytes()) and store is not None:
+        result["next_cursor"] = store.put(capture)
+    else:
+        capture.close()
+    if capture.dropped_bytes:
+        result["dropped_bytes"] = capture.dropped_bytes
+    return result
@@ -0,0 +1,224 @@
+"""
+Profiling - Opt-in cProfile and tracemalloc capture for individual tool calls
+
+ToolProfiler.middleware decides per call whether to profile it:
+
+- a `_profile` tool argument ("cpu", "memory" or "all") profiles that
+  one call; the argument is removed before the handler runs
+- MCP_PROFILE=cpu|memory|all profiles sampled calls
+  (MCP_PROFILE_SAMPLE_RATE, optionally only MCP_PROFILE_TOOLS)
+
+Each capture writes <id>.json (tool, duration, top allocations) and,
+for CPU, <id>.prof (pstats dump, usable with snakeviz or pstats) under
+data/mcp/profiles/. Only the newest MCP_PROFILE_KEEP captures are kept.
+Captures faster than MCP_PROFILE_MIN_MS are discarded.
+
+cProfile and tracemalloc are process-wide on recent Pythons, so one
+call is profiled at a time; calls arriving meanwhile run unprofiled.
+"""
+
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ARGUMENT = "_profile"
+PROFILE_MODES = {"cpu", "memory", "all"}
+DEFAULT_KEEP = 50
+DEFAULT_TOP = 20
+TRACEMALLOC_FRAMES = 10
+SORT_KEYS = {"cumulative", "tottime", "calls"}
+
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _mode(value: Any) -> Optional[str]:
+    """Normalize a _profile argument or MCP_PROFILE value to a mode or None"""
+    if value is True:
+        return "all"
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in PROFILE_MODES:
+            return value
+    return None
+
+
+class ToolProfiler:
+    """Captures and stores profiles of individual tool calls"""
+
+    def __init__(self, profile_dir: Union[str, Path]) -> None:
+        self.profile_dir = Path(profile_dir)
+        self.mode = _mode(os.environ.get("MCP_PROFILE", "off"))
+        self.sample_rate = float(os.environ.get("MCP_PROFILE_SAMPLE_RATE", 1.0))
+        self.tools = {t.strip() for t in os.environ.get("MCP_PROFILE_TOOLS", "").split(",") if t.strip()}
+        self.keep = int(os.environ.get("MCP_PROFILE_KEEP", DEFAULT_KEEP))
+        self.min_ms = float(os.environ.get("MCP_PROFILE_MIN_MS", 0))
+        self._busy = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _requested_mode(self, spec: Any, call: Any) -> Optional[str]:
+        if PROFILE_ARGUMENT in call.arguments:
+            # Never pass the control argument through to the handler
+            call.arguments = dict(call.arguments)
+            return _mode(call.arguments.pop(PROFILE_ARGUMENT))
+        if self.mode is None or (self.tools and spec.name not in self.tools):
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return self.mode
+
+    def middleware(self, spec: Any, call: Any, call_next: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """ToolRegistry middleware profiling requested or sampled calls"""
+        mode = self._requested_mode(spec, call)
+        if mode is None:
+            return call_next()
+        if not self._busy.acquire(blocking=False):
+            logger.debug(f"Profiler busy, running {spec.name} unprofiled")
+            return call_next()
+        try:
+            return self._capture(spec.name, mode, call_next)
+        finally:
+            self._busy.release()
+
+    def _capture(self, tool: str, mode: str, call_next: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        profiler = None
+        started_tracing = False
+        if mode in ("cpu", "all"):
+            import cProfile
+            profiler = cProfile.Profile()
+        if mode in ("memory", "all"):
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracing = True
+            tracemalloc.reset_peak()
+
+        error = True
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = call_next()
+            error = bool(result.get("isError"))
+            return result
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            snapshot = peak = None
+            if mode in ("memory", "all"):
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            if elapsed_ms >= self.min_ms:
+                try:
+                    self._save(tool, mode, elapsed_ms, error, profiler, snapshot, peak)
+                except OSError as e:
+                    logger.warning(f"Could not save profile for {tool}: {e}")
+
+    def _save(self, tool: str, mode: str, elapsed_ms: float, error: bool,
+              profiler: Any, snapshot: Any, peak: Optional[int]) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._ids)}-{tool}"
+        summary: Dict[str, Any] = {
+            "profile_id": profile_id,
+            "tool": tool,
+            "mode": mode,
+            "created_at": time.time(),
+            "duration_ms": round(elapsed_ms, 3),
+            "error": error,
+        }
+        if profiler is not None:
+            profiler.dump_stats(str(self.profile_dir / f"{profile_id}.prof"))
+        if snapshot is not None:
+            summary["peak_bytes"] = peak
+            summary["top_allocations"] = [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:DEFAULT_TOP]
+            ]
+        tmp_path = self.profile_dir / f"{profile_id}.json.tmp"
+        tmp_path.write_text(json.dumps(summary), encoding="utf-8")
+        os.replace(tmp_path, self.profile_dir / f"{profile_id}.json")
+        logger.info(f"Profiled {tool} ({mode}, {elapsed_ms:.1f} ms): {profile_id}")
+        self._prune()
+
+    def _summaries(self) -> List[Path]:
+        """Summary files, newest first"""
+        if not self.profile_dir.is_dir():
+            return []
+        paths = list(self.profile_dir.glob("*.json"))
+        paths.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        return paths
+
+    def _prune(self) -> None:
+        for path in self._summaries()[self.keep:]:
+            for stale in (path, path.with_suffix(".prof")):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self, limit: int = DEFAULT_TOP) -> List[Dict[str, Any]]:
+        """Newest captures (metadata only)"""
+        profiles = []
+        for path in self._summaries()[:limit]:
+            try:
+                summary = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            profiles.append({k: summary.get(k) for k in ("profile_id", "tool", "mode", "duration_ms", "error", "created_at")})
+        return profiles
+
+    def get_profile(self, profile_id: str, sort: str = "cumulative", limit: int = DEFAULT_TOP) -> Optional[Dict[str, Any]]:
+        """
+        Summary of one capture with its top functions.
+
+        Args:
+            profile_id: Id from list_profiles
+            sort: cumulative, tottime or calls
+            limit: Functions/allocations to include
+
+        Returns:
+            Summary dict, or None if the id is unknown or invalid
+        """
+        if not _PROFILE_ID.match(profile_id) or ".." in profile_id:
+            return None
+        summary_path = self.profile_dir / f"{profile_id}.json"
+        try:
+            summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if "top_allocations" in summary:
+            summary["top_allocations"] = summary["top_allocations"][:limit]
+
+        prof_path = summary_path.with_suffix(".prof")
+        if prof_path.exists():
+            import pstats
+            stats = pstats.Stats(str(prof_path))
+            stats.sort_stats(sort if sort in SORT_KEYS else "cumulative")
+            summary["total_calls"] = stats.total_calls
+            top_functions = []
+            for func in stats.fcn_list[:limit]:
+                _, calls, tottime, cumtime, _ = stats.stats[func]
+                filename, lineno, name = func
+                top_functions.append({
+                    "function": f"{filename}:{lineno}({name})",
+                    "calls": calls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3),
+                })
+            summary["top_functions"] = top_functions
+        return summary
@@ -0,0 +1,152 @@
+"""
+Serialization - JSON encoding for MCP responses
+
+Compact stdlib JSON by default, orjson when installed
+(MCP_JSON_BACKEND=auto|stdlib|orjson). MCP_RESPONSE_MODE controls how
+tool results are embedded in the response:
+
+    compact     compact JSON text (default)
+    pretty      indent=2 JSON text (previous behaviour)
+    structured  compact JSON text plus the raw object in structuredContent;
+                the text keeps results readable for clients that
+                negotiated a protocol version before 2025-06-18
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_MODES = ("compact", "pretty", "structured")
+DEFAULT_RESPONSE_MODE = "compact"
+
+
+class JSONSerializer:
+    """Standard library backend"""
+
+    name = "stdlib"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+    def pretty(self, obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+
+    def loads(self, data: Any) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson backend; falls back to stdlib for values orjson rejects"""
+
+    name = "orjson"
+    _OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=self._OPTIONS)
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            return JSONSerializer.dumps(self, obj).encode("utf-8")
+
+    def pretty(self, obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, option=self._OPTIONS | orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            return super().pretty(obj)
+
+    def loads(self, data: Any) -> Any:
+        return orjson.loads(data)
+
+
+_serializer: Optional[JSONSerializer] = None
+
+
+def get_serializer(backend: Optional[str] = None) -> JSONSerializer:
+    """
+    Return the JSON backend.
+
+    Args:
+        backend: "auto", "stdlib" or "orjson"; defaults to MCP_JSON_BACKEND.
+            Without an explicit backend the choice is cached per process.
+    """
+    global _serializer
+    if backend is None and _serializer is not None:
+        return _serializer
+
+    choice = (backend or os.environ.get("MCP_JSON_BACKEND", "auto")).lower()
+    if choice == "orjson" and orjson is None:
+        logger.warning("MCP_JSON_BACKEND=orjson but orjson is not installed; using stdlib json")
+    if choice in ("auto", "orjson") and orjson is not None:
+        serializer: JSONSerializer = OrjsonSerializer()
+    else:
+        serializer = JSONSerializer()
+
+    if backend is None:
+        _serializer = serializer
+    return serializer
+
+
+def get_response_mode(mode: Optional[str] = None) -> str:
+    """Validated response mode from the argument or MCP_RESPONSE_MODE"""
+    value = (mode or os.environ.get("MCP_RESPONSE_MODE", DEFAULT_RESPONSE_MODE)).lower()
+    if value not in RESPONSE_MODES:
+        logger.warning(f"Unknown MCP_RESPONSE_MODE {value!r}; using {DEFAULT_RESPONSE_MODE}")
+        return DEFAULT_RESPONSE_MODE
+    return value
+
+
+def format_json(obj: Any, mode: str, serializer: JSONSerializer) -> str:
+    """Encode obj for embedding in a text content item"""
+    if mode == "pretty":
+        return serializer.pretty(obj)
+    return serializer.dumps(obj)
+
+
+def tool_result(
+    label: str,
+    obj: Any,
+    mode: str,
+    serializer: JSONSerializer,
+    is_error: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Build a tools/call result for a JSON payload.
+
+    Args:
+        label: Text shown before the payload (e.g. "Git diff")
+        obj: JSON-serializable payload
+        mode: Response mode (compact, pretty or structured)
+        serializer: Backend used for text modes
+        is_error: Sets isError when not None
+    """
+    if mode == "structured":
+        result: Dict[str, Any] = {
+            "content": [
+                {"type": "text", "text": f"{label}:\n{serializer.dumps(obj)}"}
+            ],
+            # structuredContent must be an object
+            "structuredContent": obj if isinstance(obj, dict) else {"items": obj},
+        }
+    else:
+        result = {
+            "content": [
+                {"type": "text", "text": f"{label}:\n{format_json(obj, mode, serializer)}"}
+            ]
+        }
+    if is_error is not None:
+        result["isError"] = is_error
+    return result
@@ -4,12 +4,14 @@ Cursor MCP Server - Implements proper MCP protocol for Cursor IDE
 This server uses stdio-based JSON-RPC communication with Cursor.
 """
 
-import sys
-import os
 import json
 import logging
+import os
+import select
+import sys
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 SERVER_PATH = Path(__file__).resolve()
 SCRIPT_DIR = SERVER_PATH.parent
@@ -20,13 +22,24 @@ MCP_HOME = Path(os.environ.get("MCP_HOME", str(DEFAULT_SERVER_HOME))).expanduser
 if str(MCP_HOME) not in sys.path:
     sys.path.insert(0, str(MCP_HOME))
 
-from mcp.agent_integration import get_memory
-from mcp.codex_client import CodexClient
-from mcp.verdent_client import VerdentClient
+# Only what initialize and tools/list need is imported here; the memory
+# store, engineer tools, API clients and the async transport load on
+# first use so a new IDE window gets its first response quickly.
 from mcp.extension_context import ExtensionContextStore
+from mcp.line_io import LineReader, write_all
+from mcp.metrics import DEFAULT_PROM_INTERVAL_SEC, ToolMetrics
 from mcp.path_sandbox import PathSandbox
-from mcp import engineer_tools
-from mcp.repo_memory import RepoMemory
+from mcp.profiling import ToolProfiler
+from mcp.serialization import format_json, get_response_mode, get_serializer, tool_result
+from mcp.tool_registry import WRITE_TOKEN_PROPERTY, ToolCall, ToolRegistry, ToolSpec
+
+if TYPE_CHECKING:
+    from mcp.agent_integration import AgentMemory
+    from mcp.code_index import CodeIndex
+    from mcp.git_cache import GitCache
+    from mcp.output_spill import OutputStore
+    from mcp.repo_memory import RepoMemory
+    from mcp.transport import RequestContext
 
 # Setup logging (logs to stderr so stdout stays clean for MCP protocol)
 logging.basicConfig(
@@ -81,31 +94,23 @@ def _coerce_under_root(path_value: str, root: str) -> str:
 class MCPServer:
     """MCP Protocol server for Cursor IDE with security hardening"""
 
-    # Write operations that require MCP_WRITE_TOKEN
-    WRITE_OPERATIONS = {
-        "store_memory",
-        "memory_append",
-        "decision_log_add",
-        "ext_set_context",
-        "ext_clear_context",
-    }
     MAX_CODEX_CHARS = 50_000
     MAX_VERDENT_CHARS = 50_000
     MAX_EXT_CHARS = 50_000
+    MAX_BULK_MEMORIES = 10_000
+    MAX_CLASSIFY_WORKERS = 8
 
     def __init__(self):
         self.server_home = MCP_HOME
-        self.memory = get_memory(
-            db_path=str(self.server_home / "data" / "mcp" / "memories.db")
-        )
         self.request_id = 0
 
-        # Repo memory system
-        context_dir = self.server_home / "context"
-        self.repo_memory = RepoMemory(
-            memory_file=str(context_dir / "MEMORY.md"),
-            decision_file=str(context_dir / "DECISIONS.md")
-        )
+        # Memory DB and repo memory files are opened on first use (see warm_up)
+        self._memory: Optional[AgentMemory] = None
+        self._repo_memory: Optional[RepoMemory] = None
+        self._output_store: Optional[OutputStore] = None
+        self._code_indexes: Dict[str, CodeIndex] = {}
+        self._git_cache: Optional[GitCache] = None
+        self._init_lock = threading.Lock()
 
         # Security: Write token from environment
         self.write_token = os.environ.get("MCP_WRITE_TOKEN")
@@ -113,6 +118,13 @@ class MCPServer:
         # Security: Dry-run mode
         self.dry_run = os.environ.get("MCP_DRY_RUN", "false").lower() == "true"
 
+        # Trigram index for ripgrep_search: "auto" uses it once built, "off" never
+        self.index_mode = os.environ.get("MCP_INDEX", "auto").lower()
+
+        # Response encoding (MCP_JSON_BACKEND, MCP_RESPONSE_MODE)
+        self.serializer = get_serializer()
+        self.response_mode = get_response_mode()
+
         # Security: Default workspace root (resolved once for logging/default use)
         self.default_workspace_root = resolve_workspace_root(None)
 
@@ -125,16 +137,100 @@ class MCPServer:
         if self.dry_run:
             logger.info("DRY-RUN mode enabled - write operations will be logged only")
 
-        # Canonical tool registry (kept in sync with tools/list)
+        # Canonical tool registry (tools/list and tools/call both read it)
+        self.tool_registry = self._build_registry()
+
+        # Per-tool metrics (mcp://cursor-mcp/metrics)
+        self.metrics = ToolMetrics()
+        if os.environ.get("MCP_METRICS", "true").lower() != "false":
+            self.tool_registry.add_middleware(self.metrics.middleware)
+        # Security checks run inside metrics so denied calls are counted too
+        self.tool_registry.add_middleware(self._guard_tool_call)
+        # Opt-in cProfile/tracemalloc captures (MCP_PROFILE or the _profile argument)
+        self.profiler = ToolProfiler(self.server_home / "data" / "mcp" / "profiles")
+        self.tool_registry.add_middleware(self.profiler.middleware)
         self._tools_list = self._build_tools()
         self.tools = {tool["name"]: tool for tool in self._tools_list}
 
         # In-memory extension context store (sanitized + size capped)
-        self.extension_context = ExtensionContextStore(
+        self.extension_context = self.new_extension_context()
+
+    @property
+    def memory(self) -> "AgentMemory":
+        """Memory store; the SQLite DB and schema are created on first access"""
+        if self._memory is None:
+            with self._init_lock:
+                if self._memory is None:
+                    from mcp.agent_integration import get_memory
+                    self._memory = get_memory(
+                        db_path=str(self.server_home / "data" / "mcp" / "memories.db")
+                    )
+        return self._memory
+
+    @property
+    def repo_memory(self) -> "RepoMemory":
+        """Repo memory system; MEMORY.md/DECISIONS.md are created on first access"""
+        if self._repo_memory is None:
+            with self._init_lock:
+                if self._repo_memory is None:
+                    from mcp.repo_memory import RepoMemory
+                    context_dir = self.server_home / "context"
+                    self._repo_memory = RepoMemory(
+                        memory_file=str(context_dir / "MEMORY.md"),
+                        decision_file=str(context_dir / "DECISIONS.md")
+                    )
+        return self._repo_memory
+
+    @property
+    def output_store(self) -> "OutputStore":
+        """Spilled tool output awaiting continue_output"""
+        if self._output_store is None:
+            with self._init_lock:
+                if self._output_store is None:
+                    from mcp.output_spill import OutputStore
+                    self._output_store = OutputStore()
+        return self._output_store
+
+    @property
+    def git_cache(self) -> "GitCache":
+        """Results of git_status/git_diff/git_show keyed on repository state"""
+        if self._git_cache is None:
+            with self._init_lock:
+                if self._git_cache is None:
+                    from mcp.git_cache import GitCache
+                    self._git_cache = GitCache()
+                    self.metrics.add_cache("git", self._git_cache.stats)
+        return self._git_cache
+
+    def code_index(self, root: str) -> "CodeIndex":
+        """Trigram index of a workspace root; its manifest is read on first query"""
+        with self._init_lock:
+            index = self._code_indexes.get(root)
+            if index is None:
+                from mcp.code_index import CodeIndex
+                index = CodeIndex(root, self.server_home / "data" / "mcp" / "index")
+                self._code_indexes[root] = index
+        return index
+
+    def warm_up(self) -> None:
+        """Open everything deferred at start-up (long-lived transports and MCP_EAGER_INIT)"""
+        _ = self.memory, self.repo_memory, self.output_store
+        import mcp.engineer_tools  # noqa: F401
+        import mcp.transport  # noqa: F401
+
+    def new_extension_context(self) -> ExtensionContextStore:
+        """Extension context store; daemon mode creates one per client session"""
+        return ExtensionContextStore(
             sanitize_fn=self._sanitize_payload,
             count_fn=self._count_string_chars,
             max_chars=self.MAX_EXT_CHARS,
         )
+
+    def _extension_context_for(self, call: ToolCall) -> ExtensionContextStore:
+        session = getattr(call.request_context, "session", None)
+        if session is not None:
+            return session.extension_context
+        return self.extension_context
     
     def is_write_allowed(self, provided_token: Optional[str]) -> bool:
         """
@@ -183,102 +279,233 @@ class MCPServer:
             }
         }
     
-    def _build_tools(self) -> list:
-        """Build canonical tools list used by tools/list and introspection"""
-        return [
-            {
-                "name": "store_memory",
-                "description": "Store a memory in the MCP system (requires write_token)",
-                "inputSchema": {
+    def _build_registry(self) -> ToolRegistry:
+        """Build the tool registry consumed by tools/list and tools/call"""
+        registry = ToolRegistry()
+        for spec in (
+            ToolSpec(
+                name="store_memory",
+                description="Store a memory in the MCP system (requires write_token)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "domain": {"type": "string", "description": "Memory domain"},
                         "content": {"type": "string", "description": "Memory content"},
                         "title": {"type": "string", "description": "Memory title"},
                         "tags": {"type": "array", "items": {"type": "string"}},
-                        "write_token": {"type": "string", "description": "Write authorization token (set MCP_WRITE_TOKEN env var)"}
+                        "write_token": WRITE_TOKEN_PROPERTY
                     },
                     "required": ["domain", "content"]
-                }
-            },
-            {
-                "name": "search_memory",
-                "description": "Search memories",
-                "inputSchema": {
+                },
+                handler=self._tool_store_memory,
+                write=True,
+            ),
+            ToolSpec(
+                name="store_memories_bulk",
+                description="Store many memories in one transaction (requires write_token)",
+                input_schema={
                     "type": "object",
                     "properties": {
-                        "query": {"type": "string", "description": "Search query"},
+                        "memories": {
+                            "type": "array",
+                            "description": f"Memories to store (max {self.MAX_BULK_MEMORIES})",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "domain": {"type": "string", "description": "Memory domain"},
+                                    "content": {"type": "string", "description": "Memory content"},
+                                    "title": {"type": "string", "description": "Memory title"},
+                                    "tags": {"type": "array", "items": {"type": "string"}},
+                                    "priority": {"type": "string", "description": "low, medium or high"}
+                                },
+                                "required": ["content"]
+                            }
+                        },
+                        "auto_classify": {"type": "boolean", "description": "Classify domain/tags/priority automatically"},
+                        "workers": {
+                            "type": "integer",
+                            "description": f"Processes for auto_classify (default 1, max {self.MAX_CLASSIFY_WORKERS})"
+                        },
+                        "write_token": WRITE_TOKEN_PROPERTY
+                    },
+                    "required": ["memories"]
+                },
+                handler=self._tool_store_memories_bulk,
+                write=True,
+            ),
+            ToolSpec(
+                name="search_memory",
+                description="Search memories (ranked full-text search with snippets)",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "Search query (\"exact phrase\", prefix*)"},
                         "limit": {"type": "integer", "description": "Max results"}
                     },
                     "required": ["query"]
-                }
-            },
-            {
-                "name": "get_context",
-                "description": "Get contextual memories",
-                "inputSchema": {
+                },
+                handler=self._tool_search_memory,
+            ),
+            ToolSpec(
+                name="get_context",
+                description="Get contextual memories",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "workspace": {"type": "string"},
-                        "max_memories": {"type": "integer"}
+                        "max_memories": {"type": "integer"},
+                        "tags": {"type": "array", "items": {"type": "string"}, "description": "Only memories with these tags"},
+                        "tag_mode": {"type": "string", "enum": ["any", "all"], "description": "Match any tag (default) or all tags"},
+                        "cursor": {"type": "string", "description": "next_cursor from a previous page"},
+                        "include_total": {"type": "boolean", "description": "Also count all matching memories (default: false)"}
                     }
-                }
-            },
-            {
-                "name": "get_stats",
-                "description": "Get MCP system statistics",
-                "inputSchema": {"type": "object", "properties": {}}
-            },
-            {
-                "name": "git_status",
-                "description": "Get git repository status",
-                "inputSchema": {
+                },
+                handler=self._tool_get_context,
+            ),
+            ToolSpec(
+                name="get_stats",
+                description="Get MCP system statistics",
+                input_schema={"type": "object", "properties": {}},
+                handler=self._tool_get_stats,
+            ),
+            ToolSpec(
+                name="get_profile",
+                description="List recent tool-call profiles, or get one profile's top functions and allocations",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "profile_id": {"type": "string", "description": "Profile to fetch (omit to list recent profiles)"},
+                        "sort": {"type": "string", "description": "Function order: cumulative (default), tottime or calls"},
+                        "limit": {"type": "integer", "description": "Entries to return (default: 20)"}
+                    }
+                },
+                handler=self._tool_get_profile,
+            ),
+            ToolSpec(
+                name="git_status",
+                description="Get git repository status",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "cwd": {"type": "string", "description": "Working directory (default: workspace root)"}
                     }
-                }
-            },
-            {
-                "name": "git_diff",
-                "description": "Get git diff between commits or working tree",
-                "inputSchema": {
+                },
+                handler=self._tool_git_status,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="git_diff",
+                description="Get git diff between commits or working tree",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "cwd": {"type": "string", "description": "Working directory (default: workspace root)"},
                         "ref": {"type": "string", "description": "Git reference (default: HEAD)"}
                     }
-                }
-            },
-            {
-                "name": "git_show",
-                "description": "Show git commit details",
-                "inputSchema": {
+                },
+                handler=self._tool_git_diff,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="git_show",
+                description="Show git commit details",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "cwd": {"type": "string", "description": "Working directory (default: workspace root)"},
                         "ref": {"type": "string", "description": "Git reference (default: HEAD)"}
                     }
-                }
-            },
-            {
-                "name": "ripgrep_search",
-                "description": "Search files using ripgrep (with Python fallback)",
-                "inputSchema": {
+                },
+                handler=self._tool_git_show,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="git_read_file_at_ref",
+                description="Read a file as of a commit, branch or tag without checking it out",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string", "description": "File path (relative to cwd)"},
+                        "ref": {"type": "string", "description": "Git reference (default: HEAD)"},
+                        "cwd": {"type": "string", "description": "Working directory (default: workspace root)"}
+                    },
+                    "required": ["path"]
+                },
+                handler=self._tool_git_read_file_at_ref,
+                sandbox="cwd",
+            ),
+            ToolSpec(
+                name="git_ls_tree",
+                description="List a directory as of a commit, branch or tag (like git ls-tree)",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string", "description": "Directory (relative to cwd, default: cwd)"},
+                        "ref": {"type": "string", "description": "Git reference (default: HEAD)"},
+                        "recursive": {"type": "boolean", "description": "List files in all subdirectories (default: false)"},
+                        "long": {"type": "boolean", "description": "Include file sizes (default: false)"},
+                        "max_entries": {"type": "integer", "description": "Maximum entries (default: 10000)"},
+                        "cwd": {"type": "string", "description": "Working directory (default: workspace root)"}
+                    }
+                },
+                handler=self._tool_git_ls_tree,
+                sandbox="cwd",
+            ),
+            ToolSpec(
+                name="ripgrep_search",
+                description="Search files using ripgrep (with Python fallback); stops early at max_results/max_bytes",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "Search pattern"},
                         "path": {"type": "string", "description": "Directory to search (default: workspace root)"},
                         "glob": {"type": "string", "description": "File pattern (default: *)"},
-                        "context_lines": {"type": "integer", "description": "Context lines (default: 2)"}
+                        "context_lines": {"type": "integer", "description": "Context lines (default: 2)"},
+                        "max_results": {"type": "integer", "description": "Stop after this many matches (default: 200)"},
+                        "max_bytes": {"type": "integer", "description": "Stop after this much matched text (default: MCP_OUTPUT_INLINE_BYTES)"},
+                        "timeout_sec": {"type": "integer", "description": "Return partial results after this long (default: 30)"},
+                        "partial_results": {"type": "boolean", "description": "Send matches with progress notifications as they are found (default: false)"}
                     },
                     "required": ["query"]
-                }
-            },
-            {
-                "name": "run_cmd",
-                "description": "Run an allowed command (strict allowlist)",
-                "inputSchema": {
+                },
+                handler=self._tool_ripgrep_search,
+                sandbox="path",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="index_build",
+                description="Build or update the trigram index that narrows ripgrep_search in this workspace",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "cwd": {"type": "string", "description": "Workspace root to index (default: workspace root)"},
+                        "rebuild": {"type": "boolean", "description": "Discard the existing index and start over (default: false)"}
+                    }
+                },
+                handler=self._tool_index_build,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="index_status",
+                description="Show the trigram index of this workspace: files, segments, size and files changed since the build",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "cwd": {"type": "string", "description": "Workspace root (default: workspace root)"}
+                    }
+                },
+                handler=self._tool_index_status,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="run_cmd",
+                description="Run an allowed command (strict allowlist)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "cmd": {"type": "array", "items": {"type": "string"}, "description": "Command as array (e.g., [\"git\", \"status\"])"},
@@ -286,85 +513,111 @@ class MCPServer:
                         "timeout_sec": {"type": "integer", "description": "Timeout in seconds (default: 60)"}
                     },
                     "required": ["cmd"]
-                }
-            },
-            {
-                "name": "memory_append",
-                "description": "Append to project MEMORY.md (requires write_token)",
-                "inputSchema": {
+                },
+                handler=self._tool_run_cmd,
+                sandbox="cwd",
+                concurrency="process",
+            ),
+            ToolSpec(
+                name="continue_output",
+                description="Fetch the next chunk of a truncated git_diff, git_show or run_cmd output",
+                input_schema={
+                    "type": "object",
+                    "properties": {
+                        "cursor": {"type": "string", "description": "next_cursor from the truncated result"},
+                        "max_bytes": {"type": "integer", "description": "Chunk size in bytes (default: MCP_OUTPUT_INLINE_BYTES)"}
+                    },
+                    "required": ["cursor"]
+                },
+                handler=self._tool_continue_output,
+            ),
+            ToolSpec(
+                name="memory_append",
+                description="Append to project MEMORY.md (requires write_token)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "content": {"type": "string", "description": "Memory content"},
                         "tags": {"type": "array", "items": {"type": "string"}, "description": "Optional tags"},
-                        "write_token": {"type": "string", "description": "Write authorization token (set MCP_WRITE_TOKEN env var)"}
+                        "write_token": WRITE_TOKEN_PROPERTY
                     },
                     "required": ["content"]
-                }
-            },
-            {
-                "name": "memory_search",
-                "description": "Search project MEMORY.md",
-                "inputSchema": {
+                },
+                handler=self._tool_memory_append,
+                write=True,
+            ),
+            ToolSpec(
+                name="memory_search",
+                description="Search project MEMORY.md",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "Search query"}
                     },
                     "required": ["query"]
-                }
-            },
-            {
-                "name": "decision_log_add",
-                "description": "Add entry to decision log (requires write_token)",
-                "inputSchema": {
+                },
+                handler=self._tool_memory_search,
+            ),
+            ToolSpec(
+                name="decision_log_add",
+                description="Add entry to decision log (requires write_token)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "decision": {"type": "string", "description": "The decision made"},
                         "tags": {"type": "array", "items": {"type": "string"}, "description": "List of tags for categorization"},
                         "context": {"type": "string", "description": "Additional context about the decision"},
-                        "write_token": {"type": "string", "description": "Write authorization token (set MCP_WRITE_TOKEN env var)"}
+                        "write_token": WRITE_TOKEN_PROPERTY
                     },
                     "required": ["decision"]
-                }
-            },
-            {
-                "name": "decision_log_search",
-                "description": "Search decision log",
-                "inputSchema": {
+                },
+                handler=self._tool_decision_log_add,
+                write=True,
+            ),
+            ToolSpec(
+                name="decision_log_search",
+                description="Search decision log",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "Search query"}
                     },
                     "required": ["query"]
-                }
-            },
-            {
-                "name": "codex_analyze",
-                "description": "Run a read-only analysis via Codex",
-                "inputSchema": {
+                },
+                handler=self._tool_decision_log_search,
+            ),
+            ToolSpec(
+                name="codex_analyze",
+                description="Run a read-only analysis via Codex",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "input": {"type": "string", "description": "Analysis input"},
                         "context": {"type": "string", "description": "Optional context"}
                     },
                     "required": ["input"]
-                }
-            },
-            {
-                "name": "codex_plan",
-                "description": "Generate a read-only plan via Codex",
-                "inputSchema": {
+                },
+                handler=self._tool_codex,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="codex_plan",
+                description="Generate a read-only plan via Codex",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "input": {"type": "string", "description": "Planning input"},
                         "context": {"type": "string", "description": "Optional context"}
                     },
                     "required": ["input"]
-                }
-            },
-            {
-                "name": "codex_diff",
-                "description": "Generate a read-only diff via Codex",
-                "inputSchema": {
+                },
+                handler=self._tool_codex,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="codex_diff",
+                description="Generate a read-only diff via Codex",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "before": {"type": "string", "description": "Original content"},
@@ -372,69 +625,88 @@ class MCPServer:
                         "context": {"type": "string", "description": "Optional context"}
                     },
                     "required": ["before", "after"]
-                }
-            },
-            {
-                "name": "verdent_search",
-                "description": "Search Verdent traces (read-only)",
-                "inputSchema": {
+                },
+                handler=self._tool_codex,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="verdent_search",
+                description="Search Verdent traces (read-only)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "Search query"},
                         "limit": {"type": "integer", "description": "Max results"}
                     },
                     "required": ["query"]
-                }
-            },
-            {
-                "name": "verdent_get_trace",
-                "description": "Get a Verdent trace by ID (read-only)",
-                "inputSchema": {
+                },
+                handler=self._tool_verdent,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="verdent_get_trace",
+                description="Get a Verdent trace by ID (read-only)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "trace_id": {"type": "string", "description": "Trace identifier"}
                     },
                     "required": ["trace_id"]
-                }
-            },
-            {
-                "name": "verdent_recent",
-                "description": "Get recent Verdent traces (read-only)",
-                "inputSchema": {
+                },
+                handler=self._tool_verdent,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="verdent_recent",
+                description="Get recent Verdent traces (read-only)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "limit": {"type": "integer", "description": "Max results"}
                     }
-                }
-            },
-            {
-                "name": "ext_set_context",
-                "description": "Set extension-provided context (write-token required)",
-                "inputSchema": {
+                },
+                handler=self._tool_verdent,
+                concurrency="remote",
+            ),
+            ToolSpec(
+                name="ext_set_context",
+                description="Set extension-provided context (write-token required)",
+                input_schema={
                     "type": "object",
                     "properties": {
                         "payload": {"type": "object", "description": "Context payload"},
-                        "write_token": {"type": "string", "description": "Write authorization token (set MCP_WRITE_TOKEN env var)"}
+                        "write_token": WRITE_TOKEN_PROPERTY
                     },
                     "required": ["payload"]
-                }
-            },
-            {
-                "name": "ext_get_context",
-                "description": "Get extension-provided context",
-                "inputSchema": {"type": "object", "properties": {}}
-            },
-            {
-                "name": "ext_clear_context",
-                "description": "Clear extension-provided context (write-token required)",
-                "inputSchema": {
+                },
+                handler=self._tool_ext_set_context,
+                write=True,
+            ),
+            ToolSpec(
+                name="ext_get_context",
+                description="Get extension-provided context",
+                input_schema={"type": "object", "properties": {}},
+                handler=self._tool_ext_get_context,
+            ),
+            ToolSpec(
+                name="ext_clear_context",
+                description="Clear extension-provided context (write-token required)",
+                input_schema={
                     "type": "object",
                     "properties": {
-                        "write_token": {"type": "string", "description": "Write authorization token (set MCP_WRITE_TOKEN env var)"}
+                        "write_token": WRITE_TOKEN_PROPERTY
                     }
-                }
-            }
-        ]
+                },
+                handler=self._tool_ext_clear_context,
+                write=True,
+            ),
+        ):
+            registry.register(spec)
+        return registry
+
+    def _build_tools(self) -> list:
+        """Build canonical tools list used by tools/list and introspection"""
+        return self.tool_registry.list_tools()
 
     def handle_tools_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """List available tools"""
@@ -486,6 +758,7 @@ class MCPServer:
         return safe, raw_value
 
     def _handle_codex_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        from mcp.codex_client import CodexClient
         client = CodexClient()
         if not client.is_configured():
             return {
@@ -506,16 +779,10 @@ class MCPServer:
             }
 
         result = client.request(tool_name, sanitized)
-        text = json.dumps(result, indent=2)
-        is_error = "error" in result
-        return {
-            "content": [
-                {"type": "text", "text": f"Codex result:\n{text}"}
-            ],
-            "isError": is_error
-        }
+        return self._json_result("Codex result", result, is_error="error" in result)
 
     def _handle_verdent_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        from mcp.verdent_client import VerdentClient
         client = VerdentClient()
         if not client.is_configured():
             return {
@@ -547,401 +814,391 @@ class MCPServer:
         else:
             result = {"error": f"Unknown Verdent tool: {tool_name}"}
 
-        text = json.dumps(result, indent=2)
-        is_error = "error" in result
-        return {
-            "content": [
-                {"type": "text", "text": f"Verdent result:\n{text}"}
-            ],
-            "isError": is_error
-        }
+        return self._json_result("Verdent result", result, is_error="error" in result)
     
-    def handle_call_tool(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _json_result(self, label: str, obj: Any, is_error: Optional[bool] = None) -> Dict[str, Any]:
+        """Tool result for a JSON payload in the configured response mode"""
+        return tool_result(label, obj, self.response_mode, self.serializer, is_error=is_error)
+
+    def _authorize_write(self, tool_name: str, tool_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Single authorization path for write tools; returns an error result if denied"""
+        provided_token = tool_input.get("write_token")
+
+        # Check if write is allowed
+        if not self.is_write_allowed(provided_token):
+            # Build helpful error message
+            if self.dry_run:
+                msg = "[DRY-RUN] Write operation not executed. Set MCP_DRY_RUN=false to enable writes."
+            elif self.write_token is None:
+                msg = "Write operation denied: MCP_WRITE_TOKEN not set. Server is in READ-ONLY mode."
+            elif provided_token is None:
+                msg = "Write operation denied: Missing write_token parameter."
+            else:
+                msg = "Write operation denied: Invalid write_token."
+
+            logger.warning(f"Write denied for {tool_name}: {msg}")
+            return {
+                "content": [
+                    {"type": "text", "text": msg}
+                ],
+                "isError": True
+            }
+
+        # Log successful write authorization
+        logger.info(f"Write authorized for {tool_name}")
+        return None
+
+    def _guard_tool_call(self, spec: ToolSpec, call: ToolCall, call_next) -> Dict[str, Any]:
+        """Middleware: write authorization and sandbox binding before the handler runs"""
+        # Security: Check write permission for write operations
+        if spec.write:
+            denied = self._authorize_write(spec.name, call.arguments)
+            if denied is not None:
+                return denied
+        if spec.sandbox is not None:
+            outside = self._bind_sandbox(spec, call)
+            if outside is not None:
+                return outside
+        return call_next()
+
+    def _bind_sandbox(self, spec: ToolSpec, call: ToolCall) -> Optional[Dict[str, Any]]:
+        """Resolve and validate the tool's sandboxed path; returns an error result if outside"""
+        path_value = call.arguments.get(spec.sandbox)
+        workspace_root, sandbox = self._workspace_and_sandbox(path_value if spec.sandbox == "cwd" else None)
+        safe_path, raw_path = self._sanitize_tool_path(sandbox, workspace_root, path_value)
+        if safe_path is None:
+            return {
+                "content": [
+                    {"type": "text", "text": sandbox.get_error_message(raw_path)}
+                ],
+                "isError": True
+            }
+        call.workspace_root = workspace_root
+        call.sandbox = sandbox
+        call.path = safe_path
+        return None
+
+    def handle_call_tool(self, params: Dict[str, Any], request_context: Optional["RequestContext"] = None) -> Dict[str, Any]:
         """Handle tool calls with security checks"""
         tool_name = params.get("name")
         tool_input = params.get("arguments", {})
 
         logger.debug(f"Tool call: {tool_name} with {tool_input}")
 
-        # Security: Check write permission for write operations
-        if tool_name in self.WRITE_OPERATIONS:
-            provided_token = tool_input.get("write_token")
-
-            # Check if write is allowed
-            if not self.is_write_allowed(provided_token):
-                # Build helpful error message
-                if self.dry_run:
-                    msg = "[DRY-RUN] Write operation not executed. Set MCP_DRY_RUN=false to enable writes."
-                elif self.write_token is None:
-                    msg = "Write operation denied: MCP_WRITE_TOKEN not set. Server is in READ-ONLY mode."
-                elif provided_token is None:
-                    msg = "Write operation denied: Missing write_token parameter."
-                else:
-                    msg = "Write operation denied: Invalid write_token."
-
-                logger.warning(f"Write denied for {tool_name}: {msg}")
-                return {
-                    "content": [
-                        {"type": "text", "text": msg}
-                    ],
-                    "isError": True
-                }
-
-            # Log successful write authorization
-            logger.info(f"Write authorized for {tool_name}")
+        spec = self.tool_registry.get(tool_name)
+        if spec is None:
+            return {
+                "content": [
+                    {"type": "text", "text": f"Unknown tool: {tool_name}"}
+                ]
+            }
 
         try:
-            if tool_name == "store_memory":
-                # In dry-run mode, log but don't execute
-                if self.dry_run:
-                    domain = tool_input.get("domain", "Project Knowledge")
-                    content = tool_input.get("content", "")
-                    logger.info(f"[DRY-RUN] Would store memory: domain={domain}, content_length={len(content)}")
-                    return {
-                        "content": [
-                            {"type": "text", "text": "[DRY-RUN] Memory would be stored (not executed)"}
-                        ]
-                    }
-
-                memory_id = self.memory.store(
-                    domain=tool_input.get("domain", "Project Knowledge"),
-                    content=tool_input.get("content", ""),
-                    title=tool_input.get("title"),
-                    tags=tool_input.get("tags", [])
-                )
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Memory stored: {memory_id}"}
-                    ]
-                }
-            
-            elif tool_name == "search_memory":
-                results = self.memory.search(
-                    query=tool_input.get("query", ""),
-                    limit=tool_input.get("limit", 10)
-                )
-                text = json.dumps(results, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Search results:\n{text}"}
-                    ]
-                }
-            
-            elif tool_name == "get_context":
-                results = self.memory.get_context(
-                    workspace=tool_input.get("workspace"),
-                    max_memories=tool_input.get("max_memories", 20)
-                )
-                text = json.dumps(results, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Context:\n{text}"}
-                    ]
-                }
-            
-            elif tool_name == "get_stats":
-                stat = self.memory.stats()
-                text = json.dumps(stat, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Statistics:\n{text}"}
-                    ]
-                }
+            # Write authorization and sandboxing run as _guard_tool_call middleware
+            return self.tool_registry.invoke(spec, ToolCall(spec.name, tool_input, request_context))
 
-            elif tool_name == "git_status":
-                workspace_root, sandbox = self._workspace_and_sandbox(tool_input.get("cwd"))
-                safe_cwd, raw_cwd = self._sanitize_tool_path(sandbox, workspace_root, tool_input.get("cwd"))
-                if safe_cwd is None:
-                    return {
-                        "content": [
-                            {"type": "text", "text": sandbox.get_error_message(raw_cwd)}
-                        ],
-                        "isError": True
-                    }
-                result = engineer_tools.git_status(safe_cwd)
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Git status:\n{text}"}
-                    ]
-                }
+        except Exception as e:
+            logger.error(f"Tool error: {e}", exc_info=True)
+            return {
+                "content": [
+                    {"type": "text", "text": f"Error: {str(e)}"}
+                ],
+                "isError": True
+            }
 
-            elif tool_name == "git_diff":
-                workspace_root, sandbox = self._workspace_and_sandbox(tool_input.get("cwd"))
-                safe_cwd, raw_cwd = self._sanitize_tool_path(sandbox, workspace_root, tool_input.get("cwd"))
-                if safe_cwd is None:
-                    return {
-                        "content": [
-                            {"type": "text", "text": sandbox.get_error_message(raw_cwd)}
-                        ],
-                        "isError": True
-                    }
-                ref = tool_input.get("ref", "HEAD")
-                result = engineer_tools.git_diff(safe_cwd, ref)
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Git diff:\n{text}"}
-                    ]
-                }
+    def _tool_store_memory(self, call: ToolCall) -> Dict[str, Any]:
+        tool_input = call.arguments
+        memory_id = self.memory.store(
+            domain=tool_input.get("domain", "Project Knowledge"),
+            content=tool_input.get("content", ""),
+            title=tool_input.get("title"),
+            tags=tool_input.get("tags", [])
+        )
+        return {
+            "content": [
+                {"type": "text", "text": f"Memory stored: {memory_id}"}
+            ]
+        }
 
-            elif tool_name == "git_show":
-                workspace_root, sandbox = self._workspace_and_sandbox(tool_input.get("cwd"))
-                safe_cwd, raw_cwd = self._sanitize_tool_path(sandbox, workspace_root, tool_input.get("cwd"))
-                if safe_cwd is None:
-                    return {
-                        "content": [
-                            {"type": "text", "text": sandbox.get_error_message(raw_cwd)}
-                        ],
-                        "isError": True
-                    }
-                ref = tool_input.get("ref", "HEAD")
-                result = engineer_tools.git_show(safe_cwd, ref)
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Git show:\n{text}"}
-                    ]
-                }
+    def _tool_store_memories_bulk(self, call: ToolCall) -> Dict[str, Any]:
+        tool_input = call.arguments
+        memories = tool_input.get("memories", [])
+        if not isinstance(memories, list) or not all(isinstance(m, dict) for m in memories):
+            return {
+                "content": [
+                    {"type": "text", "text": "memories must be an array of objects"}
+                ],
+                "isError": True
+            }
+        if len(memories) > self.MAX_BULK_MEMORIES:
+            return {
+                "content": [
+                    {"type": "text", "text": f"Too many memories: {len(memories)} (limit {self.MAX_BULK_MEMORIES})"}
+                ],
+                "isError": True
+            }
 
-            elif tool_name == "ripgrep_search":
-                query = tool_input.get("query", "")
-                workspace_root, sandbox = self._workspace_and_sandbox(None)
-                safe_path, raw_path = self._sanitize_tool_path(sandbox, workspace_root, tool_input.get("path"))
-                if safe_path is None:
-                    return {
-                        "content": [
-                            {"type": "text", "text": sandbox.get_error_message(raw_path)}
-                        ],
-                        "isError": True
-                    }
-                glob = tool_input.get("glob", "*")
-                context_lines = tool_input.get("context_lines", 2)
-                result = engineer_tools.ripgrep_search(query, safe_path, glob, context_lines)
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Ripgrep results:\n{text}"}
-                    ]
-                }
+        items = [
+            {
+                "domain": m.get("domain", "Project Knowledge"),
+                "content": m.get("content", ""),
+                "title": m.get("title"),
+                "tags": m.get("tags", []),
+                "priority": m.get("priority", "medium"),
+            }
+            for m in memories
+        ]
+        workers = max(1, min(int(tool_input.get("workers", 1)), self.MAX_CLASSIFY_WORKERS, os.cpu_count() or 1))
+        memory_ids = self.memory.store_many(
+            items,
+            auto_classify=bool(tool_input.get("auto_classify", False)),
+            workers=workers
+        )
+        return self._json_result(f"Memories stored: {len(memory_ids)}", memory_ids)
 
-            elif tool_name == "run_cmd":
-                cmd = tool_input.get("cmd", [])
-                workspace_root, sandbox = self._workspace_and_sandbox(tool_input.get("cwd"))
-                safe_cwd, raw_cwd = self._sanitize_tool_path(sandbox, workspace_root, tool_input.get("cwd"))
-                if safe_cwd is None:
-                    return {
-                        "content": [
-                            {"type": "text", "text": sandbox.get_error_message(raw_cwd)}
-                        ],
-                        "isError": True
-                    }
-                timeout_sec = tool_input.get("timeout_sec", 60)
-                result = engineer_tools.run_cmd(cmd, safe_cwd, sandbox, timeout_sec)
-                text = json.dumps(result, indent=2)
-
-                # Check if command was rejected (returncode -1 indicates allowlist/sandbox rejection)
-                if result.get("returncode") == -1:
-                    return {
-                        "content": [
-                            {"type": "text", "text": f"Command result:\n{text}"}
-                        ],
-                        "isError": True
-                    }
+    def _tool_search_memory(self, call: ToolCall) -> Dict[str, Any]:
+        results = self.memory.search(
+            query=call.arguments.get("query", ""),
+            limit=call.arguments.get("limit", 10)
+        )
+        return self._json_result("Search results", results)
+
+    def _tool_get_context(self, call: ToolCall) -> Dict[str, Any]:
+        tool_input = call.arguments
+        page = self.memory.get_context_page(
+            workspace=tool_input.get("workspace"),
+            max_memories=tool_input.get("max_memories", 20),
+            tags=tool_input.get("tags"),
+            tag_mode=tool_input.get("tag_mode", "any"),
+            cursor=tool_input.get("cursor"),
+            include_total=tool_input.get("include_total", False)
+        )
+        page_info = {k: page[k] for k in ("next_cursor", "total") if page[k] is not None}
+        if self.response_mode == "structured":
+            return self._json_result("Context", {"memories": page["memories"], **page_info})
+
+        result = self._json_result("Context", page["memories"])
+        if page_info:
+            result["content"].append(
+                {"type": "text", "text": f"Page:\n{format_json(page_info, self.response_mode, self.serializer)}"}
+            )
+        return result
+
+    def _tool_get_stats(self, call: ToolCall) -> Dict[str, Any]:
+        stat = self.memory.stats()
+        return self._json_result("Statistics", stat)
+
+    def _tool_get_profile(self, call: ToolCall) -> Dict[str, Any]:
+        tool_input = call.arguments
+        limit = tool_input.get("limit", 20)
+        profile_id = tool_input.get("profile_id")
+        if not profile_id:
+            return self._json_result("Profiles", self.profiler.list_profiles(limit))
+        result = self.profiler.get_profile(profile_id, tool_input.get("sort", "cumulative"), limit)
+        if result is None:
+            return {
+                "content": [
+                    {"type": "text", "text": f"Profile not found: {profile_id}"}
+                ],
+                "isError": True
+            }
+        return self._json_result("Profile", result)
+
+    def _tool_git_status(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        result = engineer_tools.git_status(call.path, cache=self.git_cache)
+        return self._json_result("Git status", result)
+
+    def _tool_git_diff(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        result = engineer_tools.git_diff(
+            call.path, call.arguments.get("ref", "HEAD"),
+            cancel_token=call.cancel_token, progress=call.progress, output_store=self.output_store,
+            cache=self.git_cache
+        )
+        return self._json_result("Git diff", result)
+
+    def _tool_git_show(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        result = engineer_tools.git_show(
+            call.path, call.arguments.get("ref", "HEAD"),
+            cancel_token=call.cancel_token, progress=call.progress, output_store=self.output_store,
+            cache=self.git_cache
+        )
+        return self._json_result("Git show", result)
 
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Command result:\n{text}"}
-                    ]
-                }
+    def _object_path_error(self, call: ToolCall) -> Optional[Dict[str, Any]]:
+        """Error result if the path argument points outside the workspace"""
+        path = call.arguments.get("path") or "."
+        if call.sandbox.sanitize_path(_coerce_under_root(path, call.path)) is None:
+            return {
+                "content": [
+                    {"type": "text", "text": call.sandbox.get_error_message(path)}
+                ],
+                "isError": True
+            }
+        return None
+
+    def _tool_git_read_file_at_ref(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        denied = self._object_path_error(call)
+        if denied is not None:
+            return denied
+        result = engineer_tools.git_read_file_at_ref(
+            call.path, call.arguments.get("path", ""), call.arguments.get("ref", "HEAD"),
+            output_store=self.output_store
+        )
+        return self._json_result("File at ref", result, is_error="error" in result)
+
+    def _tool_git_ls_tree(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        denied = self._object_path_error(call)
+        if denied is not None:
+            return denied
+        tool_input = call.arguments
+        result = engineer_tools.git_ls_tree(
+            call.path, tool_input.get("ref", "HEAD"), tool_input.get("path", ""),
+            recursive=bool(tool_input.get("recursive", False)), long=bool(tool_input.get("long", False)),
+            max_entries=int(tool_input.get("max_entries", engineer_tools.MAX_TREE_ENTRIES)),
+            cancel_token=call.cancel_token
+        )
+        return self._json_result("Tree", result, is_error="error" in result)
+
+    def _tool_ripgrep_search(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        tool_input = call.arguments
+        result = engineer_tools.ripgrep_search(
+            tool_input.get("query", ""), call.path,
+            tool_input.get("glob", "*"), tool_input.get("context_lines", 2),
+            cancel_token=call.cancel_token, progress=call.progress,
+            max_results=tool_input.get("max_results", engineer_tools.DEFAULT_MAX_RESULTS),
+            max_bytes=tool_input.get("max_bytes"),
+            timeout_sec=tool_input.get("timeout_sec", 30),
+            partial_results=bool(tool_input.get("partial_results", False)),
+            index=self.code_index(call.workspace_root) if self.index_mode != "off" else None
+        )
+        return self._json_result("Ripgrep results", result)
 
-            elif tool_name == "memory_append":
-                provided_token = tool_input.get("write_token")
-
-                # Check if write is allowed
-                if not self.is_write_allowed(provided_token):
-                    if self.dry_run:
-                        msg = "[DRY-RUN] Memory append not executed. Set MCP_DRY_RUN=false to enable writes."
-                    elif self.write_token is None:
-                        msg = "Write operation denied: MCP_WRITE_TOKEN not set. Server is in READ-ONLY mode."
-                    elif provided_token is None:
-                        msg = "Write operation denied: Missing write_token parameter."
-                    else:
-                        msg = "Write operation denied: Invalid write_token."
-
-                    logger.warning(f"Write denied for {tool_name}: {msg}")
-                    return {
-                        "content": [
-                            {"type": "text", "text": msg}
-                        ],
-                        "isError": True
-                    }
+    def _tool_index_build(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp.engineer_tools import ToolCancelled
+        try:
+            result = self.code_index(call.workspace_root).build(
+                rebuild=bool(call.arguments.get("rebuild", False)),
+                cancel_token=call.cancel_token, progress=call.progress
+            )
+        except ToolCancelled:
+            result = {"error": "Index build cancelled; files indexed so far are kept", "cancelled": True}
+        return self._json_result("Index build", result, is_error="error" in result)
+
+    def _tool_index_status(self, call: ToolCall) -> Dict[str, Any]:
+        result = self.code_index(call.workspace_root).status()
+        return self._json_result("Index status", result)
+
+    def _tool_run_cmd(self, call: ToolCall) -> Dict[str, Any]:
+        from mcp import engineer_tools
+        tool_input = call.arguments
+        result = engineer_tools.run_cmd(
+            tool_input.get("cmd", []), call.path, call.sandbox, tool_input.get("timeout_sec", 60),
+            cancel_token=call.cancel_token, progress=call.progress, output_store=self.output_store
+        )
+        # Check if command was rejected (returncode -1 indicates allowlist/sandbox rejection)
+        if result.get("returncode") == -1:
+            return self._json_result("Command result", result, is_error=True)
 
-                # In dry-run mode, log but don't execute
-                if self.dry_run:
-                    content = tool_input.get("content", "")
-                    tags = tool_input.get("tags", [])
-                    logger.info(f"[DRY-RUN] Would append memory: content_length={len(content)}, tags={tags}")
-                    return {
-                        "content": [
-                            {"type": "text", "text": "[DRY-RUN] Memory would be appended (not executed)"}
-                        ]
-                    }
+        return self._json_result("Command result", result)
 
-                timestamp = self.repo_memory.append_memory(
-                    content=tool_input.get("content", ""),
-                    tags=tool_input.get("tags")
-                )
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Memory appended: {timestamp}"}
-                    ]
-                }
+    def _tool_continue_output(self, call: ToolCall) -> Dict[str, Any]:
+        cursor = call.arguments.get("cursor", "")
+        result = self.output_store.read(cursor, call.arguments.get("max_bytes"))
+        if result is None:
+            return {
+                "content": [
+                    {"type": "text", "text": f"Unknown or expired cursor: {cursor}"}
+                ],
+                "isError": True
+            }
+        return self._json_result("Output", result)
 
-            elif tool_name == "memory_search":
-                query = tool_input.get("query", "")
-                results = self.repo_memory.search_memory(query)
-                text = "\n\n".join(results) if results else "No results found"
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Memory search results:\n{text}"}
-                    ]
-                }
+    def _tool_memory_append(self, call: ToolCall) -> Dict[str, Any]:
+        timestamp = self.repo_memory.append_memory(
+            content=call.arguments.get("content", ""),
+            tags=call.arguments.get("tags")
+        )
+        return {
+            "content": [
+                {"type": "text", "text": f"Memory appended: {timestamp}"}
+            ]
+        }
 
-            elif tool_name == "decision_log_add":
-                provided_token = tool_input.get("write_token")
-
-                # Check if write is allowed
-                if not self.is_write_allowed(provided_token):
-                    if self.dry_run:
-                        msg = "[DRY-RUN] Decision log not executed. Set MCP_DRY_RUN=false to enable writes."
-                    elif self.write_token is None:
-                        msg = "Write operation denied: MCP_WRITE_TOKEN not set. Server is in READ-ONLY mode."
-                    elif provided_token is None:
-                        msg = "Write operation denied: Missing write_token parameter."
-                    else:
-                        msg = "Write operation denied: Invalid write_token."
-
-                    logger.warning(f"Write denied for {tool_name}: {msg}")
-                    return {
-                        "content": [
-                            {"type": "text", "text": msg}
-                        ],
-                        "isError": True
-                    }
+    def _tool_memory_search(self, call: ToolCall) -> Dict[str, Any]:
+        results = self.repo_memory.search_memory(call.arguments.get("query", ""))
+        text = "\n\n".join(results) if results else "No results found"
+        return {
+            "content": [
+                {"type": "text", "text": f"Memory search results:\n{text}"}
+            ]
+        }
 
-                # In dry-run mode, log but don't execute
-                if self.dry_run:
-                    decision = tool_input.get("decision", "")
-                    tags = tool_input.get("tags", [])
-                    context = tool_input.get("context", "")
-                    logger.info(f"[DRY-RUN] Would add decision: {decision}, tags={tags}, context={context}")
-                    return {
-                        "content": [
-                            {"type": "text", "text": "[DRY-RUN] Decision would be logged (not executed)"}
-                        ]
-                    }
+    def _tool_decision_log_add(self, call: ToolCall) -> Dict[str, Any]:
+        timestamp = self.repo_memory.add_decision(
+            decision=call.arguments.get("decision", ""),
+            tags=call.arguments.get("tags", []),
+            context=call.arguments.get("context", "")
+        )
+        return {
+            "content": [
+                {"type": "text", "text": f"Decision logged: {timestamp}"}
+            ]
+        }
 
-                timestamp = self.repo_memory.add_decision(
-                    decision=tool_input.get("decision", ""),
-                    tags=tool_input.get("tags", []),
-                    context=tool_input.get("context", "")
-                )
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Decision logged: {timestamp}"}
-                    ]
-                }
+    def _tool_decision_log_search(self, call: ToolCall) -> Dict[str, Any]:
+        results = self.repo_memory.search_decisions(call.arguments.get("query", ""))
+        text = "\n\n".join(results) if results else "No results found"
+        return {
+            "content": [
+                {"type": "text", "text": f"Decision log results:\n{text}"}
+            ]
+        }
 
-            elif tool_name == "decision_log_search":
-                query = tool_input.get("query", "")
-                results = self.repo_memory.search_decisions(query)
-                text = "\n\n".join(results) if results else "No results found"
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Decision log results:\n{text}"}
-                    ]
-                }
-            
-            elif tool_name == "codex_analyze":
-                return self._handle_codex_tool(tool_name, tool_input)
-            
-            elif tool_name == "codex_plan":
-                return self._handle_codex_tool(tool_name, tool_input)
-            
-            elif tool_name == "codex_diff":
-                return self._handle_codex_tool(tool_name, tool_input)
-
-            elif tool_name == "verdent_search":
-                return self._handle_verdent_tool(tool_name, tool_input)
-
-            elif tool_name == "verdent_get_trace":
-                return self._handle_verdent_tool(tool_name, tool_input)
-
-            elif tool_name == "verdent_recent":
-                return self._handle_verdent_tool(tool_name, tool_input)
-
-            elif tool_name == "ext_set_context":
-                payload = tool_input.get("payload", {})
-                result = self.extension_context.set_context(payload)
-                text = json.dumps(result, indent=2)
-                is_error = "error" in result
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Extension context set:\n{text}"}
-                    ],
-                    "isError": is_error
-                }
+    def _tool_codex(self, call: ToolCall) -> Dict[str, Any]:
+        return self._handle_codex_tool(call.name, call.arguments)
 
-            elif tool_name == "ext_get_context":
-                result = self.extension_context.get_context()
-                if result.get("status") == "none set":
-                    return {
-                        "content": [
-                            {"type": "text", "text": "Extension context: none set"}
-                        ]
-                    }
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Extension context:\n{text}"}
-                    ]
-                }
+    def _tool_verdent(self, call: ToolCall) -> Dict[str, Any]:
+        return self._handle_verdent_tool(call.name, call.arguments)
 
-            elif tool_name == "ext_clear_context":
-                result = self.extension_context.clear()
-                text = json.dumps(result, indent=2)
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Extension context cleared:\n{text}"}
-                    ]
-                }
+    def _tool_ext_set_context(self, call: ToolCall) -> Dict[str, Any]:
+        result = self._extension_context_for(call).set_context(call.arguments.get("payload", {}))
+        return self._json_result("Extension context set", result, is_error="error" in result)
 
-            else:
-                return {
-                    "content": [
-                        {"type": "text", "text": f"Unknown tool: {tool_name}"}
-                    ]
-                }
-        
-        except Exception as e:
-            logger.error(f"Tool error: {e}", exc_info=True)
+    def _tool_ext_get_context(self, call: ToolCall) -> Dict[str, Any]:
+        result = self._extension_context_for(call).get_context()
+        if result.get("status") == "none set":
             return {
                 "content": [
-                    {"type": "text", "text": f"Error: {str(e)}"}
-                ],
-                "isError": True
+                    {"type": "text", "text": "Extension context: none set"}
+                ]
             }
-    
+        return self._json_result("Extension context", result)
+
+    def _tool_ext_clear_context(self, call: ToolCall) -> Dict[str, Any]:
+        result = self._extension_context_for(call).clear()
+        return self._json_result("Extension context cleared", result)
+
     def handle_resources_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """List available resources"""
-        stats = self.memory.stats()
+        total = self.memory.count()
         return {
             "resources": [
                 {
                     "uri": "mcp://cursor-mcp/stats",
                     "name": "MCP Statistics",
-                    "description": f"Current system stats: {stats['total']} memories",
+                    "description": f"Current system stats: {total} memories",
+                    "mimeType": "application/json"
+                },
+                {
+                    "uri": "mcp://cursor-mcp/metrics",
+                    "name": "MCP Tool Metrics",
+                    "description": "Per-tool calls, latency percentiles, errors, payload bytes and DB statements",
                     "mimeType": "application/json"
                 }
             ]
@@ -958,15 +1215,45 @@ class MCPServer:
                     {
                         "uri": uri,
                         "mimeType": "application/json",
-                        "text": json.dumps(stats, indent=2)
+                        "text": format_json(stats, self.response_mode, self.serializer)
+                    }
+                ]
+            }
+        
+        if uri == "mcp://cursor-mcp/metrics":
+            return {
+                "contents": [
+                    {
+                        "uri": uri,
+                        "mimeType": "application/json",
+                        "text": format_json(self.metrics.snapshot(), self.response_mode, self.serializer)
                     }
                 ]
             }
         
         return {"contents": []}
     
-    def process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Process incoming MCP request"""
+    def process_batch(self, requests: List[Any]) -> Optional[Any]:
+        """Process a JSON-RPC batch in order (the async transport runs members concurrently)"""
+        from mcp.transport import invalid_request
+        if not requests:
+            return invalid_request()
+        responses = []
+        for request in requests:
+            response = self.process_request(request) if isinstance(request, dict) else invalid_request()
+            if response is not None:
+                responses.append(response)
+        return responses or None
+
+    def process_request(
+        self,
+        request: Union[Dict[str, Any], List[Any]],
+        request_context: Optional["RequestContext"] = None
+    ) -> Optional[Any]:
+        """Process incoming MCP request or batch (request_context carries cancellation and progress)"""
+        if isinstance(request, list):
+            return self.process_batch(request)
+
         method = request.get("method", "")
         params = request.get("params", {})
         request_id = request.get("id")
@@ -988,7 +1275,7 @@ class MCPServer:
             elif method == "tools/list":
                 result = self.handle_tools_list(params)
             elif method == "tools/call":
-                result = self.handle_call_tool(params)
+                result = self.handle_call_tool(params, request_context)
             elif method == "resources/list":
                 result = self.handle_resources_list(params)
             elif method == "resources/read":
@@ -1026,42 +1313,148 @@ class MCPServer:
                 return None
 
 
+# Handshake methods answered before the async transport is imported
+STARTUP_METHODS = frozenset({"initialize", "tools/list", "notifications/initialized"})
+
+# Start warming up deferred state once stdin has been quiet this long
+WARM_UP_IDLE_SEC = 0.05
+
+
+def _warm_up_in_background(server: MCPServer) -> None:
+    """Run MCPServer.warm_up on a thread while the client is idle"""
+    def run() -> None:
+        try:
+            server.warm_up()
+        except Exception as e:
+            # Retried (and reported to the client) on first real use
+            logger.warning(f"Background warm-up failed: {e}")
+
+    threading.Thread(target=run, name="mcp-warm-up", daemon=True).start()
+
+
+def serve_startup(server: MCPServer, reader: LineReader) -> Optional[List[bytes]]:
+    """
+    Answer the opening handshake synchronously, before asyncio is loaded.
+
+    initialize and tools/list are served from data built in
+    MCPServer.__init__; the first other request ends this phase. Once
+    the client goes quiet, warm_up() runs in the background so the first
+    tool call does not pay for the deferred imports and DB open.
+
+    Returns:
+        Unprocessed lines starting with that request, or None at EOF
+    """
+    out_fd = sys.stdout.fileno()
+    warming = False
+    while True:
+        if not warming:
+            # Use the client's idle time, not its handshake round trips
+            readable, _, _ = select.select([reader.fd], [], [], WARM_UP_IDLE_SEC)
+            if not readable:
+                _warm_up_in_background(server)
+                warming = True
+        lines = reader.read_lines()
+        if lines is None:
+            return None
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                request = server.serializer.loads(line)
+            except ValueError:
+                return lines[index:]
+            if not isinstance(request, dict) or request.get("method") not in STARTUP_METHODS:
+                return lines[index:]
+
+            response = server.process_request(request)
+            if response is not None:
+                write_all(out_fd, server.serializer.dumps_bytes(response) + b"\n")
+
+
+def serve_stdio_sync(server: MCPServer) -> None:
+    """Legacy one-request-at-a-time stdio loop (MCP_STDIO_MODE=sync)"""
+    # Read and process requests from stdin
+    while True:
+        try:
+            line = sys.stdin.readline()
+            if not line:
+                logger.info("EOF received, shutting down")
+                break
+            
+            # Parse JSON request
+            request = json.loads(line.strip())
+            
+            # Process request
+            response = server.process_request(request)
+            
+            # Send response on stdout only if not None (notifications have no response)
+            if response is not None:
+                data = server.serializer.dumps_bytes(response) + b"\n"
+                sys.stdout.buffer.write(data)
+                sys.stdout.flush()
+                server.metrics.record_io(request, len(line), len(data))
+        
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid JSON: {e}")
+            continue
+        except KeyboardInterrupt:
+            logger.info("Interrupted, shutting down")
+            break
+        except Exception as e:
+            logger.error(f"Error: {e}", exc_info=True)
+            continue
+
+
 def main():
     """Main entry point"""
     logger.info("Starting Cursor MCP Server")
     
     try:
         server = MCPServer()
-        logger.info("Server ready, listening on stdio")
+        transport = os.environ.get("MCP_TRANSPORT", "stdio").lower()
+        mode = os.environ.get("MCP_STDIO_MODE", "async").lower()
+
+        prom_file = os.environ.get("MCP_METRICS_PROM_FILE")
+        if prom_file:
+            interval = float(os.environ.get("MCP_METRICS_PROM_INTERVAL_SEC", DEFAULT_PROM_INTERVAL_SEC))
+            server.metrics.start_prometheus_dump(prom_file, interval)
+
+        # Shared long-lived servers pay the start-up cost once, up front
+        if transport != "stdio" or os.environ.get("MCP_EAGER_INIT", "false").lower() == "true":
+            server.warm_up()
+
+        if transport == "daemon":
+            import asyncio
+
+            from mcp.daemon import default_socket_path, idle_timeout_from_env, serve_unix
+            socket_path = default_socket_path(server.server_home)
+            logger.info(f"Server ready, starting daemon on {socket_path}")
+            asyncio.run(serve_unix(server, socket_path, idle_timeout_from_env()))
+            return
+        if transport == "http":
+            # Imported here so stdio start-up does not load FastAPI
+            from mcp.http_transport import serve_http
+            logger.info("Server ready, starting HTTP transport")
+            serve_http(server)
+            return
+
+        logger.info(f"Server ready, listening on stdio ({mode})")
         
-        # Read and process requests from stdin
-        while True:
+        if mode == "sync":
+            serve_stdio_sync(server)
+        else:
             try:
-                line = sys.stdin.readline()
-                if not line:
+                reader = LineReader(sys.stdin.fileno())
+                initial_lines = serve_startup(server, reader)
+                if initial_lines is None:
                     logger.info("EOF received, shutting down")
-                    break
-                
-                # Parse JSON request
-                request = json.loads(line.strip())
-                
-                # Process request
-                response = server.process_request(request)
-                
-                # Send response on stdout only if not None (notifications have no response)
-                if response is not None:
-                    print(json.dumps(response))
-                    sys.stdout.flush()
-            
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON: {e}")
-                continue
+                    return
+                import asyncio
+
+                from mcp.transport import serve_stdio
+                asyncio.run(serve_stdio(server, reader=reader, initial_lines=initial_lines))
             except KeyboardInterrupt:
                 logger.info("Interrupted, shutting down")
-                break
-            except Exception as e:
-                logger.error(f"Error: {e}", exc_info=True)
-                continue
     
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+MCP Stdio Shim - Attach an IDE's stdio pipe to the shared MCP daemon
+
+Connects to the daemon's Unix socket, starting the daemon
+(mcp/server.py with MCP_TRANSPORT=daemon) if none is running, then
+relays bytes in both directions. Uses only the standard library so an
+IDE window attaches without importing the server.
+
+Usage (in place of mcp/server.py in the IDE MCP config):
+    python3 /ABS/PATH/TO/mcp/shim.py
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SERVER_PATH = SCRIPT_DIR / "server.py"
+MCP_HOME = Path(os.environ.get("MCP_HOME", str(SCRIPT_DIR.parent))).expanduser().resolve()
+
+# How long to wait for a freshly spawned daemon to accept connections
+SPAWN_TIMEOUT_SEC = 30.0
+CHUNK_SIZE = 1 << 16
+
+
+def socket_path() -> Path:
+    """Must match mcp.daemon.default_socket_path"""
+    env_path = os.environ.get("MCP_SOCKET_PATH")
+    if env_path:
+        return Path(env_path).expanduser()
+    return MCP_HOME / "data" / "mcp" / "mcp.sock"
+
+
+def connect(path: Path) -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def spawn_daemon(path: Path) -> subprocess.Popen:
+    """Start a detached daemon that outlives this shim"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    env["MCP_TRANSPORT"] = "daemon"
+    env["MCP_SOCKET_PATH"] = str(path)
+    env["MCP_HOME"] = str(MCP_HOME)
+    with open(f"{path}.log", "ab") as log:
+        return subprocess.Popen(
+            [sys.executable, str(SERVER_PATH)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+
+
+def attach(path: Path, timeout: float = SPAWN_TIMEOUT_SEC) -> socket.socket:
+    sock = connect(path)
+    if sock is not None:
+        return sock
+
+    process = spawn_daemon(path)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        sock = connect(path)
+        if sock is not None:
+            return sock
+        if process.poll() is not None and process.returncode != 0:
+            raise RuntimeError(f"MCP daemon exited with {process.returncode}; see {path}.log")
+        time.sleep(0.02)
+    raise TimeoutError(f"MCP daemon did not start within {timeout:g}s; see {path}.log")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def relay(sock: socket.socket) -> None:
+    """Copy stdin to the socket and the socket to stdout until the daemon closes"""
+    stdin_fd, stdout_fd = sys.stdin.fileno(), sys.stdout.fileno()
+
+    def pump_stdin() -> None:
+        try:
+            while True:
+                data = os.read(stdin_fd, CHUNK_SIZE)
+                if not data:
+                    break
+                sock.sendall(data)
+        except OSError:
+            pass
+        finally:
+            # Half-close: the daemon finishes pending calls, then closes
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+    while True:
+        data = sock.recv(CHUNK_SIZE)
+        if not data:
+            break
+        _write_all(stdout_fd, data)
+
+
+def main() -> int:
+    path = socket_path()
+    try:
+        sock = attach(path)
+    except (RuntimeError, TimeoutError, OSError) as e:
+        print(f"mcp shim: {e}", file=sys.stderr)
+        return 1
+    try:
+        relay(sock)
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
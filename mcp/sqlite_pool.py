@@ -0,0 +1,152 @@
+"""
+SQLite Pool - Long-lived connections for the memory store
+
+One writer connection (serialized by a lock) plus a bounded pool of
+read-only connections. PRAGMAs are applied once when a connection is
+opened instead of on every call. Every connection counts the statements
+it runs for per-tool metrics.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from .metrics import count_db_statement
+
+
+@dataclass
+class SQLiteSettings:
+    """Per-connection PRAGMAs and pool sizing"""
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16000          # negative = KiB (16 MB)
+    mmap_size: int = 268_435_456      # 256 MB
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
+    read_pool_size: int = 4
+
+    @classmethod
+    def from_env(cls) -> "SQLiteSettings":
+        """Build settings from MCP_SQLITE_* environment variables"""
+        defaults = cls()
+        return cls(
+            journal_mode=os.environ.get("MCP_SQLITE_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=os.environ.get("MCP_SQLITE_SYNCHRONOUS", defaults.synchronous),
+            cache_size=int(os.environ.get("MCP_SQLITE_CACHE_SIZE", defaults.cache_size)),
+            mmap_size=int(os.environ.get("MCP_SQLITE_MMAP_SIZE", defaults.mmap_size)),
+            temp_store=os.environ.get("MCP_SQLITE_TEMP_STORE", defaults.temp_store),
+            busy_timeout_ms=int(os.environ.get("MCP_SQLITE_BUSY_TIMEOUT_MS", defaults.busy_timeout_ms)),
+            read_pool_size=int(os.environ.get("MCP_SQLITE_READ_POOL_SIZE", defaults.read_pool_size)),
+        )
+
+
+class SQLiteConnectionPool:
+    """Single writer connection plus a bounded pool of read-only connections"""
+
+    def __init__(self, db_path: str, settings: Optional[SQLiteSettings] = None):
+        self.db_path = Path(db_path)
+        self.settings = settings or SQLiteSettings.from_env()
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._reader_lock = threading.Lock()
+        self._closed = False
+
+    def _apply_pragmas(self, conn: sqlite3.Connection, writer: bool) -> None:
+        conn.set_trace_callback(count_db_statement)
+        s = self.settings
+        # journal_mode is persistent in the database file; only the writer sets it
+        if writer and s.journal_mode:
+            conn.execute(f"PRAGMA journal_mode={s.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={s.synchronous}")
+        conn.execute(f"PRAGMA cache_size={int(s.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(s.mmap_size)}")
+        conn.execute(f"PRAGMA temp_store={s.temp_store}")
+        conn.execute(f"PRAGMA busy_timeout={int(s.busy_timeout_ms)}")
+
+    def _open_writer(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn, writer=True)
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn, writer=False)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Borrow the writer connection; commits on success, rolls back on error"""
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._writer is None:
+                self._writer = self._open_writer()
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        # The writer creates the file and enables WAL before any reader attaches
+        if self._writer is None:
+            with self.writer():
+                pass
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._reader_lock:
+            if len(self._all_readers) < max(1, self.settings.read_pool_size):
+                conn = self._open_reader()
+                self._all_readers.append(conn)
+                return conn
+
+        # Pool exhausted: wait for a connection to be returned
+        return self._readers.get()
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._reader_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._all_readers.clear()
@@ -0,0 +1,136 @@
+"""
+Tool Registry - Table-driven tool definitions and dispatch for the MCP server
+
+Each tool is a ToolSpec (name, schema, write flag, sandbox argument,
+concurrency class, handler). tools/list and tools/call both read the
+same registry, so a tool's metadata lives in one place and routing is
+a dict lookup. Middleware wraps every handler call, giving one hook
+point for per-tool metrics and caching.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional
+
+from mcp.path_sandbox import PathSandbox
+
+# Schema property shared by every write tool
+WRITE_TOKEN_PROPERTY = {
+    "type": "string",
+    "description": "Write authorization token (set MCP_WRITE_TOKEN env var)",
+}
+
+
+@dataclass
+class ToolCall:
+    """Arguments and resolved execution context for one tool invocation"""
+    name: str
+    arguments: Dict[str, Any]
+    request_context: Optional[Any] = None
+    # Set when the tool declares a sandbox argument
+    workspace_root: Optional[str] = None
+    sandbox: Optional[PathSandbox] = None
+    path: Optional[str] = None
+
+    @property
+    def cancel_token(self) -> Optional[Any]:
+        return self.request_context.cancel_token if self.request_context is not None else None
+
+    @property
+    def progress(self) -> Optional[Callable[..., None]]:
+        return self.request_context.report_progress if self.request_context is not None else None
+
+
+ToolHandler = Callable[[ToolCall], Dict[str, Any]]
+# middleware(spec, call, call_next) -> result
+ToolMiddleware = Callable[["ToolSpec", ToolCall, Callable[[], Dict[str, Any]]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """
+    Definition of one MCP tool.
+
+    Attributes:
+        name: Tool name exposed over MCP
+        description: Human-readable description for tools/list
+        input_schema: JSON schema for the tool arguments
+        handler: Callable that executes the tool
+        write: Requires MCP_WRITE_TOKEN (and is refused in dry-run mode)
+        sandbox: Argument holding a path that must stay in the workspace;
+            "cwd" also selects the workspace root
+        concurrency: Concurrency class shared by similar tools
+            (e.g. "process", "remote") for transport limits
+    """
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: ToolHandler = field(compare=False, repr=False)
+    write: bool = False
+    sandbox: Optional[str] = None
+    concurrency: Optional[str] = None
+
+    def to_mcp(self) -> Dict[str, Any]:
+        """Tool entry as returned by tools/list"""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": self.input_schema,
+        }
+
+
+class ToolRegistry:
+    """Ordered name -> ToolSpec table with middleware around invocation"""
+
+    def __init__(self) -> None:
+        self._tools: Dict[str, ToolSpec] = {}
+        self._middleware: List[ToolMiddleware] = []
+        self._tools_list: Optional[List[Dict[str, Any]]] = None
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        if spec.name in self._tools:
+            raise ValueError(f"Tool already registered: {spec.name}")
+        self._tools[spec.name] = spec
+        self._tools_list = None
+        return spec
+
+    def get(self, name: Optional[str]) -> Optional[ToolSpec]:
+        return self._tools.get(name or "")
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[ToolSpec]:
+        return iter(self._tools.values())
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """tools/list payload, built once per registry change"""
+        if self._tools_list is None:
+            self._tools_list = [spec.to_mcp() for spec in self._tools.values()]
+        return self._tools_list
+
+    @property
+    def write_tools(self) -> FrozenSet[str]:
+        return frozenset(spec.name for spec in self._tools.values() if spec.write)
+
+    def concurrency_class(self, name: Optional[str]) -> Optional[str]:
+        spec = self.get(name)
+        return spec.concurrency if spec is not None else None
+
+    def add_middleware(self, middleware: ToolMiddleware) -> None:
+        """Wrap every handler call; the first added is the outermost"""
+        self._middleware.append(middleware)
+
+    def invoke(self, spec: ToolSpec, call: ToolCall) -> Dict[str, Any]:
+        """Run a tool handler through the middleware chain"""
+        if not self._middleware:
+            return spec.handler(call)
+
+        def run(index: int) -> Dict[str, Any]:
+            if index == len(self._middleware):
+                return spec.handler(call)
+            return self._middleware[index](spec, call, lambda: run(index + 1))
+
+        return run(0)
@@ -0,0 +1,556 @@
+"""
+Transport - Concurrent stdio JSON-RPC loop for the MCP server
+
+Reads requests continuously, runs tool calls on a bounded worker pool
+(with per-tool concurrency limits) and writes each response as soon as
+it is ready, so a slow run_cmd no longer blocks fast calls. Responses
+may arrive out of order; clients match them by JSON-RPC id.
+
+Write operations act as barriers: a write waits for every earlier call
+and later calls wait for the write, so pipelined set/get sequences still
+observe arrival order.
+
+JSON-RPC batch arrays are dispatched concurrently (subject to the same
+write barriers) and answered with a single array.
+
+notifications/cancelled kills the subprocess behind an in-flight call
+and suppresses its response; calls sent with params._meta.progressToken
+receive notifications/progress while they run.
+
+Output goes through StdoutWriter, which encodes straight to bytes,
+coalesces every message produced in one event-loop tick into a single
+write on the stdout file descriptor, and stops reading new requests
+while the client is not draining responses.
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from mcp.engineer_tools import CancelToken
+from mcp.line_io import LineReader, write_all
+from mcp.serialization import get_serializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+# Stop reading requests while this many response bytes are unwritten
+DEFAULT_WRITE_HIGH_WATER = 4 * 1024 * 1024
+
+# Tools that shell out or call remote services get a smaller share of the pool.
+# Keys are tool names or registry concurrency classes; a tool's own limit wins.
+DEFAULT_TOOL_CONCURRENCY = {
+    "run_cmd": 2,
+    "ripgrep_search": 2,
+    "process": 4,
+}
+
+
+def invalid_request(request_id: Any = None) -> Dict[str, Any]:
+    """JSON-RPC Invalid Request error (e.g. empty batch or non-object member)"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": -32600, "message": "Invalid Request"},
+    }
+
+
+def parse_tool_limits(spec: Optional[str]) -> Dict[str, int]:
+    """
+    Parse a per-tool limit spec such as "run_cmd=2,ripgrep_search=1,remote=4".
+
+    Args:
+        spec: Comma-separated name=limit pairs (e.g. MCP_TOOL_CONCURRENCY)
+
+    Returns:
+        Mapping of tool name or concurrency class to max concurrent calls
+    """
+    limits: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        name, sep, value = part.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid tool concurrency entry: {part!r}")
+    return limits
+
+
+class RequestContext:
+    """Cancellation token and progress reporter for one in-flight request"""
+
+    def __init__(
+        self,
+        request_id: Any,
+        progress_token: Any = None,
+        notify: Optional[Callable[[Dict[str, Any]], None]] = None,
+        session: Any = None,
+    ) -> None:
+        self.request_id = request_id
+        self.progress_token = progress_token
+        self.cancel_token = CancelToken()
+        # Per-client state when serving several clients (see mcp.daemon)
+        self.session = session
+        self._notify = notify
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_token.cancelled
+
+    def cancel(self) -> None:
+        self.cancel_token.cancel()
+
+    def report_progress(self, progress: float, total: Optional[float] = None,
+                        message: Optional[str] = None, partial: Optional[List[Any]] = None) -> None:
+        """Send notifications/progress if the client asked for it (thread-safe)
+
+        partial carries results found since the last notification (sent as
+        partialResults) for tools that stream them, such as ripgrep_search.
+        """
+        if self.progress_token is None or self._notify is None or self.cancelled:
+            return
+        params: Dict[str, Any] = {"progressToken": self.progress_token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message:
+            params["message"] = message
+        if partial:
+            params["partialResults"] = partial
+        self._notify({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+
+
+class RequestDispatcher:
+    """
+    Runs MCPServer requests on a bounded thread pool with per-tool limits.
+
+    One dispatcher serves one client connection. Dispatchers created with
+    for_client() share the worker pool and tool limits of their parent
+    but keep their own ordering barriers, cancellation table and session.
+    """
+
+    def __init__(
+        self,
+        server: Any,
+        max_workers: Optional[int] = None,
+        tool_limits: Optional[Dict[str, int]] = None,
+        notify: Optional[Callable[[Dict[str, Any]], None]] = None,
+        session: Any = None,
+    ) -> None:
+        self.server = server
+        self.notify = notify
+        self.session = session
+        self.max_workers = max_workers or int(
+            os.environ.get("MCP_MAX_WORKERS", DEFAULT_MAX_WORKERS)
+        )
+        self.tool_limits = dict(DEFAULT_TOOL_CONCURRENCY)
+        self.tool_limits.update(parse_tool_limits(os.environ.get("MCP_TOOL_CONCURRENCY")))
+        self.tool_limits.update(tool_limits or {})
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="mcp-worker"
+        )
+        self._owns_executor = True
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.registry = getattr(server, "tool_registry", None)
+        self.write_tools = set(self.registry.write_tools) if self.registry is not None else set()
+        self._inflight: Set[asyncio.Future] = set()
+        self._last_write: Optional[asyncio.Future] = None
+        self._active: Dict[Any, RequestContext] = {}
+
+    def for_client(
+        self,
+        notify: Optional[Callable[[Dict[str, Any]], None]] = None,
+        session: Any = None,
+    ) -> "RequestDispatcher":
+        """Dispatcher for another client sharing this one's pool and limits"""
+        child = RequestDispatcher.__new__(RequestDispatcher)
+        child.__dict__.update(self.__dict__)
+        child.notify = notify
+        child.session = session
+        child._owns_executor = False
+        child._inflight = set()
+        child._last_write = None
+        child._active = {}
+        return child
+
+    def _semaphore_for(self, tool_name: Optional[str]) -> Optional[asyncio.Semaphore]:
+        key = tool_name or ""
+        if key not in self.tool_limits and self.registry is not None:
+            # Fall back to the limit shared by the tool's concurrency class
+            key = self.registry.concurrency_class(tool_name) or ""
+        limit = self.tool_limits.get(key)
+        if limit is None:
+            return None
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(limit)
+        return self._semaphores[key]
+
+    def cancel(self, request_id: Any) -> bool:
+        """Cancel an in-flight request; returns False if it is unknown or finished"""
+        context = self._active.get(request_id)
+        if context is None:
+            return False
+        context.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        """Cancel every in-flight request (e.g. the client ended its session)"""
+        for context in list(self._active.values()):
+            context.cancel()
+
+    def _make_context(self, loop: asyncio.AbstractEventLoop, request: Dict[str, Any]) -> RequestContext:
+        meta = (request.get("params") or {}).get("_meta") or {}
+        notify = None
+        if self.notify is not None:
+            write = self.notify
+
+            # Progress is reported from worker threads; write on the loop thread
+            def notify(message: Dict[str, Any]) -> None:
+                loop.call_soon_threadsafe(write, message)
+
+        return RequestContext(request.get("id"), meta.get("progressToken"), notify, self.session)
+
+    async def dispatch(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Process one request; tool calls run on the worker pool"""
+        method = request.get("method")
+        if method == "notifications/cancelled":
+            params = request.get("params") or {}
+            if self.cancel(params.get("requestId")):
+                logger.info(f"Cancelled request {params.get('requestId')}: {params.get('reason', 'no reason')}")
+            return None
+
+        if method != "tools/call":
+            # Protocol methods are cheap and must keep their arrival order
+            return self.server.process_request(request)
+
+        loop = asyncio.get_running_loop()
+        tool_name = (request.get("params") or {}).get("name")
+        context = self._make_context(loop, request)
+        if context.request_id is not None:
+            self._active[context.request_id] = context
+
+        # Register before the first await so ordering follows arrival order
+        is_write = tool_name in self.write_tools
+        if is_write:
+            wait_for: List[asyncio.Future] = list(self._inflight)
+        else:
+            wait_for = [self._last_write] if self._last_write is not None else []
+        done = loop.create_future()
+        self._inflight.add(done)
+        if is_write:
+            self._last_write = done
+
+        try:
+            if wait_for:
+                await asyncio.wait(wait_for)
+            response = await self._run(loop, tool_name, request, context)
+            # A cancelled request gets no response
+            return None if context.cancelled else response
+        finally:
+            done.set_result(None)
+            self._inflight.discard(done)
+            if self._last_write is done:
+                self._last_write = None
+            if self._active.get(context.request_id) is context:
+                del self._active[context.request_id]
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, tool_name: Optional[str],
+                   request: Dict[str, Any], context: RequestContext) -> Optional[Dict[str, Any]]:
+        semaphore = self._semaphore_for(tool_name)
+        if semaphore is None:
+            if context.cancelled:
+                return None
+            return await loop.run_in_executor(
+                self._executor, self.server.process_request, request, context
+            )
+
+        # Wait for a tool slot before taking a worker so slow tools can't starve the pool
+        async with semaphore:
+            if context.cancelled:
+                return None
+            return await loop.run_in_executor(
+                self._executor, self.server.process_request, request, context
+            )
+
+    async def respond(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """dispatch() with unexpected errors turned into JSON-RPC error responses"""
+        try:
+            return await self.dispatch(request)
+        except Exception as e:
+            logger.error(f"Error dispatching request: {e}", exc_info=True)
+            if request.get("id") is None:
+                return None
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32603, "message": str(e)},
+            }
+
+    async def dispatch_batch(self, requests: List[Any]) -> Optional[Any]:
+        """
+        Process a JSON-RPC batch concurrently.
+
+        Members are registered in array order, so write barriers still
+        order dependent calls. Returns the response array, None when the
+        batch held only notifications, or a single error for an empty batch.
+        """
+        if not requests:
+            return invalid_request()
+
+        async def member(request: Any) -> Optional[Dict[str, Any]]:
+            if not isinstance(request, dict):
+                return invalid_request()
+            return await self.respond(request)
+
+        responses = await asyncio.gather(*(member(r) for r in requests))
+        return [r for r in responses if r is not None] or None
+
+    def shutdown(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+
+class StdoutWriter:
+    """
+    Coalescing line-delimited JSON-RPC writer on a binary file descriptor.
+
+    write() must be called on the event loop thread. Messages written in
+    the same loop tick are joined and handed to a single writer thread,
+    which keeps output ordered and the loop free while a slow client
+    drains the pipe.
+    """
+
+    def __init__(
+        self,
+        fd: Optional[int] = None,
+        serializer: Any = None,
+        high_water: int = DEFAULT_WRITE_HIGH_WATER,
+    ) -> None:
+        if fd is None:
+            sys.stdout.flush()
+            fd = sys.stdout.fileno()
+        self.fd = fd
+        self.serializer = serializer or get_serializer()
+        self.high_water = high_water
+        self.flushes = 0
+        self.closed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[bytes] = []
+        self._flush_scheduled = False
+        self._unwritten = 0
+        self._lock = threading.Lock()
+        self._drained: Optional[asyncio.Event] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-stdout")
+        self._last_write: Optional[asyncio.Future] = None
+
+    def write(self, message: Dict[str, Any]) -> int:
+        """Queue a message; it is written when the current loop tick ends. Returns its size."""
+        if self.closed:
+            return 0
+        data = self.serializer.dumps_bytes(message) + b"\n"
+        self._pending.append(data)
+        with self._lock:
+            self._unwritten += len(data)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._get_loop().call_soon(self._flush)
+        return len(data)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._drained = asyncio.Event()
+            self._drained.set()
+        return self._loop
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self.flushes += 1
+        if self._unwritten > self.high_water:
+            self._drained.clear()
+        self._last_write = self._get_loop().run_in_executor(self._executor, self._write, data)
+
+    def _write(self, data: bytes) -> None:
+        try:
+            if not self.closed:
+                write_all(self.fd, data)
+        except OSError as e:
+            if e.errno != errno.EPIPE:
+                logger.error(f"stdout write failed: {e}")
+            # Client went away; drop further output
+            self.closed = True
+        finally:
+            with self._lock:
+                self._unwritten -= len(data)
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._update_drained)
+
+    def _update_drained(self) -> None:
+        # Re-checked on the loop thread; a newer flush may have refilled the buffer
+        if self._unwritten <= self.high_water:
+            self._drained.set()
+
+    @property
+    def unwritten_bytes(self) -> int:
+        return self._unwritten
+
+    async def drain(self) -> None:
+        """Wait while more than high_water bytes are waiting to be written"""
+        if self._drained is not None:
+            await self._drained.wait()
+
+    async def aclose(self) -> None:
+        """Write everything queued so far, then stop the writer thread"""
+        if self._flush_scheduled or self._pending:
+            self._flush()
+        if self._last_write is not None:
+            await asyncio.wait([self._last_write])
+        self._executor.shutdown(wait=True)
+
+
+class StreamMessageWriter:
+    """StdoutWriter counterpart for an asyncio stream (e.g. a Unix socket client)"""
+
+    def __init__(self, stream: asyncio.StreamWriter, serializer: Any = None) -> None:
+        self.stream = stream
+        self.serializer = serializer or get_serializer()
+        self.closed = False
+
+    def write(self, message: Dict[str, Any]) -> int:
+        if self.closed or self.stream.is_closing():
+            return 0
+        # The stream transport buffers and writes without blocking the loop
+        data = self.serializer.dumps_bytes(message) + b"\n"
+        self.stream.write(data)
+        return len(data)
+
+    async def drain(self) -> None:
+        try:
+            await self.stream.drain()
+        except ConnectionError:
+            self.closed = True
+
+    async def aclose(self) -> None:
+        await self.drain()
+        self.closed = True
+        self.stream.close()
+        try:
+            await self.stream.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve_lines(
+    dispatcher: RequestDispatcher,
+    next_lines: Callable[[], Awaitable[Optional[List[bytes]]]],
+    writer: Any,
+) -> None:
+    """
+    Dispatch line-delimited JSON-RPC from one client until EOF.
+
+    Args:
+        dispatcher: RequestDispatcher for this client
+        next_lines: Coroutine returning the next complete lines, or None at EOF
+        writer: StdoutWriter or StreamMessageWriter for responses
+    """
+    loop = asyncio.get_running_loop()
+    serializer = get_serializer()
+    metrics = getattr(dispatcher.server, "metrics", None)
+    pending: Set[asyncio.Task] = set()
+
+    async def handle(request: Any, size: int) -> None:
+        if isinstance(request, list):
+            response = await dispatcher.dispatch_batch(request)
+        else:
+            response = await dispatcher.respond(request)
+        # Send response only if not None (notifications have no response)
+        if response is not None:
+            written = writer.write(response)
+            if metrics is not None:
+                metrics.record_io(request, size, written)
+
+    def submit(line: bytes) -> None:
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            request = serializer.loads(line)
+        except ValueError as e:
+            logger.warning(f"Invalid JSON: {e}")
+            return
+
+        if not isinstance(request, (dict, list)):
+            logger.warning(f"Ignoring non-object request: {type(request).__name__}")
+            return
+
+        task = loop.create_task(handle(request, len(line)))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    while True:
+        # Backpressure: don't take new work while the client isn't reading
+        await writer.drain()
+        lines = await next_lines()
+        if lines is None:
+            logger.info("EOF received, shutting down")
+            break
+        for line in lines:
+            submit(line)
+
+    # Let in-flight calls finish so every request gets its response
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def serve_stdio(
+    server: Any,
+    dispatcher: Optional[RequestDispatcher] = None,
+    writer: Optional[StdoutWriter] = None,
+    reader: Optional[LineReader] = None,
+    initial_lines: Optional[List[bytes]] = None,
+) -> None:
+    """
+    Serve line-delimited JSON-RPC on stdin/stdout until EOF.
+
+    Args:
+        server: MCPServer instance
+        dispatcher: Optional preconfigured RequestDispatcher
+        writer: Optional StdoutWriter (defaults to the stdout fd)
+        reader: Optional LineReader already reading stdin
+        initial_lines: Lines read before the loop started (see server.serve_startup)
+    """
+    loop = asyncio.get_running_loop()
+    writer = writer or StdoutWriter()
+    if dispatcher is None:
+        dispatcher = RequestDispatcher(server, notify=writer.write)
+    elif dispatcher.notify is None:
+        dispatcher.notify = writer.write
+    # stdin may be a pipe, tty or regular file; a reader thread handles all of them
+    stdin_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-stdin")
+    reader = reader or LineReader(sys.stdin.fileno())
+    backlog = initial_lines
+
+    async def next_lines() -> Optional[List[bytes]]:
+        nonlocal backlog
+        if backlog:
+            lines, backlog = backlog, None
+            return lines
+        return await loop.run_in_executor(stdin_executor, reader.read_lines)
+
+    try:
+        await serve_lines(dispatcher, next_lines, writer)
+    finally:
+        dispatcher.shutdown()
+        await writer.aclose()
+        stdin_executor.shutdown(wait=False)
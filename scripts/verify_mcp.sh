@@ -52,7 +52,7 @@ TOOL_COUNT=$(echo '{"jsonrpc":"2.0","id":1,"method":"tools/list","params":{}}' |
 echo "✓ Tools available: $TOOL_COUNT"
 
 # Check expected tools exist
-EXPECTED_TOOLS=("store_memory" "search_memory" "get_context" "get_stats" "git_status" "git_diff" "git_show" "ripgrep_search" "run_cmd" "memory_append" "memory_search" "decision_log_add" "decision_log_search" "ext_get_context" "ext_set_context" "ext_clear_context")
+EXPECTED_TOOLS=("store_memory" "store_memories_bulk" "search_memory" "get_context" "get_stats" "get_profile" "git_status" "git_diff" "git_show" "git_read_file_at_ref" "git_ls_tree" "ripgrep_search" "index_build" "index_status" "run_cmd" "continue_output" "memory_append" "memory_search" "decision_log_add" "decision_log_search" "ext_get_context" "ext_set_context" "ext_clear_context")
 if [ -n "$CODEX_ENDPOINT" ]; then
     EXPECTED_TOOLS+=("codex_analyze" "codex_plan" "codex_diff")
 fi
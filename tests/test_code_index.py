@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Code Index Self-Test
+
+Tests:
+a) regexes reduce to the literals every match must contain; queries
+   without a three-character literal are not narrowed
+b) a build indexes the files rg would search; narrowed searches return
+   the same matches as full searches
+c) rebuilding reads only new and changed files, and segments are merged
+   when too many postings are dead; builds in other processes are
+   serialized by a lock file and never reuse or drop segments
+d) files changed since the build (uncommitted, untracked or committed)
+   are always searched
+e) candidate lists too long for rg's command line search everything
+f) index_build/index_status tools and the index field of ripgrep_search
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp import code_index
+from mcp.code_index import CodeIndex, query_trigrams
+from mcp.engineer_tools import ripgrep_search
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                   check=True, capture_output=True)
+
+
+def _make_repo(root: Path, files: int = 120) -> None:
+    _git(root, "init", "-q")
+    (root / ".gitignore").write_text("*.log\n")
+    for i in range(files):
+        path = root / f"pkg{i % 4}" / f"mod{i:03d}.py"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"def handler_{i}(request):\n    return render('page_{i % 10}.html')\n")
+    (root / "pkg0" / "special.py").write_text("MAGIC_TOKEN = 'xyzzy'\n")
+    (root / "pkg2" / "names.py").write_text("CAFE = 'café'\nBRAND = 'Élan'\n", encoding="utf-8")
+    (root / "pkg1" / "blob.bin").write_bytes(b"MAGIC_TOKEN\x00\x01")
+    (root / "debug.log").write_text("MAGIC_TOKEN in an ignored file\n")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-qm", "init")
+
+
+def _matches(result: dict) -> list:
+    return [(r["file"], r["line"]) for r in result["results"]]
+
+
+def _search(query: str, root: Path, index=None, **kwargs) -> dict:
+    with mock.patch("mcp.engineer_tools.shutil.which", return_value=None):
+        return ripgrep_search(query, str(root), context_lines=0, max_results=10_000, index=index, **kwargs)
+
+
+def test_query_trigrams():
+    """Test regexes reduce to required literals"""
+    print("\n=== Testing Query Trigrams ===")
+
+    def literals(query):
+        alternatives = query_trigrams(query)
+        return None if alternatives is None else len(alternatives)
+
+    assert literals("MAGIC_TOKEN") == 1
+    assert literals(r"def handler_\d+\(request\)") == 1
+    assert literals("(?i)magic|xyzzy") == 2, "Alternation gives one trigram set per branch"
+    assert literals("foo.*bar") == 1
+    assert literals("(abcd)+efg") == 1, "A repeat with min >= 1 still requires its literals"
+    for query in ("ab", "a.c", "(abcd)?", "foo|ba", r"\w+", "", "x{3}"):
+        assert literals(query) is None, f"{query!r} should not be narrowed"
+    for query in (r"caf\xe9", r"caf\351", "(?i)éé", "(?i:éé)"):
+        assert literals(query) is None, f"{query!r} should not be narrowed"
+    assert query_trigrams(r"caf\\xe9") is not None, "An escaped backslash is not an escape"
+    assert query_trigrams("(?i)élan") == query_trigrams("lan"), "Case-insensitive non-ASCII is not required"
+    assert query_trigrams("(?i)x(?-i:élan)") == query_trigrams("élan")
+    assert query_trigrams("(?i)kelvin") == query_trigrams("elvin"), "K also matches the Kelvin sign"
+    assert literals("foo(") is None, "Invalid regexes are left to the search to report"
+
+    keys = query_trigrams("Abc")[0]
+    assert keys == query_trigrams("aBC")[0], "Trigrams are ASCII case-folded"
+    print("✓ Literals, alternation, repeats and unindexable queries handled")
+
+
+def test_build_and_narrowed_search():
+    """Test a narrowed search returns the same matches as a full search"""
+    print("\n=== Testing Build and Narrowed Search ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        root = Path(tmp)
+        _make_repo(root)
+        index = CodeIndex(tmp, data)
+        assert not index.built and index.candidates("MAGIC_TOKEN", tmp) is None
+        summary = index.build(workers=1)
+        assert summary["files"] == 123 and summary["segments"] == 1, summary
+        assert index.status()["changed_files"] == 0
+
+        narrowed = index.candidates("MAGIC_TOKEN", tmp)
+        assert [rel for _, rel in narrowed["files"]] == ["pkg0/special.py"], \
+            "Binary and ignored files are not candidates"
+
+        for query in ("MAGIC_TOKEN", r"handler_1[0-2]\(", "page_3|page_7", "(?i)magic_token", "render"):
+            full = _search(query, root)
+            indexed = _search(query, root, index)
+            assert sorted(_matches(indexed)) == sorted(_matches(full)), query
+            assert "index" in indexed, f"{query!r} should use the index"
+        for query in (r"caf\xe9", "(?i)élan", "(?i)ÉLAN", r"caf\w", "(?i)CAFÉ"):
+            full = _search(query, root)
+            indexed = _search(query, root, index)
+            assert _matches(full) == [("pkg2/names.py", 1 + ("lan" in query.lower()))], (query, _matches(full))
+            assert sorted(_matches(indexed)) == sorted(_matches(full)), query
+        scoped = _search("handler_", root / "pkg2", index, glob="mod00*.py")
+        assert sorted(_matches(scoped)) == [("mod002.py", 1), ("mod006.py", 1)], _matches(scoped)
+
+        # The index is persistent
+        reopened = CodeIndex(tmp, data)
+        assert reopened.built and reopened.candidates("xyzzy", tmp)["candidates"] == 1
+    print("✓ Narrowed results identical to full searches")
+
+
+def test_incremental_build():
+    """Test rebuilds only read changed files and compact dead postings"""
+    print("\n=== Testing Incremental Build ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        root = Path(tmp)
+        _make_repo(root)
+        index = CodeIndex(tmp, data)
+        index.build(workers=1)
+
+        (root / "pkg3" / "mod003.py").write_text("changed = 'freshly_written'\n")
+        (root / "pkg3" / "added.py").write_text("freshly_written = 1\n")
+        (root / "pkg2" / "mod002.py").unlink()
+        summary = index.build(workers=1)
+        assert summary["indexed"] == 2 and summary["removed"] == 2, summary
+        assert summary["segments"] == 2 and not summary["compacted"]
+        assert index.candidates("freshly_written", tmp)["candidates"] == 2
+        assert index.candidates(r"handler_2\(", tmp)["candidates"] == 0
+
+        # Rewriting most files leaves mostly dead postings: merge
+        for i in range(0, 120, 2):
+            path = root / f"pkg{i % 4}" / f"mod{i:03d}.py"
+            if path.exists():
+                path.write_text(f"def renamed_{i}():\n    pass\n")
+        summary = index.build(workers=1)
+        status = index.status()
+        assert summary["compacted"] and status["segments"] == 1 and status["dead_postings"] == 0, status
+        segment_files = sorted(p.name for p in index.index_dir.glob("seg-*"))
+        assert segment_files == json.loads(index.manifest_path.read_text())["segments"], \
+            "Merged segments should be deleted"
+        assert index.candidates(r"renamed_4\(\)", tmp)["candidates"] == 1
+        assert index.candidates(r"handler_4\(", tmp)["candidates"] == 0
+
+        rebuilt = index.build(rebuild=True, workers=1)
+        assert rebuilt["indexed"] == rebuilt["files"] == status["files"]
+    print("✓ Only changed files re-read; dead postings merged away")
+
+
+def test_builders_in_other_processes():
+    """Test builds from several server processes share the index safely"""
+    print("\n=== Testing Builders in Other Processes ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        root = Path(tmp)
+        _make_repo(root)
+        # Separate instances stand in for separate processes: no shared state but the directory
+        first, second = CodeIndex(tmp, data), CodeIndex(tmp, data)
+        first.build(workers=1)
+        assert second.built
+
+        (root / "pkg0" / "one.py").write_text("first_writer = 1\n")
+        first.build(workers=1)
+        (root / "pkg1" / "two.py").write_text("second_writer = 2\n")
+        summary = second.build(workers=1)
+        manifest = json.loads(second.manifest_path.read_text())
+        assert summary["segments"] == 3 and len(set(manifest["segments"])) == 3, \
+            "A stale builder should not reuse segment names"
+        assert sorted(p.name for p in first.index_dir.glob("seg-*")) == manifest["segments"]
+        files = [rel for _, rel in first.candidates("first_writer", tmp)["files"]]
+        assert "pkg0/one.py" in files, "Mapped segments stay valid"
+        reopened = CodeIndex(tmp, data)
+        for query in ("first_writer", "second_writer"):
+            assert reopened.candidates(query, tmp)["candidates"] == 1, query
+
+        held = code_index._acquire_lock(first.index_dir / "build.lock")
+        try:
+            assert "another process" in second.build(workers=1)["error"]
+        finally:
+            held.close()
+        assert "error" not in second.build(workers=1)
+    print("✓ Builds serialized across processes; segments never reused or lost")
+
+
+def test_changes_since_build():
+    """Test files changed after the build are still searched"""
+    print("\n=== Testing Changes Since Build ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        root = Path(tmp)
+        _make_repo(root)
+        index = CodeIndex(tmp, data)
+        index.build(workers=1)
+
+        (root / "pkg1" / "mod001.py").write_text("edited = 'late_edit'\n")
+        (root / "pkg1" / "new.py").write_text("late_edit = True\n")
+        narrowed = index.candidates("late_edit", tmp)
+        assert sorted(rel for _, rel in narrowed["files"]) == ["pkg1/mod001.py", "pkg1/new.py"]
+        assert narrowed["changed_files"] == 2
+
+        # Committed changes stay visible after the working tree is clean again
+        _git(root, "add", "-A")
+        _git(root, "commit", "-qm", "edit")
+        assert index.candidates("late_edit", tmp)["candidates"] == 2
+        assert len(_search("late_edit", root, index)["results"]) == 2
+
+        # Outside git every file is stat'ed instead
+        with tempfile.TemporaryDirectory() as outside:
+            plain = Path(outside)
+            (plain / "a.txt").write_text("alpha beta\n")
+            other = CodeIndex(outside, data)
+            other.build(workers=1)
+            (plain / "b.txt").write_text("gamma alpha\n")
+            assert sorted(rel for _, rel in other.candidates("alpha", outside)["files"]) == ["a.txt", "b.txt"]
+
+        # A build that did not finish is never used for narrowing
+        with mock.patch.object(code_index, "BUILD_CHUNK_FILES", 50), \
+                mock.patch.object(CodeIndex, "_compact", side_effect=RuntimeError("stop")):
+            try:
+                index.build(rebuild=True, workers=1)
+            except RuntimeError:
+                pass
+        assert index.status()["complete"] is False and index.candidates("late_edit", tmp) is None
+    print("✓ Uncommitted, untracked and committed changes searched")
+
+
+def test_large_candidate_lists():
+    """Test rg searches everything when the candidate paths do not fit on its command line"""
+    print("\n=== Testing Large Candidate Lists ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        _make_repo(Path(tmp))
+        index = CodeIndex(tmp, data)
+        index.build(workers=1)
+        commands = []
+
+        def fake_rg(cmd, *args):
+            commands.append(cmd)
+            if "--" in cmd and fail_with is not None:
+                raise fail_with
+            return 1, False, ""
+
+        def search():
+            with mock.patch("mcp.engineer_tools.shutil.which", return_value="/usr/bin/rg"), \
+                    mock.patch("mcp.engineer_tools._stream_ripgrep", side_effect=fake_rg):
+                return ripgrep_search("handler_", tmp, index=index)
+
+        fail_with = None
+        narrowed = search()
+        assert "--" in commands[-1] and narrowed["index"]["candidates"] == 120, narrowed
+        with mock.patch("mcp.engineer_tools.MAX_RG_ARGV_BYTES", 1000):
+            capped = search()
+        assert "--" not in commands[-1] and "index" not in capped and capped["returncode"] == 0, \
+            "Too many candidate bytes: search everything"
+
+        fail_with = OSError(7, "Argument list too long")
+        retried = search()
+        assert [("--" in cmd) for cmd in commands[-2:]] == [True, False], commands[-2:]
+        assert "error" not in retried and retried["returncode"] == 0 and "index" not in retried, retried
+    print("✓ Oversized candidate lists fall back to an unnarrowed rg search")
+
+
+def test_index_tools():
+    """Test index_build, index_status and ripgrep_search through the server"""
+    print("\n=== Testing Index Tools ===")
+    from mcp.server import MCPServer
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as home:
+        _make_repo(Path(tmp))
+        server = MCPServer()
+        server.server_home = Path(home)
+
+        def call(name, arguments):
+            response = server.process_request({
+                "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": name, "arguments": arguments},
+            })
+            result = response["result"]
+            text = result["content"][0]["text"]
+            return result, json.loads(text[text.index("{"):])
+
+        _, status = call("index_status", {"cwd": tmp})
+        assert status["built"] is False
+        result, built = call("index_build", {"cwd": tmp})
+        assert not result.get("isError") and built["files"] == 123, built
+        _, status = call("index_status", {"cwd": tmp})
+        assert status["built"] and status["size_bytes"] > 0
+        assert (Path(home) / "data" / "mcp" / "index").is_dir()
+
+        with mock.patch.dict(os.environ, {"MCP_WORKSPACE_ROOT": tmp}):
+            _, found = call("ripgrep_search", {"query": "MAGIC_TOKEN"})
+            assert found["index"]["candidates"] == 1 and found["match_count"] == 1, found
+            server.index_mode = "off"
+            _, unindexed = call("ripgrep_search", {"query": "MAGIC_TOKEN"})
+            assert "index" not in unindexed and unindexed["match_count"] == 1
+    print("✓ Tools build and report the index; searches use it")
+
+
+if __name__ == "__main__":
+    try:
+        test_query_trigrams()
+        test_build_and_narrowed_search()
+        test_incremental_build()
+        test_builders_in_other_processes()
+        test_changes_since_build()
+        test_large_candidate_lists()
+        test_index_tools()
+        print("\n" + "=" * 50)
+        print("ALL CODE INDEX TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Daemon Mode Test
+
+Tests the Unix-socket daemon through the stdio shim: on-demand start,
+per-client extension context and idle shutdown.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+REPO_ROOT = Path(__file__).parent.parent.resolve()
+SHIM_PATH = REPO_ROOT / "mcp" / "shim.py"
+
+
+def _start_shim(env):
+    return subprocess.Popen(
+        [sys.executable, str(SHIM_PATH)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        cwd=str(REPO_ROOT),
+    )
+
+
+def _call(proc, request_id, name, arguments):
+    request = {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments},
+    }
+    proc.stdin.write(json.dumps(request) + "\n")
+    proc.stdin.flush()
+    response = json.loads(proc.stdout.readline())
+    assert response["id"] == request_id, f"Unexpected response: {response}"
+    return response["result"]["content"][0]["text"]
+
+
+def test_daemon_sessions_and_idle_shutdown():
+    """Test two shims share one daemon with separate extension contexts"""
+    print("\n=== Testing Daemon Mode ===")
+
+    token = "test-token"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            "MCP_HOME": tmp,
+            "MCP_WRITE_TOKEN": token,
+            "MCP_DAEMON_IDLE_SEC": "1",
+            "PYTHONPATH": str(REPO_ROOT),
+        })
+        env.pop("MCP_SOCKET_PATH", None)
+        socket_path = Path(tmp) / "data" / "mcp" / "mcp.sock"
+
+        # Both shims race to start the daemon; the lock lets only one serve
+        first = _start_shim(env)
+        second = _start_shim(env)
+        try:
+            text = _call(first, 1, "ext_set_context", {"payload": {"doc": "a.py"}, "write_token": token})
+            assert "Extension context set" in text, text
+            assert "a.py" in _call(first, 2, "ext_get_context", {})
+            assert "none set" in _call(second, 3, "ext_get_context", {}), "Sessions should not share context"
+            print("✓ Two shims attached with separate extension contexts")
+
+            assert socket_path.exists(), "Daemon should listen on data/mcp/mcp.sock"
+            mode = socket_path.stat().st_mode & 0o777
+            assert mode == 0o600, f"Socket should be owner-only: {oct(mode)}"
+            print("✓ Socket created with mode 0600")
+        finally:
+            for proc in (first, second):
+                proc.stdin.close()
+                proc.wait(timeout=10)
+                proc.stdout.close()
+                proc.stderr.close()
+        assert first.returncode == 0 and second.returncode == 0
+
+        deadline = time.monotonic() + 15
+        while socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not socket_path.exists(), "Daemon should exit and remove its socket when idle"
+        print("✓ Daemon shut down after idle timeout")
+
+
+if __name__ == "__main__":
+    try:
+        test_daemon_sessions_and_idle_shutdown()
+        print("\n✅ All daemon tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Fallback Search Self-Test
+
+Tests:
+a) the walk honours .gitignore (inside a git repo), .ignore, negation,
+   anchored and ** patterns, nested ignore files and .git/info/exclude,
+   skips hidden files, and lets a -g style glob override ignores
+b) regex search with rg's Unicode rules: binary files skipped, CRLF and
+   missing final newline handled, character offsets and rg-style context
+c) the process pool returns the same matches as the serial scan and
+   stops when the caller does
+d) invalid regexes are reported like rg's parse errors
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp import fallback_search
+from mcp.engineer_tools import ripgrep_search
+
+
+def _make_repo(root: Path) -> None:
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    (root / ".gitignore").write_text("*.log\n!keep.log\n/build\ndocs/**/gen\ntmp/\n# comment\n\n")
+    (root / ".ignore").write_text("secret*\n")
+    (root / ".git" / "info").mkdir(parents=True, exist_ok=True)
+    (root / ".git" / "info" / "exclude").write_text("sub/deep/c.py\n")
+    for name in ("a.log", "keep.log", "build/x.py", "src/build/y.py", "docs/a/gen/z.md", "docs/gen/w.md",
+                 "tmp/t.py", "sub/a.txt", "sub/ok.txt", "sub/deep/b.txt", "sub/deep/c.py", "secret.py",
+                 ".hid.py", ".hidden/h.py", "main.py"):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("hit one\nmiss\nhit two\n")
+    (root / "sub" / ".gitignore").write_text("*.txt\n!ok.txt\n")
+
+
+def _walk(root: Path, glob: str = "*") -> set:
+    return {rel for _, rel in fallback_search.walk_files(str(root), glob)}
+
+
+def _fallback(*args, **kwargs) -> dict:
+    with mock.patch("mcp.engineer_tools.shutil.which", return_value=None):
+        return ripgrep_search(*args, **kwargs)
+
+
+def test_ignore_rules():
+    """Test which files the walk visits"""
+    print("\n=== Testing Ignore Rules ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        assert _walk(root) == {"keep.log", "main.py", "src/build/y.py", "sub/ok.txt"}, _walk(root)
+        assert _walk(root / "sub") == {"ok.txt"}, "Parent ignore files and info/exclude should apply"
+        assert _walk(root, "*.py") == {".hid.py", "main.py", "secret.py", "src/build/y.py", "sub/deep/c.py"}, \
+            "A glob overrides ignores for the files it matches, but not inside ignored directories"
+
+        # Outside a git repository only .ignore counts
+        os.rename(root / ".git", root / "not-git")
+        assert "a.log" in _walk(root) and "secret.py" not in _walk(root)
+    print("✓ gitignore, .ignore, negation, anchors and overrides applied")
+
+
+def test_search_semantics():
+    """Test regex matching and result records"""
+    print("\n=== Testing Search Semantics ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "bin.dat").write_bytes(b"hit\x00binary\n")
+        (root / "crlf.txt").write_bytes(b"hit crlf\r\nmiss\r\nhit\r\n")
+        (root / "nonl.txt").write_text("no newline hit")
+        (root / "utf8.txt").write_text("ñ hit\nhit hit ✓\nmiss\nfour\nhit five\n")
+
+        result = _fallback(r"hit", tmp, "*", 1, max_results=100)
+        assert result["fallback"] == "python" and result["returncode"] == 0
+        by_file = {}
+        for record in result["results"]:
+            by_file.setdefault(record["file"], []).append(record)
+        assert "bin.dat" not in by_file, "Binary files should be skipped"
+        assert [r["text"] for r in by_file["crlf.txt"]] == ["hit crlf", "hit"]
+        assert by_file["crlf.txt"][0]["after"] == [{"line": 2, "text": "miss"}]
+        assert by_file["nonl.txt"][0]["text"] == "no newline hit"
+
+        first, second, third = by_file["utf8.txt"]
+        assert first["submatches"] == [[2, 5]], "Offsets should be in characters"
+        assert second["submatches"] == [[0, 3], [4, 7]]
+        assert first["after"] == [] and second["before"] == [], "Matching lines are not context"
+        assert second["after"] == [{"line": 3, "text": "miss"}]
+        assert third["before"] == [{"line": 4, "text": "four"}]
+
+        # As in rg, $ does not match before \r
+        anchored = _fallback(r"^hit \w+$", tmp, "*.txt", 0)
+        assert [r["text"] for r in anchored["results"]] == ["hit five"], "Anchors should work per line"
+        assert _fallback("HIT", tmp, "*", 0)["match_count"] == 0, "Search should be case-sensitive like rg"
+        empty = _fallback("^$", tmp, "utf8.txt", 0)
+        assert empty["match_count"] == 0, "No phantom line after the final newline"
+
+        # Classes, "." and (?i) match characters, not bytes, as in rg
+        (root / "cafe.txt").write_bytes("café au lait\nCAFÉ\n".encode("utf-8") + b"\xff caf\n")
+        for query, lines in ((r"caf\w", [1]), (r"caf.\s", [1]), (r"caf\xe9", [1]), ("(?i)café", [1, 2])):
+            found = _fallback(query, tmp, "cafe.txt", 0)
+            assert [r["line"] for r in found["results"]] == lines, (query, found["results"])
+        assert _fallback(r"caf\w", tmp, "cafe.txt", 0)["results"][0]["submatches"] == [[0, 4]]
+        assert _fallback("lait", tmp, "cafe.txt", 0)["results"][0]["submatches"] == [[8, 12]]
+        assert _fallback("caf$", tmp, "cafe.txt", 0)["results"][0]["submatches"] == [[2, 5]], \
+            "Invalid UTF-8 does not shift offsets"
+    print("✓ Regex, binary detection, line endings, offsets and context correct")
+
+
+def test_process_pool():
+    """Test parallel scanning matches the serial scan and stops early"""
+    print("\n=== Testing Process Pool ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for i in range(300):
+            (root / f"d{i % 7}").mkdir(exist_ok=True)
+            (root / f"d{i % 7}" / f"f{i:03d}.txt").write_text(f"x\nvalue {i}\n" + ("needle\n" if i % 3 == 0 else ""))
+        regex = fallback_search.compile_query("needle|value 1[0-9]")
+
+        def run(workers):
+            return [m for _, matches in fallback_search.search(regex, tmp, "*", 1, 10**6, workers) for m in matches]
+
+        serial, parallel = run(1), run(2)
+        # needle in every third file, "value 1[0-9]" in files 10-19 and 100-199
+        assert len(serial) == 100 + 110, f"Expected 210 matches, got {len(serial)}"
+        assert parallel == serial, "Pool results should equal the serial scan, in order"
+
+        scan = fallback_search.search(regex, tmp, "*", 0, 10**6, 2)
+        for _, matches in scan:
+            if matches:
+                break
+        scan.close()
+
+        with mock.patch.dict(os.environ, {"MCP_SEARCH_WORKERS": "2"}):
+            capped = _fallback("needle", tmp, "*", 0, max_results=5)
+        assert capped["match_count"] == 5 and capped["stop_reason"] == "max_results"
+    print(f"✓ {len(serial)} matches identical on 1 and 2 workers; early stop works")
+
+
+def test_invalid_regex():
+    """Test a bad pattern returns an error instead of raising"""
+    print("\n=== Testing Invalid Regex ===")
+
+    result = _fallback("foo(", ".", "*.py", 0)
+    assert result["returncode"] == 2 and "regex parse error" in result["error"], result
+    print("✓ Invalid regex reported")
+
+
+if __name__ == "__main__":
+    try:
+        test_ignore_rules()
+        test_search_semantics()
+        test_process_pool()
+        test_invalid_regex()
+        print("\n" + "=" * 50)
+        print("ALL FALLBACK SEARCH TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
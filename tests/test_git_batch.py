@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Git Batch Self-Test
+
+Tests:
+a) pooled cat-file processes read blobs, trees and commits, list trees
+   like git ls-tree, and see commits made after they started
+b) a process that dies is replaced and the read retried; concurrent
+   readers share at most MCP_GIT_BATCH_WORKERS processes
+c) idle processes are reaped
+d) git_read_file_at_ref and git_ls_tree through the server: text, binary,
+   truncated and missing files, sizes, limits and the sandbox
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.git_batch import GitBatchPool, ObjectNotFound
+
+
+def _git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                          check=True, capture_output=True, text=True).stdout
+
+
+def _make_repo(root: Path) -> None:
+    _git(root, "init", "-q")
+    for i in range(12):
+        path = root / f"pkg{i % 3}" / ("sub" if i % 2 else "") / f"mod{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"value = {i}\n")
+    (root / "README").write_text("first\n")
+    (root / "logo.bin").write_bytes(b"\x89PNG\x00\x01\x02" * 10)
+    _git(root, "add", "-A")
+    _git(root, "commit", "-qm", "one")
+
+
+def test_object_reads():
+    """Test blob, tree and commit reads and tree listings"""
+    print("\n=== Testing Object Reads ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        top = os.path.realpath(tmp)
+        pool = GitBatchPool(workers=1, idle_sec=0)
+        try:
+            blob = pool.read(top, "HEAD:README")
+            assert blob.type == "blob" and blob.data == b"first\n" and blob.size == 6
+            commit = pool.read(top, "HEAD")
+            assert commit.type == "commit" and commit.data.startswith(b"tree ")
+            check = pool.read(top, "HEAD:pkg0", check=True)
+            assert check.type == "tree" and check.data is None
+
+            entries = [f"{e.mode} {e.type} {e.oid}\t{e.path}"
+                       for e in pool.ls_tree(top, "HEAD^{tree}", recursive=True)]
+            assert entries == _git(root, "ls-tree", "-r", "HEAD").splitlines()
+            top_level = [e.path for e in pool.ls_tree(top, "HEAD:pkg1", prefix="pkg1/")]
+            assert top_level == ["pkg1/mod10.py", "pkg1/mod4.py", "pkg1/sub"], top_level
+            assert len(list(pool.ls_tree(top, "HEAD^{tree}", recursive=True, limit=3))) == 3
+
+            for name in ("HEAD:nope", "no-such-ref", "HEAD\nHEAD"):
+                try:
+                    pool.read(top, name)
+                except ObjectNotFound:
+                    continue
+                raise AssertionError(f"{name!r} should not resolve")
+
+            (root / "README").write_text("second\n")
+            _git(root, "commit", "-qam", "two")
+            assert pool.read(top, "HEAD:README").data == b"second\n", "New commits are visible"
+            assert pool.read(top, "HEAD~1:README").data == b"first\n"
+            assert pool.stats()["started"] == 2, "One --batch and one --batch-check process"
+        finally:
+            pool.close()
+    print("✓ Blobs, trees and commits read over one pipe per kind")
+
+
+def test_restart_and_concurrency():
+    """Test failed processes are replaced and workers are bounded"""
+    print("\n=== Testing Restart and Concurrency ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        top = os.path.realpath(tmp)
+        pool = GitBatchPool(workers=2, idle_sec=0)
+        try:
+            pool.read(top, "HEAD:README")
+            for process in pool._idle[(top, "--batch")]:
+                process.process.kill()
+                process.process.wait()
+            assert pool.read(top, "HEAD:README").data == b"first\n"
+
+            # Dies while the request is in flight: retried on a fresh process
+            process = pool._idle[(top, "--batch")][0]
+            readline = process._readline
+
+            def die_then_read(deadline):
+                process.process.kill()
+                process.process.wait()
+                # Discard anything it answered before dying
+                process.process.stdout.read()
+                return readline(deadline)
+
+            with mock.patch.object(process, "_readline", side_effect=die_then_read):
+                assert pool.read(top, "HEAD:README").data == b"first\n"
+            stats = pool.stats()
+            assert stats["restarts"] == 1 and stats["started"] == 3, stats
+
+            errors = []
+
+            def reader():
+                try:
+                    for i in range(20):
+                        assert pool.read(top, f"HEAD:pkg{i % 3}").type == "tree"
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=reader) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors, errors
+            assert len(pool._idle[(top, "--batch")]) <= 2, "At most MCP_GIT_BATCH_WORKERS processes"
+        finally:
+            pool.close()
+    print("✓ Dead processes replaced; concurrent reads share the pool")
+
+
+def test_idle_reaping():
+    """Test idle processes are stopped"""
+    print("\n=== Testing Idle Reaping ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_repo(Path(tmp))
+        top = os.path.realpath(tmp)
+        pool = GitBatchPool(idle_sec=0.2)
+        try:
+            pool.read(top, "HEAD:README")
+            pool.read(top, "HEAD:README", check=True)
+            processes = [p for idle in pool._idle.values() for p in idle]
+            assert len(processes) == 2
+            deadline = time.monotonic() + 5
+            while any(p.alive for p in processes) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert pool.stats()["processes"] == 0 and pool.stats()["reaped"] == 2, pool.stats()
+            assert pool.read(top, "HEAD:README").data == b"first\n", "Reads start a new process"
+            assert pool.reap(idle_sec=0) == 1
+        finally:
+            pool.close()
+    print("✓ Idle processes stopped and restarted on demand")
+
+
+def test_tools():
+    """Test git_read_file_at_ref and git_ls_tree through the server"""
+    print("\n=== Testing Git Object Tools ===")
+    from mcp.server import MCPServer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        server = MCPServer()
+
+        def call(name, arguments):
+            response = server.process_request({
+                "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": name, "arguments": arguments},
+            })
+            result = response["result"]
+            text = result["content"][0]["text"]
+            return result, (json.loads(text[text.index("{"):]) if "{" in text else text)
+
+        with mock.patch.dict(os.environ, {"MCP_WORKSPACE_ROOT": tmp}):
+            result, read = call("git_read_file_at_ref", {"path": "pkg0/mod0.py"})
+            assert not result.get("isError") and read["content"] == "value = 0\n", read
+            assert read["commit"] == _git(root, "rev-parse", "HEAD").strip()
+            _, nested = call("git_read_file_at_ref", {"path": "mod3.py", "cwd": str(root / "pkg0" / "sub")})
+            assert nested["path"] == "pkg0/sub/mod3.py" and nested["content"] == "value = 3\n"
+
+            _, binary = call("git_read_file_at_ref", {"path": "logo.bin"})
+            assert binary["binary"] is True and "content" not in binary and binary["size"] == 70
+            result, missing = call("git_read_file_at_ref", {"path": "nope.py"})
+            assert result.get("isError") and "not found" in missing["error"]
+            result, directory = call("git_read_file_at_ref", {"path": "pkg0"})
+            assert result.get("isError") and "git_ls_tree" in directory["error"]
+            result, _ = call("git_read_file_at_ref", {"path": "README", "ref": "HEAD:x"})
+            assert result.get("isError"), "Refs cannot smuggle in a path"
+            result, _ = call("git_read_file_at_ref", {"path": "../../etc/passwd"})
+            assert result.get("isError"), "Paths outside the workspace are refused"
+
+            (root / "big.txt").write_text("line\n" * 1000)
+            _git(root, "add", "big.txt")
+            _git(root, "commit", "-qm", "big")
+            with mock.patch.dict(os.environ, {"MCP_OUTPUT_INLINE_BYTES": "1000"}):
+                _, big = call("git_read_file_at_ref", {"path": "big.txt"})
+                assert big["truncated"] and big["total_bytes"] == 5000 and len(big["content"]) == 1000
+                _, rest = call("continue_output", {"cursor": big["next_cursor"], "max_bytes": 10_000})
+                assert big["content"] + rest["output"] == "line\n" * 1000
+            _, old = call("git_read_file_at_ref", {"path": "big.txt", "ref": "HEAD~1"})
+            assert "not found" in old["error"]
+
+            _, listing = call("git_ls_tree", {})
+            assert [e["path"] for e in listing["entries"]] == ["README", "big.txt", "logo.bin", "pkg0", "pkg1", "pkg2"]
+            _, listing = call("git_ls_tree", {"path": "pkg2", "recursive": True, "long": True})
+            assert [(e["path"], e["size"]) for e in listing["entries"]] == \
+                [("pkg2/mod2.py", 10), ("pkg2/mod8.py", 10), ("pkg2/sub/mod11.py", 11), ("pkg2/sub/mod5.py", 10)], listing
+            _, limited = call("git_ls_tree", {"recursive": True, "max_entries": 5})
+            assert limited["count"] == 5 and limited["truncated"] is True
+            result, _ = call("git_ls_tree", {"path": "README"})
+            assert result.get("isError"), "Files are not directories"
+    print("✓ Files and directories read at any ref through the pool")
+
+
+if __name__ == "__main__":
+    try:
+        test_object_reads()
+        test_restart_and_concurrency()
+        test_idle_reaping()
+        test_tools()
+        print("\n" + "=" * 50)
+        print("ALL GIT BATCH TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
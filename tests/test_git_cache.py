@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Git Cache Self-Test
+
+Tests:
+a) refs resolve like git rev-parse from loose refs, packed-refs and
+   symbolic refs; rev expressions are not resolved
+b) git_show of a commit is cached; git_diff/git_status hits until a file,
+   the index, HEAD or an untracked path changes
+c) uncacheable calls (rev expressions, failures, truncated output, trees
+   too large to fingerprint) run every time; the LRU stays within its
+   entry and byte bounds
+d) the git tools report hits through the metrics snapshot and Prometheus
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp import git_cache
+from mcp.engineer_tools import git_diff, git_show, git_status
+from mcp.git_cache import GitCache, Repository
+
+
+def _git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _make_repo(root: Path) -> None:
+    _git(root, "init", "-q")
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("print('one')\n")
+    (root / "README").write_text("readme\n")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-qm", "one")
+    _git(root, "tag", "v1")
+    (root / "src" / "app.py").write_text("print('two')\n")
+    _git(root, "commit", "-qam", "two")
+
+
+def test_resolve_refs():
+    """Test refs resolve without running git"""
+    print("\n=== Testing Ref Resolution ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        repository = Repository.find(str(root / "src"))
+        assert repository.top == os.path.realpath(tmp)
+
+        for ref in ("HEAD", "v1", "master" if _git(root, "branch", "--show-current") == "master" else "main"):
+            assert repository.resolve(ref) == _git(root, "rev-parse", ref), ref
+        head = _git(root, "rev-parse", "HEAD")
+        assert repository.resolve(head) == head
+        for ref in ("HEAD~1", "v1^{tree}", head[:7], "nope", "a..b"):
+            assert repository.resolve(ref) is None, ref
+
+        _git(root, "pack-refs", "--all")
+        assert not (root / ".git" / "refs" / "tags" / "v1").exists()
+        assert repository.resolve("v1") == _git(root, "rev-parse", "v1"), "Packed refs are read"
+        assert repository.resolve("refs/tags/v1") == repository.resolve("v1")
+    print("✓ Loose, packed and symbolic refs resolved; rev expressions left to git")
+
+
+def test_invalidation():
+    """Test cached results are reused until the repository changes"""
+    print("\n=== Testing Invalidation ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_repo(root)
+        cache = GitCache()
+        cwd = str(root)
+
+        first = git_show(cwd, "v1", cache=cache)
+        assert first["returncode"] == 0 and "cached" not in first
+        again = git_show(cwd, "v1", cache=cache)
+        assert again["cached"] is True and again["show"] == first["show"]
+        by_id = git_show(cwd, _git(root, "rev-parse", "v1"), cache=cache)
+        assert by_id.get("cached") is True, "A ref and its object id share the entry"
+
+        assert "cached" not in git_diff(cwd, cache=cache)
+        assert git_diff(cwd, cache=cache)["cached"] is True
+        (root / "src" / "app.py").write_text("print('three')\n")
+        changed = git_diff(cwd, cache=cache)
+        assert "cached" not in changed and "three" in changed["diff"], "Edits invalidate the diff"
+        assert git_diff(cwd, cache=cache)["cached"] is True
+
+        # git status refreshes the index itself; the refreshed state is what gets cached
+        status = git_status(cwd, cache=cache)
+        assert status["status"] == "M src/app.py" and "cached" not in status
+        assert git_status(cwd, cache=cache)["cached"] is True
+        (root / "notes.txt").write_text("new\n")
+        status = git_status(cwd, cache=cache)
+        assert "?? notes.txt" in status["status"] and "cached" not in status, "New files invalidate status"
+        assert git_status(cwd, cache=cache)["cached"] is True
+        (root / "notes.txt").write_text("edited untracked file\n")
+        assert "cached" not in git_status(cwd, cache=cache)
+
+        _git(root, "add", "-A")
+        status = git_status(cwd, cache=cache)
+        assert "A  notes.txt" in status["status"] and "cached" not in status, "Staging invalidates status"
+        _git(root, "commit", "-qm", "three")
+        assert git_status(cwd, cache=cache)["status"] == ""
+        diff = git_diff(cwd, "v1", cache=cache)
+        assert "cached" not in diff and "notes.txt" in diff["diff"]
+        assert git_show(cwd, cache=cache)["show"] != first["show"], "HEAD moved: git_show HEAD is a new entry"
+
+        counts = cache.stats()["tools"]
+        assert counts["git_show"] == {"hits": 2, "misses": 2, "bypassed": 0}, counts
+    print("✓ Edits, new files, staging and commits invalidate; unchanged state hits")
+
+
+def test_uncacheable_and_bounds():
+    """Test bypassed calls and LRU bounds"""
+    print("\n=== Testing Bypass and Bounds ===")
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as outside:
+        root = Path(tmp)
+        _make_repo(root)
+        cwd = str(root)
+        cache = GitCache(max_entries=2)
+
+        for _ in range(2):
+            assert "cached" not in git_show(cwd, "HEAD~1", cache=cache)
+            assert git_show(cwd, "no-such-ref", cache=cache)["returncode"] != 0
+            assert git_status(outside, cache=cache)["returncode"] != 0
+        counts = cache.stats()["tools"]
+        assert counts["git_show"]["bypassed"] == 4 and counts["git_status"]["bypassed"] == 2, counts
+        for _ in range(2):
+            assert cache.call("git_show", cwd, "v1", lambda: {"error": "failed", "returncode": 1})["returncode"] == 1
+        assert cache.stats()["tools"]["git_show"]["misses"] == 2
+        assert cache.stats()["entries"] == 0, "Failures are not cached"
+
+        with mock.patch.dict(os.environ, {"MCP_OUTPUT_INLINE_BYTES": "16"}):
+            truncated = git_show(cwd, "HEAD", cache=cache)
+            assert truncated["truncated"] and "cached" not in git_show(cwd, "HEAD", cache=cache)
+
+        git_show(cwd, "HEAD", cache=cache)
+        git_show(cwd, "v1", cache=cache)
+        git_diff(cwd, cache=cache)
+        stats = cache.stats()
+        assert stats["entries"] == 2 and stats["evictions"] == 1, stats
+        assert "cached" not in git_show(cwd, "HEAD", cache=cache), "Least recently used entry evicted"
+
+        with mock.patch.object(git_cache, "MAX_FINGERPRINT_FILES", 1):
+            git_status(cwd, cache=cache)
+            assert "cached" not in git_status(cwd, cache=cache), "Large trees are not fingerprinted"
+
+        small = GitCache(max_bytes=200)
+        git_show(cwd, "HEAD", cache=small)
+        assert small.stats()["entries"] == 0, "Results larger than the cache are not stored"
+        disabled = GitCache(max_bytes=0)
+        git_show(cwd, "HEAD", cache=disabled)
+        assert "cached" not in git_show(cwd, "HEAD", cache=disabled)
+        assert disabled.stats()["tools"]["git_show"]["bypassed"] == 2
+    print("✓ Rev expressions, failures and truncated output bypass; LRU bounded")
+
+
+def test_metrics():
+    """Test hit rates reach the metrics snapshot and Prometheus output"""
+    print("\n=== Testing Cache Metrics ===")
+    from mcp.server import MCPServer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_repo(Path(tmp))
+        server = MCPServer()
+
+        def call(name, arguments):
+            response = server.process_request({
+                "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": name, "arguments": arguments},
+            })
+            text = response["result"]["content"][0]["text"]
+            return json.loads(text[text.index("{"):])
+
+        with mock.patch.dict(os.environ, {"MCP_WORKSPACE_ROOT": tmp}):
+            assert "cached" not in call("git_show", {"ref": "v1"})
+            assert call("git_show", {"ref": "v1"})["cached"] is True
+            call("git_status", {})
+            call("git_status", {})
+
+        git = server.metrics.snapshot()["caches"]["git"]
+        assert git["hits"] == 2 and git["misses"] == 2 and git["hit_rate"] == 0.5, git
+        assert git["tools"]["git_show"]["hits"] == 1
+        prometheus = server.metrics.prometheus()
+        assert 'mcp_cache_hits_total{cache="git",tool="git_show"} 1' in prometheus
+        assert 'mcp_cache_entries{cache="git"} 2' in prometheus
+    print("✓ Hits, misses and hit rate reported per tool")
+
+
+if __name__ == "__main__":
+    try:
+        test_resolve_refs()
+        test_invalidation()
+        test_uncacheable_and_bounds()
+        test_metrics()
+        print("\n" + "=" * 50)
+        print("ALL GIT CACHE TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
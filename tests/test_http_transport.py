@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport Self-Test
+
+Tests:
+a) initialize issues an Mcp-Session-Id and sessions keep separate extension context
+b) notifications get 202, bad JSON gets a parse error, unknown sessions 404
+c) progress notifications and the response stream over SSE
+d) large responses are gzip-compressed and foreign Origins are refused
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.http_transport import SESSION_HEADER, FastAPI, create_app
+
+if FastAPI is not None:
+    from fastapi.testclient import TestClient
+
+TOKEN = "test-token"
+
+
+def _client():
+    from mcp.server import MCPServer
+
+    server = MCPServer()
+    server.write_token = TOKEN
+    return TestClient(create_app(server))
+
+
+def _call(request_id, name, arguments, meta=None):
+    params = {"name": name, "arguments": arguments}
+    if meta:
+        params["_meta"] = meta
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+def _initialize(client):
+    response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+    assert response.status_code == 200, response.text
+    assert response.json()["result"]["protocolVersion"] == "2024-11-05"
+    return {SESSION_HEADER: response.headers[SESSION_HEADER]}
+
+
+def test_http_sessions():
+    """Test session handshake, per-session context and error statuses"""
+    print("\n=== Testing HTTP Sessions ===")
+    if FastAPI is None:
+        print("⚠ fastapi not installed, skipping")
+        return
+
+    with _client() as client:
+        first = _initialize(client)
+        second = _initialize(client)
+        assert first != second, "Each initialize should start a new session"
+
+        set_call = _call(2, "ext_set_context", {"payload": {"doc": "a.py"}, "write_token": TOKEN})
+        assert client.post("/mcp", json=set_call, headers=first).status_code == 200
+        text = client.post("/mcp", json=_call(3, "ext_get_context", {}), headers=first).json()["result"]["content"][0]["text"]
+        assert "a.py" in text, text
+        text = client.post("/mcp", json=_call(4, "ext_get_context", {}), headers=second).json()["result"]["content"][0]["text"]
+        assert "none set" in text, f"Sessions should not share context: {text}"
+        print("✓ Sessions keep separate extension context")
+
+        notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        assert client.post("/mcp", json=notification, headers=first).status_code == 202
+        assert client.post("/mcp", content=b"{not json", headers=first).json()["error"]["code"] == -32700
+        unknown = client.post("/mcp", json=_call(5, "get_stats", {}), headers={SESSION_HEADER: "nope"})
+        assert unknown.status_code == 404
+
+        batch = client.post("/mcp", json=[_call(6, "get_stats", {}), _call(7, "git_status", {})], headers=first)
+        assert sorted(r["id"] for r in batch.json()) == [6, 7]
+
+        assert client.delete("/mcp", headers=first).status_code == 204
+        assert client.post("/mcp", json=_call(8, "get_stats", {}), headers=first).status_code == 404
+        print("✓ 202 for notifications, parse errors, batches and session end")
+
+
+def test_http_sse_progress():
+    """Test a call with a progressToken streams progress, then its response"""
+    print("\n=== Testing HTTP SSE Progress ===")
+    if FastAPI is None:
+        print("⚠ fastapi not installed, skipping")
+        return
+
+    with _client() as client:
+        headers = _initialize(client)
+        headers["Accept"] = "application/json, text/event-stream"
+        request = _call(
+            10, "run_cmd", {"cmd": ["python3", "-c", "import time; time.sleep(1.2)"]},
+            meta={"progressToken": "p-10"},
+        )
+        with client.stream("POST", "/mcp", json=request, headers=headers) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+        progress = [e for e in events if e.get("method") == "notifications/progress"]
+        assert progress, f"Expected progress events: {events}"
+        assert all(p["params"]["progressToken"] == "p-10" for p in progress)
+        assert events[-1]["id"] == 10 and "result" in events[-1], f"Response should come last: {events[-1]}"
+        print(f"✓ {len(progress)} progress events then the response")
+
+
+def test_http_gzip_and_origin():
+    """Test gzip for large payloads and Origin checks"""
+    print("\n=== Testing HTTP gzip and Origin ===")
+    if FastAPI is None:
+        print("⚠ fastapi not installed, skipping")
+        return
+
+    with _client() as client:
+        headers = _initialize(client)
+        listing = {"jsonrpc": "2.0", "id": 20, "method": "tools/list", "params": {}}
+        response = client.post("/mcp", json=listing, headers={**headers, "Accept-Encoding": "gzip"})
+        assert response.headers.get("content-encoding") == "gzip", "tools/list should be compressed"
+        assert len(response.json()["result"]["tools"]) > 0
+
+        evil = client.post("/mcp", json=listing, headers={**headers, "Origin": "https://evil.example"})
+        assert evil.status_code == 403
+        local = client.post("/mcp", json=listing, headers={**headers, "Origin": "http://localhost:3000"})
+        assert local.status_code == 200
+        print("✓ gzip applied; foreign Origin refused")
+
+
+if __name__ == "__main__":
+    try:
+        test_http_sessions()
+        test_http_sse_progress()
+        test_http_gzip_and_origin()
+        print("\n✅ All HTTP transport tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
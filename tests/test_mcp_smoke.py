@@ -9,6 +9,7 @@ import os
 import sys
 import json
 import subprocess
+import time
 from pathlib import Path
 import tempfile
 
@@ -81,8 +82,10 @@ def test_tools_list():
 
     # Check for expected tools
     expected_tools = {
-        "store_memory", "search_memory", "get_context", "get_stats",
-        "git_status", "git_diff", "git_show", "ripgrep_search", "run_cmd",
+        "store_memory", "store_memories_bulk", "search_memory", "get_context", "get_stats",
+        "get_profile", "git_status", "git_diff", "git_show", "git_read_file_at_ref", "git_ls_tree",
+        "ripgrep_search", "index_build", "index_status",
+        "run_cmd", "continue_output",
         "memory_append", "memory_search", "decision_log_add", "decision_log_search",
         "ext_get_context", "ext_set_context", "ext_clear_context"
     }
@@ -487,6 +490,141 @@ def test_repo_memory_tools():
     print(f"✓ memory_search works")
 
 
+def test_concurrent_requests():
+    """Test a slow tool call does not block a fast one"""
+    print("\n=== Testing Concurrent Requests ===")
+
+    slow = {
+        "jsonrpc": "2.0",
+        "id": 30,
+        "method": "tools/call",
+        "params": {
+            "name": "run_cmd",
+            "arguments": {"cmd": ["python3", "-c", "import time; time.sleep(1.5)"]}
+        }
+    }
+    fast = {
+        "jsonrpc": "2.0",
+        "id": 31,
+        "method": "tools/call",
+        "params": {"name": "get_stats", "arguments": {}}
+    }
+
+    result = subprocess.run(
+        ["python3", str(SERVER_PATH)],
+        input=json.dumps(slow) + "\n" + json.dumps(fast) + "\n",
+        capture_output=True,
+        text=True,
+        cwd=str(REPO_ROOT)
+    )
+
+    responses = [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+    ids = [r["id"] for r in responses]
+    assert sorted(ids) == [30, 31], f"Both requests should be answered: {ids}"
+    assert ids[0] == 31, f"Fast call should finish before the slow one: {ids}"
+    print("✓ Fast call answered while slow call was running")
+
+
+def test_cancel_request():
+    """Test notifications/cancelled stops a running tool and progress is reported"""
+    print("\n=== Testing Request Cancellation ===")
+
+    slow = {
+        "jsonrpc": "2.0",
+        "id": 40,
+        "method": "tools/call",
+        "params": {
+            "name": "run_cmd",
+            "arguments": {"cmd": ["python3", "-c", "import time; time.sleep(30)"]},
+            "_meta": {"progressToken": "slow-40"}
+        }
+    }
+    cancel = {
+        "jsonrpc": "2.0",
+        "method": "notifications/cancelled",
+        "params": {"requestId": 40, "reason": "user aborted"}
+    }
+    fast = {
+        "jsonrpc": "2.0",
+        "id": 41,
+        "method": "tools/call",
+        "params": {"name": "get_stats", "arguments": {}}
+    }
+
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        ["python3", str(SERVER_PATH)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        cwd=str(REPO_ROOT)
+    )
+    proc.stdin.write(json.dumps(slow) + "\n")
+    proc.stdin.flush()
+    time.sleep(2)
+    proc.stdin.write(json.dumps(cancel) + "\n" + json.dumps(fast) + "\n")
+    proc.stdin.close()
+    output = proc.stdout.read()
+    proc.wait(timeout=30)
+    elapsed = time.monotonic() - start
+
+    messages = [json.loads(line) for line in output.splitlines() if line.strip()]
+    ids = [m.get("id") for m in messages if "id" in m]
+    progress = [m for m in messages if m.get("method") == "notifications/progress"]
+    assert elapsed < 15, f"Cancelled command should not run to completion ({elapsed:.1f}s)"
+    assert ids == [41], f"Only the uncancelled request should be answered: {ids}"
+    assert progress, "Expected progress notifications for the slow call"
+    assert all(p["params"]["progressToken"] == "slow-40" for p in progress)
+    print(f"✓ Cancelled after {elapsed:.1f}s with {len(progress)} progress notifications")
+
+
+def test_batch_requests():
+    """Test JSON-RPC batch arrays in both stdio modes"""
+    print("\n=== Testing Batch Requests ===")
+
+    batch = [
+        {"jsonrpc": "2.0", "id": 50, "method": "tools/call",
+         "params": {"name": "get_context", "arguments": {}}},
+        {"jsonrpc": "2.0", "id": 51, "method": "tools/call",
+         "params": {"name": "git_status", "arguments": {}}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 52, "method": "tools/call",
+         "params": {"name": "ext_get_context", "arguments": {}}},
+        "not a request",
+    ]
+    input_data = json.dumps(batch) + "\n" + json.dumps([]) + "\n"
+
+    for mode in ("async", "sync"):
+        env = dict(os.environ)
+        env["MCP_STDIO_MODE"] = mode
+        result = subprocess.run(
+            ["python3", str(SERVER_PATH)],
+            input=input_data,
+            capture_output=True,
+            text=True,
+            cwd=str(REPO_ROOT),
+            env=env,
+        )
+        lines = [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+        assert len(lines) == 2, f"[{mode}] Expected one reply per batch, got {len(lines)}"
+
+        # The async transport may answer the empty batch first
+        arrays = [line for line in lines if isinstance(line, list)]
+        errors = [line for line in lines if isinstance(line, dict)]
+        assert len(arrays) == 1 and len(errors) == 1, f"[{mode}] Batch reply should be an array: {lines}"
+        responses = arrays[0]
+        by_id = {r["id"]: r for r in responses}
+        assert set(by_id) == {50, 51, 52, None}, f"[{mode}] Unexpected ids: {list(by_id)}"
+        assert "Context" in by_id[50]["result"]["content"][0]["text"]
+        assert "Git status" in by_id[51]["result"]["content"][0]["text"]
+        assert "none set" in by_id[52]["result"]["content"][0]["text"]
+        assert by_id[None]["error"]["code"] == -32600, "Non-object member should be Invalid Request"
+
+        assert errors[0]["error"]["code"] == -32600, f"[{mode}] Empty batch should be one Invalid Request"
+        print(f"✓ Batch handled in {mode} mode")
+
+
 if __name__ == "__main__":
     try:
         test_server_imports()
@@ -501,6 +639,9 @@ if __name__ == "__main__":
         test_git_tools()
         test_run_cmd_allowlist()
         test_repo_memory_tools()
+        test_concurrent_requests()
+        test_cancel_request()
+        test_batch_requests()
 
         print("\n" + "=" * 50)
         print("ALL MCP SMOKE TESTS PASSED ✓")
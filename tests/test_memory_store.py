@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Memory Store Self-Test
+
+Tests:
+a) pooled connections are reused across calls
+b) PRAGMAs are applied from SQLiteSettings
+c) writes are visible to pooled readers
+d) FTS5 search ranks, supports phrase/prefix queries and backfills old DBs
+e) tag loading uses a constant number of queries per page
+f) list_memories filters by any-of/all-of tags via the tag index
+g) keyset cursors page through every row exactly once
+h) bulk ingestion stores rows, tags and FTS entries in one transaction
+i) materialized stats stay consistent with the memories table
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.agent_integration import AgentMemory
+from mcp.memory_store import MemoryStore, build_fts_query, decode_cursor
+from mcp.models import MemoryQuery
+from mcp.sqlite_pool import SQLiteSettings
+
+
+def _make_store(tmp: str, **settings) -> MemoryStore:
+    return MemoryStore(str(Path(tmp) / "memories.db"), settings=SQLiteSettings(**settings))
+
+
+def test_connection_pool_reuse():
+    """Test writer and reader connections are long-lived"""
+    print("\n=== Testing Connection Pool Reuse ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp, read_pool_size=2)
+        try:
+            with store._get_connection() as first_writer:
+                pass
+            store.set_memory("test", "title", "content")
+            with store._get_connection() as second_writer:
+                pass
+            assert first_writer is second_writer, "Writer connection should be reused"
+
+            with store._read_connection() as first_reader:
+                pass
+            store.get_memory("missing")
+            with store._read_connection() as second_reader:
+                pass
+            assert first_reader is second_reader, "Idle reader should be reused"
+            assert len(store.pool._all_readers) == 1, "Only one reader should be opened"
+        finally:
+            store.close()
+
+    print("✓ Connections reused across calls")
+
+
+def test_pragmas_applied():
+    """Test PRAGMAs come from SQLiteSettings"""
+    print("\n=== Testing PRAGMAs ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp, cache_size=-2048, temp_store="MEMORY", synchronous="NORMAL")
+        try:
+            with store._get_connection() as conn:
+                assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+                assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+                assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+                assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            with store._read_connection() as conn:
+                assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        finally:
+            store.close()
+
+    print("✓ PRAGMAs applied per connection")
+
+
+def test_reads_see_writes():
+    """Test readers observe committed writes from the writer"""
+    print("\n=== Testing Read-After-Write ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        try:
+            assert store.get_stats().total_memories == 0
+            memory_id = store.set_memory("test", "hello", "world", tags=["Greeting"], workspace="ws")
+            memory = store.get_memory(memory_id)
+            assert memory is not None and memory.tags == ["greeting"]
+            memories, total = store.list_memories(MemoryQuery(workspace="ws"))
+            assert total == 1 and memories[0].id == memory_id
+            assert [m.id for m in store.search("world")] == [memory_id]
+            assert store.get_stats().total_memories == 1
+            assert store.delete_memory(memory_id)
+            assert store.get_memory(memory_id) is None
+        finally:
+            store.close()
+
+    print("✓ Readers see committed writes")
+
+
+def test_fts_search_ranking():
+    """Test BM25 ranking, phrase and prefix queries and snippets"""
+    print("\n=== Testing FTS Search ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        try:
+            if not store.fts_enabled:
+                print("⚠ Skipping FTS test (SQLite built without FTS5)")
+                return
+            body_only = store.set_memory("test", "Notes", "we discussed caching layers today")
+            in_title = store.set_memory("test", "Caching strategy", "redis caching for sessions")
+            tagged = store.set_memory("test", "Other", "unrelated text", tags=["caching"])
+
+            hits = store.search_hits("caching")
+            assert hits[0].memory.id == in_title, "Title match should rank first"
+            assert {h.memory.id for h in hits} == {body_only, in_title, tagged}
+            assert "[caching]" in hits[0].snippet, f"Snippet should highlight: {hits[0].snippet}"
+
+            assert [m.id for m in store.search('"caching layers"')] == [body_only]
+            assert [m.id for m in store.search("unrel*")] == [tagged]
+            assert store.search("c++ (") == [], "Punctuation-only terms should not error"
+
+            # Replacing a memory must not leave a stale index entry
+            store.set_memory("test", "Notes", "nothing relevant", memory_id=body_only)
+            assert body_only not in [m.id for m in store.search("layers")]
+        finally:
+            store.close()
+
+    assert build_fts_query('foo-bar "a b" pre*') == '"foo bar" "a b" "pre"*'
+    print("✓ FTS ranking, phrase and prefix queries work")
+
+
+def test_fts_backfill_and_fallback():
+    """Test existing databases are indexed and LIKE fallback still works"""
+    print("\n=== Testing FTS Backfill ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        memory_id = store.set_memory("test", "Legacy", "pre-existing memory row")
+        fts_enabled = store.fts_enabled
+        store.close()
+
+        # Simulate a memories.db created before the FTS index existed
+        conn = sqlite3.connect(str(Path(tmp) / "memories.db"))
+        conn.execute("DROP TABLE IF EXISTS memories_fts")
+        conn.commit()
+        conn.close()
+
+        store = _make_store(tmp)
+        try:
+            if fts_enabled:
+                assert [m.id for m in store.search("existing")] == [memory_id]
+            store.fts_enabled = False
+            assert [m.id for m in store.search("pre-existing")] == [memory_id]
+        finally:
+            store.close()
+
+    print("✓ Existing rows backfilled; LIKE fallback works")
+
+
+def test_constant_queries_per_page():
+    """Test list_memories/search don't issue one tag query per row"""
+    print("\n=== Testing Query Count Per Page ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp, read_pool_size=1)
+        try:
+            for i in range(60):
+                store.set_memory("test", f"page item {i}", "paged content", tags=[f"t{i}", "shared"])
+
+            statements = []
+
+            def _trace(sql):
+                # Statements run inside virtual tables are reported with a "--" prefix
+                if not sql.startswith("--"):
+                    statements.append(sql)
+
+            with store._read_connection() as conn:
+                conn.set_trace_callback(_trace)
+            store.search("paged", limit=1)  # FTS5 loads its config on first use
+
+            counts = {}
+            for limit in (1, 10, 60):
+                statements.clear()
+                memories, _ = store.list_memories(MemoryQuery(limit=limit))
+                counts[("list", limit)] = len(statements)
+                assert all(sorted(m.tags) == m.tags and "shared" in m.tags for m in memories)
+
+                statements.clear()
+                hits = store.search("paged", limit=limit)
+                counts[("search", limit)] = len(statements)
+                assert len(hits) == limit
+
+            assert counts[("list", 1)] == counts[("list", 60)], f"List queries grew: {counts}"
+            assert counts[("search", 1)] == counts[("search", 60)], f"Search queries grew: {counts}"
+        finally:
+            store.close()
+
+    print(f"✓ Query count constant per page: {counts}")
+
+
+def test_tag_filter():
+    """Test any-of/all-of tag filtering in list_memories"""
+    print("\n=== Testing Tag Filter ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        try:
+            both = store.set_memory("test", "both", "x", tags=["python", "sqlite"])
+            py_only = store.set_memory("test", "py", "x", tags=["python"])
+            store.set_memory("test", "none", "x", tags=["rust"])
+
+            memories, total = store.list_memories(MemoryQuery(tags=["Python", "sqlite"]))
+            assert total == 2 and {m.id for m in memories} == {both, py_only}
+
+            memories, total = store.list_memories(
+                MemoryQuery(tags=["python", "sqlite"], tag_mode="all")
+            )
+            assert total == 1 and memories[0].id == both
+
+            with store._read_connection() as conn:
+                plan = " ".join(
+                    row[3] for row in conn.execute(
+                        "EXPLAIN QUERY PLAN SELECT memory_id FROM memory_tags WHERE tag IN (?, ?)",
+                        ("python", "sqlite"),
+                    )
+                )
+            assert "idx_memory_tags_tag" in plan, f"Tag lookup should use index: {plan}"
+
+            try:
+                store.list_memories(MemoryQuery(tags=["python"], tag_mode="some"))
+                raise AssertionError("Invalid tag_mode should be rejected")
+            except ValueError:
+                pass
+        finally:
+            store.close()
+
+    print("✓ Tag filtering works (any/all)")
+
+
+def test_keyset_pagination():
+    """Test cursor pagination visits each memory once, including timestamp ties"""
+    print("\n=== Testing Keyset Pagination ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        try:
+            ids = {store.set_memory("test", f"m{i}", "x", workspace="ws") for i in range(25)}
+            with store._get_connection() as conn:
+                # Force ties on updated_at so the id tiebreaker matters
+                conn.execute("UPDATE memories SET updated_at = '2026-01-01T00:00:00' WHERE title < 'm2'")
+
+            seen, after, pages = [], None, 0
+            while True:
+                page = store.list_memories_page(
+                    MemoryQuery(workspace="ws", limit=7, after=after, include_total=(after is None))
+                )
+                pages += 1
+                if after is None:
+                    assert page.total == 25
+                else:
+                    assert page.total is None, "Count should be skipped when include_total=False"
+                seen.extend(m.id for m in page.memories)
+                if page.next_cursor is None:
+                    break
+                after = decode_cursor(page.next_cursor)
+
+            assert len(seen) == len(set(seen)) == 25 and set(seen) == ids, "Each row exactly once"
+            assert pages == 4
+
+            try:
+                decode_cursor("not-a-cursor")
+                raise AssertionError("Malformed cursor should be rejected")
+            except ValueError:
+                pass
+        finally:
+            store.close()
+
+    print("✓ Keyset pagination visits every row once")
+
+
+def test_bulk_ingestion():
+    """Test set_memories_bulk and AgentMemory.store_many"""
+    print("\n=== Testing Bulk Ingestion ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = AgentMemory(str(Path(tmp) / "memories.db"))
+        try:
+            items = [
+                {"domain": "test", "content": f"bulk row {i} about docker", "tags": ["Bulk"]}
+                for i in range(200)
+            ]
+            ids = memory.store_many(items)
+            assert len(ids) == len(set(ids)) == 200
+            stored = memory.retrieve(ids[0])
+            assert stored["tags"] == ["bulk"] and stored["title"] == "bulk row 0 about docker"
+            assert memory.stats()["total"] == 200
+            if memory.store_instance.fts_enabled:
+                assert len(memory.search("bulk", limit=500)) == 200, "FTS should index bulk rows"
+
+            classified = memory.store_many(
+                [{"content": "Critical: use kubernetes for deployment"}] * 4,
+                auto_classify=True,
+                workers=2,
+            )
+            stored = memory.retrieve(classified[0])
+            assert stored["priority"] == "high" and "cloud" in stored["tags"]
+
+            # The MCP tool classifies on the requested (clamped) number of processes
+            from mcp.server import MCPServer
+            server = MCPServer()
+            server.write_token = "bulk-token"
+            server._memory = memory
+            requested = []
+            store_many = memory.store_many
+
+            def record_workers(items, auto_classify=False, workers=1):
+                requested.append(workers)
+                return store_many(items, auto_classify, workers)
+
+            memory.store_many = record_workers
+            for workers in (2, 10_000, None):
+                arguments = {"memories": [{"content": "Critical: use kubernetes"}] * 2, "auto_classify": True,
+                             "write_token": "bulk-token"}
+                if workers is not None:
+                    arguments["workers"] = workers
+                response = server.process_request({
+                    "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                    "params": {"name": "store_memories_bulk", "arguments": arguments},
+                })
+                assert not response["result"].get("isError"), response
+            cap = min(MCPServer.MAX_CLASSIFY_WORKERS, os.cpu_count() or 1)
+            assert requested == [min(2, cap), cap, 1], requested
+        finally:
+            memory.close()
+
+    print("✓ Bulk ingestion works")
+
+
+def test_materialized_stats():
+    """Test trigger-maintained stats match a full rebuild"""
+    print("\n=== Testing Materialized Stats ===")
+
+    def snapshot(store):
+        stats = store.get_stats()
+        return stats.total_memories, stats.by_domain, stats.by_workspace, stats.total_content_chars
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _make_store(tmp)
+        try:
+            a = store.set_memory("alpha", "a", "12345", workspace="ws1")
+            store.set_memory("beta", "b", "123", workspace="ws2")
+            store.set_memory("beta", "c", "1")
+            store.set_memories_bulk([{"domain": "alpha", "title": "d", "content": "12"}] * 3)
+            # Replace, update and delete paths
+            store.set_memory("gamma", "a", "1234567", workspace="ws2", memory_id=a)
+            with store._get_connection() as conn:
+                conn.execute("UPDATE memories SET domain = 'beta', content = 'xy' WHERE title = 'c'")
+            store.delete_memory(store.list_memories(MemoryQuery(domain="alpha", limit=1))[0][0].id)
+
+            live = snapshot(store)
+            assert live == (5, {"alpha": 2, "beta": 2, "gamma": 1}, {"ws2": 2}, 7 + 3 + 2 + 2 + 2), live
+            assert store.count_memories() == 5
+
+            store.rebuild_stats()
+            assert snapshot(store) == live, "Incremental stats should match a rebuild"
+        finally:
+            store.close()
+
+    print("✓ Materialized stats consistent")
+
+
+if __name__ == "__main__":
+    try:
+        test_connection_pool_reuse()
+        test_pragmas_applied()
+        test_reads_see_writes()
+        test_fts_search_ranking()
+        test_fts_backfill_and_fallback()
+        test_constant_queries_per_page()
+        test_tag_filter()
+        test_keyset_pagination()
+        test_bulk_ingestion()
+        test_materialized_stats()
+        print("\n" + "=" * 50)
+        print("ALL MEMORY STORE TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
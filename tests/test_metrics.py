@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tool Metrics Self-Test
+
+Tests:
+a) histogram quantiles land in the right bucket
+b) the middleware counts calls, errors, denied writes and DB statements
+c) request/response sizes are attributed to the tool that was called
+d) the snapshot is served as mcp://cursor-mcp/metrics and the
+   Prometheus dump is well-formed
+e) per-call overhead of the middleware stays within budget
+
+The overhead budget can be overridden with MCP_METRICS_BUDGET_US.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.metrics import LatencyHistogram, ToolMetrics, count_db_statement, db_statements
+from mcp.tool_registry import ToolCall, ToolRegistry, ToolSpec
+
+# Microseconds added per tool call by the metrics middleware
+OVERHEAD_BUDGET_US = float(os.environ.get("MCP_METRICS_BUDGET_US", 5))
+TOKEN = "test-token"
+
+
+def _ok(call: ToolCall) -> dict:
+    count_db_statement()
+    return {"content": [{"type": "text", "text": "ok"}]}
+
+
+def _fail(call: ToolCall) -> dict:
+    raise RuntimeError("boom")
+
+
+def _server():
+    from mcp.server import MCPServer
+
+    server = MCPServer()
+    server.write_token = TOKEN
+    return server
+
+
+def _call(server, request_id, name, arguments):
+    request = {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+               "params": {"name": name, "arguments": arguments}}
+    line = json.dumps(request)
+    response = server.process_request(request)
+    server.metrics.record_io(request, len(line), len(json.dumps(response)))
+    return response
+
+
+def test_histogram_quantiles():
+    """Test quantile estimates from the fixed buckets"""
+    print("\n=== Testing Latency Histogram ===")
+
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) == 0.0
+    for _ in range(90):
+        histogram.observe(0.001)
+    for _ in range(10):
+        histogram.observe(0.100)
+
+    p50, p99 = histogram.quantile(0.50), histogram.quantile(0.99)
+    assert 0.0007 < p50 <= 0.001, f"p50 should be about 1 ms, got {p50}"
+    assert 0.07 < p99 <= 0.100, f"p99 should be about 100 ms, got {p99}"
+    assert histogram.max == 0.100 and histogram.count == 100
+    print(f"✓ p50={p50 * 1000:.3f} ms, p99={p99 * 1000:.3f} ms")
+
+
+def test_middleware_counts():
+    """Test call, error and DB statement counting on a bare registry"""
+    print("\n=== Testing Metrics Middleware ===")
+
+    metrics = ToolMetrics()
+    registry = ToolRegistry()
+    registry.register(ToolSpec("ok_tool", "OK", {"type": "object", "properties": {}}, _ok))
+    registry.register(ToolSpec("fail_tool", "Fail", {"type": "object", "properties": {}}, _fail))
+    registry.add_middleware(metrics.middleware)
+
+    before = db_statements()
+    for _ in range(3):
+        registry.invoke(registry.get("ok_tool"), ToolCall("ok_tool", {}))
+    assert db_statements() - before == 3
+    try:
+        registry.invoke(registry.get("fail_tool"), ToolCall("fail_tool", {}))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Handler exception should propagate through the middleware")
+
+    tools = metrics.snapshot()["tools"]
+    assert tools["ok_tool"]["calls"] == 3 and tools["ok_tool"]["errors"] == 0
+    assert tools["ok_tool"]["db_statements"] == 3
+    assert tools["fail_tool"]["calls"] == 1 and tools["fail_tool"]["errors"] == 1
+    print("✓ Calls, errors and DB statements counted")
+
+
+def test_server_metrics():
+    """Test metrics collected by MCPServer, including denied writes and payload sizes"""
+    print("\n=== Testing Server Metrics ===")
+
+    server = _server()
+    _call(server, 1, "ext_set_context", {"payload": {"k": "v"}, "write_token": TOKEN})
+    denied = _call(server, 2, "ext_set_context", {"payload": {"k": "v"}, "write_token": "wrong"})
+    assert denied["result"]["isError"], "Wrong token should be denied"
+    _call(server, 3, "ext_get_context", {})
+    _call(server, 4, "get_stats", {})
+    # Non-tool requests are not attributed to any tool
+    server.metrics.record_io({"jsonrpc": "2.0", "id": 5, "method": "tools/list"}, 100, 100)
+
+    response = server.process_request({
+        "jsonrpc": "2.0", "id": 6, "method": "resources/read",
+        "params": {"uri": "mcp://cursor-mcp/metrics"},
+    })
+    contents = response["result"]["contents"][0]
+    assert contents["uri"] == "mcp://cursor-mcp/metrics"
+    snapshot = json.loads(contents["text"])
+    tools = snapshot["tools"]
+    assert tools["ext_set_context"]["calls"] == 2
+    assert tools["ext_set_context"]["errors"] == 1, "Denied write should count as an error"
+    assert tools["ext_set_context"]["input_bytes"] > 0 and tools["ext_set_context"]["output_bytes"] > 0
+    assert tools["ext_get_context"]["errors"] == 0
+    assert tools["get_stats"]["db_statements"] > 0, "get_stats should run SQLite statements"
+    assert snapshot["totals"]["calls"] == 4
+    assert "tools/list" not in tools
+    for key in ("p50", "p95", "p99"):
+        assert key in tools["get_stats"]["latency_ms"]
+
+    listed = server.process_request({"jsonrpc": "2.0", "id": 7, "method": "resources/list", "params": {}})
+    assert "mcp://cursor-mcp/metrics" in [r["uri"] for r in listed["result"]["resources"]]
+    print(f"✓ Metrics resource: {snapshot['totals']}")
+
+
+def test_prometheus_dump():
+    """Test the Prometheus text format written to a file"""
+    print("\n=== Testing Prometheus Dump ===")
+
+    metrics = ToolMetrics()
+    registry = ToolRegistry()
+    registry.register(ToolSpec('odd"tool', "Odd", {"type": "object", "properties": {}}, _ok))
+    registry.add_middleware(metrics.middleware)
+    registry.invoke(registry.get('odd"tool'), ToolCall('odd"tool', {}))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "mcp.prom"
+        metrics.write_prometheus(str(path))
+        text = path.read_text()
+        assert not (Path(tmp) / "mcp.prom.tmp").exists()
+
+    assert 'mcp_tool_calls_total{tool="odd\\"tool"} 1' in text, text
+    assert "# TYPE mcp_tool_latency_seconds histogram" in text
+    assert 'mcp_tool_latency_seconds_bucket{tool="odd\\"tool",le="+Inf"} 1' in text
+    assert 'mcp_tool_latency_seconds_count{tool="odd\\"tool"} 1' in text
+    for line in text.splitlines():
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2, f"Malformed line: {line}"
+    print(f"✓ {len(text.splitlines())} lines of Prometheus text")
+
+
+def test_middleware_overhead():
+    """Test the middleware adds only a few microseconds per call"""
+    print("\n=== Testing Metrics Overhead ===")
+
+    def noop(call: ToolCall) -> dict:
+        return {"content": []}
+
+    def guard(spec, call, call_next):
+        return call_next()
+
+    def per_call(with_metrics: bool, iterations: int = 20000) -> float:
+        registry = ToolRegistry()
+        registry.register(ToolSpec("noop", "Noop", {"type": "object", "properties": {}}, noop))
+        if with_metrics:
+            registry.add_middleware(ToolMetrics().middleware)
+        # MCPServer always installs its security middleware, so the chain is already in use
+        registry.add_middleware(guard)
+        spec, call = registry.get("noop"), ToolCall("noop", {})
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                registry.invoke(spec, call)
+            best = min(best, (time.perf_counter() - start) / iterations)
+        return best
+
+    overhead_us = (per_call(True) - per_call(False)) * 1e6
+    assert overhead_us < OVERHEAD_BUDGET_US, (
+        f"Metrics middleware adds {overhead_us:.2f} us per call (budget {OVERHEAD_BUDGET_US:g} us)"
+    )
+    print(f"✓ Middleware overhead {overhead_us:.2f} us per call (budget {OVERHEAD_BUDGET_US:g} us)")
+
+
+if __name__ == "__main__":
+    try:
+        test_histogram_quantiles()
+        test_middleware_counts()
+        test_server_metrics()
+        test_prometheus_dump()
+        test_middleware_overhead()
+        print("\n" + "=" * 50)
+        print("ALL METRICS TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
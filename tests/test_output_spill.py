@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Output Cap Self-Test
+
+Tests:
+a) OutputCapture keeps only the inline head in memory, spills the rest
+   and never splits a UTF-8 character
+b) continue_output cursors return the full output in order and expire
+c) OutputStore stays within its byte budget
+d) run_cmd output beyond the cap is truncated and fetched back through
+   the continue_output tool
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.engineer_tools import run_cmd
+from mcp.output_spill import OutputCapture, OutputStore, capped_output
+from mcp.path_sandbox import PathSandbox
+
+REPO_ROOT = Path(__file__).parent.parent.resolve()
+
+
+def _drain(store: OutputStore, cursor: str, max_bytes: int) -> str:
+    parts = []
+    while cursor:
+        chunk = store.read(cursor, max_bytes)
+        assert chunk is not None, f"Cursor {cursor} should be readable"
+        parts.append(chunk["output"])
+        cursor = chunk["next_cursor"]
+    return "".join(parts)
+
+
+def test_capture_bounds():
+    """Test head/spill split, byte limit and character boundaries"""
+    print("\n=== Testing OutputCapture ===")
+
+    text = "héllo wörld ✓ " * 5000
+    data = text.encode("utf-8")
+    capture = OutputCapture(inline_bytes=1000, max_bytes=10**6)
+    capture.feed(io.BufferedReader(io.BytesIO(data)))
+    assert capture.total_bytes == len(data) and capture.truncated
+    assert len(capture._head) <= 1004, "Only the inline head should be kept in memory"
+    head = capture.text()
+    assert text.startswith(head) and len(head.encode("utf-8")) <= 1000, "Head must end on a whole character"
+    assert capture.read_at(0, len(data)) == data
+    capture.close()
+
+    small = OutputCapture(inline_bytes=1000)
+    small.write(b"short")
+    assert not small.truncated and capped_output(small, "stdout", None) == {"stdout": "short"}
+
+    limited = OutputCapture(inline_bytes=10, max_bytes=100)
+    for _ in range(30):
+        limited.write(b"0123456789")
+    assert limited.total_bytes == 100 and limited.dropped_bytes == 200
+    result = capped_output(limited, "stdout", None)
+    assert result["truncated"] and result["dropped_bytes"] == 200 and "next_cursor" not in result
+    print("✓ Head bounded, spill complete, characters intact")
+
+
+def test_continuation():
+    """Test cursors reassemble the output and are released at the end"""
+    print("\n=== Testing Continuation ===")
+
+    text = "".join(f"line {i}: ünïcode ✓\n" for i in range(3000))
+    capture = OutputCapture(inline_bytes=4096)
+    capture.write(text.encode("utf-8"))
+    store = OutputStore()
+    result = capped_output(capture, "diff", store)
+    assert result["truncated"] and result["total_bytes"] == len(text.encode("utf-8"))
+
+    rest = _drain(store, result["next_cursor"], 777)
+    assert result["diff"] + rest == text, "Chunks should reassemble the full output"
+    assert store.read(result["next_cursor"]) is None, "Fully read output should be released"
+    assert store.read("bogus.0") is None and store.read("no-offset") is None
+    print(f"✓ {result['total_bytes']:,} bytes reassembled from 777-byte chunks")
+
+
+def test_store_budget():
+    """Test the oldest spilled outputs are evicted past the byte budget"""
+    print("\n=== Testing Store Budget ===")
+
+    store = OutputStore(budget_bytes=50_000)
+    cursors = []
+    for _ in range(5):
+        capture = OutputCapture(inline_bytes=100)
+        capture.write(b"x" * 20_000)
+        cursors.append(capped_output(capture, "stdout", store)["next_cursor"])
+    assert store._bytes <= 50_000, f"Store holds {store._bytes} bytes"
+    held = len(store._outputs)
+    assert held == 2, f"Expected the 2 newest outputs, got {held}"
+    assert store.read(cursors[0]) is None, "Oldest output should be evicted"
+    assert store.read(cursors[-1]) is not None, "Newest output should be kept"
+    print(f"✓ Store held {held} outputs within budget")
+
+
+def test_run_cmd_continuation():
+    """Test a large run_cmd output through the server and continue_output"""
+    print("\n=== Testing run_cmd + continue_output ===")
+    from mcp.server import MCPServer
+
+    server = MCPServer()
+    script = "import sys\nfor i in range(200000): sys.stdout.write(f'{i:07d}\\n')"
+    result = run_cmd(["python3", "-c", script], str(REPO_ROOT), PathSandbox(str(REPO_ROOT)), 60,
+                     output_store=server.output_store)
+    assert result["returncode"] == 0 and result["truncated"], result.get("error")
+    assert result["total_bytes"] == 200000 * 8
+    assert len(result["stdout"]) < result["total_bytes"]
+
+    parts = [result["stdout"]]
+    cursor = result["next_cursor"]
+    request_id = 1
+    while cursor:
+        response = server.process_request({
+            "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": "continue_output", "arguments": {"cursor": cursor, "max_bytes": 500_000}},
+        })
+        text = response["result"]["content"][0]["text"]
+        chunk = json.loads(text[text.index("{"):])
+        parts.append(chunk["output"])
+        cursor = chunk["next_cursor"]
+        request_id += 1
+    output = "".join(parts)
+    assert output == "".join(f"{i:07d}\n" for i in range(200000)), "continue_output should return the rest"
+
+    expired = server.process_request({
+        "jsonrpc": "2.0", "id": 0, "method": "tools/call",
+        "params": {"name": "continue_output", "arguments": {"cursor": result["next_cursor"]}},
+    })
+    assert expired["result"]["isError"]
+    print(f"✓ {len(output):,} bytes fetched in {request_id} responses")
+
+
+if __name__ == "__main__":
+    try:
+        test_capture_bounds()
+        test_continuation()
+        test_store_budget()
+        test_run_cmd_continuation()
+        print("\n" + "=" * 50)
+        print("ALL OUTPUT CAP TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -11,6 +11,8 @@ c) rg works (or clean fallback)
 import sys
 import json
 import subprocess
+import threading
+import time
 from pathlib import Path
 
 # Add parent directory to path
@@ -22,6 +24,7 @@ from mcp.engineer_tools import (
     git_show,
     ripgrep_search,
     run_cmd,
+    CancelToken,
     ALLOWED_COMMANDS
 )
 from mcp.path_sandbox import PathSandbox
@@ -88,11 +91,10 @@ def test_ripgrep_search():
         print(f"  Using ripgrep (rg available)")
 
     # Verify results contain the query
-    results_str = result.get("results", "")
-    if query.lower() in results_str.lower() or query in results_str:
-        print(f"  Found '{query}' in results")
-    else:
-        print(f"  Results preview: {results_str[:200]}...")
+    results = result.get("results", [])
+    assert results, "Expected matches for a string that exists in the repo"
+    assert all(query.lower() in r["text"].lower() for r in results)
+    print(f"  Found '{query}' in {result['match_count']} lines of {result['file_count']} files")
 
     print("\n✓ Ripgrep search tests passed\n")
 
@@ -129,6 +131,38 @@ def test_run_cmd_allowlist():
     print("\n✓ run_cmd allowlist tests passed\n")
 
 
+def test_run_cmd_cancel():
+    """Test cancelling run_cmd kills the subprocess and progress is reported"""
+    print("=== Testing run_cmd Cancellation ===")
+
+    cwd = str(Path(__file__).parent.parent.resolve())
+    sandbox = PathSandbox(cwd)
+    token = CancelToken()
+    updates = []
+
+    timer = threading.Timer(1.5, token.cancel)
+    timer.start()
+    start = time.monotonic()
+    result = run_cmd(
+        ["python3", "-c", "import time; time.sleep(30)"], cwd, sandbox, 60,
+        cancel_token=token, progress=lambda p, total, msg: updates.append((p, total))
+    )
+    elapsed = time.monotonic() - start
+    timer.join()
+
+    assert result.get("cancelled"), f"run_cmd should report cancellation: {result}"
+    assert result["returncode"] == -1, "Cancelled command should return -1"
+    assert elapsed < 10, f"Cancellation should kill the process promptly ({elapsed:.1f}s)"
+    assert updates and all(total == 60 for _, total in updates), f"Expected progress updates: {updates}"
+    assert [p for p, _ in updates] == sorted(p for p, _ in updates), "Progress should not go backwards"
+    print(f"✓ Cancelled after {elapsed:.1f}s with {len(updates)} progress updates")
+
+    # A token cancelled up front never starts the process
+    result = run_cmd(["python3", "--version"], cwd, sandbox, 30, cancel_token=token)
+    assert result.get("cancelled"), "Pre-cancelled token should skip execution"
+    print("\n✓ run_cmd cancellation tests passed\n")
+
+
 def test_allowlist_content():
     """Verify allowlist contains expected commands"""
     print("=== Testing Allowlist Content ===")
@@ -250,6 +284,7 @@ if __name__ == "__main__":
         test_git_tools()
         test_ripgrep_search()
         test_run_cmd_allowlist()
+        test_run_cmd_cancel()
         test_mcp_server_integration()
 
         print("\n" + "=" * 50)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tool Profiling Self-Test
+
+Tests:
+a) the _profile argument captures cProfile and tracemalloc data and is
+   not passed to the handler
+b) MCP_PROFILE samples calls, honours MCP_PROFILE_TOOLS and keeps only
+   MCP_PROFILE_KEEP captures
+c) get_profile lists captures, returns top functions and rejects bad ids
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.profiling import ToolProfiler
+from mcp.tool_registry import ToolCall, ToolRegistry, ToolSpec
+
+
+def _busy_work(call: ToolCall) -> dict:
+    assert "_profile" not in call.arguments, "Control argument leaked to the handler"
+    blocks = [bytearray(1024) for _ in range(200)]
+    total = sum(sorted(range(20000), key=lambda i: -i)[:10])
+    return {"content": [{"type": "text", "text": f"{len(blocks)} {total}"}]}
+
+
+def _registry(profiler: ToolProfiler) -> ToolRegistry:
+    registry = ToolRegistry()
+    for name in ("slow_tool", "other_tool"):
+        registry.register(ToolSpec(name, name, {"type": "object", "properties": {}}, _busy_work))
+    registry.add_middleware(profiler.middleware)
+    return registry
+
+
+def test_profile_argument():
+    """Test a single call profiled through the _profile argument"""
+    print("\n=== Testing _profile Argument ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = ToolProfiler(tmp)
+        registry = _registry(profiler)
+        arguments = {"_profile": "all"}
+        registry.invoke(registry.get("slow_tool"), ToolCall("slow_tool", arguments))
+        assert arguments == {"_profile": "all"}, "Caller's arguments should not be mutated"
+        registry.invoke(registry.get("slow_tool"), ToolCall("slow_tool", {}))
+
+        profiles = profiler.list_profiles()
+        assert len(profiles) == 1, f"Only the flagged call should be profiled: {profiles}"
+        summary = profiler.get_profile(profiles[0]["profile_id"], sort="tottime", limit=5)
+        assert summary["tool"] == "slow_tool" and summary["mode"] == "all"
+        assert summary["peak_bytes"] >= 200 * 1024, f"Peak too small: {summary['peak_bytes']}"
+        assert summary["top_allocations"], "Expected tracemalloc allocations"
+        assert len(summary["top_functions"]) <= 5
+        assert any("_busy_work" in f["function"] for f in summary["top_functions"] + [
+            {"function": a["location"]} for a in summary["top_allocations"]
+        ])
+        assert list(Path(tmp).glob("*.prof")), "Expected a pstats dump"
+        print(f"✓ Captured {summary['profile_id']} ({summary['duration_ms']} ms)")
+
+
+def test_sampling_and_retention():
+    """Test MCP_PROFILE sampling, tool filter and retention"""
+    print("\n=== Testing Sampling and Retention ===")
+
+    env = {"MCP_PROFILE": "cpu", "MCP_PROFILE_TOOLS": "slow_tool", "MCP_PROFILE_KEEP": "3"}
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, env):
+        profiler = ToolProfiler(tmp)
+        registry = _registry(profiler)
+        for _ in range(5):
+            registry.invoke(registry.get("slow_tool"), ToolCall("slow_tool", {}))
+            registry.invoke(registry.get("other_tool"), ToolCall("other_tool", {}))
+
+        profiles = profiler.list_profiles()
+        assert len(profiles) == 3, f"Retention should keep 3 profiles, got {len(profiles)}"
+        assert {p["tool"] for p in profiles} == {"slow_tool"}
+        assert len(list(Path(tmp).glob("*.prof"))) == 3, "Pruned captures should lose their .prof too"
+        assert "top_allocations" not in profiler.get_profile(profiles[0]["profile_id"])
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"MCP_PROFILE": "cpu", "MCP_PROFILE_SAMPLE_RATE": "0"}):
+        profiler = ToolProfiler(tmp)
+        registry = _registry(profiler)
+        registry.invoke(registry.get("slow_tool"), ToolCall("slow_tool", {}))
+        assert profiler.list_profiles() == [], "Sample rate 0 should profile nothing"
+    print("✓ Sampling, tool filter and retention applied")
+
+
+def test_get_profile_tool():
+    """Test the get_profile tool on MCPServer"""
+    print("\n=== Testing get_profile Tool ===")
+    from mcp.server import MCPServer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = MCPServer()
+        server.profiler.profile_dir = Path(tmp)
+
+        def call(request_id, name, arguments):
+            return server.process_request({
+                "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                "params": {"name": name, "arguments": arguments},
+            })["result"]
+
+        assert not call(1, "ext_get_context", {"_profile": "cpu"}).get("isError")
+        listing = call(2, "get_profile", {})
+        assert "ext_get_context" in listing["content"][0]["text"], listing
+
+        profile_id = server.profiler.list_profiles()[0]["profile_id"]
+        detail = call(3, "get_profile", {"profile_id": profile_id, "limit": 3})
+        assert "top_functions" in detail["content"][0]["text"]
+
+        for bad_id in ("../../etc/passwd", "missing"):
+            result = call(4, "get_profile", {"profile_id": bad_id})
+            assert result.get("isError"), f"{bad_id} should be rejected"
+    print("✓ get_profile lists and fetches captures")
+
+
+if __name__ == "__main__":
+    try:
+        test_profile_argument()
+        test_sampling_and_retention()
+        test_get_profile_tool()
+        print("\n" + "=" * 50)
+        print("ALL PROFILING TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Streaming Search Self-Test
+
+Tests:
+a) rg --json events become structured records with context, character
+   submatch offsets and base64-encoded lines decoded
+b) max_results/max_bytes stop the search and report a stop_reason;
+   long lines are clipped around the match
+c) the Python fallback stops early and streams partial results through
+   progress notifications (partialResults)
+d) with rg installed, a broad query stops rg early
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.engineer_tools import MAX_LINE_CHARS, SearchCollector, ripgrep_search
+
+# Recorded from `rg needle -C1 --json` over a.txt and a non-UTF-8 b.txt
+RG_EVENTS = [
+    b'{"type":"begin","data":{"path":{"text":"b.txt"}}}',
+    b'{"type":"match","data":{"path":{"text":"b.txt"},"lines":{"bytes":"eP9uZWVkbGUK"},"line_number":1,'
+    b'"absolute_offset":0,"submatches":[{"match":{"text":"needle"},"start":2,"end":8}]}}',
+    b'{"type":"end","data":{"path":{"text":"b.txt"},"binary_offset":null,"stats":{}}}',
+    b'{"type":"begin","data":{"path":{"text":"a.txt"}}}',
+    b'{"type":"context","data":{"path":{"text":"a.txt"},"lines":{"text":"one\\n"},"line_number":1,'
+    b'"absolute_offset":0,"submatches":[]}}',
+    b'{"type":"match","data":{"path":{"text":"a.txt"},"lines":{"text":"two needle\\n"},"line_number":2,'
+    b'"absolute_offset":4,"submatches":[{"match":{"text":"needle"},"start":4,"end":10}]}}',
+    b'{"type":"context","data":{"path":{"text":"a.txt"},"lines":{"text":"three\\n"},"line_number":3,'
+    b'"absolute_offset":15,"submatches":[]}}',
+    b'{"type":"context","data":{"path":{"text":"a.txt"},"lines":{"text":"five\\n"},"line_number":5,'
+    b'"absolute_offset":26,"submatches":[]}}',
+    b'{"type":"match","data":{"path":{"text":"a.txt"},"lines":{"text":"six \xc3\xb1eedle needle\\n"},'
+    b'"line_number":6,"absolute_offset":31,"submatches":[{"match":{"text":"needle"},"start":12,"end":18}]}}',
+    b'{"type":"context","data":{"path":{"text":"a.txt"},"lines":{"text":"seven\\n"},"line_number":7,'
+    b'"absolute_offset":50,"submatches":[]}}',
+    b'{"type":"end","data":{"path":{"text":"a.txt"},"binary_offset":null,"stats":{}}}',
+    b'{"type":"summary","data":{"stats":{"matches":3}}}',
+]
+
+
+def _write_tree(root: Path, files: int, lines: int) -> None:
+    for i in range(files):
+        body = "".join(f"line {j} {'needle' if j % 10 == 0 else 'hay'}\n" for j in range(lines))
+        (root / f"f{i:03d}.txt").write_text(body)
+
+
+def test_json_events():
+    """Test rg --json events are parsed into structured records"""
+    print("\n=== Testing rg --json Parsing ===")
+
+    collector = SearchCollector(context_lines=1, max_results=10, max_bytes=10_000)
+    for raw in RG_EVENTS:
+        collector.feed_json(raw)
+    summary = collector.summary()
+    assert summary["match_count"] == 3 and summary["file_count"] == 2 and not summary["truncated"]
+
+    binary, first, second = summary["results"]
+    assert binary["text"] == "x�needle" and binary["submatches"] == [[2, 8]], binary
+    assert first == {
+        "file": "a.txt", "line": 2, "text": "two needle", "submatches": [[4, 10]],
+        "before": [{"line": 1, "text": "one"}], "after": [{"line": 3, "text": "three"}],
+    }, first
+    assert second["submatches"] == [[11, 17]], "Byte offsets should become character offsets"
+    assert second["text"][11:17] == "needle"
+    assert second["before"] == [{"line": 5, "text": "five"}] and second["after"] == [{"line": 7, "text": "seven"}]
+    print("✓ Matches, context and offsets parsed")
+
+
+def test_limits():
+    """Test max_results, max_bytes and long-line clipping"""
+    print("\n=== Testing Limits ===")
+
+    collector = SearchCollector(context_lines=1, max_results=2, max_bytes=10_000)
+    for raw in RG_EVENTS:
+        collector.feed_json(raw)
+        if collector.full:
+            break
+    summary = collector.summary()
+    assert summary["match_count"] == 2 and summary["truncated"] and summary["stop_reason"] == "max_results"
+
+    collector = SearchCollector(context_lines=0, max_results=100, max_bytes=50)
+    while not collector.full:
+        collector.add_match("big.txt", len(collector.results) + 1, "needle " * 4, [[0, 6]])
+    assert collector.summary()["stop_reason"] == "max_bytes" and collector.bytes <= 50 + 28
+
+    line = "x" * 5000 + "needle" + "y" * 5000
+    collector = SearchCollector(context_lines=0, max_results=10, max_bytes=100_000)
+    collector.add_match("min.js", 1, line, [[5000, 5006]])
+    record = collector.results[0]
+    start, end = record["submatches"][0]
+    assert len(record["text"]) <= MAX_LINE_CHARS + 2, "Long lines should be clipped"
+    assert record["text"][start:end] == "needle", "Clipped submatch should still point at the match"
+    print("✓ Limits stop the search; long lines clipped around the match")
+
+
+def test_fallback_partial_results():
+    """Test the Python fallback stops early and streams partial results"""
+    print("\n=== Testing Fallback Partial Results ===")
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch("mcp.engineer_tools.shutil.which", return_value=None):
+        _write_tree(Path(tmp), files=20, lines=200)
+        updates = []
+
+        def progress(done, total=None, message=None, partial=None):
+            if partial:
+                updates.append(partial)
+
+        result = ripgrep_search("needle", tmp, "*.txt", 1, progress=progress,
+                                max_results=50, partial_results=True)
+        assert result["fallback"] == "python" and result["returncode"] == 0
+        assert result["match_count"] == 50 and result["stop_reason"] == "max_results"
+        assert not Path(result["results"][0]["file"]).is_absolute(), "Paths should be relative like rg's"
+        streamed = [r for batch in updates for r in batch]
+        assert streamed and streamed == result["results"][:len(streamed)], "Partials should be a prefix of the result"
+
+        sent = len(updates)
+        quiet = ripgrep_search("needle", tmp, "*.txt", 1, progress=progress, max_results=5)
+        assert quiet["match_count"] == 5 and len(updates) == sent, "No partials unless asked"
+    print(f"✓ Stopped at 50 matches; {len(streamed)} streamed in {len(updates)} notifications")
+
+
+def test_partial_results_notification():
+    """Test partialResults in progress notifications from the server"""
+    print("\n=== Testing partialResults Notifications ===")
+    from mcp.server import MCPServer
+    from mcp.transport import RequestContext
+
+    server = MCPServer()
+    notes = []
+    context = RequestContext(1, "tok", notes.append)
+    response = server.process_request({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "ripgrep_search", "arguments": {
+            "query": "def ", "glob": "*.py", "max_results": 20, "partial_results": True,
+        }},
+    }, context)
+    assert not response["result"].get("isError"), response
+    partial = [n for n in notes if "partialResults" in n["params"]]
+    assert partial, f"Expected partialResults notifications, got {notes}"
+    assert partial[0]["params"]["progressToken"] == "tok"
+    assert "def " in partial[0]["params"]["partialResults"][0]["text"]
+    print(f"✓ {len(partial)} notifications carried partial results")
+
+
+def test_rg_stops_early():
+    """Test a broad query over a large tree stops rg early (needs rg)"""
+    print("\n=== Testing rg Early Stop ===")
+    if shutil.which("rg") is None:
+        print("  rg not installed; skipped")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_tree(Path(tmp), files=200, lines=2000)
+        start = time.monotonic()
+        full = ripgrep_search("needle", tmp, "*.txt", 0, max_results=10**9, max_bytes=10**9)
+        full_ms = (time.monotonic() - start) * 1000
+        start = time.monotonic()
+        capped = ripgrep_search("needle", tmp, "*.txt", 0, max_results=10)
+        capped_ms = (time.monotonic() - start) * 1000
+        assert "fallback" not in capped and capped["returncode"] == 0, capped
+        assert capped["match_count"] == 10 and capped["stop_reason"] == "max_results"
+        assert full["match_count"] == 200 * 200 and not full["truncated"]
+        print(f"✓ 10 matches in {capped_ms:.0f} ms vs all {full['match_count']} in {full_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    try:
+        test_json_events()
+        test_limits()
+        test_fallback_partial_results()
+        test_partial_results_notification()
+        test_rg_stops_early()
+        print("\n" + "=" * 50)
+        print("ALL STREAMING SEARCH TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Serialization Self-Test
+
+Tests:
+a) stdlib and orjson backends round-trip the same payloads
+b) orjson falls back to stdlib for values it cannot encode
+c) tool_result honours compact, pretty and structured modes
+d) the server emits structuredContent when MCP_RESPONSE_MODE=structured
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.serialization import (
+    JSONSerializer,
+    get_response_mode,
+    get_serializer,
+    orjson,
+    tool_result,
+)
+
+REPO_ROOT = Path(__file__).parent.parent.resolve()
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+
+PAYLOAD = {"diff": "--- a\n+++ b\n+\"quoted\" ünïcode", "count": 3, "items": [1, 2.5, None, True]}
+
+
+def test_backends_round_trip():
+    """Test each backend produces compact JSON that decodes to the input"""
+    print("\n=== Testing Serializer Backends ===")
+
+    backends = [get_serializer("stdlib")]
+    if orjson is not None:
+        backends.append(get_serializer("orjson"))
+    for serializer in backends:
+        text = serializer.dumps(PAYLOAD)
+        assert "\n" not in text and ": " not in text, f"{serializer.name} output not compact: {text}"
+        assert json.loads(text) == PAYLOAD, f"{serializer.name} round trip failed"
+        assert json.loads(serializer.dumps_bytes(PAYLOAD)) == PAYLOAD
+        assert serializer.loads(text) == PAYLOAD
+        assert "\n  " in serializer.pretty(PAYLOAD), f"{serializer.name} pretty output not indented"
+
+    assert isinstance(get_serializer("stdlib"), JSONSerializer)
+    if orjson is not None:
+        # 2**70 does not fit orjson's 64-bit integers
+        assert json.loads(get_serializer("orjson").dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    print(f"✓ Backends round-trip: {', '.join(s.name for s in backends)}")
+
+
+def test_tool_result_modes():
+    """Test the three response modes"""
+    print("\n=== Testing Response Modes ===")
+
+    serializer = get_serializer("stdlib")
+    compact = tool_result("Git diff", PAYLOAD, "compact", serializer)
+    pretty = tool_result("Git diff", PAYLOAD, "pretty", serializer)
+    structured = tool_result("Git diff", PAYLOAD, "structured", serializer, is_error=False)
+
+    assert compact["content"][0]["text"].startswith("Git diff:\n{")
+    assert len(compact["content"][0]["text"]) < len(pretty["content"][0]["text"])
+    assert "isError" not in compact
+    assert structured["structuredContent"] == PAYLOAD
+    assert structured["content"] == compact["content"], "Clients without structuredContent still get the data"
+    assert structured["isError"] is False
+    assert tool_result("Results", [1, 2], "structured", serializer)["structuredContent"] == {"items": [1, 2]}
+    assert get_response_mode("PRETTY") == "pretty"
+    assert get_response_mode("bogus") == "compact"
+    print("✓ compact, pretty and structured modes")
+
+
+def test_server_structured_mode():
+    """Test tools/call returns structuredContent in structured mode"""
+    print("\n=== Testing Server Structured Mode ===")
+
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": "get_stats", "arguments": {}}
+    }
+    env = dict(os.environ)
+    env["MCP_RESPONSE_MODE"] = "structured"
+    result = subprocess.run(
+        ["python3", str(SERVER_PATH)],
+        input=json.dumps(request),
+        capture_output=True,
+        text=True,
+        cwd=str(REPO_ROOT),
+        env=env,
+    )
+    response = json.loads(result.stdout)
+    stats = response["result"]["structuredContent"]
+    assert "total" in stats and "by_domain" in stats, f"Expected stats object: {stats}"
+    text = response["result"]["content"][0]["text"]
+    assert json.loads(text[text.index("{"):]) == stats, "The text block carries the same JSON"
+    print("✓ Server emits structuredContent")
+
+
+if __name__ == "__main__":
+    try:
+        test_backends_round_trip()
+        test_tool_result_modes()
+        test_server_structured_mode()
+        print("\n" + "=" * 50)
+        print("ALL SERIALIZATION TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
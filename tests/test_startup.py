@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Test
+
+Every IDE window spawns its own server, so start-up is on the user's
+critical path. Tests:
+a) importing mcp.server and answering initialize/tools/list loads no
+   SQLite, engineer tools, API clients or asyncio, and touches no files
+b) import time of the mcp package (python -X importtime) stays in budget
+c) time to the first response stays within budget of a bare interpreter,
+   and requests pipelined behind the handshake are still answered
+
+Budgets can be overridden with MCP_IMPORT_BUDGET_MS and MCP_STARTUP_BUDGET_MS.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+REPO_ROOT = Path(__file__).parent.parent.resolve()
+SERVER_PATH = REPO_ROOT / "mcp" / "server.py"
+
+# Milliseconds on top of a bare `python -c pass`
+IMPORT_BUDGET_MS = float(os.environ.get("MCP_IMPORT_BUDGET_MS", 100))
+STARTUP_BUDGET_MS = float(os.environ.get("MCP_STARTUP_BUDGET_MS", 200))
+
+DEFERRED_MODULES = [
+    "asyncio",
+    "sqlite3",
+    "mcp.agent_integration",
+    "mcp.memory_store",
+    "mcp.repo_memory",
+    "mcp.codex_client",
+    "mcp.verdent_client",
+    "mcp.engineer_tools",
+    "mcp.transport",
+]
+
+HANDSHAKE_SCRIPT = f"""
+import json, sys
+from mcp.server import MCPServer
+server = MCPServer()
+server.process_request({{"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {{}}}})
+tools = server.process_request({{"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {{}}}})
+print(json.dumps({{
+    "tools": len(tools["result"]["tools"]),
+    "loaded": [m for m in {DEFERRED_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def _env(home: str) -> dict:
+    env = dict(os.environ)
+    env["MCP_HOME"] = home
+    env["PYTHONPATH"] = str(REPO_ROOT)
+    return env
+
+
+def _median_ms(samples: list) -> float:
+    return statistics.median(samples) * 1000
+
+
+def _bare_start(runs: int = 5) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        samples.append(time.perf_counter() - start)
+    return _median_ms(samples)
+
+
+def test_handshake_defers_heavy_imports():
+    """Test initialize and tools/list need no DB, repo files or async stack"""
+    print("\n=== Testing Deferred Start-up ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, "-c", HANDSHAKE_SCRIPT],
+            capture_output=True, text=True, env=_env(tmp), cwd=str(REPO_ROOT),
+        )
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout)
+        assert report["tools"] > 0, "tools/list should be answered"
+        assert report["loaded"] == [], f"Loaded before first use: {report['loaded']}"
+        assert not (Path(tmp) / "data" / "mcp" / "memories.db").exists(), "DB opened before first use"
+        assert not (Path(tmp) / "context").exists(), "Repo memory files written before first use"
+    print(f"✓ Handshake answered without {len(DEFERRED_MODULES)} deferred modules")
+
+
+def test_import_time_budget():
+    """Test python -X importtime for mcp.server stays in budget"""
+    print("\n=== Testing Import Time ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import mcp.server"],
+            capture_output=True, text=True, env=_env(tmp), cwd=str(REPO_ROOT),
+        )
+    assert result.returncode == 0, result.stderr
+
+    # Top-level entries; their cumulative time includes everything they pulled in
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            module = name.strip()
+            if module == "mcp" or module.startswith("mcp."):
+                total_us += int(cumulative)
+    total_ms = total_us / 1000
+    assert total_ms < IMPORT_BUDGET_MS, f"mcp imports took {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:g} ms)"
+    print(f"✓ mcp.server imports in {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:g} ms)")
+
+
+def test_time_to_first_response():
+    """Test the handshake is answered quickly and pipelined calls still work"""
+    print("\n=== Testing Time to First Response ===")
+
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}},
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+         "params": {"name": "get_stats", "arguments": {}}},
+    ]
+    handshake = (json.dumps(requests[0]) + "\n").encode()
+    rest = "".join(json.dumps(r) + "\n" for r in requests[1:]).encode()
+
+    bare_ms = _bare_start()
+    samples = []
+    for _ in range(5):
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, str(SERVER_PATH)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                env=_env(tmp), cwd=str(REPO_ROOT),
+            )
+            proc.stdin.write(handshake)
+            proc.stdin.flush()
+            first = json.loads(proc.stdout.readline())
+            samples.append(time.perf_counter() - start)
+
+            proc.stdin.write(rest)
+            proc.stdin.close()
+            later = [json.loads(line) for line in proc.stdout.read().splitlines() if line.strip()]
+            proc.wait(timeout=30)
+
+        assert first["id"] == 1 and "result" in first, f"Bad initialize reply: {first}"
+        assert sorted(r["id"] for r in later) == [2, 3], f"Pipelined requests lost: {later}"
+
+    startup_ms = _median_ms(samples)
+    overhead_ms = startup_ms - bare_ms
+    assert overhead_ms < STARTUP_BUDGET_MS, (
+        f"initialize answered after {startup_ms:.0f} ms, {overhead_ms:.0f} ms over a bare "
+        f"interpreter (budget {STARTUP_BUDGET_MS:g} ms)"
+    )
+    print(f"✓ initialize in {startup_ms:.0f} ms ({overhead_ms:.0f} ms over bare python, budget {STARTUP_BUDGET_MS:g} ms)")
+
+
+if __name__ == "__main__":
+    try:
+        test_handshake_defers_heavy_imports()
+        test_import_time_budget()
+        test_time_to_first_response()
+        print("\n✅ All startup tests passed!")
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tool Registry Self-Test
+
+Tests:
+a) specs are listed in registration order and duplicates are rejected
+b) write flags and concurrency classes are derived from the specs
+c) middleware wraps handlers in registration order
+d) the transport applies concurrency-class limits from the registry
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.tool_registry import ToolCall, ToolRegistry, ToolSpec
+from mcp.transport import RequestDispatcher
+
+
+def _echo(call: ToolCall) -> dict:
+    return {"content": [{"type": "text", "text": f"{call.name}:{call.arguments.get('value')}"}]}
+
+
+def _make_registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    registry.register(ToolSpec("read_tool", "Read", {"type": "object", "properties": {}}, _echo))
+    registry.register(ToolSpec("write_tool", "Write", {"type": "object", "properties": {}}, _echo, write=True))
+    registry.register(ToolSpec(
+        "shell_tool", "Shell", {"type": "object", "properties": {}}, _echo,
+        sandbox="cwd", concurrency="process"
+    ))
+    return registry
+
+
+def test_registry_listing():
+    """Test tools/list payload and duplicate registration"""
+    print("\n=== Testing Registry Listing ===")
+
+    registry = _make_registry()
+    listed = registry.list_tools()
+    assert [t["name"] for t in listed] == ["read_tool", "write_tool", "shell_tool"]
+    assert set(listed[0]) == {"name", "description", "inputSchema"}, f"Unexpected keys: {listed[0]}"
+    assert registry.list_tools() is listed, "tools/list payload should be cached"
+    assert "shell_tool" in registry and registry.get("missing") is None
+
+    try:
+        registry.register(ToolSpec("read_tool", "Again", {}, _echo))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Duplicate tool names should be rejected")
+    print("✓ Registry lists tools in order and rejects duplicates")
+
+
+def test_registry_metadata():
+    """Test write flags and concurrency classes"""
+    print("\n=== Testing Registry Metadata ===")
+
+    registry = _make_registry()
+    assert registry.write_tools == frozenset({"write_tool"})
+    assert registry.concurrency_class("shell_tool") == "process"
+    assert registry.concurrency_class("read_tool") is None
+    assert registry.concurrency_class("missing") is None
+    print("✓ Write flags and concurrency classes derived from specs")
+
+
+def test_middleware_order():
+    """Test middleware wraps handlers outermost-first"""
+    print("\n=== Testing Middleware ===")
+
+    registry = _make_registry()
+    seen = []
+
+    def outer(spec, call, call_next):
+        seen.append(f"outer:{spec.name}")
+        result = call_next()
+        seen.append("outer:done")
+        return result
+
+    def inner(spec, call, call_next):
+        seen.append("inner")
+        return call_next()
+
+    registry.add_middleware(outer)
+    registry.add_middleware(inner)
+    result = registry.invoke(registry.get("read_tool"), ToolCall("read_tool", {"value": 7}))
+    assert result["content"][0]["text"] == "read_tool:7", f"Handler result lost: {result}"
+    assert seen == ["outer:read_tool", "inner", "outer:done"], f"Unexpected order: {seen}"
+    print("✓ Middleware runs in order around the handler")
+
+
+def test_dispatcher_uses_registry():
+    """Test the transport reads write flags and class limits from the registry"""
+    print("\n=== Testing Dispatcher Registry Integration ===")
+
+    class FakeServer:
+        tool_registry = _make_registry()
+
+    dispatcher = RequestDispatcher(FakeServer(), max_workers=1, tool_limits={"process": 3})
+    try:
+        assert dispatcher.write_tools == {"write_tool"}
+        semaphore = dispatcher._semaphore_for("shell_tool")
+        assert semaphore is not None and semaphore._value == 3, "Class limit should apply"
+        assert dispatcher._semaphore_for("read_tool") is None, "Unlimited tools get no semaphore"
+    finally:
+        dispatcher.shutdown()
+    print("✓ Dispatcher applies registry metadata")
+
+
+if __name__ == "__main__":
+    try:
+        test_registry_listing()
+        test_registry_metadata()
+        test_middleware_order()
+        test_dispatcher_uses_registry()
+        print("\n" + "=" * 50)
+        print("ALL TOOL REGISTRY TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Transport Self-Test
+
+Tests:
+a) StdoutWriter coalesces messages from one loop tick into one write
+b) write_all completes partial writes on a non-blocking pipe
+c) drain() blocks while the client is not reading
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp.transport import StdoutWriter, write_all
+
+
+def _read_all(fd: int, chunks: list) -> None:
+    while True:
+        data = os.read(fd, 65536)
+        if not data:
+            return
+        chunks.append(data)
+
+
+def test_writer_coalesces_per_tick():
+    """Test a burst of messages is flushed with a single write"""
+    print("\n=== Testing Writer Coalescing ===")
+
+    read_fd, write_fd = os.pipe()
+    chunks = []
+    reader = threading.Thread(target=_read_all, args=(read_fd, chunks))
+    reader.start()
+
+    async def burst():
+        writer = StdoutWriter(fd=write_fd)
+        for i in range(100):
+            writer.write({"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": i}})
+        await asyncio.sleep(0)
+        writer.write({"jsonrpc": "2.0", "id": 1, "result": {}})
+        await writer.aclose()
+        return writer.flushes
+
+    try:
+        flushes = asyncio.run(burst())
+    finally:
+        os.close(write_fd)
+        reader.join(timeout=5)
+        os.close(read_fd)
+
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    messages = [json.loads(line) for line in lines]
+    assert len(messages) == 101, f"Expected 101 messages, got {len(messages)}"
+    assert [m["params"]["progress"] for m in messages[:100]] == list(range(100)), "Order not preserved"
+    assert flushes == 2, f"Expected one flush per tick, got {flushes}"
+    print(f"✓ 101 messages written in {flushes} flushes")
+
+
+def test_write_all_partial_writes():
+    """Test large payloads survive a full non-blocking pipe"""
+    print("\n=== Testing Partial Writes ===")
+
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(write_fd, False)
+    payload = os.urandom(1024 * 1024)
+    chunks = []
+
+    def slow_reader():
+        time.sleep(0.2)
+        _read_all(read_fd, chunks)
+
+    reader = threading.Thread(target=slow_reader)
+    reader.start()
+    try:
+        write_all(write_fd, payload)
+    finally:
+        os.close(write_fd)
+        reader.join(timeout=10)
+        os.close(read_fd)
+
+    assert b"".join(chunks) == payload, "Payload corrupted or truncated"
+    print("✓ 1 MiB written through a non-blocking pipe")
+
+
+def test_writer_backpressure():
+    """Test drain() waits until the client reads"""
+    print("\n=== Testing Writer Backpressure ===")
+
+    read_fd, write_fd = os.pipe()
+    chunks = []
+
+    async def scenario():
+        writer = StdoutWriter(fd=write_fd, high_water=1024)
+        # Larger than both the high-water mark and the pipe buffer
+        writer.write({"data": "x" * (256 * 1024)})
+        await asyncio.sleep(0.05)
+        blocked = writer.unwritten_bytes > writer.high_water
+
+        started = time.monotonic()
+        reader = threading.Thread(target=lambda: (time.sleep(0.2), _read_all(read_fd, chunks)))
+        reader.start()
+        await asyncio.wait_for(writer.drain(), timeout=10)
+        waited = time.monotonic() - started
+        await writer.aclose()
+        return blocked, waited, reader
+
+    try:
+        blocked, waited, reader = asyncio.run(scenario())
+    finally:
+        os.close(write_fd)
+    reader.join(timeout=5)
+    os.close(read_fd)
+
+    assert blocked, "Writer should report unwritten bytes while the pipe is full"
+    assert waited >= 0.15, f"drain() returned before the client read ({waited:.2f}s)"
+    assert len(b"".join(chunks)) > 256 * 1024
+    print(f"✓ drain() waited {waited:.2f}s for the client")
+
+
+if __name__ == "__main__":
+    try:
+        test_writer_coalesces_per_tick()
+        test_write_all_partial_writes()
+        test_writer_backpressure()
+        print("\n" + "=" * 50)
+        print("ALL TRANSPORT TESTS PASSED ✓")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)